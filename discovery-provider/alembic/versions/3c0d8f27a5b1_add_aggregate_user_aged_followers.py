@@ -0,0 +1,33 @@
+"""add aggregate_user_aged_followers
+
+Revision ID: 3c0d8f27a5b1
+Revises: cdf1f6197fc6
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c0d8f27a5b1"
+down_revision = "cdf1f6197fc6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "aggregate_user_aged_followers",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("follower_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # Lets the aggregate find follows that aged past the cutoff since the last run
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS follows_created_at_idx ON follows (created_at) WHERE is_current IS TRUE AND is_delete IS FALSE;"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS follows_created_at_idx;")
+    op.drop_table("aggregate_user_aged_followers")
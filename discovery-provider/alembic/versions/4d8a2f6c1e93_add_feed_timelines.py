@@ -0,0 +1,49 @@
+"""add feed_timelines
+
+Revision ID: 4d8a2f6c1e93
+Revises: 9b4e1f7a3c25
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4d8a2f6c1e93"
+down_revision = "9b4e1f7a3c25"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The timelines are backfilled by the index_feed_timelines task
+    op.create_table(
+        "feed_timelines",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("item_type", sa.String(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("actor_user_id", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "user_id", "item_type", "item_id", "actor_user_id", "reason"
+        ),
+    )
+    op.create_index(
+        "feed_timelines_user_id_created_at_idx",
+        "feed_timelines",
+        ["user_id", "created_at"],
+    )
+    op.create_index(
+        "feed_timelines_item_idx", "feed_timelines", ["item_type", "item_id"]
+    )
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(
+        "DELETE FROM indexing_checkpoints WHERE tablename IN ('feed_timelines', 'feed_timelines_backfill');"
+    )
+    op.drop_index("feed_timelines_item_idx", table_name="feed_timelines")
+    op.drop_index("feed_timelines_user_id_created_at_idx", table_name="feed_timelines")
+    op.drop_table("feed_timelines")
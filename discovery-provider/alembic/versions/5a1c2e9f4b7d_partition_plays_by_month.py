@@ -0,0 +1,198 @@
+"""partition plays by month
+
+Revision ID: 5a1c2e9f4b7d
+Revises: 3c0d8f27a5b1
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5a1c2e9f4b7d"
+down_revision = "3c0d8f27a5b1"
+branch_labels = None
+depends_on = None
+
+# same query as 98e2a0a25ada
+# the mat view depends on the plays table so it is recreated along with it
+AGGREGATE_INTERVAL_PLAYS_QUERY = """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS aggregate_interval_plays as
+    SELECT
+        tracks.track_id as track_id,
+        tracks.genre as genre,
+        tracks.created_at as created_at,
+        COALESCE (week_listen_counts.count, 0) as week_listen_counts,
+        COALESCE (month_listen_counts.count, 0) as month_listen_counts
+    FROM
+        tracks
+    LEFT OUTER JOIN (
+        SELECT
+            plays.play_item_id as play_item_id,
+            count(plays.id) as count
+        FROM
+            plays
+        WHERE
+            plays.created_at > (now() - interval '1 week')
+        GROUP BY plays.play_item_id
+    ) as week_listen_counts ON week_listen_counts.play_item_id = tracks.track_id
+    LEFT OUTER JOIN (
+        SELECT
+            plays.play_item_id as play_item_id,
+            count(plays.id) as count
+        FROM
+            plays
+        WHERE
+            plays.created_at > (now() - interval '1 month')
+        GROUP BY plays.play_item_id
+    ) as month_listen_counts ON month_listen_counts.play_item_id = tracks.track_id
+    WHERE
+        tracks.is_current is True AND
+        tracks.is_delete is False AND
+        tracks.is_unlisted is False AND
+        tracks.stem_of is Null;
+
+    CREATE INDEX IF NOT EXISTS interval_play_track_id_idx ON aggregate_interval_plays (track_id);
+    CREATE INDEX IF NOT EXISTS interval_play_week_count_idx ON aggregate_interval_plays (week_listen_counts);
+    CREATE INDEX IF NOT EXISTS interval_play_month_count_idx ON aggregate_interval_plays (month_listen_counts);
+"""
+
+PLAYS_INDEXES_QUERY = """
+    CREATE INDEX IF NOT EXISTS ix_plays_user_play_item ON plays (play_item_id, user_id);
+    CREATE INDEX IF NOT EXISTS ix_plays_user_play_item_date ON plays (play_item_id, user_id, created_at);
+    CREATE INDEX IF NOT EXISTS ix_plays_sol_signature ON plays (signature);
+    CREATE INDEX IF NOT EXISTS ix_plays_slot ON plays (slot);
+    CREATE INDEX IF NOT EXISTS ix_plays_created_at ON plays (created_at);
+    CREATE INDEX IF NOT EXISTS play_updated_at_idx ON plays (updated_at);
+    CREATE INDEX IF NOT EXISTS play_item_idx ON plays (play_item_id);
+"""
+
+
+def upgrade():
+    conn = op.get_bind()
+    query = """
+        DO
+        $do$
+        DECLARE
+            archive_end timestamp;
+            first_month timestamp;
+            last_month timestamp := date_trunc('month', localtimestamp) + interval '3 months';
+            partition_month timestamp;
+        BEGIN
+            ALTER TABLE plays_archive ADD COLUMN IF NOT EXISTS city varchar;
+            ALTER TABLE plays_archive ADD COLUMN IF NOT EXISTS region varchar;
+            ALTER TABLE plays_archive ADD COLUMN IF NOT EXISTS country varchar;
+
+            -- finish archiving the month of the last archived play
+            -- so the archived and current plays cover separate months
+            SELECT
+                date_trunc('month', max(created_at)) + interval '1 month' INTO archive_end
+            FROM
+                plays_archive;
+
+            IF archive_end IS NOT NULL THEN
+                INSERT INTO
+                    plays_archive (
+                        id,
+                        user_id,
+                        source,
+                        city,
+                        region,
+                        country,
+                        play_item_id,
+                        created_at,
+                        updated_at,
+                        slot,
+                        signature,
+                        archived_at
+                    )
+                SELECT
+                    id,
+                    user_id,
+                    source,
+                    city,
+                    region,
+                    country,
+                    play_item_id,
+                    created_at,
+                    updated_at,
+                    slot,
+                    signature,
+                    localtimestamp
+                FROM
+                    plays
+                WHERE
+                    created_at < archive_end;
+
+                DELETE FROM plays WHERE created_at < archive_end;
+            END IF;
+
+            SELECT date_trunc('month', min(created_at)) INTO first_month FROM plays;
+            first_month := GREATEST(
+                COALESCE(first_month, date_trunc('month', localtimestamp)),
+                archive_end
+            );
+
+            -- plays is partitioned by created_at month
+            -- the partition key must be part of the primary key
+            ALTER TABLE plays RENAME TO plays_unpartitioned;
+            ALTER INDEX plays_pkey RENAME TO plays_unpartitioned_pkey;
+            CREATE TABLE plays (LIKE plays_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at);
+            ALTER TABLE plays ADD PRIMARY KEY (id, created_at);
+
+            partition_month := first_month;
+            WHILE partition_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF plays FOR VALUES FROM (%L) TO (%L)',
+                    'plays_' || to_char(partition_month, 'YYYY_MM'),
+                    partition_month,
+                    partition_month + interval '1 month'
+                );
+                partition_month := partition_month + interval '1 month';
+            END LOOP;
+
+            -- catches plays outside of the monthly partitions, see prune_plays
+            CREATE TABLE plays_default PARTITION OF plays DEFAULT;
+
+            INSERT INTO plays SELECT * FROM plays_unpartitioned;
+
+            ALTER SEQUENCE plays_id_seq OWNED BY plays.id;
+            DROP MATERIALIZED VIEW IF EXISTS aggregate_interval_plays;
+            DROP TABLE plays_unpartitioned;
+
+            -- plays_archive is partitioned the same way so monthly partitions of plays
+            -- can be moved to it, the existing archive becomes its oldest partition
+            ALTER TABLE plays_archive RENAME TO plays_archive_legacy;
+            CREATE TABLE plays_archive (LIKE plays_archive_legacy) PARTITION BY RANGE (created_at);
+            EXECUTE format(
+                'ALTER TABLE plays_archive ATTACH PARTITION plays_archive_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+                first_month
+            );
+            CREATE TABLE plays_archive_default PARTITION OF plays_archive DEFAULT;
+        END
+        $do$
+    """
+    conn.execute(query)
+    conn.execute(PLAYS_INDEXES_QUERY)
+    conn.execute(AGGREGATE_INTERVAL_PLAYS_QUERY)
+
+
+def downgrade():
+    conn = op.get_bind()
+    query = """
+        ALTER TABLE plays RENAME TO plays_partitioned;
+        ALTER INDEX plays_pkey RENAME TO plays_partitioned_pkey;
+        CREATE TABLE plays (LIKE plays_partitioned INCLUDING DEFAULTS);
+        INSERT INTO plays SELECT * FROM plays_partitioned;
+        ALTER TABLE plays ADD PRIMARY KEY (id);
+        ALTER SEQUENCE plays_id_seq OWNED BY plays.id;
+        DROP MATERIALIZED VIEW IF EXISTS aggregate_interval_plays;
+        DROP TABLE plays_partitioned;
+
+        ALTER TABLE plays_archive RENAME TO plays_archive_partitioned;
+        CREATE TABLE plays_archive (LIKE plays_archive_partitioned);
+        INSERT INTO plays_archive SELECT * FROM plays_archive_partitioned;
+        DROP TABLE plays_archive_partitioned;
+    """
+    conn.execute(query)
+    conn.execute(PLAYS_INDEXES_QUERY)
+    conn.execute(AGGREGATE_INTERVAL_PLAYS_QUERY)
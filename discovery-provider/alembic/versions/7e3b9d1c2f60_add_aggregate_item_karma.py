@@ -0,0 +1,322 @@
+"""add aggregate_item_karma
+
+Revision ID: 7e3b9d1c2f60
+Revises: 5a1c2e9f4b7d
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7e3b9d1c2f60"
+down_revision = "5a1c2e9f4b7d"
+branch_labels = None
+depends_on = None
+
+# same query as dc7f691adc79 with the karma join replaced
+TRENDING_PARAMS_QUERY = """
+    DROP MATERIALIZED VIEW IF EXISTS trending_params;
+    CREATE MATERIALIZED VIEW trending_params as
+      SELECT
+          t.track_id as track_id,
+          t.genre as genre,
+          t.owner_id as owner_id,
+          ap.play_count as play_count,
+          au.follower_count as owner_follower_count,
+          COALESCE (aggregate_track.repost_count, 0) as repost_count,
+          COALESCE (aggregate_track.save_count, 0) as save_count,
+          COALESCE (repost_week.repost_count, 0) as repost_week_count,
+          COALESCE (repost_month.repost_count, 0) as repost_month_count,
+          COALESCE (repost_year.repost_count, 0) as repost_year_count,
+          COALESCE (save_week.repost_count, 0) as save_week_count,
+          COALESCE (save_month.repost_count, 0) as save_month_count,
+          COALESCE (save_year.repost_count, 0) as save_year_count,
+          COALESCE (karma.karma, 0) as karma
+      FROM
+          tracks t
+      -- join on subquery for aggregate play count
+      LEFT OUTER JOIN (
+          SELECT
+              ap.count as play_count,
+              ap.play_item_id as play_item_id
+          FROM
+              aggregate_plays ap
+      ) as ap ON ap.play_item_id = t.track_id
+      -- join on subquery for aggregate user
+      LEFT OUTER JOIN (
+          SELECT
+              au.user_id as user_id,
+              au.follower_count as follower_count
+          FROM
+              aggregate_user au
+      ) as au ON au.user_id = t.owner_id
+      -- join on subquery for aggregate track
+      LEFT OUTER JOIN (
+          SELECT
+              aggregate_track.track_id as track_id,
+              aggregate_track.repost_count as repost_count,
+              aggregate_track.save_count as save_count
+          FROM
+              aggregate_track
+      ) as aggregate_track ON aggregate_track.track_id = t.track_id
+      -- -- join on subquery for reposts by year
+      LEFT OUTER JOIN (
+          SELECT
+              r.repost_item_id as track_id,
+              count(r.repost_item_id) as repost_count
+          FROM
+              reposts r
+          WHERE
+              r.is_current is True AND
+              r.repost_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 year')
+          GROUP BY r.repost_item_id
+      ) repost_year ON repost_year.track_id = t.track_id
+      -- -- join on subquery for reposts by month
+      LEFT OUTER JOIN (
+          SELECT
+              r.repost_item_id as track_id,
+              count(r.repost_item_id) as repost_count
+          FROM
+              reposts r
+          WHERE
+              r.is_current is True AND
+              r.repost_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 month')
+          GROUP BY r.repost_item_id
+      ) repost_month ON repost_month.track_id = t.track_id
+      -- -- join on subquery for reposts by week
+      LEFT OUTER JOIN (
+          SELECT
+              r.repost_item_id as track_id,
+              count(r.repost_item_id) as repost_count
+          FROM
+              reposts r
+          WHERE
+              r.is_current is True AND
+              r.repost_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 week')
+          GROUP BY r.repost_item_id
+      ) repost_week ON repost_week.track_id = t.track_id
+      -- -- join on subquery for saves by year
+      LEFT OUTER JOIN (
+          SELECT
+              r.save_item_id as track_id,
+              count(r.save_item_id) as repost_count
+          FROM
+              saves r
+          WHERE
+              r.is_current is True AND
+              r.save_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 year')
+          GROUP BY r.save_item_id
+      ) save_year ON save_year.track_id = t.track_id
+      -- -- join on subquery for saves by month
+      LEFT OUTER JOIN (
+          SELECT
+              r.save_item_id as track_id,
+              count(r.save_item_id) as repost_count
+          FROM
+              saves r
+          WHERE
+              r.is_current is True AND
+              r.save_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 month')
+          GROUP BY r.save_item_id
+      ) save_month ON save_month.track_id = t.track_id
+      -- -- join on subquery for saves by week
+      LEFT OUTER JOIN (
+          SELECT
+              r.save_item_id as track_id,
+              count(r.save_item_id) as repost_count
+          FROM
+              saves r
+          WHERE
+              r.is_current is True AND
+              r.save_type = 'track' AND
+              r.is_delete is False AND
+              r.created_at > (now() - interval '1 week')
+          GROUP BY r.save_item_id
+      ) save_week ON save_week.track_id = t.track_id
+{karma_join}
+      WHERE
+          t.is_current is True AND
+          t.is_delete is False AND
+          t.is_unlisted is False AND
+          t.stem_of is Null;
+
+    CREATE INDEX trending_params_track_id_idx ON trending_params (track_id);
+
+"""
+
+KARMA_JOIN = """
+    LEFT OUTER JOIN (
+        SELECT
+            aik.item_id as track_id,
+            aik.xf_karma as karma
+        FROM
+            aggregate_item_karma aik
+        WHERE
+            aik.item_type = 'track'
+    ) karma ON karma.track_id = t.track_id
+"""
+
+# karma join of dc7f691adc79
+PREVIOUS_KARMA_JOIN = """
+    LEFT OUTER JOIN (
+        SELECT
+            save_and_reposts.item_id as track_id,
+            sum(au.follower_count) as karma
+        FROM
+            (
+                select
+                    r_and_s.user_id,
+                    r_and_s.item_id
+                from
+                    (select
+                        user_id,
+                        repost_item_id as item_id
+                    from
+                        reposts
+                    where
+                        is_delete is false AND
+                        is_current is true AND
+                        repost_type = 'track'
+                    union all
+                    select
+                        user_id,
+                        save_item_id as item_id
+                    from
+                        saves
+                    where
+                        is_delete is false AND
+                        is_current is true AND
+                        save_type = 'track'
+                    ) r_and_s
+                join
+                    users
+                on r_and_s.user_id = users.user_id
+                where
+                    (
+                        users.cover_photo is not null OR
+                        users.cover_photo_sizes is not null
+                    ) AND
+                    (
+                        users.profile_picture is not null OR
+                        users.profile_picture_sizes is not null
+                    ) AND
+                    users.bio is not null
+            ) save_and_reposts
+        JOIN
+            aggregate_user au
+        ON
+            save_and_reposts.user_id = au.user_id
+        GROUP BY save_and_reposts.item_id
+    ) karma ON karma.track_id = t.track_id
+"""
+
+# Backfill from the reposts and saves up to the aggregate_user checkpoint,
+# the aggregate_user task applies the deltas past it from there on.
+# Rows written after the checkpoint by older versions are corrected by reconcile_aggregates
+BACKFILL_AGGREGATE_ITEM_KARMA_QUERY = """
+    INSERT INTO indexing_checkpoints (tablename, last_checkpoint)
+    VALUES(
+        'aggregate_item_karma',
+        COALESCE(
+            (
+                SELECT last_checkpoint
+                FROM indexing_checkpoints
+                WHERE tablename = 'aggregate_user'
+            ),
+            0
+        )
+    )
+    ON CONFLICT (tablename)
+    DO UPDATE SET last_checkpoint = EXCLUDED.last_checkpoint;
+
+    INSERT INTO aggregate_item_karma (item_id, item_type, karma, xf_karma)
+    SELECT
+        r_and_s.item_id,
+        r_and_s.item_type,
+        sum(au.follower_count) as karma,
+        sum(
+            CASE
+                WHEN
+                    (users.cover_photo is not null OR users.cover_photo_sizes is not null) AND
+                    (users.profile_picture is not null OR users.profile_picture_sizes is not null) AND
+                    users.bio is not null
+                THEN au.follower_count
+                ELSE 0
+            END
+        ) as xf_karma
+    FROM
+        (
+            select
+                user_id,
+                repost_item_id as item_id,
+                repost_type::text as item_type
+            from
+                reposts
+            where
+                is_delete is false AND
+                is_current is true AND
+                blocknumber <= (
+                    SELECT last_checkpoint
+                    FROM indexing_checkpoints
+                    WHERE tablename = 'aggregate_item_karma'
+                )
+            union all
+            select
+                user_id,
+                save_item_id as item_id,
+                save_type::text as item_type
+            from
+                saves
+            where
+                is_delete is false AND
+                is_current is true AND
+                blocknumber <= (
+                    SELECT last_checkpoint
+                    FROM indexing_checkpoints
+                    WHERE tablename = 'aggregate_item_karma'
+                )
+        ) r_and_s
+    JOIN aggregate_user au ON r_and_s.user_id = au.user_id
+    JOIN users ON users.user_id = r_and_s.user_id AND users.is_current is true
+    GROUP BY r_and_s.item_id, r_and_s.item_type;
+"""
+
+
+def upgrade():
+    op.create_table(
+        "aggregate_item_karma",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("item_type", sa.String(), nullable=False),
+        sa.Column("karma", sa.BigInteger(), nullable=False),
+        sa.Column("xf_karma", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("item_id", "item_type"),
+    )
+    # Lets the karma deltas look up a user's profile as of a blocknumber
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS users_user_id_blocknumber_idx ON users (user_id, blocknumber);"
+    )
+
+    connection = op.get_bind()
+    connection.execute(BACKFILL_AGGREGATE_ITEM_KARMA_QUERY)
+    connection.execute(TRENDING_PARAMS_QUERY.format(karma_join=KARMA_JOIN))
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute(TRENDING_PARAMS_QUERY.format(karma_join=PREVIOUS_KARMA_JOIN))
+    connection.execute(
+        "DELETE FROM indexing_checkpoints WHERE tablename = 'aggregate_item_karma';"
+    )
+    op.execute("DROP INDEX IF EXISTS users_user_id_blocknumber_idx;")
+    op.drop_table("aggregate_item_karma")
@@ -0,0 +1,41 @@
+"""add keyset pagination indexes
+
+Revision ID: 9b4e1f7a3c25
+Revises: 7e3b9d1c2f60
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b4e1f7a3c25"
+down_revision = "7e3b9d1c2f60"
+branch_labels = None
+depends_on = None
+
+# Match the (created_at desc, id desc) order of the repost feed and the feed
+# so a page after a cursor is an index range scan per user
+INDEXES = [
+    (
+        "repost_user_id_created_at_idx",
+        "reposts (user_id, created_at DESC, repost_item_id DESC) WHERE is_current IS TRUE AND is_delete IS FALSE",
+    ),
+    (
+        "track_owner_id_created_at_idx",
+        "tracks (owner_id, created_at DESC, track_id DESC) WHERE is_current IS TRUE",
+    ),
+    (
+        "playlist_owner_id_created_at_idx",
+        "playlists (playlist_owner_id, created_at DESC, playlist_id DESC) WHERE is_current IS TRUE",
+    ),
+]
+
+
+def upgrade():
+    for (name, definition) in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition};")
+
+
+def downgrade():
+    for (name, _) in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
@@ -2,6 +2,7 @@ import logging
 from typing import Dict, List, Optional
 
 import redis
+import src.challenges.challenge_event_bus
 from integration_tests.queries.test_get_challenges import DefaultUpdater
 from integration_tests.utils import populate_mock_db_blocks
 from sqlalchemy.orm.session import Session
@@ -10,7 +11,12 @@ from src.challenges.challenge import (
     ChallengeUpdater,
     FullEventMetadata,
 )
-from src.challenges.challenge_event_bus import ChallengeEventBus
+from src.challenges.challenge_event_bus import (
+    REDIS_CONSUMER_GROUP,
+    ChallengeEventBus,
+    get_event_partition,
+    get_event_stream_key,
+)
 from src.models import Challenge, ChallengeType, UserChallenge
 from src.models.models import Block
 from src.queries.get_challenges import get_challenges
@@ -486,3 +492,156 @@ def test_catches_exceptions_in_single_processor(app):
         # Make sure broken manager didn't do anything
         challenge_2_state = broken_manager.get_user_challenge_state(session, ["1"])
         assert len(challenge_2_state) == 0
+
+
+def test_reclaims_unacked_events(app, monkeypatch):
+    """Ensure events read by a consumer that died before acking are reprocessed"""
+    setup_challenges(app)
+    with app.app_context():
+        db = get_db()
+
+    redis_conn = redis.Redis.from_url(url=REDIS_URL)
+
+    bus = ChallengeEventBus(redis_conn)
+    with db.scoped_session() as session:
+        mgr = ChallengeManager("test_challenge_1", DefaultUpdater())
+        TEST_EVENT = "TEST_EVENT"
+        bus.register_listener(TEST_EVENT, mgr)
+        with bus.use_scoped_dispatch_queue():
+            bus.dispatch(TEST_EVENT, 100, 1)
+
+        # Another consumer reads the event and never acks it
+        stream_key = get_event_stream_key(get_event_partition(1))
+        bus._ensure_consumer_group(stream_key)  # pylint: disable=W0212
+        redis_conn.xreadgroup(
+            REDIS_CONSUMER_GROUP, "dead-consumer", {stream_key: ">"}, count=10
+        )
+        assert bus.get_partition_stats()[get_event_partition(1)]["backlog"] == 1
+
+        # Not yet idle long enough to be reclaimed
+        (count, _) = bus.process_events(session)
+        assert count == 0
+
+        monkeypatch.setattr(
+            src.challenges.challenge_event_bus, "PENDING_EVENT_IDLE_MS", 0
+        )
+        (count, did_error) = bus.process_events(session)
+        assert count == 1
+        assert did_error == False
+        state = mgr.get_user_challenge_state(session, ["1"])
+        assert state[0].current_step_count == 2
+
+        stats = bus.get_partition_stats()[get_event_partition(1)]
+        assert stats["backlog"] == 0
+        assert stats["lag_sec"] == 0
+
+
+def test_dispatch_many(app):
+    """Ensure bulk dispatched events are flushed together and invalid ones dropped"""
+    setup_challenges(app)
+    with app.app_context():
+        db = get_db()
+
+    redis_conn = redis.Redis.from_url(url=REDIS_URL)
+
+    bus = ChallengeEventBus(redis_conn)
+    with db.scoped_session() as session:
+        mgr = ChallengeManager("test_challenge_1", DefaultUpdater())
+        TEST_EVENT = "TEST_EVENT"
+        bus.register_listener(TEST_EVENT, mgr)
+        with bus.use_scoped_dispatch_queue():
+            bus.dispatch_many(
+                TEST_EVENT, [(100, 1, None), (100, 3, {}), (None, 1, None)]
+            )
+        (count, did_error) = bus.process_events(session)
+        assert count == 2
+        assert did_error == False
+        state = mgr.get_user_challenge_state(session, ["1", "3"])
+        assert sorted(s.current_step_count for s in state) == [2, 3]
+
+
+class FailingPipeline:
+    """Pipeline that loses its connection when executed"""
+
+    def __init__(self, pipe):
+        self._pipe = pipe
+
+    def xadd(self, *args, **kwargs):
+        self._pipe.xadd(*args, **kwargs)
+
+    def execute(self, **kwargs):
+        raise redis.exceptions.ConnectionError("Connection lost")
+
+
+def test_flush_keeps_valid_events(app, monkeypatch):
+    """Ensure a malformed event or a failed pipeline doesn't drop the rest of a flush"""
+    setup_challenges(app)
+    with app.app_context():
+        db = get_db()
+
+    redis_conn = redis.Redis.from_url(url=REDIS_URL)
+
+    bus = ChallengeEventBus(redis_conn)
+    with db.scoped_session() as session:
+        mgr = ChallengeManager("test_challenge_1", DefaultUpdater())
+        TEST_EVENT = "TEST_EVENT"
+        bus.register_listener(TEST_EVENT, mgr)
+
+        pipeline = redis_conn.pipeline
+        monkeypatch.setattr(
+            redis_conn,
+            "pipeline",
+            lambda transaction=True: FailingPipeline(pipeline(transaction)),
+        )
+        with bus.use_scoped_dispatch_queue():
+            # extra that can't be serialized to json
+            bus.dispatch_many(TEST_EVENT, [(100, 1, {"ids": {1, 2}}), (100, 3, {})])
+        monkeypatch.setattr(redis_conn, "pipeline", pipeline)
+
+        (count, did_error) = bus.process_events(session)
+        assert count == 1
+        assert did_error == False
+        # Only user 3's event was dispatched
+        state = mgr.get_user_challenge_state(session, ["1", "3"])
+        assert sorted(s.current_step_count for s in state) == [1, 3]
+
+
+class BatchedAggregateUpdater(ChallengeUpdater):
+    def __init__(self):
+        self.batches: List[List[FullEventMetadata]] = []
+
+    def generate_specifier(self, user_id: int, extra: Dict) -> str:
+        return f"{user_id}-{extra['referred_id']}"
+
+    def should_create_new_challenges(
+        self, session: Session, event: str, metadatas: List[FullEventMetadata]
+    ) -> List[bool]:
+        self.batches.append(metadatas)
+        return [metadata["extra"]["referred_id"] != 3 for metadata in metadatas]
+
+
+def test_aggregate_challenge_batched_should_create(app):
+    """Ensure aggregate challenges ask the updater about new challenges once per batch"""
+    setup_challenges(app)
+    with app.app_context():
+        db = get_db()
+
+    redis_conn = redis.Redis.from_url(url=REDIS_URL)
+
+    bus = ChallengeEventBus(redis_conn)
+    with db.scoped_session() as session:
+        updater = BatchedAggregateUpdater()
+        agg_challenge = ChallengeManager("test_challenge_3", updater)
+        TEST_EVENT = "TEST_EVENT"
+        bus.register_listener(TEST_EVENT, agg_challenge)
+        with bus.use_scoped_dispatch_queue():
+            bus.dispatch_many(
+                TEST_EVENT,
+                [(100, 1, {"referred_id": referred_id}) for referred_id in [2, 3, 4]],
+            )
+        bus.process_events(session)
+
+        assert len(updater.batches) == 1
+        assert len(updater.batches[0]) == 3
+        state = agg_challenge.get_user_challenge_state(session, ["1-2", "1-3", "1-4"])
+        assert [s.specifier for s in state] == ["1-2", "1-4"]
@@ -17,6 +17,9 @@ from src.tasks.aggregates.index_aggregate_plays import _update_aggregate_plays
 from src.tasks.aggregates.index_aggregate_track import _update_aggregate_track
 from src.tasks.calculate_trending_challenges import enqueue_trending_challenges
 from src.tasks.index_aggregate_user import _update_aggregate_user
+from src.tasks.index_aggregate_user_aged_followers import (
+    _update_aggregate_user_aged_followers,
+)
 from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory
 from src.trending_strategies.trending_type_and_version import TrendingType
 from src.utils.config import shared_config
@@ -276,6 +279,7 @@ def test_trending_challenge_job(app):
         _update_aggregate_plays(session)
         _update_aggregate_track(session)
         _update_aggregate_user(session)
+        _update_aggregate_user_aged_followers(session)
         session.execute("REFRESH MATERIALIZED VIEW aggregate_interval_plays")
         session.execute("REFRESH MATERIALIZED VIEW trending_params")
         trending_track_versions = trending_strategy_factory.get_versions_for_type(
@@ -13,6 +13,7 @@ from src.queries.get_attestation import (
     Attestation,
     AttestationError,
     get_attestation,
+    get_attestations,
     get_create_sender_attestation,
 )
 from src.tasks.index_oracles import oracle_addresses_key
@@ -122,6 +123,61 @@ def test_get_attestation(app):
                 )
 
 
+def test_get_attestations(app):
+    with app.app_context():
+        db = get_db()
+        with db.scoped_session() as session:
+            setup_db(session)
+
+            oracle_address = "0x32a10e91820fd10366AC363eD0DEa40B2e598D22"
+            redis_handle.set(oracle_addresses_key, oracle_address)
+
+            def attestation_request(challenge_id, user_id=1, specifier="1"):
+                return {
+                    "challenge_id": challenge_id,
+                    "user_id": user_id,
+                    "oracle_address": oracle_address,
+                    "specifier": specifier,
+                }
+
+            requests = [
+                attestation_request("boolean_challenge_2"),
+                attestation_request("boolean_challenge_2", specifier="xyz"),
+                attestation_request("boolean_challenge_3"),
+                attestation_request("boolean_challenge_1"),
+                {**attestation_request("boolean_challenge_2"), "oracle_address": "x"},
+                attestation_request("boolean_challenge_2", user_id=None),
+                # Someone else's user challenge
+                attestation_request("boolean_challenge_2", user_id=2),
+            ]
+            results = get_attestations(session, requests)
+
+            assert [result["error"] for result in results] == [
+                None,
+                "MISSING_CHALLENGES",
+                "CHALLENGE_INCOMPLETE",
+                "ALREADY_DISBURSED",
+                "INVALID_ORACLE",
+                "INVALID_INPUT",
+                "MISSING_CHALLENGES",
+            ]
+            # The batch signs the same attestation as the single item path
+            assert (
+                results[0]["owner_wallet"],
+                results[0]["attestation"],
+            ) == get_attestation(
+                session,
+                user_id=1,
+                challenge_id="boolean_challenge_2",
+                oracle_address=oracle_address,
+                specifier="1",
+            )
+            assert all(
+                result["attestation"] is None and result["owner_wallet"] is None
+                for result in results[1:]
+            )
+
+
 @pytest.fixture
 def patch_get_all_other_nodes():
     with patch(
@@ -0,0 +1,62 @@
+from integration_tests.utils import populate_mock_db
+from src.models import Follow, Track
+from src.queries.get_followee_user_ids import get_followee_user_ids, in_user_ids
+from src.utils.db_session import get_db
+from src.utils.redis_cache import remove_cached_followee_user_ids
+from src.utils.redis_connection import get_redis
+
+test_entities = {
+    "users": [{"user_id": i} for i in range(1, 6)],
+    "tracks": [{"track_id": i, "owner_id": i} for i in range(1, 6)],
+    "follows": [
+        {"follower_user_id": 1, "followee_user_id": 4},
+        {"follower_user_id": 1, "followee_user_id": 2},
+        {"follower_user_id": 1, "followee_user_id": 3, "is_delete": True},
+        {"follower_user_id": 2, "followee_user_id": 1},
+    ],
+}
+
+
+def test_get_followee_user_ids(app):
+    """Test that followees are cached until they are invalidated"""
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+        assert get_followee_user_ids(session, 1) == [2, 4]
+        assert get_followee_user_ids(session, 3) == []
+
+        session.query(Follow).filter(Follow.follower_user_id == 1).update(
+            {"is_delete": True}
+        )
+        session.flush()
+
+        # Served from the cache
+        assert get_followee_user_ids(session, 1) == [2, 4]
+
+        remove_cached_followee_user_ids(redis, [1])
+        assert get_followee_user_ids(session, 1) == []
+        assert get_followee_user_ids(session, 2) == [1]
+
+
+def test_in_user_ids(app):
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+
+        def get_track_ids(user_ids):
+            return sorted(
+                track_id
+                for (track_id,) in session.query(Track.track_id).filter(
+                    Track.is_current == True, in_user_ids(Track.owner_id, user_ids)
+                )
+            )
+
+        assert get_track_ids([2, 4]) == [2, 4]
+        assert get_track_ids([]) == []
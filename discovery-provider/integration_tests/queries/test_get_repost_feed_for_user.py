@@ -1,5 +1,8 @@
+from datetime import datetime
+
 from integration_tests.utils import populate_mock_db
 from src.queries.get_repost_feed_for_user import _get_repost_feed_for_user
+from src.queries.query_helpers import REPOST_FEED_CURSOR_TYPES, decode_cursor
 from src.utils.db_session import get_db
 
 
@@ -47,7 +50,9 @@ def test_get_repost_feed_for_user(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        repost_feed = _get_repost_feed_for_user(session, 1, {"limit": 10, "offset": 0})
+        (repost_feed, _) = _get_repost_feed_for_user(
+            session, 1, {"limit": 10, "offset": 0}
+        )
 
     assert repost_feed[0]["title"] == "track 6"
     assert repost_feed[1]["playlist_name"] == "album 8"
@@ -106,7 +111,9 @@ def test_get_repost_feed_for_user_limit_bounds(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        repost_feed = _get_repost_feed_for_user(session, 1, {"limit": 5, "offset": 0})
+        (repost_feed, _) = _get_repost_feed_for_user(
+            session, 1, {"limit": 5, "offset": 0}
+        )
 
     # Query for 5 reposts. The problem is the 5th one was deleted, so
     # we only return 4 here. This is broken.
@@ -117,3 +124,71 @@ def test_get_repost_feed_for_user_limit_bounds(app):
     assert repost_feed[3]["title"] == "track 4"
     # Should skip track 1 because it is deleted
     assert repost_feed[4]["title"] == "track 3"
+
+
+def test_get_repost_feed_for_user_cursor(app):
+    """Tests that a repost feed can be paged with the cursor of the previous page"""
+    with app.app_context():
+        db = get_db()
+
+    # reposts at the same time are ordered by item id desc, then repost type desc
+    created_at = datetime(2022, 1, 1)
+    test_entities = {
+        "reposts": [
+            {"user_id": 1, "repost_item_id": 1, "repost_type": "track"},
+            {
+                "user_id": 1,
+                "repost_item_id": 2,
+                "repost_type": "track",
+                "created_at": created_at,
+            },
+            {
+                "user_id": 1,
+                "repost_item_id": 3,
+                "repost_type": "track",
+                "created_at": created_at,
+            },
+            {
+                "user_id": 1,
+                "repost_item_id": 3,
+                "repost_type": "playlist",
+                "created_at": created_at,
+            },
+            {
+                "user_id": 1,
+                "repost_item_id": 4,
+                "repost_type": "track",
+                "created_at": created_at,
+            },
+        ],
+        "tracks": [
+            {"track_id": 1, "title": "track 1"},
+            {"track_id": 2, "title": "track 2"},
+            {"track_id": 3, "title": "track 3"},
+            {"track_id": 4, "title": "track 4"},
+        ],
+        "playlists": [{"playlist_id": 3, "playlist_name": "playlist 3"}],
+    }
+
+    populate_mock_db(db, test_entities)
+
+    def get_titles(feed):
+        return [item.get("title", item.get("playlist_name")) for item in feed]
+
+    with db.scoped_session() as session:
+        pages = []
+        cursor = None
+        while True:
+            (page, next_cursor) = _get_repost_feed_for_user(
+                session, 1, {"limit": 2, "offset": 0, "cursor": cursor}
+            )
+            pages.append(get_titles(page))
+            if next_cursor is None:
+                break
+            cursor = decode_cursor(next_cursor, REPOST_FEED_CURSOR_TYPES)
+
+    assert pages == [
+        ["track 1", "track 4"],
+        ["playlist 3", "track 3"],
+        ["track 2"],
+    ]
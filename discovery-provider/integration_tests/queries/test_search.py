@@ -243,7 +243,8 @@ def setup_search(app_module):
         session.execute("REFRESH MATERIALIZED VIEW track_lexeme_dict;")
 
         session.execute(
-            UPDATE_AGGREGATE_USER_QUERY, {"prev_indexed_aggregate_block": 0}
+            UPDATE_AGGREGATE_USER_QUERY,
+            {"prev_blocknumber": 0, "current_blocknumber": blocks[-1].number},
         )
         session.execute("REFRESH MATERIALIZED VIEW user_lexeme_dict;")
 
@@ -335,6 +336,10 @@ def test_get_tracks_internal(app_module):
 
     assert len(es_res["tracks"]) == 2
     assert len(es_res["saved_tracks"]) == 1
+    # relationship flags are resolved server side, the id arrays are never returned
+    assert es_res["saved_tracks"][0]["has_current_user_saved"] == True
+    assert "saved_by" not in es_res["tracks"][0]
+    assert "reposted_by" not in es_res["tracks"][0]
 
 
 def test_get_downloadable_tracks(app_module):
@@ -0,0 +1,120 @@
+from typing import List
+
+from integration_tests.utils import populate_mock_db
+from src.models import AggregateItemKarma, Save
+from src.queries.query_helpers import get_karma
+from src.tasks.aggregates.reconcile_aggregates import _reconcile_aggregates
+from src.tasks.index_aggregate_user import _update_aggregate_user
+from src.utils.db_session import get_db
+
+basic_entities = {
+    "users": [
+        {"user_id": 1, "handle": "user1"},
+        # complete profile, counts towards xf karma
+        {
+            "user_id": 2,
+            "handle": "user2",
+            "cover_photo": "cover",
+            "profile_picture": "picture",
+        },
+        {"user_id": 3, "handle": "user3"},
+    ],
+    "tracks": [{"track_id": 1, "owner_id": 1}],
+    "playlists": [{"playlist_id": 1, "playlist_owner_id": 1}],
+    "follows": [
+        {"follower_user_id": 1, "followee_user_id": 2},
+        {"follower_user_id": 3, "followee_user_id": 2},
+        {"follower_user_id": 1, "followee_user_id": 3},
+    ],
+    "reposts": [{"user_id": 2, "repost_item_id": 1, "repost_type": "track"}],
+    "saves": [
+        {"user_id": 3, "save_item_id": 1, "save_type": "track"},
+        {"user_id": 2, "save_item_id": 1, "save_type": "playlist"},
+    ],
+}
+
+
+def get_item_karma(session):
+    results: List[AggregateItemKarma] = (
+        session.query(AggregateItemKarma)
+        .order_by(AggregateItemKarma.item_id, AggregateItemKarma.item_type)
+        .all()
+    )
+    return [
+        (result.item_id, result.item_type, result.karma, result.xf_karma)
+        for result in results
+    ]
+
+
+def test_index_aggregate_item_karma(app):
+    """Test that karma follows the reposts, saves and follower counts"""
+
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, basic_entities, block_offset=1)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+
+        assert get_item_karma(session) == [
+            (1, "playlist", 2, 2),
+            (1, "track", 3, 2),
+        ]
+        assert get_karma(session, (1,), None, None, False, False) == [(1, 3)]
+        assert get_karma(session, (1,), None, None, False, True) == [(1, 2)]
+        assert get_karma(session, (1,), None, None, True, True) == [(1, 2)]
+
+        # user 2 unsaves playlist 1
+        session.query(Save).filter(
+            Save.user_id == 2, Save.save_item_id == 1, Save.is_current == True
+        ).update({"is_current": False})
+
+    entities = {
+        "follows": [{"follower_user_id": 2, "followee_user_id": 3}],
+        "saves": [
+            {
+                "user_id": 2,
+                "save_item_id": 1,
+                "save_type": "playlist",
+                "is_delete": True,
+            }
+        ],
+    }
+    populate_mock_db(db, entities)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+
+        # user 3 now has 2 followers, user 2 no longer saves the playlist
+        assert get_item_karma(session) == [
+            (1, "playlist", 0, 0),
+            (1, "track", 4, 2),
+        ]
+        # Items without karma are left out so callers keep their default karma
+        assert get_karma(session, (1,), None, None, True, False) == []
+        assert get_karma(session, (1,), None, None, False, False) == [(1, 4)]
+
+
+def test_reconcile_aggregate_item_karma(app):
+    """Test that drifted karma is recounted"""
+
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, basic_entities, block_offset=1)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+
+        session.query(AggregateItemKarma).filter(
+            AggregateItemKarma.item_type == "track"
+        ).update({"karma": 100, "xf_karma": 100})
+
+    with db.scoped_session() as session:
+        _reconcile_aggregates(session)
+
+        assert get_item_karma(session) == [
+            (1, "playlist", 2, 2),
+            (1, "track", 3, 2),
+        ]
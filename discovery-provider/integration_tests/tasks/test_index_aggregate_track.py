@@ -8,6 +8,7 @@ from src.tasks.aggregates.index_aggregate_track import (
     AGGREGATE_TRACK,
     _update_aggregate_track,
 )
+from src.tasks.aggregates.reconcile_aggregates import _reconcile_aggregates
 from src.utils.db_session import get_db
 from src.utils.redis_connection import get_redis
 from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
@@ -473,6 +474,12 @@ def test_index_aggregate_track_update(app):
 
         _update_aggregate_track(session)
 
+    with db.scoped_session() as session:
+        basic_tests(session, previous_count=9)
+
+        # recount the drifted rows
+        _reconcile_aggregates(session)
+
     with db.scoped_session() as session:
         basic_tests(session)
 
@@ -537,6 +544,7 @@ def test_index_aggregate_track_update_with_extra_user(app):
             assert result.save_count == 9, "Test entities were populated correctly"
 
         _update_aggregate_track(session)
+        _reconcile_aggregates(session)
 
     with db.scoped_session() as session:
         basic_tests(session, last_checkpoint=9)
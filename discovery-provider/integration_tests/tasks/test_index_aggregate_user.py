@@ -4,7 +4,8 @@ from datetime import datetime, timedelta
 from typing import List
 
 from integration_tests.utils import populate_mock_db
-from src.models import AggregateUser
+from src.models import AggregateUser, Follow
+from src.tasks.aggregates.reconcile_aggregates import _reconcile_aggregates
 from src.tasks.index_aggregate_user import AGGREGATE_USER, _update_aggregate_user
 from src.utils.db_session import get_db
 from src.utils.redis_connection import get_redis
@@ -321,7 +322,7 @@ def test_index_aggregate_user_empty_completely(app):
 
 
 def test_index_aggregate_user_update(app):
-    """Test that the aggregate_user data is overwritten"""
+    """Test that the aggregate_user data is added to and reconciled"""
 
     with app.app_context():
         db = get_db()
@@ -364,6 +365,34 @@ def test_index_aggregate_user_update(app):
 
         _update_aggregate_user(session)
 
+    with db.scoped_session() as session:
+        results: List[AggregateUser] = (
+            session.query(AggregateUser).order_by(AggregateUser.user_id).all()
+        )
+
+        assert len(results) == 2
+
+        assert results[0].user_id == 1
+        assert results[0].track_count == 11
+        assert results[0].playlist_count == 10
+        assert results[0].album_count == 10
+        assert results[0].follower_count == 10
+        assert results[0].following_count == 10
+        assert results[0].repost_count == 9
+        assert results[0].track_save_count == 9
+
+        assert results[1].user_id == 2
+        assert results[1].track_count == 10
+        assert results[1].playlist_count == 9
+        assert results[1].album_count == 9
+        assert results[1].follower_count == 10
+        assert results[1].following_count == 10
+        assert results[1].repost_count == 11
+        assert results[1].track_save_count == 10
+
+        # recount the drifted rows
+        _reconcile_aggregates(session)
+
     with db.scoped_session() as session:
         basic_tests(session)
 
@@ -430,6 +459,7 @@ def test_index_aggregate_user_update_with_extra_user(app):
         assert len(results) == 3, "Test that aggregate_user entities are populated"
 
         _update_aggregate_user(session)
+        _reconcile_aggregates(session)
 
     with db.scoped_session() as session:
         results: List[AggregateUser] = (
@@ -640,3 +670,53 @@ def test_index_aggregate_user_same_checkpoint(app):
 
         prev_id_checkpoint = get_last_indexed_checkpoint(session, AGGREGATE_USER)
         assert prev_id_checkpoint == 3
+
+
+def test_index_aggregate_user_deltas(app):
+    """Test that changes since the last checkpoint are applied as deltas"""
+
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, basic_entities, block_offset=3)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+        basic_tests(session)
+
+        # user 2 unfollows user 1
+        session.query(Follow).filter(
+            Follow.follower_user_id == 2,
+            Follow.followee_user_id == 1,
+            Follow.is_current == True,
+        ).update({"is_current": False})
+
+    entities = {
+        "tracks": [{"track_id": 5, "owner_id": 2}],
+        "follows": [
+            {
+                "follower_user_id": 2,
+                "followee_user_id": 1,
+                "is_delete": True,
+            },
+        ],
+    }
+    populate_mock_db(db, entities)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+
+        results: List[AggregateUser] = (
+            session.query(AggregateUser).order_by(AggregateUser.user_id).all()
+        )
+
+        assert len(results) == 2
+
+        assert results[0].user_id == 1
+        assert results[0].follower_count == 0
+        assert results[0].following_count == 1
+
+        assert results[1].user_id == 2
+        assert results[1].track_count == 2
+        assert results[1].follower_count == 1
+        assert results[1].following_count == 0
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from integration_tests.utils import populate_mock_db
+from src.models import AggregateUserAgedFollowers
+from src.tasks.index_aggregate_user_aged_followers import (
+    AGGREGATE_USER_AGED_FOLLOWERS,
+    AGGREGATE_USER_AGED_FOLLOWERS_AGED_AT,
+    _update_aggregate_user_aged_followers,
+)
+from src.utils.db_session import get_db
+from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
+
+now = datetime.now()
+
+entities = {
+    "users": [
+        {"user_id": 1, "handle": "user1"},
+        {"user_id": 2, "handle": "user2"},
+        {"user_id": 3, "handle": "user3"},
+    ],
+    "follows": [
+        # aged follows of user 1
+        {
+            "follower_user_id": 2,
+            "followee_user_id": 1,
+            "created_at": now - timedelta(days=30),
+        },
+        {
+            "follower_user_id": 3,
+            "followee_user_id": 1,
+            "created_at": now - timedelta(days=8),
+        },
+        # deleted follow of user 2
+        {
+            "follower_user_id": 1,
+            "followee_user_id": 2,
+            "is_delete": True,
+            "created_at": now - timedelta(days=30),
+        },
+        # follow of user 3 that ages tomorrow
+        {
+            "follower_user_id": 1,
+            "followee_user_id": 3,
+            "created_at": now - timedelta(days=6),
+        },
+    ],
+}
+
+
+def get_follower_counts(session):
+    results: List[AggregateUserAgedFollowers] = (
+        session.query(AggregateUserAgedFollowers)
+        .order_by(AggregateUserAgedFollowers.user_id)
+        .all()
+    )
+    return {result.user_id: result.follower_count for result in results}
+
+
+def test_index_aggregate_user_aged_followers(app):
+    """Tests that aged follower counts are populated and pick up aging follows"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, entities, block_offset=0)
+
+    with db.scoped_session() as session:
+        _update_aggregate_user_aged_followers(session)
+
+        assert get_follower_counts(session) == {1: 2, 2: 0, 3: 0}
+        assert get_last_indexed_checkpoint(session, AGGREGATE_USER_AGED_FOLLOWERS) == 3
+
+
+def test_index_aggregate_user_aged_followers_aging(app):
+    """Tests that follows crossing the aged cutoff are counted without new blocks"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {
+            "indexing_checkpoints": [
+                {"tablename": AGGREGATE_USER_AGED_FOLLOWERS, "last_checkpoint": 1},
+                {
+                    "tablename": AGGREGATE_USER_AGED_FOLLOWERS_AGED_AT,
+                    "last_checkpoint": int((now - timedelta(days=9)).timestamp()),
+                },
+            ],
+            "users": [
+                {"user_id": 1, "handle": "user1"},
+                {"user_id": 2, "handle": "user2"},
+            ],
+            "follows": [
+                # aged before the last run
+                {
+                    "follower_user_id": 2,
+                    "followee_user_id": 1,
+                    "created_at": now - timedelta(days=30),
+                },
+                # aged since the last run
+                {
+                    "follower_user_id": 1,
+                    "followee_user_id": 2,
+                    "created_at": now - timedelta(days=8),
+                },
+            ],
+        },
+        block_offset=0,
+    )
+
+    with db.scoped_session() as session:
+        session.add(AggregateUserAgedFollowers(user_id=2, follower_count=0))
+        session.flush()
+
+        _update_aggregate_user_aged_followers(session)
+
+        # only the followee whose follow aged past the cutoff is recounted
+        assert get_follower_counts(session) == {2: 1}
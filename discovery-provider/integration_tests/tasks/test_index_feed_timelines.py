@@ -0,0 +1,293 @@
+from datetime import datetime, timedelta
+
+from integration_tests.utils import populate_mock_db
+from src.models import FeedTimeline, Repost
+from src.queries.get_feed import get_feed_sql
+from src.queries.get_feed_timeline import (
+    FEED_TIMELINE_DAYS,
+    FEED_TIMELINES,
+    FEED_TIMELINES_BACKFILL,
+    MAX_FANOUT_FOLLOWER_COUNT,
+    get_feed_timeline,
+    is_feed_timeline_ready,
+)
+from src.queries.query_helpers import FEED_CURSOR_TYPES, decode_cursor
+from src.tasks.aggregates import get_latest_blocknumber
+from src.tasks.index_feed_timelines import _index_feed_timelines, _trim_feed_timelines
+from src.utils.changefeed import get_changefeed_reverts, push_changefeed_revert
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
+
+now = datetime.now()
+
+
+def hours_ago(hours):
+    return now - timedelta(hours=hours)
+
+
+# User 3 has too many followers to be fanned out, user 1 follows users 2 and 3
+test_entities = {
+    "users": [{"user_id": i} for i in range(1, 6)],
+    "aggregate_user": [{"user_id": 3, "follower_count": MAX_FANOUT_FOLLOWER_COUNT + 1}],
+    "tracks": [
+        {"track_id": 1, "owner_id": 2, "created_at": hours_ago(5)},
+        {"track_id": 2, "owner_id": 3, "created_at": hours_ago(4)},
+        {"track_id": 3, "owner_id": 4, "created_at": hours_ago(10)},
+        {
+            "track_id": 4,
+            "owner_id": 2,
+            "created_at": hours_ago(24 * (FEED_TIMELINE_DAYS + 1)),
+        },
+    ],
+    "follows": [
+        {"follower_user_id": 1, "followee_user_id": 2},
+        {"follower_user_id": 1, "followee_user_id": 3},
+    ],
+    "reposts": [
+        {
+            "user_id": 2,
+            "repost_item_id": 3,
+            "repost_type": "track",
+            "created_at": hours_ago(3),
+        },
+        {
+            "user_id": 3,
+            "repost_item_id": 1,
+            "repost_type": "track",
+            "created_at": hours_ago(2),
+        },
+    ],
+}
+
+
+def get_timeline(session, user_id):
+    return sorted(
+        session.query(
+            FeedTimeline.item_type,
+            FeedTimeline.item_id,
+            FeedTimeline.actor_user_id,
+            FeedTimeline.reason,
+        )
+        .filter(FeedTimeline.user_id == user_id)
+        .all()
+    )
+
+
+def test_index_feed_timelines(app):
+    """Test that timelines are backfilled, then fanned out to on write"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session)
+
+        assert get_last_indexed_checkpoint(
+            session, FEED_TIMELINES
+        ) == get_latest_blocknumber(session)
+        assert get_last_indexed_checkpoint(session, FEED_TIMELINES_BACKFILL) == 5
+        assert get_timeline(session, 1) == [
+            ("track", 1, 2, "original"),
+            ("track", 3, 2, "repost"),
+        ]
+        assert get_timeline(session, 2) == []
+
+        session.query(Repost).filter(Repost.is_current == True).update(
+            {"is_current": False}
+        )
+
+    populate_mock_db(
+        db,
+        {
+            "tracks": [
+                {"track_id": 5, "owner_id": 2, "created_at": hours_ago(1)},
+                {"track_id": 6, "owner_id": 3, "created_at": hours_ago(1)},
+            ],
+            "follows": [{"follower_user_id": 1, "followee_user_id": 4}],
+            "reposts": [
+                {
+                    "user_id": 2,
+                    "repost_item_id": 3,
+                    "repost_type": "track",
+                    "is_delete": True,
+                }
+            ],
+        },
+    )
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session)
+
+        assert get_timeline(session, 1) == [
+            ("track", 1, 2, "original"),
+            ("track", 3, 4, "original"),
+            ("track", 5, 2, "original"),
+        ]
+
+        session.add(
+            FeedTimeline(
+                user_id=1,
+                item_type="track",
+                item_id=4,
+                actor_user_id=2,
+                reason="original",
+                created_at=hours_ago(24 * (FEED_TIMELINE_DAYS + 1)),
+            )
+        )
+        session.flush()
+        _trim_feed_timelines(session)
+
+        assert ("track", 4, 2, "original") not in get_timeline(session, 1)
+
+
+def test_index_feed_timelines_revert(app):
+    """Test that reverted blocks are fanned out again and reverted reposts removed"""
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session, redis)
+        checkpoint = get_last_indexed_checkpoint(session, FEED_TIMELINES)
+        assert ("track", 3, 2, "repost") in get_timeline(session, 1)
+
+        # The block of user 2's repost of track 3 is reverted and indexed again
+        # with a repost of track 1 instead
+        session.query(Repost).filter(
+            Repost.user_id == 2, Repost.repost_item_id == 3
+        ).delete()
+
+    populate_mock_db(
+        db,
+        {
+            "reposts": [
+                {
+                    "user_id": 2,
+                    "repost_item_id": 1,
+                    "repost_type": "track",
+                    "blocknumber": checkpoint,
+                }
+            ]
+        },
+    )
+    push_changefeed_revert(
+        redis, FEED_TIMELINES, checkpoint - 1, {"reposts": [[2, "track", 3]]}
+    )
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session, redis)
+
+        assert get_timeline(session, 1) == [
+            ("track", 1, 2, "original"),
+            ("track", 1, 2, "repost"),
+        ]
+        assert get_changefeed_reverts(redis, FEED_TIMELINES) == []
+
+
+def test_get_feed_timeline(app):
+    """Test that feed pages merge the timeline with the followees read on demand"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session)
+
+        assert is_feed_timeline_ready(session, 5)
+        assert not is_feed_timeline_ready(session, 6)
+
+        def get_item_ids(followee_user_ids, feed_filter, cursor, limit):
+            items = get_feed_timeline(
+                session, 1, followee_user_ids, feed_filter, False, cursor, limit
+            )
+            return items and [(item_type, item_id) for (item_type, item_id, _) in items]
+
+        # Track 2 is read from user 3, track 3 is sorted by its repost
+        assert get_item_ids([2, 3], "all", None, 3) == [
+            ("track", 3),
+            ("track", 2),
+            ("track", 1),
+        ]
+        assert get_item_ids([2, 3], "original", None, 2) == [
+            ("track", 2),
+            ("track", 1),
+        ]
+        # Reposts are sorted by their repost in the repost feed, even of followee tracks
+        assert get_item_ids([2, 3], "repost", None, 2) == [
+            ("track", 1),
+            ("track", 3),
+        ]
+
+        # Pages after a cursor
+        assert get_item_ids([2, 3], "all", (hours_ago(3), 3), 2) == [
+            ("track", 2),
+            ("track", 1),
+        ]
+
+        # Unfollowed users are skipped
+        assert get_item_ids([2], "all", None, 2) == [("track", 3), ("track", 1)]
+
+        # Short pages are served, empty pages and pages past the horizon are built on read
+        assert get_item_ids([2, 3], "all", None, 4) == [
+            ("track", 3),
+            ("track", 2),
+            ("track", 1),
+        ]
+        assert get_item_ids([2, 3], "all", (hours_ago(5), 1), 2) is None
+        assert (
+            get_item_ids(
+                [2, 3], "all", (hours_ago(24 * (FEED_TIMELINE_DAYS + 1)), 1), 1
+            )
+            is None
+        )
+
+
+def test_get_feed_short_timeline_page(app):
+    """Test that a short timeline page is filled with the older items built on read"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(
+        db,
+        {
+            "users": [{"user_id": i} for i in range(1, 3)],
+            "tracks": [
+                {"track_id": 1, "owner_id": 2, "created_at": hours_ago(1)},
+                {
+                    "track_id": 2,
+                    "owner_id": 2,
+                    "created_at": hours_ago(24 * (FEED_TIMELINE_DAYS + 10)),
+                },
+                {
+                    "track_id": 3,
+                    "owner_id": 2,
+                    "created_at": hours_ago(24 * (FEED_TIMELINE_DAYS + 20)),
+                },
+            ],
+            "follows": [{"follower_user_id": 1, "followee_user_id": 2}],
+        },
+    )
+
+    with db.scoped_session() as session:
+        _index_feed_timelines(session)
+        assert get_timeline(session, 1) == [("track", 1, 2, "original")]
+
+    with app.test_request_context("/?limit=2"):
+        (feed, next_cursor) = get_feed_sql({"user_id": 1, "filter": "all"})
+        assert [track["track_id"] for track in feed] == [1, 2]
+        assert next_cursor is not None
+
+        (feed, next_cursor) = get_feed_sql(
+            {
+                "user_id": 1,
+                "filter": "all",
+                "cursor": decode_cursor(next_cursor, FEED_CURSOR_TYPES),
+            }
+        )
+        assert [track["track_id"] for track in feed] == [3]
+        assert next_cursor is None
@@ -16,6 +16,7 @@ from src.tasks.playlists import (
 from src.utils import helpers
 from src.utils.db_session import get_db
 from src.utils.playlist_event_constants import playlist_event_types_lookup
+from src.utils.redis_connection import get_redis
 from web3 import Web3
 
 block_hash = b"0x8f19da326900d171642af08e6770eedd83509c6c44f6855c98e6a752844e2521"
@@ -140,7 +141,9 @@ def test_index_playlist(app):
         cid_metadata_client = CIDMetadataClient({})
         web3 = Web3()
         challenge_event_bus = setup_challenge_bus()
-        update_task = UpdateTask(cid_metadata_client, web3, challenge_event_bus)
+        update_task = UpdateTask(
+            cid_metadata_client, web3, challenge_event_bus, get_redis()
+        )
 
     with db.scoped_session() as session:
         # ================= Test playlist_created Event =================
@@ -11,6 +11,7 @@ from src.tasks.index_aggregate_user import _update_aggregate_user
 from src.tasks.index_related_artists import (
     process_related_artists_queue,
     queue_related_artist_calculation,
+    recalculate_related_artists,
 )
 from src.utils.config import shared_config
 from src.utils.db_session import get_db
@@ -20,32 +21,34 @@ REDIS_URL = shared_config["redis"]["url"]
 logger = logging.getLogger(__name__)
 
 
+entities = {
+    "users": [{}] * 7,
+    "follows": [
+        # at least 200 followers for user_0
+        {"follower_user_id": i, "followee_user_id": 0}
+        for i in range(1, 201)
+    ]
+    # 50 mutual followers between user_1 & user_0 make up 100% of user_1 followers = score 50
+    + [{"follower_user_id": i, "followee_user_id": 1} for i in range(151, 201)]
+    # 50 mutual followers between user_2 & user_0 make up 50% of user_2 followers = score 25
+    + [{"follower_user_id": i, "followee_user_id": 2} for i in range(151, 251)]
+    # 20 mutual followers between user_3 & user_0 make up 50% of user_3 followers = score 10
+    + [{"follower_user_id": i, "followee_user_id": 3} for i in range(181, 221)]
+    # 4 mutual followers between user_4 & user_0 make up 80% of user_4 followers = score 3.2
+    + [{"follower_user_id": i, "followee_user_id": 4} for i in range(197, 202)]
+    # 50 mutual followers between user_5 & user_0 make up 10% of user_5 followers = score 5
+    + [{"follower_user_id": i, "followee_user_id": 5} for i in range(151, 651)]
+    # 60 mutual followers between user_5 & user_0 make up 30% of user_6 followers = score 18
+    + [{"follower_user_id": i, "followee_user_id": 6} for i in range(141, 341)],
+    "tracks": [{"owner_id": i} for i in range(0, 7)],
+}
+
+
 def test_index_related_artists(app):
     redis_conn = redis.Redis.from_url(url=REDIS_URL)
     with app.app_context():
         db = get_db()
 
-    entities = {
-        "users": [{}] * 7,
-        "follows": [
-            # at least 200 followers for user_0
-            {"follower_user_id": i, "followee_user_id": 0}
-            for i in range(1, 201)
-        ]
-        # 50 mutual followers between user_1 & user_0 make up 100% of user_1 followers = score 50
-        + [{"follower_user_id": i, "followee_user_id": 1} for i in range(151, 201)]
-        # 50 mutual followers between user_2 & user_0 make up 50% of user_2 followers = score 25
-        + [{"follower_user_id": i, "followee_user_id": 2} for i in range(151, 251)]
-        # 20 mutual followers between user_3 & user_0 make up 50% of user_3 followers = score 10
-        + [{"follower_user_id": i, "followee_user_id": 3} for i in range(181, 221)]
-        # 4 mutual followers between user_4 & user_0 make up 80% of user_4 followers = score 3.2
-        + [{"follower_user_id": i, "followee_user_id": 4} for i in range(197, 202)]
-        # 50 mutual followers between user_5 & user_0 make up 10% of user_5 followers = score 5
-        + [{"follower_user_id": i, "followee_user_id": 5} for i in range(151, 651)]
-        # 60 mutual followers between user_5 & user_0 make up 30% of user_6 followers = score 18
-        + [{"follower_user_id": i, "followee_user_id": 6} for i in range(141, 341)],
-        "tracks": [{"owner_id": i} for i in range(0, 7)],
-    }
     populate_mock_db(db, entities)
     with db.scoped_session() as session:
         _update_aggregate_user(session)
@@ -116,3 +119,30 @@ def test_index_related_artists(app):
         assert results[5].related_artist_user_id == 4 and math.isclose(
             results[5].score, 5, abs_tol=0.001
         )
+
+
+def test_recalculate_related_artists(app):
+    """Test that recalculating every artist scores the same as the queue"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, entities)
+    with db.scoped_session() as session:
+        _update_aggregate_user(session)
+    recalculate_related_artists(db)
+    with db.scoped_session() as session:
+        results: List[RelatedArtist] = (
+            session.query(RelatedArtist)
+            .filter(RelatedArtist.user_id == 0)
+            .order_by(desc(RelatedArtist.score))
+            .all()
+        )
+        assert [
+            (result.related_artist_user_id, round(result.score, 3))
+            for result in results
+        ] == [(1, 50), (2, 25), (6, 18), (3, 10), (5, 5), (4, 3.2)]
+
+        # Only artists with enough followers are scored
+        assert {
+            user_id for (user_id,) in session.query(RelatedArtist.user_id).distinct()
+        } == {0, 5, 6}
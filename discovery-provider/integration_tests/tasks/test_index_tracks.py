@@ -25,6 +25,7 @@ from src.tasks.tracks import (
 )
 from src.utils import helpers
 from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
 from web3 import Web3
 
 block_hash = b"0x8f19da326900d171642af08e6770eedd83509c6c44f6855c98e6a752844e2521"
@@ -198,7 +199,9 @@ def test_index_tracks(mock_index_task, app):
         db = get_db()
         challenge_event_bus: ChallengeEventBus = setup_challenge_bus()
         web3 = Web3()
-        update_task = UpdateTask(cid_metadata_client, web3, challenge_event_bus)
+        update_task = UpdateTask(
+            cid_metadata_client, web3, challenge_event_bus, get_redis()
+        )
 
     pending_track_routes = []
 
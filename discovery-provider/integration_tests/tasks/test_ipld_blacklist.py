@@ -0,0 +1,58 @@
+from src.models import BlacklistedIPLD, IPLDBlacklistBlock
+from src.tasks.ipld_blacklist import BlacklistedIPLDSet, bump_ipld_blacklist_version
+from src.utils.db_session import get_db
+from src.utils.redis_connection import get_redis
+
+
+def add_blacklisted_ipld(session, block_number, ipld):
+    session.add(
+        IPLDBlacklistBlock(
+            blockhash=f"0x{block_number}",
+            parenthash=f"0x{block_number - 1}",
+            number=block_number,
+            is_current=False,
+        )
+    )
+    session.flush()
+    session.add(
+        BlacklistedIPLD(
+            blockhash=f"0x{block_number}",
+            blocknumber=block_number,
+            ipld=ipld,
+            is_blacklisted=True,
+            is_current=True,
+        )
+    )
+
+
+def test_blacklisted_ipld_set(app):
+    """Test that the blacklist is refreshed incrementally and reloaded after reverts"""
+    with app.app_context():
+        db = get_db()
+        redis = get_redis()
+
+    blacklisted_iplds = BlacklistedIPLDSet()
+    with db.scoped_session() as session:
+        add_blacklisted_ipld(session, 1, "QmA")
+        add_blacklisted_ipld(session, 2, "QmB")
+
+    with db.scoped_session() as session:
+        blacklisted_iplds.refresh(session, redis)
+        assert blacklisted_iplds.iplds == {"QmA", "QmB"}
+
+        # rows added without a version bump are not read
+        add_blacklisted_ipld(session, 3, "QmC")
+        session.flush()
+        blacklisted_iplds.refresh(session, redis)
+        assert blacklisted_iplds.iplds == {"QmA", "QmB"}
+
+        bump_ipld_blacklist_version(redis)
+        blacklisted_iplds.refresh(session, redis)
+        assert blacklisted_iplds.iplds == {"QmA", "QmB", "QmC"}
+
+        # reverted rows are dropped by a full reload
+        session.query(BlacklistedIPLD).filter(BlacklistedIPLD.ipld == "QmB").delete()
+        session.flush()
+        bump_ipld_blacklist_version(redis, is_reset=True)
+        blacklisted_iplds.refresh(session, redis)
+        assert blacklisted_iplds.iplds == {"QmA", "QmC"}
@@ -3,8 +3,18 @@ from datetime import datetime, timedelta
 from typing import List
 
 from integration_tests.utils import populate_mock_db
+from sqlalchemy import text
 from src.models import Play, PlaysArchive
-from src.tasks.prune_plays import _prune_plays
+from src.tasks.prune_plays import (
+    DEFAULT_RETENTION_MONTHS,
+    PLAYS_ARCHIVE_TABLE_NAME,
+    PLAYS_DEFAULT_PARTITION_NAME,
+    _prune_plays,
+    add_months,
+    get_month_start,
+    get_partition_months,
+    get_partition_name,
+)
 from src.utils.config import shared_config
 from src.utils.db_session import get_db
 
@@ -169,3 +179,91 @@ def test_prune_plays_skip_prune(app):
         )
 
         assert len(plays_archive_result) == 0
+
+
+def test_prune_plays_archive_partitions(app):
+    """Test that monthly partitions past the retention window are moved to the archive"""
+    # setup
+    with app.app_context():
+        db = get_db()
+
+    current_month = get_month_start(CURRENT_TIMESTAMP)
+    # run
+    entities = {
+        "tracks": [
+            {"track_id": 1, "title": "track 1"},
+            {"track_id": 2, "title": "track 2"},
+        ],
+        "plays": [
+            {"item_id": 1, "created_at": current_month},
+            {"item_id": 2, "created_at": add_months(current_month, 1)},
+            {"item_id": 1, "created_at": add_months(current_month, 3)},
+        ],
+    }
+
+    populate_mock_db(db, entities)
+
+    # prune as if it was two months past the retention window
+    prune_timestamp = add_months(current_month, DEFAULT_RETENTION_MONTHS + 2)
+    with db.scoped_session() as session:
+        _prune_plays(session, prune_timestamp)
+
+        # verify plays
+        plays_result: List[Play] = session.query(Play).order_by(Play.id).all()
+        assert len(plays_result) == 1
+        assert plays_result[0].id == 3
+
+        # verify archive
+        plays_archive_result: List[PlaysArchive] = (
+            session.query(PlaysArchive).order_by(PlaysArchive.id).all()
+        )
+        assert len(plays_archive_result) == 2
+        assert plays_archive_result[0].id == 1
+        assert plays_archive_result[0].archived_at == prune_timestamp
+        assert plays_archive_result[1].id == 2
+        assert plays_archive_result[1].archived_at == prune_timestamp
+
+        # verify partitions
+        assert get_partition_months(session, PLAYS_ARCHIVE_TABLE_NAME) == [
+            current_month,
+            add_months(current_month, 1),
+        ]
+        plays_partition_months = get_partition_months(session, "plays")
+        assert plays_partition_months[0] == add_months(current_month, 2)
+        assert plays_partition_months[-1] == add_months(prune_timestamp, 3)
+
+
+def test_prune_plays_create_partition_with_default_plays(app):
+    """Test that plays of a new partition's month are moved out of the default partition"""
+    # setup
+    with app.app_context():
+        db = get_db()
+
+    current_month = get_month_start(CURRENT_TIMESTAMP)
+    future_month = add_months(current_month, 12)
+    # run
+    entities = {
+        "tracks": [{"track_id": 1, "title": "track 1"}],
+        "plays": [{"item_id": 1, "created_at": future_month}],
+    }
+
+    populate_mock_db(db, entities)
+
+    with db.scoped_session() as session:
+
+        def count_plays(table_name):
+            return session.execute(text(f"SELECT count(*) FROM {table_name}")).scalar()
+
+        assert count_plays(PLAYS_DEFAULT_PARTITION_NAME) == 1
+
+        _prune_plays(session, add_months(future_month, -1))
+
+        # verify partitions
+        assert future_month in get_partition_months(session, "plays")
+        assert count_plays(PLAYS_DEFAULT_PARTITION_NAME) == 0
+        assert count_plays(get_partition_name("plays", future_month)) == 1
+
+        # verify plays
+        plays_result: List[Play] = session.query(Play).all()
+        assert len(plays_result) == 1
+        assert plays_result[0].created_at == future_month
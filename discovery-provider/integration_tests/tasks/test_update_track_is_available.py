@@ -6,9 +6,9 @@ from src.models import Track
 from src.tasks.update_track_is_available import (
     ALL_UNAVAILABLE_TRACKS_REDIS_KEY,
     _get_redis_set_members_as_list,
-    check_track_is_available,
     fetch_unavailable_track_ids,
     fetch_unavailable_track_ids_in_network,
+    get_unavailable_track_ids,
     get_unavailable_tracks_redis_key,
     query_registered_content_node_info,
     query_replica_set_by_track_id,
@@ -69,10 +69,11 @@ def test_fetch_unavailable_track_ids_in_network(
 
     spID_1_unavailable_tracks = [1, 2, 3, 4]
     spID_2_unavailable_tracks = [4, 5, 6, 7]
-    mock_fetch_unavailable_track_ids.side_effect = [
-        spID_1_unavailable_tracks,
-        spID_2_unavailable_tracks,
-    ]
+    # Content Nodes are fetched concurrently, so key the responses by endpoint
+    mock_fetch_unavailable_track_ids.side_effect = lambda endpoint: {
+        "http://content_node.com": spID_1_unavailable_tracks,
+        "http://content_node2.com": spID_2_unavailable_tracks,
+    }[endpoint]
 
     with app.app_context():
         redis = get_redis()
@@ -124,8 +125,7 @@ def test_fetch_unavailable_track_ids(mock_requests, app):
     assert fetch_response == track_ids
 
 
-@mock.patch("src.tasks.update_track_is_available.check_track_is_available")
-def test_update_tracks_is_available_status(mock_check_track_is_available, app):
+def test_update_tracks_is_available_status(app):
     with app.app_context():
         db = get_db()
         redis = get_redis()
@@ -134,7 +134,9 @@ def test_update_tracks_is_available_status(mock_check_track_is_available, app):
     mock_unavailable_tracks = [1, 2, 3, 4, 5, 6, 7]
     _seed_db_with_data(db)
     redis.sadd(ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *mock_unavailable_tracks)
-    mock_check_track_is_available.return_value = False
+    # Unavailable on every node of their replica sets
+    for spID in [7, 9, 10, 11, 12, 13]:
+        redis.sadd(get_unavailable_tracks_redis_key(spID), *mock_unavailable_tracks)
 
     update_tracks_is_available_status(db, redis)
 
@@ -180,59 +182,45 @@ def test_query_replica_set_by_track_id(app):
         assert sorted_actual_results == expected_query_results
 
 
-def test_check_track_is_available__return_is_not_available(app):
-    with app.app_context():
-        redis = get_redis()
-
-    spID_2_key = get_unavailable_tracks_redis_key(2)
-    spID_3_key = get_unavailable_tracks_redis_key(3)
-    spID_4_key = get_unavailable_tracks_redis_key(4)
-
-    # Seed redis some initialized data
+def test_get_unavailable_track_ids__return_is_not_available(app):
     # (1, 2, [3, 4])
-    redis.sadd(spID_2_key, 1)
-    redis.sadd(spID_3_key, 1)
-    redis.sadd(spID_4_key, 1)
+    spID_unavailable_track_ids = {2: {1}, 3: {1}, 4: {1}}
 
-    assert False == check_track_is_available(redis, 1, [2, 3, 4])
-
-
-def test_check_track_is_available__return_is_available_1(app):
-    with app.app_context():
-        redis = get_redis()
+    assert get_unavailable_track_ids([(1, 2, [3, 4])], spID_unavailable_track_ids) == [
+        1
+    ]
 
-    spID_2_key = get_unavailable_tracks_redis_key(2)
-    spID_3_key = get_unavailable_tracks_redis_key(3)
 
-    redis.sadd(spID_2_key, 1)
-    redis.sadd(spID_3_key, 1)
+def test_get_unavailable_track_ids__return_is_available_1(app):
     # Available on spID = 4
+    spID_unavailable_track_ids = {2: {1}, 3: {1}}
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
+    assert get_unavailable_track_ids([(1, 2, [3, 4])], spID_unavailable_track_ids) == []
 
 
-def test_check_track_is_available__return_is_available_2(app):
-    with app.app_context():
-        redis = get_redis()
-
-    spID_2_key = get_unavailable_tracks_redis_key(2)
-
-    redis.sadd(spID_2_key, 1)
+def test_get_unavailable_track_ids__return_is_available_2(app):
     # Available on spID = 3
     # Available on spID = 4
+    spID_unavailable_track_ids = {2: {1}}
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
-
+    assert get_unavailable_track_ids([(1, 2, [3, 4])], spID_unavailable_track_ids) == []
 
-def test_check_track_is_available__return_is_available_3(app):
-    with app.app_context():
-        redis = get_redis()
 
+def test_get_unavailable_track_ids__return_is_available_3(app):
     # Available on spID = 2
     # Available on spID = 3
     # Available on spID = 4
 
-    assert True == check_track_is_available(redis, 1, [2, 3, 4])
+    assert get_unavailable_track_ids([(1, 2, [3, 4])], {}) == []
+
+
+def test_get_unavailable_track_ids__no_replica_set(app):
+    # Tracks of users without a replica set default to available
+    spID_unavailable_track_ids = {2: {1, 2}, 3: {1, 2}, 4: {1, 2}}
+
+    assert get_unavailable_track_ids(
+        [(1, 2, [3, 4]), (2, None, [None, None])], spID_unavailable_track_ids
+    ) == [1]
 
 
 def test_query_tracks_by_track_id(app):
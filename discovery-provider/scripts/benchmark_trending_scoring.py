@@ -0,0 +1,83 @@
+"""
+Benchmarks scoring trending candidates one dict at a time against columnar scoring.
+
+Usage, from the discovery-provider directory:
+    python3 -m scripts.benchmark_trending_scoring --candidates 100000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.trending_strategies.EJ57D_trending_playlists_strategy import (
+    TrendingPlaylistsStrategyEJ57D,
+)
+from src.trending_strategies.EJ57D_underground_trending_tracks_strategy import (
+    UndergroundTrendingTracksStrategyEJ57D,
+)
+from src.trending_strategies.trending_scoring import to_scoring_columns, top_k_indexes
+
+TOP_K = 100
+
+
+def make_candidates(num_candidates):
+    now = datetime.now()
+    return [
+        {
+            "track_id": track_id,
+            "created_at": (
+                now - timedelta(days=random.randint(0, 30), hours=random.randint(0, 23))
+            ).isoformat(timespec="seconds"),
+            "listens": random.randint(0, 10000),
+            "windowed_repost_count": random.randint(0, 100),
+            "repost_count": random.randint(0, 1000),
+            "windowed_save_count": random.randint(0, 100),
+            "save_count": random.randint(0, 1000),
+            "owner_follower_count": random.randint(0, 1500),
+            "owner_verified": random.random() < 0.05,
+            "karma": random.randint(1, 500),
+        }
+        for track_id in range(num_candidates)
+    ]
+
+
+def score_rows(strategy, candidates):
+    scored = [strategy.get_track_score("week", track) for track in candidates]
+    top = sorted(scored, key=lambda k: k["score"], reverse=True)[:TOP_K]
+    return [track["track_id"] for track in top]
+
+
+def score_columns(strategy, candidates):
+    columns = to_scoring_columns(candidates, "track_id")
+    scores = strategy.get_track_scores("week", columns)
+    return columns["track_id"][top_k_indexes(scores, TOP_K)].tolist()
+
+
+def benchmark(name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"    {name}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=100000)
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates)
+    for strategy in [
+        UndergroundTrendingTracksStrategyEJ57D(),
+        TrendingPlaylistsStrategyEJ57D(),
+    ]:
+        print(
+            f"{strategy.trending_type.name} {strategy.version.name}, {args.candidates} candidates"
+        )
+        row_top = benchmark("row scoring", score_rows, strategy, candidates)
+        column_top = benchmark("columnar scoring", score_columns, strategy, candidates)
+        overlap = len(set(row_top) & set(column_top))
+        print(f"    top {TOP_K} overlap: {overlap}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import logging
 
+from flask import request
 from flask_restx import Namespace, Resource, abort, fields, reqparse
 from src.api.v1.helpers import (
     DescriptiveArgument,
@@ -12,16 +13,20 @@ from src.api.v1.helpers import (
 )
 from src.api.v1.models.challenges import (
     attestation,
+    attestation_request,
+    attestation_result,
     create_sender_attestation,
     undisbursed_challenge,
 )
 from src.queries.get_attestation import (
     AttestationError,
     get_attestation,
+    get_attestations,
     get_create_sender_attestation,
 )
 from src.queries.get_undisbursed_challenges import get_undisbursed_challenges
 from src.utils.db_session import get_db_read_replica
+from src.utils.helpers import decode_string_id
 from src.utils.redis_cache import cache
 
 logger = logging.getLogger(__name__)
@@ -94,6 +99,73 @@ class Attest(Resource):
                 return None
 
 
+attestations_route = "/attestations"
+
+# Max number of attestations in a single batch request
+MAX_ATTESTATIONS = 500
+
+attestations_response = make_response(
+    "attestations_response", ns, fields.List(fields.Nested(attestation_result))
+)
+
+
+@ns.route(attestations_route, doc=False)
+class Attestations(Resource):
+    @ns.doc(
+        id="Get Challenge Attestations",
+        description="Produces an attestation or an error for each of a batch of user challenges.",
+        responses={
+            200: "Success",
+            400: "The batch was malformed or too large",
+            500: "Server error",
+        },
+    )
+    @ns.expect([attestation_request])
+    @ns.marshal_with(attestations_response)
+    def post(self):
+        attestation_requests = request.get_json(silent=True)
+        if not isinstance(attestation_requests, list) or not all(
+            isinstance(attestation_request, dict)
+            for attestation_request in attestation_requests
+        ):
+            abort(400, "Expected a list of attestation requests")
+            return None
+        if len(attestation_requests) > MAX_ATTESTATIONS:
+            abort(400, f"Expected at most {MAX_ATTESTATIONS} attestation requests")
+            return None
+
+        db = get_db_read_replica()
+        with db.scoped_session() as session:
+            results = get_attestations(
+                session,
+                [
+                    {
+                        "challenge_id": attestation_request.get("challenge_id"),
+                        # Invalid ids fail with INVALID_INPUT
+                        "user_id": decode_string_id(
+                            str(attestation_request.get("user_id"))
+                        ),
+                        "oracle_address": attestation_request.get("oracle"),
+                        "specifier": attestation_request.get("specifier"),
+                    }
+                    for attestation_request in attestation_requests
+                ],
+            )
+            return success_response(
+                [
+                    {
+                        "challenge_id": attestation_request.get("challenge_id"),
+                        "user_id": attestation_request.get("user_id"),
+                        "specifier": attestation_request.get("specifier"),
+                        **result,
+                    }
+                    for (attestation_request, result) in zip(
+                        attestation_requests, results
+                    )
+                ]
+            )
+
+
 undisbursed_route = "/undisbursed"
 
 get_undisbursed_challenges_route_parser = pagination_parser.copy()
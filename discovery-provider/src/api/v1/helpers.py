@@ -3,17 +3,18 @@ from datetime import datetime
 from typing import Dict, cast
 
 from flask_restx import reqparse
-from src import api_helpers
+from src import api_helpers, exceptions
 from src.models import ChallengeType
 from src.queries.get_challenges import ChallengeResponse
 from src.queries.get_support_for_user import SupportResponse
 from src.queries.get_undisbursed_challenges import UndisbursedChallengeResponse
+from src.queries.query_helpers import decode_cursor
 from src.queries.reactions import ReactionResponse
 from src.utils.config import shared_config
 from src.utils.helpers import decode_string_id, encode_int_id
 from src.utils.spl_audio import to_wei_string
 
-from .models.common import full_response
+from .models.common import full_paginated_response, full_response
 
 logger = logging.getLogger(__name__)
 
@@ -377,6 +378,10 @@ def make_full_response(name, namespace, modelType):
     return namespace.clone(name, full_response, {"data": modelType})
 
 
+def make_full_paginated_response(name, namespace, modelType):
+    return namespace.clone(name, full_paginated_response, {"data": modelType})
+
+
 def to_dict(multi_dict):
     """Converts a multi dict into a dict where only list entries are not flat"""
     return {
@@ -484,6 +489,14 @@ pagination_with_current_user_parser.add_argument(
     "user_id", required=False, description="The user ID of the user making the request"
 )
 
+cursor_pagination_parser = pagination_with_current_user_parser.copy()
+cursor_pagination_parser.add_argument(
+    "cursor",
+    required=False,
+    type=str,
+    description="The next_cursor of the previous page. Takes precedence over offset",
+)
+
 search_parser = reqparse.RequestParser(argument_class=DescriptiveArgument)
 search_parser.add_argument("query", required=True, description="The search query")
 
@@ -530,6 +543,13 @@ def success_response(entity):
     return api_helpers.success_response(entity, 200, False)
 
 
+def paginated_success_response(entity, next_cursor):
+    response_dictionary = api_helpers.response_dict_with_metadata(
+        {"data": entity, "next_cursor": next_cursor}, True
+    )
+    return response_dictionary, 200
+
+
 DEFAULT_LIMIT = 100
 MIN_LIMIT = 1
 MAX_LIMIT = 500
@@ -552,6 +572,17 @@ def format_offset(args, max_offset=MAX_LIMIT):
     return max(min(int(offset), max_offset), MIN_OFFSET)
 
 
+def format_cursor(args, types, namespace):
+    """Decodes the cursor argument into a sort key, aborting on malformed cursors"""
+    cursor = args.get("cursor")
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, types)
+    except exceptions.ArgumentError:
+        abort_bad_request_param("cursor", namespace)
+
+
 def get_default_max(value, default, max=None):
     if not isinstance(value, int):
         return default
@@ -10,6 +10,28 @@ attestation = ns.model(
     },
 )
 
+attestation_request = ns.model(
+    "attestation_request",
+    {
+        "challenge_id": fields.String(required=True),
+        "user_id": fields.String(required=True),
+        "specifier": fields.String(required=True),
+        "oracle": fields.String(required=True),
+    },
+)
+
+attestation_result = ns.model(
+    "attestation_result",
+    {
+        "challenge_id": fields.String(required=True),
+        "user_id": fields.String(required=True),
+        "specifier": fields.String(required=True),
+        "owner_wallet": fields.String,
+        "attestation": fields.String,
+        "error": fields.String,
+    },
+)
+
 undisbursed_challenge = ns.model(
     "undisbursed_challenge",
     {
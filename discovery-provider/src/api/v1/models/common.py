@@ -38,3 +38,13 @@ full_response = ns.model(
         "version": fields.Nested(version_metadata, required=True),
     },
 )
+
+full_paginated_response = ns.clone(
+    "full_paginated_response",
+    full_response,
+    {
+        "next_cursor": fields.String(
+            description="Cursor of the next page, null on the last page"
+        ),
+    },
+)
@@ -6,17 +6,20 @@ from src.api.v1.helpers import (
     abort_bad_path_param,
     abort_bad_request_param,
     current_user_parser,
+    cursor_pagination_parser,
     decode_with_abort,
     extend_playlist,
     extend_track,
     extend_user,
+    format_cursor,
     full_trending_parser,
     get_current_user_id,
     get_default_max,
+    make_full_paginated_response,
     make_full_response,
     make_response,
+    paginated_success_response,
     pagination_parser,
-    pagination_with_current_user_parser,
     search_parser,
     success_response,
     trending_parser,
@@ -34,6 +37,7 @@ from src.queries.get_trending_playlists import (
     get_full_trending_playlists,
     get_trending_playlists,
 )
+from src.queries.query_helpers import USER_LIST_CURSOR_TYPES
 from src.queries.search_queries import SearchKind, search
 from src.trending_strategies.trending_strategy_factory import (
     DEFAULT_TRENDING_VERSIONS,
@@ -222,7 +226,7 @@ class Top(Resource):
         return success_response(playlists)
 
 
-playlist_favorites_response = make_full_response(
+playlist_favorites_response = make_full_paginated_response(
     "following_response", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -235,28 +239,30 @@ class FullTrackFavorites(Resource):
         params={"playlist_id": "A Playlist ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(playlist_favorites_response)
     @cache(ttl_sec=5)
     def get(self, playlist_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         decoded_id = decode_with_abort(playlist_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
         args = {
             "save_playlist_id": decoded_id,
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_savers_for_playlist(args)
+        (users, next_cursor) = get_savers_for_playlist(args)
         users = list(map(extend_user, users))
 
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
-playlist_reposts_response = make_full_response(
+playlist_reposts_response = make_full_paginated_response(
     "following_response", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -269,24 +275,26 @@ class FullPlaylistReposts(Resource):
         params={"playlist_id": "A Playlist ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(playlist_reposts_response)
     @cache(ttl_sec=5)
     def get(self, playlist_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         decoded_id = decode_with_abort(playlist_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
         args = {
             "repost_playlist_id": decoded_id,
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_reposters_for_playlist(args)
+        (users, next_cursor) = get_reposters_for_playlist(args)
         users = list(map(extend_user, users))
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
 trending_response = make_response(
@@ -10,18 +10,22 @@ from src.api.v1.helpers import (
     abort_bad_request_param,
     abort_not_found,
     current_user_parser,
+    cursor_pagination_parser,
     decode_ids_array,
     decode_with_abort,
     extend_track,
     extend_user,
+    format_cursor,
     format_limit,
     format_offset,
     full_trending_parser,
     get_current_user_id,
     get_default_max,
     get_encoded_track_id,
+    make_full_paginated_response,
     make_full_response,
     make_response,
+    paginated_success_response,
     pagination_with_current_user_parser,
     search_parser,
     stem_from_track,
@@ -52,6 +56,7 @@ from src.queries.get_trending import get_full_trending, get_trending
 from src.queries.get_trending_ids import get_trending_ids
 from src.queries.get_trending_tracks import TRENDING_LIMIT, TRENDING_TTL_SEC
 from src.queries.get_underground_trending import get_underground_trending
+from src.queries.query_helpers import FEED_CURSOR_TYPES, USER_LIST_CURSOR_TYPES
 from src.queries.search_queries import SearchKind, search
 from src.trending_strategies.trending_strategy_factory import (
     DEFAULT_TRENDING_VERSIONS,
@@ -449,8 +454,8 @@ class TrackSearchResult(Resource):
 #
 # However, this causes an issue where every distinct user_id (every logged in user) will have a cache miss
 # on their first call to trending. We deal with this by adding an additional layer of caching inside
-# `get_trending_tracks.py`, which caches the scored tracks before they are populated (keyed by genre + time).
-# With this second cache, each user_id can reuse on the same cached list of tracks, and then populate them uniquely.
+# `get_trending_tracks.py`, which caches the scored track ids as a redis sorted set (keyed by genre + time).
+# With this second cache, each user_id can page through the same sorted set, and then populate only that page uniquely.
 
 
 @ns.route(
@@ -742,7 +747,7 @@ class FullTrendingIds(Resource):
         return success_response(res)
 
 
-track_favorites_response = make_full_response(
+track_favorites_response = make_full_paginated_response(
     "track_favorites_response_full",
     full_ns,
     fields.List(fields.Nested(user_model_full)),
@@ -757,14 +762,15 @@ class FullTrackFavorites(Resource):
         params={"track_id": "A Track ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(track_favorites_response)
     @cache(ttl_sec=5)
     def get(self, track_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         decoded_id = decode_with_abort(track_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
 
         args = {
@@ -772,14 +778,15 @@ class FullTrackFavorites(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_savers_for_track(args)
+        (users, next_cursor) = get_savers_for_track(args)
         users = list(map(extend_user, users))
 
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
-track_reposts_response = make_full_response(
+track_reposts_response = make_full_paginated_response(
     "track_reposts_response_full", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -792,14 +799,15 @@ class FullTrackReposts(Resource):
         params={"track_id": "A Track ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(track_reposts_response)
     @cache(ttl_sec=5)
     def get(self, track_id):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         decoded_id = decode_with_abort(track_id, full_ns)
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
 
         args = {
@@ -807,10 +815,11 @@ class FullTrackReposts(Resource):
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_reposters_for_track(args)
+        (users, next_cursor) = get_reposters_for_track(args)
         users = list(map(extend_user, users))
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
 track_stems_response = make_full_response(
@@ -998,7 +1007,7 @@ This is generated in the following manner:
   - Sort combined results by 'timestamp' field and return
 """
 
-under_the_radar_parser = pagination_with_current_user_parser.copy()
+under_the_radar_parser = cursor_pagination_parser.copy()
 under_the_radar_parser.add_argument(
     "filter",
     required=False,
@@ -1020,6 +1029,10 @@ under_the_radar_parser.add_argument(
     description="Boolean to include user info with tracks",
 )
 
+under_the_radar_response = make_full_paginated_response(
+    "under_the_radar_response", full_ns, fields.List(fields.Nested(track_full))
+)
+
 
 @full_ns.route("/under_the_radar")
 class UnderTheRadar(Resource):
@@ -1029,7 +1042,7 @@ class UnderTheRadar(Resource):
         description="""Gets the tracks found on the \"Under the Radar\" smart playlist""",
     )
     @full_ns.expect(under_the_radar_parser)
-    @full_ns.marshal_with(full_tracks_response)
+    @full_ns.marshal_with(under_the_radar_response)
     @cache(ttl_sec=10)
     def get(self):
         request_args = under_the_radar_parser.parse_args()
@@ -1040,10 +1053,11 @@ class UnderTheRadar(Resource):
             "offset": format_offset(request_args),
             "user_id": get_current_user_id(request_args),
             "filter": request_args.get("filter"),
+            "cursor": format_cursor(request_args, FEED_CURSOR_TYPES, full_ns),
         }
-        feed_results = get_feed(args)
+        (feed_results, next_cursor) = get_feed(args)
         feed_results = list(map(extend_track, feed_results))
-        return success_response(feed_results)
+        return paginated_success_response(feed_results, next_cursor)
 
 
 most_loved_parser = current_user_parser.copy()
@@ -9,6 +9,7 @@ from src.api.v1.helpers import (
     abort_bad_request_param,
     abort_not_found,
     current_user_parser,
+    cursor_pagination_parser,
     decode_with_abort,
     extend_activity,
     extend_challenge_response,
@@ -17,12 +18,15 @@ from src.api.v1.helpers import (
     extend_supporting,
     extend_track,
     extend_user,
+    format_cursor,
     format_limit,
     format_offset,
     get_current_user_id,
     get_default_max,
+    make_full_paginated_response,
     make_full_response,
     make_response,
+    paginated_success_response,
     pagination_parser,
     pagination_with_current_user_parser,
     search_parser,
@@ -72,6 +76,7 @@ from src.queries.get_user_listening_history import (
 from src.queries.get_user_with_wallet import get_user_with_wallet
 from src.queries.get_users import get_users
 from src.queries.get_users_cnode import ReplicaType, get_users_cnode
+from src.queries.query_helpers import REPOST_FEED_CURSOR_TYPES, USER_LIST_CURSOR_TYPES
 from src.queries.search_queries import SearchKind, search
 from src.utils import web3_provider
 from src.utils.auth_middleware import auth_middleware
@@ -344,13 +349,13 @@ class RepostList(Resource):
             "limit": limit,
             "offset": offset,
         }
-        reposts = get_repost_feed_for_user(decoded_id, args)
+        (reposts, _) = get_repost_feed_for_user(decoded_id, args)
         activities = list(map(extend_activity, reposts))
 
         return success_response(activities)
 
 
-full_reposts_response = make_full_response(
+full_reposts_response = make_full_paginated_response(
     "full_reposts", full_ns, fields.List(fields.Nested(activity_model_full))
 )
 
@@ -366,17 +371,18 @@ class FullRepostList(Resource):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(full_reposts_response)
     @cache(ttl_sec=5)
     def get(self, id):
         decoded_id = decode_with_abort(id, ns)
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
 
         current_user_id = get_current_user_id(args)
 
         offset = format_offset(args)
         limit = format_limit(args)
+        cursor = format_cursor(args, REPOST_FEED_CURSOR_TYPES, full_ns)
 
         args = {
             "current_user_id": current_user_id,
@@ -384,8 +390,9 @@ class FullRepostList(Resource):
             "filter_deleted": True,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        reposts = get_repost_feed_for_user(decoded_id, args)
+        (reposts, next_cursor) = get_repost_feed_for_user(decoded_id, args)
         for repost in reposts:
             if "playlist_id" in repost:
                 repost["tracks"] = get_tracks_for_playlist(
@@ -393,7 +400,7 @@ class FullRepostList(Resource):
                 )
         activities = list(map(extend_activity, reposts))
 
-        return success_response(activities)
+        return paginated_success_response(activities, next_cursor)
 
 
 @full_ns.route("/handle/<string:handle>/reposts")
@@ -407,15 +414,16 @@ class HandleFullRepostList(Resource):
         },
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(full_reposts_response)
     @cache(ttl_sec=5)
     def get(self, handle):
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
 
         current_user_id = get_current_user_id(args)
         offset = format_offset(args)
         limit = format_limit(args)
+        cursor = format_cursor(args, REPOST_FEED_CURSOR_TYPES, full_ns)
 
         args = {
             "handle": handle,
@@ -424,8 +432,9 @@ class HandleFullRepostList(Resource):
             "filter_deleted": True,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        reposts = get_repost_feed_for_user(None, args)
+        (reposts, next_cursor) = get_repost_feed_for_user(None, args)
         for repost in reposts:
             if "playlist_id" in repost:
                 repost["tracks"] = get_tracks_for_playlist(
@@ -433,7 +442,7 @@ class HandleFullRepostList(Resource):
                 )
         activities = list(map(extend_activity, reposts))
 
-        return success_response(activities)
+        return paginated_success_response(activities, next_cursor)
 
 
 favorites_response = make_response(
@@ -591,7 +600,7 @@ class UserSearchResult(Resource):
         return success_response(response["users"])
 
 
-followers_response = make_full_response(
+followers_response = make_full_paginated_response(
     "followers_response", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -605,27 +614,29 @@ class FollowerUsers(Resource):
         params={"id": "A User ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @ns.expect(pagination_with_current_user_parser)
+    @ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(followers_response)
     @cache(ttl_sec=5)
     def get(self, id):
         decoded_id = decode_with_abort(id, full_ns)
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
         args = {
             "followee_user_id": decoded_id,
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_followers_for_user(args)
+        (users, next_cursor) = get_followers_for_user(args)
         users = list(map(extend_user, users))
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
-following_response = make_full_response(
+following_response = make_full_paginated_response(
     "following_response", full_ns, fields.List(fields.Nested(user_model_full))
 )
 
@@ -639,24 +650,26 @@ class FollowingUsers(Resource):
         params={"id": "A User ID"},
         responses={200: "Success", 400: "Bad request", 500: "Server error"},
     )
-    @full_ns.expect(pagination_with_current_user_parser)
+    @full_ns.expect(cursor_pagination_parser)
     @full_ns.marshal_with(following_response)
     @cache(ttl_sec=5)
     def get(self, id):
         decoded_id = decode_with_abort(id, full_ns)
-        args = pagination_with_current_user_parser.parse_args()
+        args = cursor_pagination_parser.parse_args()
         limit = get_default_max(args.get("limit"), 10, 100)
         offset = get_default_max(args.get("offset"), 0)
+        cursor = format_cursor(args, USER_LIST_CURSOR_TYPES, full_ns)
         current_user_id = get_current_user_id(args)
         args = {
             "follower_user_id": decoded_id,
             "current_user_id": current_user_id,
             "limit": limit,
             "offset": offset,
+            "cursor": cursor,
         }
-        users = get_followees_for_user(args)
+        (users, next_cursor) = get_followees_for_user(args)
         users = list(map(extend_user, users))
-        return success_response(users)
+        return paginated_success_response(users, next_cursor)
 
 
 related_artist_route_parser = pagination_with_current_user_parser.copy()
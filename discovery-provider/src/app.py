@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
 import ast
-import datetime
 import logging
 import time
 from collections import defaultdict
@@ -10,13 +9,12 @@ from typing import Any, Dict
 import redis
 from celery.schedules import crontab, timedelta
 from flask import Flask
-from flask.json import JSONEncoder
 from flask_cors import CORS
 from sqlalchemy import exc
 from sqlalchemy_utils import create_database, database_exists
 from src import api_helpers, exceptions
 from src.api.v1 import api as api_v1
-from src.challenges.challenge_event_bus import setup_challenge_bus
+from src.challenges.challenge_event_bus import NUM_EVENT_PARTITIONS, setup_challenge_bus
 from src.challenges.create_new_challenges import create_new_challenges
 from src.database_task import DatabaseTask
 from src.eth_indexing.event_scanner import eth_indexing_last_scanned_block_key
@@ -33,16 +31,23 @@ from src.queries import (
     skipped_transactions,
     user_signals,
 )
+from src.queries.search_autocomplete import start_autocomplete_indexes
 from src.solana.anchor_program_indexer import AnchorProgramIndexer
 from src.solana.solana_client_manager import SolanaClientManager
 from src.tasks import celery_app
+from src.tasks.index_autocomplete_changefeed import INDEX_AUTOCOMPLETE_CHANGEFEED_LOCK
+from src.tasks.index_challenges import get_index_challenges_lock_key
+from src.tasks.index_notifications_changefeed import INDEX_NOTIFICATIONS_CHANGEFEED_LOCK
 from src.tasks.index_reactions import INDEX_REACTIONS_LOCK
+from src.tasks.index_related_artists import RECALCULATE_RELATED_ARTISTS_LOCK
 from src.tasks.update_track_is_available import UPDATE_TRACK_IS_AVAILABLE_LOCK
 from src.utils import helpers
 from src.utils.cid_metadata_client import CIDMetadataClient
 from src.utils.config import ConfigIni, config_files, shared_config
 from src.utils.multi_provider import MultiProvider
+from src.utils.redis_connection import get_redis
 from src.utils.redis_metrics import METRICS_INTERVAL, SYNCHRONIZE_METRICS_INTERVAL
+from src.utils.request_costs import add_server_timing_header, start_request_costs
 from src.utils.session_manager import SessionManager
 from web3 import HTTPProvider, Web3
 from werkzeug.middleware.proxy_fix import ProxyFix
@@ -237,6 +242,9 @@ def create(test_config=None, mode="app"):
         session_manager = app.db_session_manager
         with session_manager.scoped_session() as session:
             create_new_challenges(session)
+        # Load the search autocomplete indexes of this worker in the background
+        if test_config is None:
+            start_autocomplete_indexes(app.db_read_replica_session_manager, get_redis())
         return app
 
     if mode == "celery":
@@ -271,15 +279,7 @@ def configure_flask(test_config, app, mode="app"):
         app.iniconfig.read(config_files)
 
     # custom JSON serializer for timestamps
-    class TimestampJSONEncoder(JSONEncoder):
-        # pylint: disable=E0202
-        def default(self, o):
-            if isinstance(o, datetime.datetime):
-                # ISO-8601 timestamp format
-                return o.strftime("%Y-%m-%dT%H:%M:%S Z")
-            return JSONEncoder.default(self, o)
-
-    app.json_encoder = TimestampJSONEncoder
+    app.json_encoder = helpers.TimestampJSONEncoder
 
     database_url = app.config["db"]["url"]
     if test_config is not None:
@@ -322,6 +322,10 @@ def configure_flask(test_config, app, mode="app"):
         ast.literal_eval(app.config["db"]["engine_args_literal"]),
     )
 
+    # Account for the SQL and redis costs of each request
+    app.before_request(start_request_costs)
+    app.after_request(add_server_timing_header)
+
     # Register route blueprints
     register_exception_handlers(app)
     app.register_blueprint(queries.bp)
@@ -372,9 +376,7 @@ def configure_celery(celery, test_config=None):
             "src.tasks.index_blacklist",
             "src.tasks.index_metrics",
             "src.tasks.index_materialized_views",
-            "src.tasks.aggregates.index_aggregate_plays",
-            "src.tasks.index_aggregate_monthly_plays",
-            "src.tasks.index_hourly_play_counts",
+            "src.tasks.aggregates.index_play_rollups",
             "src.tasks.vacuum_db",
             "src.tasks.index_network_peers",
             "src.tasks.index_trending",
@@ -384,7 +386,9 @@ def configure_celery(celery, test_config=None):
             "src.tasks.index_solana_plays",
             "src.tasks.index_aggregate_views",
             "src.tasks.index_aggregate_user",
+            "src.tasks.index_aggregate_user_aged_followers",
             "src.tasks.aggregates.index_aggregate_track",
+            "src.tasks.aggregates.reconcile_aggregates",
             "src.tasks.index_challenges",
             "src.tasks.index_user_bank",
             "src.tasks.index_eth",
@@ -400,6 +404,9 @@ def configure_celery(celery, test_config=None):
             "src.tasks.index_aggregate_tips",
             "src.tasks.index_reactions",
             "src.tasks.update_track_is_available",
+            "src.tasks.index_notifications_changefeed",
+            "src.tasks.index_autocomplete_changefeed",
+            "src.tasks.index_feed_timelines",
         ],
         beat_schedule={
             "update_discovery_provider": {
@@ -426,14 +433,10 @@ def configure_celery(celery, test_config=None):
                 "task": "update_materialized_views",
                 "schedule": timedelta(seconds=300),
             },
-            "update_aggregate_plays": {
-                "task": "update_aggregate_plays",
+            "index_play_rollups": {
+                "task": "index_play_rollups",
                 "schedule": timedelta(seconds=15),
             },
-            "index_hourly_play_counts": {
-                "task": "index_hourly_play_counts",
-                "schedule": timedelta(seconds=30),
-            },
             "vacuum_db": {
                 "task": "vacuum_db",
                 "schedule": timedelta(days=1),
@@ -466,10 +469,18 @@ def configure_celery(celery, test_config=None):
                 "task": "update_aggregate_user",
                 "schedule": timedelta(seconds=30),
             },
+            "update_aggregate_user_aged_followers": {
+                "task": "update_aggregate_user_aged_followers",
+                "schedule": timedelta(seconds=30),
+            },
             "update_aggregate_track": {
                 "task": "update_aggregate_track",
                 "schedule": timedelta(seconds=30),
             },
+            "reconcile_aggregates": {
+                "task": "reconcile_aggregates",
+                "schedule": timedelta(minutes=1),
+            },
             "update_aggregate_playlist": {
                 "task": "update_aggregate_playlist",
                 "schedule": timedelta(seconds=30),
@@ -498,6 +509,11 @@ def configure_celery(celery, test_config=None):
                 "task": "index_related_artists",
                 "schedule": timedelta(seconds=60),
             },
+            "recalculate_related_artists": {
+                "task": "recalculate_related_artists",
+                # weekly during non peak hours, within CALCULATION_TTL
+                "schedule": crontab(minute=0, hour=14, day_of_week=0),
+            },
             "index_listen_count_milestones": {
                 "task": "index_listen_count_milestones",
                 "schedule": timedelta(seconds=5),
@@ -506,10 +522,6 @@ def configure_celery(celery, test_config=None):
                 "task": "index_user_listening_history",
                 "schedule": timedelta(seconds=5),
             },
-            "index_aggregate_monthly_plays": {
-                "task": "index_aggregate_monthly_plays",
-                "schedule": crontab(minute=0, hour=0),  # daily at midnight
-            },
             "prune_plays": {
                 "task": "prune_plays",
                 "schedule": crontab(
@@ -532,7 +544,23 @@ def configure_celery(celery, test_config=None):
             "update_track_is_available": {
                 "task": "update_track_is_available",
                 "schedule": timedelta(hours=12),  # run every 12 hours
-            }
+            },
+            "index_notifications_changefeed": {
+                "task": "index_notifications_changefeed",
+                "schedule": timedelta(seconds=5),
+            },
+            "index_autocomplete_changefeed": {
+                "task": "index_autocomplete_changefeed",
+                "schedule": timedelta(seconds=5),
+            },
+            "index_feed_timelines": {
+                "task": "index_feed_timelines",
+                "schedule": timedelta(seconds=5),
+            },
+            "trim_feed_timelines": {
+                "task": "trim_feed_timelines",
+                "schedule": crontab(minute=0, hour=15),  # daily during non peak hours
+            },
             # UNCOMMENT BELOW FOR MIGRATION DEV WORK
             # "index_solana_user_data": {
             #     "task": "index_solana_user_data",
@@ -581,13 +609,13 @@ def configure_celery(celery, test_config=None):
     redis_inst.delete("materialized_view_lock")
     redis_inst.delete("update_metrics_lock")
     redis_inst.delete("update_play_count_lock")
-    redis_inst.delete("index_hourly_play_counts_lock")
     redis_inst.delete("ipld_blacklist_lock")
     redis_inst.delete("update_discovery_lock")
     redis_inst.delete("aggregate_metrics_lock")
     redis_inst.delete("synchronize_metrics_lock")
     redis_inst.delete("solana_plays_lock")
-    redis_inst.delete("index_challenges_lock")
+    for partition in range(NUM_EVENT_PARTITIONS):
+        redis_inst.delete(get_index_challenges_lock_key(partition))
     redis_inst.delete("user_bank_lock")
     redis_inst.delete("index_eth_lock")
     redis_inst.delete("index_oracles_lock")
@@ -597,7 +625,12 @@ def configure_celery(celery, test_config=None):
     redis_inst.delete("prune_plays_lock")
     redis_inst.delete("update_aggregate_table:aggregate_user_tips")
     redis_inst.delete(INDEX_REACTIONS_LOCK)
+    redis_inst.delete(RECALCULATE_RELATED_ARTISTS_LOCK)
     redis_inst.delete(UPDATE_TRACK_IS_AVAILABLE_LOCK)
+    redis_inst.delete(INDEX_NOTIFICATIONS_CHANGEFEED_LOCK)
+    redis_inst.delete(INDEX_AUTOCOMPLETE_CHANGEFEED_LOCK)
+    redis_inst.delete("update_aggregate_table:feed_timelines")
+    redis_inst.delete("update_aggregate_table:trim_feed_timelines")
 
     logger.info("Redis instance initialized!")
 
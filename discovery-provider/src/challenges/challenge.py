@@ -83,12 +83,28 @@ class ChallengeUpdater(ABC):
         """
         return True
 
+    def should_create_new_challenges(
+        self, session: Session, event: str, metadatas: List[FullEventMetadata]
+    ) -> List[bool]:
+        """Batched `should_create_new_challenge`, called once per processed batch of events.
+        Returns whether to create a challenge for each of the metadatas, in order.
+        Override this rather than `should_create_new_challenge` to answer a batch in a single query.
+        """
+        return [
+            self.should_create_new_challenge(
+                session, event, metadata["user_id"], metadata["extra"]
+            )
+            for metadata in metadatas
+        ]
+
     def should_show_challenge_for_user(self, session: Session, user_id: int) -> bool:
         """Optional method to show/hide a challenge for a particular user."""
         return True
 
     def get_metadata(self, session: Session, specifiers: List[str]) -> List[Dict]:
-        """Optional method to provide any extra metadata required for client to properly display a challenge."""
+        """Optional method to provide any extra metadata required for client to properly display a challenge.
+        Called once with all of the specifiers to display, so overrides should fetch them in a single query.
+        """
         return [{} for s in specifiers]
 
     def get_default_metadata(self) -> Dict:
@@ -214,20 +230,24 @@ class ChallengeManager:
                     .group_by(UserChallenge.user_id)
                 ).all()
                 challenges_per_user = dict(all_user_challenges)
+                should_create = (
+                    self._updater.should_create_new_challenges(
+                        session, event_type, new_challenge_metadata
+                    )
+                    if new_challenge_metadata
+                    else []
+                )
                 new_user_challenges_specifiers: Dict[int, Set[str]] = defaultdict(set)
-                for new_metadata in new_challenge_metadata:
+                for new_metadata, should_create_challenge in zip(
+                    new_challenge_metadata, should_create
+                ):
                     user_id = new_metadata["user_id"]
                     completion_count = challenges_per_user.get(user_id, 0) + len(
                         new_user_challenges_specifiers[user_id]
                     )
                     if self._step_count and completion_count >= self._step_count:
                         continue
-                    if not self._updater.should_create_new_challenge(
-                        session,
-                        event_type,
-                        new_metadata["user_id"],
-                        new_metadata["extra"],
-                    ):
+                    if not should_create_challenge:
                         continue
                     new_user_challenges_specifiers[user_id].add(
                         new_metadata["specifier"]
@@ -254,14 +274,15 @@ class ChallengeManager:
 
             # Filter out challenges for deactivated users
             to_update_user_ids = list({c.user_id for c in to_update})
-            deactivated_user_ids = (
-                session.query(User.user_id)
-                .filter(
-                    User.user_id.in_(to_update_user_ids),
-                    User.is_deactivated == True,
-                )
-                .all()
-            )
+            deactivated_user_ids: Set[int] = set()
+            if to_update_user_ids:
+                deactivated_user_ids = {
+                    user_id
+                    for (user_id,) in session.query(User.user_id).filter(
+                        User.user_id.in_(to_update_user_ids),
+                        User.is_deactivated == True,
+                    )
+                }
             to_create_metadata = list(
                 filter(
                     lambda c: c["user_id"] not in deactivated_user_ids,
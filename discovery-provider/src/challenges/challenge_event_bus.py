@@ -1,9 +1,13 @@
 import json
 import logging
+import os
+import socket
+import time
 from collections import defaultdict
 from contextlib import contextmanager
-from typing import Any, DefaultDict, Dict, List, Tuple, TypedDict
+from typing import Any, DefaultDict, Dict, List, Optional, Set, Tuple, TypedDict
 
+from redis.exceptions import ResponseError
 from sqlalchemy.orm.session import Session
 from src.challenges.challenge import ChallengeManager, EventMetadata
 from src.challenges.challenge_event import ChallengeEvent
@@ -23,10 +27,30 @@ from src.challenges.trending_challenge import (
     trending_track_challenge_manager,
     trending_underground_track_challenge_manager,
 )
+from src.utils.prometheus_metric import PrometheusMetric, PrometheusType
 from src.utils.redis_connection import get_redis
 
 logger = logging.getLogger(__name__)
+# Legacy list queue, drained into the event streams on processing
 REDIS_QUEUE_PREFIX = "challenges-event-queue"
+REDIS_STREAM_PREFIX = "challenges-event-stream"
+REDIS_CONSUMER_GROUP = "challenge-managers"
+
+# Events are partitioned by user_id so that each partition can be processed
+# by a separate worker while a user's events stay in order
+NUM_EVENT_PARTITIONS = 8
+
+# Pending events delivered to a consumer that hasn't acked them within this
+# many milliseconds are assumed lost (e.g. the worker died) and reclaimed
+PENDING_EVENT_IDLE_MS = 5 * 60 * 1000
+
+
+def get_event_partition(user_id: int) -> int:
+    return user_id % NUM_EVENT_PARTITIONS
+
+
+def get_event_stream_key(partition: int) -> str:
+    return f"{REDIS_STREAM_PREFIX}:{partition}"
 
 
 class InternalEvent(TypedDict):
@@ -36,11 +60,19 @@ class InternalEvent(TypedDict):
     extra: Dict
 
 
+class EventPartitionStats(TypedDict):
+    # Number of events in the partition that haven't been acked yet
+    backlog: int
+    # Seconds since the oldest unacked event was dispatched
+    lag_sec: float
+
+
 class ChallengeEventBus:
     """`ChallengeEventBus` supports:
-    - dispatching challenge events to a Redis queue
+    - dispatching challenge events to Redis streams, partitioned by user_id
     - registering challenge managers to listen to the events.
-    - consuming items from the Redis queue
+    - consuming items from the Redis streams through a consumer group,
+        acking them once processed and reclaiming events abandoned by other consumers
     - fetching the manager for a given challenge
     """
 
@@ -48,12 +80,16 @@ class ChallengeEventBus:
     _redis: Any
     _managers: Dict[str, ChallengeManager]
     _in_memory_queue: List[InternalEvent]
+    _consumer_name: str
+    _groups_created: Set[str]
 
     def __init__(self, redis):
         self._listeners = defaultdict(lambda: [])
         self._redis = redis
         self._managers = {}
         self._in_memory_queue: List[Dict] = []
+        self._consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+        self._groups_created = set()
 
     def register_listener(self, event: ChallengeEvent, listener: ChallengeManager):
         """Registers a listener (`ChallengeManager`) to listen for a particular event type."""
@@ -90,60 +126,172 @@ class ChallengeEventBus:
 
         Does not dispatch to Redis until flush is called or a scoped dispatch queue goes out of scope
         """
-        if extra is None:
-            extra = {}
-        # Sanitize input, drop the event if it's malformed
+        self.dispatch_many(event, [(block_number, user_id, extra)])
+
+    def dispatch_many(
+        self,
+        event: ChallengeEvent,
+        events: List[Tuple[int, int, Optional[Dict]]],
+    ):
+        """Dispatches many (block_number, user_id, extra) events of the same type to the in memory queue."""
         valid_event = event is not None and isinstance(event, str)
-        valid_block = block_number is not None and isinstance(block_number, int)
-        valid_user = user_id is not None and isinstance(user_id, int)
-        valid_extra = extra is not None and isinstance(extra, dict)
-        if not (valid_event and valid_block and valid_user and valid_extra):
-            logger.warning(
-                f"ChallengeEventBus: ignoring invalid event: {(event, block_number, user_id, extra)}"
-            )
-            return
+        for block_number, user_id, extra in events:
+            if extra is None:
+                extra = {}
+            # Sanitize input, drop the event if it's malformed
+            valid_block = block_number is not None and isinstance(block_number, int)
+            valid_user = user_id is not None and isinstance(user_id, int)
+            valid_extra = extra is not None and isinstance(extra, dict)
+            if not (valid_event and valid_block and valid_user and valid_extra):
+                logger.warning(
+                    f"ChallengeEventBus: ignoring invalid event: {(event, block_number, user_id, extra)}"
+                )
+                continue
 
-        self._in_memory_queue.append(
-            {
-                "event": event,
-                "block_number": block_number,
-                "user_id": user_id,
-                "extra": extra,
-            }
-        )
+            self._in_memory_queue.append(
+                {
+                    "event": event,
+                    "block_number": block_number,
+                    "user_id": user_id,
+                    "extra": extra,
+                }
+            )
 
     def flush(self):
-        """Flushes the in-memory queue of events and enqueues them to Redis"""
+        """Flushes the in-memory queue of events and enqueues them to Redis in a single pipeline"""
+        metric = PrometheusMetric(
+            "challenge_event_bus_flush_duration_seconds",
+            "Runtimes for src.challenges.challenge_event_bus:ChallengeEventBus.flush()",
+        )
+        num_events = len(self._in_memory_queue)
         logger.info(
-            f"ChallengeEventBus: Flushing {len(self._in_memory_queue)} events from in-memory queue"
+            f"ChallengeEventBus: Flushing {num_events} events from in-memory queue"
         )
-        for event in self._in_memory_queue:
+        if num_events == 0:
+            return
+        try:
+            stream_events = self._serialize_events(self._in_memory_queue)
             try:
-                event_json = self._event_to_json(
-                    event["event"],
-                    event["block_number"],
-                    event["user_id"],
-                    event.get("extra", {}),
-                )
-                logger.info(f"ChallengeEventBus: dispatch {event_json}")
-                self._redis.rpush(REDIS_QUEUE_PREFIX, event_json)
+                num_dispatched = self._add_to_streams(stream_events)
             except Exception as e:
-                logger.warning(f"ChallengeEventBus: error enqueuing to Redis: {e}")
-        self._in_memory_queue.clear()
+                # The pipeline failed as a whole (e.g. the connection dropped),
+                # fall back to adding events one at a time so valid events aren't lost
+                logger.warning(
+                    f"ChallengeEventBus: error enqueuing pipeline to Redis, retrying events one by one: {e}"
+                )
+                num_dispatched = 0
+                for stream_key, event_json in stream_events:
+                    try:
+                        self._redis.xadd(stream_key, {"event": event_json})
+                        num_dispatched += 1
+                    except Exception as xadd_error:
+                        logger.warning(
+                            f"ChallengeEventBus: error enqueuing to Redis: {xadd_error}"
+                        )
+            logger.info(f"ChallengeEventBus: dispatched {num_dispatched} events")
+        finally:
+            self._in_memory_queue.clear()
+            metric.save_time()
 
-    def process_events(self, session: Session, max_events=1000) -> Tuple[int, bool]:
-        """Dequeues `max_events` from Redis queue and processes them, forwarding to listening ChallengeManagers.
+    def process_events(
+        self,
+        session: Session,
+        max_events=1000,
+        partitions: Optional[List[int]] = None,
+    ) -> Tuple[int, bool]:
+        """Reads up to `max_events` from each Redis stream partition and processes them,
+        forwarding to listening ChallengeManagers. Processes every partition unless `partitions` is given.
         Returns (num_processed_events, did_error).
         Will return -1 as num_processed_events if an error prevented any events from
         being processed (i.e. some error deserializing from Redis)
         """
         try:
-            # get the first max_events elements.
-            events_json = self._redis.lrange(REDIS_QUEUE_PREFIX, 0, max_events)
-            logger.info(f"ChallengeEventBus: dequeued {len(events_json)} events")
-            # trim the first from the front of the list
-            self._redis.ltrim(REDIS_QUEUE_PREFIX, len(events_json), -1)
-            events_dicts = list(map(self._json_to_event, events_json))
+            self._drain_legacy_queue()
+        except Exception as e:
+            logger.warning(f"ChallengeEventBus: error draining legacy queue: {e}")
+        if partitions is None:
+            partitions = list(range(NUM_EVENT_PARTITIONS))
+
+        num_processed = 0
+        did_error = False
+        did_read_error = False
+        for partition in partitions:
+            (partition_processed, partition_did_error) = self._process_partition(
+                session, partition, max_events
+            )
+            if partition_processed == -1:
+                did_read_error = True
+            else:
+                num_processed += partition_processed
+            did_error = did_error or partition_did_error
+        if did_read_error and num_processed == 0:
+            return (-1, True)
+        return (num_processed, did_error)
+
+    def get_partition_stats(self) -> Dict[int, EventPartitionStats]:
+        """Returns the backlog and lag of each event stream partition"""
+        pipe = self._redis.pipeline()
+        for partition in range(NUM_EVENT_PARTITIONS):
+            stream_key = get_event_stream_key(partition)
+            pipe.xlen(stream_key)
+            # Processed events are deleted, so the first entry is the oldest unacked one
+            pipe.xrange(stream_key, count=1)
+        results = pipe.execute()
+
+        now_ms = time.time() * 1000
+        stats: Dict[int, EventPartitionStats] = {}
+        for partition in range(NUM_EVENT_PARTITIONS):
+            backlog, oldest = results[2 * partition], results[2 * partition + 1]
+            lag_sec = 0.0
+            if oldest:
+                dispatched_ms = int(oldest[0][0].decode().split("-")[0])
+                lag_sec = max(now_ms - dispatched_ms, 0) / 1000
+            stats[partition] = {"backlog": backlog, "lag_sec": lag_sec}
+        return stats
+
+    def record_partition_metrics(self) -> Dict[int, EventPartitionStats]:
+        """Saves the backlog and lag of each partition to prometheus"""
+        stats = self.get_partition_stats()
+        backlog_metric = PrometheusMetric(
+            "challenge_events_backlog",
+            "Number of unprocessed challenge events per partition",
+            ("partition",),
+            PrometheusType.GAUGE,
+        )
+        lag_metric = PrometheusMetric(
+            "challenge_events_lag_seconds",
+            "Age of the oldest unprocessed challenge event per partition",
+            ("partition",),
+            PrometheusType.GAUGE,
+        )
+        for partition, partition_stats in stats.items():
+            labels = {"partition": str(partition)}
+            backlog_metric.save(partition_stats["backlog"], labels)
+            lag_metric.save(partition_stats["lag_sec"], labels)
+        return stats
+
+    def _process_partition(
+        self, session: Session, partition: int, max_events: int
+    ) -> Tuple[int, bool]:
+        stream_key = get_event_stream_key(partition)
+        try:
+            self._ensure_consumer_group(stream_key)
+            # Events abandoned by a consumer that died before acking come first
+            entries = self._reclaim_pending_events(stream_key, max_events)
+            if len(entries) < max_events:
+                response = self._redis.xreadgroup(
+                    REDIS_CONSUMER_GROUP,
+                    self._consumer_name,
+                    {stream_key: ">"},
+                    count=max_events - len(entries),
+                )
+                for _, stream_entries in response:
+                    entries.extend(stream_entries)
+            logger.info(
+                f"ChallengeEventBus: read {len(entries)} events from {stream_key}"
+            )
+            entry_ids = [entry_id for entry_id, _ in entries]
+            events_dicts = self._entries_to_events(entries)
 
             # Consolidate event types for processing
             # map of {"event_type": [{ user_id: number, block_number: number, extra: {} }]}}
@@ -163,6 +311,8 @@ class ChallengeEventBus:
                 )
         except Exception as e:
             logger.warning(f"ChallengeEventBus: error processing from Redis: {e}")
+            # Recreate the consumer group next time in case the stream was removed
+            self._groups_created.discard(stream_key)
             return (-1, True)
 
         did_error = False
@@ -179,10 +329,113 @@ class ChallengeEventBus:
                     )
                     did_error = True
 
-        return (len(events_json), did_error)
+        # Errors from managers are swallowed above, so the events are acked either way
+        # to keep a bad event from being redelivered forever
+        if entry_ids:
+            pipe = self._redis.pipeline()
+            pipe.xack(stream_key, REDIS_CONSUMER_GROUP, *entry_ids)
+            pipe.xdel(stream_key, *entry_ids)
+            pipe.execute()
+
+        return (len(entry_ids), did_error)
 
     # Helpers
 
+    def _ensure_consumer_group(self, stream_key: str):
+        if stream_key in self._groups_created:
+            return
+        try:
+            self._redis.xgroup_create(
+                stream_key, REDIS_CONSUMER_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise e
+        self._groups_created.add(stream_key)
+
+    def _reclaim_pending_events(self, stream_key: str, max_events: int) -> List:
+        """Claims pending events that other consumers have left unacked for too long"""
+        pending = self._redis.xpending_range(
+            stream_key, REDIS_CONSUMER_GROUP, "-", "+", max_events
+        )
+        stale_ids = [
+            entry["message_id"]
+            for entry in pending
+            if entry["time_since_delivered"] >= PENDING_EVENT_IDLE_MS
+        ]
+        if not stale_ids:
+            return []
+        logger.warning(
+            f"ChallengeEventBus: reclaiming {len(stale_ids)} pending events from {stream_key}"
+        )
+        return self._redis.xclaim(
+            stream_key,
+            REDIS_CONSUMER_GROUP,
+            self._consumer_name,
+            PENDING_EVENT_IDLE_MS,
+            stale_ids,
+        )
+
+    def _drain_legacy_queue(self):
+        """Moves events left in the legacy list queue into the event streams"""
+        pipe = self._redis.pipeline()
+        pipe.lrange(REDIS_QUEUE_PREFIX, 0, -1)
+        pipe.delete(REDIS_QUEUE_PREFIX)
+        events_json, _ = pipe.execute()
+        if not events_json:
+            return
+        logger.info(
+            f"ChallengeEventBus: moving {len(events_json)} events from legacy queue"
+        )
+        pipe = self._redis.pipeline(transaction=False)
+        for event_json in events_json:
+            event = self._json_to_event(event_json)
+            pipe.xadd(
+                get_event_stream_key(get_event_partition(event["user_id"])),
+                {"event": event_json},
+            )
+        pipe.execute()
+
+    def _serialize_events(self, events: List[InternalEvent]) -> List[Tuple[str, str]]:
+        """Returns the (stream_key, event_json) of each event, dropping events that can't be serialized"""
+        stream_events = []
+        for event in events:
+            try:
+                event_json = self._event_to_json(
+                    event["event"],
+                    event["block_number"],
+                    event["user_id"],
+                    event.get("extra", {}),
+                )
+            except Exception as e:
+                logger.warning(
+                    f"ChallengeEventBus: dropping event that can't be serialized {event}: {e}"
+                )
+                continue
+            stream_events.append(
+                (
+                    get_event_stream_key(get_event_partition(event["user_id"])),
+                    event_json,
+                )
+            )
+        return stream_events
+
+    def _add_to_streams(self, stream_events: List[Tuple[str, str]]) -> int:
+        """Adds events to their streams in a single pipeline, returns the number added"""
+        pipe = self._redis.pipeline(transaction=False)
+        for stream_key, event_json in stream_events:
+            pipe.xadd(stream_key, {"event": event_json})
+        results = pipe.execute(raise_on_error=False)
+        num_added = 0
+        for (stream_key, event_json), result in zip(stream_events, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"ChallengeEventBus: error enqueuing {event_json} to {stream_key}: {result}"
+                )
+            else:
+                num_added += 1
+        return num_added
+
     def _event_to_json(self, event: str, block_number: int, user_id: int, extra: Dict):
         event_dict = {
             "event": event,
@@ -195,6 +448,30 @@ class ChallengeEventBus:
     def _json_to_event(self, event_json) -> InternalEvent:
         return json.loads(event_json)
 
+    def _entries_to_events(self, entries: List) -> List[InternalEvent]:
+        """Decodes a batch of stream entries with a single json parse,
+        falling back to decoding entry by entry to drop malformed events"""
+        try:
+            events_json = b",".join(fields[b"event"] for _, fields in entries)
+            events = json.loads(b"[" + events_json + b"]")
+            if len(events) == len(entries) and all(
+                isinstance(event, dict) for event in events
+            ):
+                return events
+        except Exception:
+            pass
+
+        events = []
+        for entry_id, fields in entries:
+            try:
+                events.append(self._json_to_event(fields[b"event"]))
+            except Exception as e:
+                # Malformed events are acked along with the rest so they aren't redelivered
+                logger.warning(
+                    f"ChallengeEventBus: dropping malformed event {entry_id}: {e}"
+                )
+        return events
+
 
 def setup_challenge_bus():
     redis = get_redis()
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from sqlalchemy.orm.session import Session
 from src.challenges.challenge import (
@@ -29,6 +29,29 @@ def does_user_exist_with_verification_status(
     return bool(user)
 
 
+def get_user_ids_with_verification_status(
+    session, user_ids: List[int], is_verified: bool
+) -> Set[int]:
+    """Returns which of the user_ids exist with the given verification status"""
+    return {
+        user_id
+        for (user_id,) in session.query(User.user_id).filter(
+            User.user_id.in_(user_ids),
+            User.is_current == True,
+            User.is_verified == is_verified,
+        )
+    }
+
+
+def should_create_referral_challenges(
+    session, metadatas: List[FullEventMetadata], is_verified: bool
+) -> List[bool]:
+    user_ids = get_user_ids_with_verification_status(
+        session, list({metadata["user_id"] for metadata in metadatas}), is_verified
+    )
+    return [metadata["user_id"] in user_ids for metadata in metadatas]
+
+
 class ReferralChallengeUpdater(ChallengeUpdater):
     def generate_specifier(self, user_id: int, extra: Dict) -> str:
         return generate_referral_specifier(user_id, extra)
@@ -38,6 +61,11 @@ class ReferralChallengeUpdater(ChallengeUpdater):
     ) -> bool:
         return does_user_exist_with_verification_status(session, user_id, False)
 
+    def should_create_new_challenges(
+        self, session, event: str, metadatas: List[FullEventMetadata]
+    ) -> List[bool]:
+        return should_create_referral_challenges(session, metadatas, False)
+
     def should_show_challenge_for_user(self, session: Session, user_id: int) -> bool:
         return does_user_exist_with_verification_status(session, user_id, False)
 
@@ -51,6 +79,11 @@ class VerifiedReferralChallengeUpdater(ChallengeUpdater):
     ) -> bool:
         return does_user_exist_with_verification_status(session, user_id, True)
 
+    def should_create_new_challenges(
+        self, session, event: str, metadatas: List[FullEventMetadata]
+    ) -> List[bool]:
+        return should_create_referral_challenges(session, metadatas, True)
+
     def should_show_challenge_for_user(self, session: Session, user_id: int) -> bool:
         return does_user_exist_with_verification_status(session, user_id, True)
 
@@ -1,5 +1,8 @@
 from .aggregate_interval_play import AggregateIntervalPlay
+from .aggregate_item_karma import AggregateItemKarma
+from .aggregate_user_aged_followers import AggregateUserAgedFollowers
 from .aggregate_user_tips import AggregateUserTips
+from .feed_timeline import FeedTimeline
 from .milestone import Milestone
 from .models import (
     AggregateDailyAppNameMetrics,
@@ -82,8 +85,10 @@ __all__ = [
     "AggregateMonthlyPlays",
     "AggregateTrack",
     "AggregateUser",
+    "AggregateUserAgedFollowers",
     "AggregateUserTips",
     "AggregateIntervalPlay",
+    "AggregateItemKarma",
     "AppMetricsAllTime",
     "AppMetricsTrailingMonth",
     "AppMetricsTrailingWeek",
@@ -96,6 +101,7 @@ __all__ = [
     "Challenge",
     "ChallengeDisbursement",
     "ChallengeType",
+    "FeedTimeline",
     "Follow",
     "HourlyPlayCounts",
     "IPLDBlacklistBlock",
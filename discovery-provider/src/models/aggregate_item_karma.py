@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, Integer, String
+
+from .models import Base, RepresentableMixin
+
+
+class AggregateItemKarma(Base, RepresentableMixin):
+    """
+    Per track, playlist and album sum of the follower counts of the users that
+    currently repost or save it. xf_karma only counts users with a complete profile.
+    """
+
+    __tablename__ = "aggregate_item_karma"
+    item_id = Column(Integer, primary_key=True, nullable=False)
+    item_type = Column(String, primary_key=True, nullable=False)
+    karma = Column(BigInteger, nullable=False)
+    xf_karma = Column(BigInteger, nullable=False)
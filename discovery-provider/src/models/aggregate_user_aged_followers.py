@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer
+
+from .models import Base, RepresentableMixin
+
+
+class AggregateUserAgedFollowers(Base, RepresentableMixin):
+    """Per user count of current followers that followed at least AGED_FOLLOWER_DAYS ago"""
+
+    __tablename__ = "aggregate_user_aged_followers"
+    user_id = Column(Integer, primary_key=True, nullable=False)
+    follower_count = Column(Integer, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from .models import Base, RepresentableMixin
+
+
+class FeedTimeline(Base, RepresentableMixin):
+    """
+    Precomputed feed entries: an item created (reason 'original') or reposted
+    (reason 'repost') by actor_user_id, fanned out to each of the actor's followers.
+    """
+
+    __tablename__ = "feed_timelines"
+    user_id = Column(Integer, primary_key=True, nullable=False)
+    item_type = Column(String, primary_key=True, nullable=False)
+    item_id = Column(Integer, primary_key=True, nullable=False)
+    actor_user_id = Column(Integer, primary_key=True, nullable=False)
+    reason = Column(String, primary_key=True, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    Index("feed_timelines_user_id_created_at_idx", "user_id", "created_at")
+    Index("feed_timelines_item_idx", "item_type", "item_id")
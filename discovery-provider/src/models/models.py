@@ -576,6 +576,8 @@ child_track_id={self.child_track_id})>"
 
 
 class Play(Base):
+    # Partitioned by created_at month, see prune_plays
+    # The table's primary key is (id, created_at), id alone is unique
     __tablename__ = "plays"
 
     id = Column(Integer, primary_key=True)
@@ -615,11 +617,15 @@ created_at={self.created_at})>"
 
 
 class PlaysArchive(Base):
+    # Partitioned by created_at month, archived partitions of plays are attached to it
     __tablename__ = "plays_archive"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=True, index=False)
     source = Column(String, nullable=True, index=False)
+    city = Column(String, nullable=True, index=False)
+    region = Column(String, nullable=True, index=False)
+    country = Column(String, nullable=True, index=False)
     play_item_id = Column(Integer, nullable=False, index=False)
     slot = Column(Integer, nullable=True, index=True)
     signature = Column(String, nullable=True, index=False)
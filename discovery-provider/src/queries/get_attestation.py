@@ -1,4 +1,5 @@
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TypedDict
 
 from eth_keys import keys
 from eth_utils.conversions import to_bytes
@@ -6,6 +7,7 @@ from hexbytes import HexBytes
 from solana.publickey import PublicKey
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.elements import and_
+from sqlalchemy.sql.expression import tuple_
 from src.models.models import Challenge, ChallengeDisbursement, User, UserChallenge
 from src.solana.constants import WAUDIO_DECIMALS
 from src.tasks.index_oracles import (
@@ -83,18 +85,39 @@ class AttestationError(Exception):
     pass
 
 
-def is_valid_oracle(address: str) -> bool:
+class AttestationRequest(TypedDict):
+    challenge_id: str
+    user_id: Optional[int]
+    oracle_address: str
+    specifier: str
+
+
+class AttestationResult(TypedDict):
+    owner_wallet: Optional[str]
+    attestation: Optional[str]
+    error: Optional[str]
+
+
+def get_oracle_addresses() -> List[str]:
     redis = get_redis()
     oracle_addresses = redis.get(oracle_addresses_key)
     if oracle_addresses:
-        oracle_addresses = oracle_addresses.decode().split(",")
-    else:
-        oracle_addresses = get_oracle_addresses_from_chain(redis)
-    return address in oracle_addresses
+        return oracle_addresses.decode().split(",")
+    return get_oracle_addresses_from_chain(redis)
+
+
+def is_valid_oracle(address: str) -> bool:
+    return address in get_oracle_addresses()
+
+
+@lru_cache(maxsize=1)
+def get_private_key(private_key: str) -> keys.PrivateKey:
+    # Deriving the key is as slow as signing, only do it once per key
+    return keys.PrivateKey(HexBytes(private_key))
 
 
 def sign_attestation(attestation_bytes: bytes, private_key: str):
-    k = keys.PrivateKey(HexBytes(private_key))
+    k = get_private_key(private_key)
     to_sign_hash = Web3.keccak(attestation_bytes)
     sig = k.sign_msg_hash(to_sign_hash)
     return sig.to_hex()
@@ -113,73 +136,156 @@ def get_attestation(
     or throws an error explaining why the attestation was
     not able to be created.
     """
-    if not user_id or not challenge_id or not oracle_address:
-        raise AttestationError(INVALID_INPUT)
-
-    # First, validate the oracle adddress
-    if not is_valid_oracle(oracle_address):
-        raise AttestationError(INVALID_ORACLE)
-
-    challenges_and_disbursements: Tuple[
-        UserChallenge, Challenge, ChallengeDisbursement
-    ] = (
-        session.query(UserChallenge, Challenge, ChallengeDisbursement)
-        .join(Challenge, Challenge.id == UserChallenge.challenge_id)
-        # Need to do outerjoin because some challenges
-        # may not have disbursements
-        .outerjoin(
-            ChallengeDisbursement,
-            and_(
-                ChallengeDisbursement.specifier == UserChallenge.specifier,
-                ChallengeDisbursement.challenge_id == UserChallenge.challenge_id,
-            ),
+    [result] = get_attestations(
+        session,
+        [
+            {
+                "challenge_id": challenge_id,
+                "user_id": user_id,
+                "oracle_address": oracle_address,
+                "specifier": specifier,
+            }
+        ],
+    )
+    if result["error"]:
+        raise AttestationError(result["error"])
+    return (result["owner_wallet"], result["attestation"])
+
+
+def get_attestations(
+    session: Session, requests: List[AttestationRequest]
+) -> List[AttestationResult]:
+    """
+    Returns an owner_wallet, signed_attestation result for each request,
+    or the error explaining why its attestation was not able to be created.
+    The user challenges and wallets of all the requests are fetched in one query each.
+    """
+    errors: List[Optional[str]] = [None] * len(requests)
+
+    def validate(predicate, error: str):
+        for i, request in enumerate(requests):
+            if not errors[i] and not predicate(request):
+                errors[i] = error
+
+    validate(
+        lambda request: request["user_id"]
+        and request["challenge_id"]
+        and request["oracle_address"],
+        INVALID_INPUT,
+    )
+
+    # First, validate the oracle adddresses
+    if not all(errors):
+        oracle_addresses = set(get_oracle_addresses())
+        validate(
+            lambda request: request["oracle_address"] in oracle_addresses,
+            INVALID_ORACLE,
         )
-        .filter(
-            UserChallenge.user_id == user_id,
-            UserChallenge.challenge_id == challenge_id,
-            UserChallenge.specifier == specifier,
+
+    challenges_and_disbursements: Dict[
+        Tuple[str, str], Tuple[UserChallenge, Challenge, ChallengeDisbursement]
+    ] = {}
+    challenge_keys = {
+        (request["challenge_id"], request["specifier"])
+        for i, request in enumerate(requests)
+        if not errors[i]
+    }
+    if challenge_keys:
+        rows = (
+            session.query(UserChallenge, Challenge, ChallengeDisbursement)
+            .join(Challenge, Challenge.id == UserChallenge.challenge_id)
+            # Need to do outerjoin because some challenges
+            # may not have disbursements
+            .outerjoin(
+                ChallengeDisbursement,
+                and_(
+                    ChallengeDisbursement.specifier == UserChallenge.specifier,
+                    ChallengeDisbursement.challenge_id == UserChallenge.challenge_id,
+                ),
+            )
+            # (challenge_id, specifier) is the primary key of user_challenges
+            .filter(
+                tuple_(UserChallenge.challenge_id, UserChallenge.specifier).in_(
+                    list(challenge_keys)
+                )
+            )
+            .all()
         )
-    ).one_or_none()
-
-    if not challenges_and_disbursements:
-        raise AttestationError(MISSING_CHALLENGES)
-    user_challenge, challenge, disbursement = (
-        challenges_and_disbursements[0],
-        challenges_and_disbursements[1],
-        challenges_and_disbursements[2],
-    )
-    if not user_challenge.is_complete:
-        raise AttestationError(CHALLENGE_INCOMPLETE)
-    if disbursement:
-        raise AttestationError(ALREADY_DISBURSED)
-
-    # Get the users's eth address
-    user_eth_address = (
-        session.query(User.wallet)
-        .filter(
-            User.is_current == True,
-            User.user_id == user_id,
-            User.is_deactivated == False,
+        challenges_and_disbursements = {
+            (user_challenge.challenge_id, user_challenge.specifier): (
+                user_challenge,
+                challenge,
+                disbursement,
+            )
+            for (user_challenge, challenge, disbursement) in rows
+        }
+
+    def get_challenge_and_disbursement(request: AttestationRequest):
+        row = challenges_and_disbursements.get(
+            (request["challenge_id"], request["specifier"])
         )
-        .one_or_none()
+        if not row or row[0].user_id != request["user_id"]:
+            return None
+        return row
+
+    validate(get_challenge_and_disbursement, MISSING_CHALLENGES)
+    validate(
+        lambda request: get_challenge_and_disbursement(request)[0].is_complete,
+        CHALLENGE_INCOMPLETE,
     )
-    if not user_eth_address:
-        raise AttestationError(USER_NOT_FOUND)
-    user_address = str(user_eth_address[0])
-
-    attestation = Attestation(
-        amount=challenge.amount,
-        oracle_address=oracle_address,
-        user_address=user_address,
-        challenge_id=challenge.id,
-        challenge_specifier=user_challenge.specifier,
+    validate(
+        lambda request: not get_challenge_and_disbursement(request)[2],
+        ALREADY_DISBURSED,
     )
 
-    attestation_bytes = attestation.get_attestation_bytes()
-    signed_attestation: str = sign_attestation(
-        attestation_bytes, shared_config["delegate"]["private_key"]
-    )
-    return (shared_config["delegate"]["owner_wallet"], signed_attestation)
+    # Get the users's eth addresses
+    user_ids = {
+        request["user_id"] for i, request in enumerate(requests) if not errors[i]
+    }
+    user_eth_addresses: Dict[int, str] = {}
+    if user_ids:
+        user_eth_addresses = dict(
+            session.query(User.user_id, User.wallet)
+            .filter(
+                User.is_current == True,
+                User.user_id.in_(list(user_ids)),
+                User.is_deactivated == False,
+            )
+            .all()
+        )
+    validate(lambda request: request["user_id"] in user_eth_addresses, USER_NOT_FOUND)
+
+    owner_wallet = shared_config["delegate"]["owner_wallet"]
+    private_key = shared_config["delegate"]["private_key"]
+    results: List[AttestationResult] = []
+    for i, request in enumerate(requests):
+        if errors[i]:
+            results.append(
+                {"owner_wallet": None, "attestation": None, "error": errors[i]}
+            )
+            continue
+        # Requests without a user_id failed the INVALID_INPUT check
+        user_id = request["user_id"]
+        assert user_id is not None, "Expected a user_id on valid requests"
+        user_challenge, challenge, _ = get_challenge_and_disbursement(request)
+        attestation = Attestation(
+            amount=challenge.amount,
+            oracle_address=request["oracle_address"],
+            user_address=str(user_eth_addresses[user_id]),
+            challenge_id=challenge.id,
+            challenge_specifier=user_challenge.specifier,
+        )
+        signed_attestation: str = sign_attestation(
+            attestation.get_attestation_bytes(), private_key
+        )
+        results.append(
+            {
+                "owner_wallet": owner_wallet,
+                "attestation": signed_attestation,
+                "error": None,
+            }
+        )
+    return results
 
 
 ADD_SENDER_MESSAGE_PREFIX = "add"
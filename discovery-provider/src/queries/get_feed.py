@@ -2,11 +2,16 @@ import datetime
 
 from flask import request
 from sqlalchemy import and_, desc, func, or_
-from src.models import Follow, Playlist, Repost, RepostType, SaveType, Track
+from src.models import Playlist, Repost, RepostType, SaveType, Track
 from src.queries import response_name_constants
 from src.queries.get_feed_es import get_feed_es
+from src.queries.get_feed_timeline import get_feed_timeline, is_feed_timeline_ready
+from src.queries.get_followee_user_ids import get_followee_user_ids, in_user_ids
 from src.queries.get_unpopulated_tracks import get_unpopulated_tracks
 from src.queries.query_helpers import (
+    get_feed_item_sort_key,
+    get_keyset_filter,
+    get_next_cursor,
     get_pagination_vars,
     get_users_by_id,
     get_users_ids,
@@ -22,12 +27,20 @@ trackDedupeMaxMinutes = 10
 
 
 def get_feed(args):
+    """Returns a page of the feed and the cursor of the next page"""
     skip_es = request.args.get("es") == "0"
-    use_es = es_url and not skip_es
+    # the es feed only serves the first page
+    use_es = es_url and not skip_es and args.get("cursor") is None
     if use_es:
         try:
             (limit, _) = get_pagination_vars()
-            return get_feed_es(args, limit)
+            feed_results = get_feed_es(args, limit)
+            return (
+                feed_results,
+                get_next_cursor(
+                    [get_feed_item_sort_key(item) for item in feed_results], limit
+                ),
+            )
         except:
             return get_feed_sql(args)
     else:
@@ -44,222 +57,58 @@ def get_feed_sql(args):
 
     followee_user_ids = args.get("followee_user_ids", [])
 
+    # (activity_timestamp, track or playlist id) of the last item of the previous page
+    cursor = args.get("cursor")
+
     # Current user - user for whom feed is being generated
     current_user_id = args.get("user_id")
     with db.scoped_session() as session:
-        # Generate list of users followed by current user, i.e. 'followees'
+        (limit, _) = get_pagination_vars()
+
+        # Feeds of an explicit list of followees are always built on read
+        timeline_items = None
         if not followee_user_ids:
-            followee_user_ids = (
-                session.query(Follow.followee_user_id)
-                .filter(
-                    Follow.follower_user_id == current_user_id,
-                    Follow.is_current == True,
-                    Follow.is_delete == False,
+            # Generate list of users followed by current user, i.e. 'followees'
+            followee_user_ids = get_followee_user_ids(session, current_user_id)
+            if current_user_id is not None and is_feed_timeline_ready(
+                session, current_user_id
+            ):
+                timeline_items = get_feed_timeline(
+                    session,
+                    current_user_id,
+                    followee_user_ids,
+                    feed_filter,
+                    tracks_only,
+                    cursor,
+                    limit,
                 )
-                .all()
-            )
-            followee_user_ids = [f[0] for f in followee_user_ids]
-
-        # Fetch followee creations if requested
-        if feed_filter in ["original", "all"]:
-            if not tracks_only:
-                # Query playlists posted by followees, sorted and paginated by created_at desc
-                created_playlists_query = (
-                    session.query(Playlist)
-                    .filter(
-                        Playlist.is_current == True,
-                        Playlist.is_delete == False,
-                        Playlist.is_private == False,
-                        Playlist.playlist_owner_id.in_(followee_user_ids),
-                    )
-                    .order_by(desc(Playlist.created_at))
-                )
-                created_playlists = paginate_query(created_playlists_query, False).all()
-
-                # get track ids for all tracks in playlists
-                playlist_track_ids = set()
-                for playlist in created_playlists:
-                    for track in playlist.playlist_contents["track_ids"]:
-                        playlist_track_ids.add(track["track"])
-
-                # get all track objects for track ids
-                playlist_tracks = get_unpopulated_tracks(session, playlist_track_ids)
-                playlist_tracks_dict = {
-                    track["track_id"]: track for track in playlist_tracks
-                }
-
-                # get all track ids that have same owner as playlist and created in "same action"
-                # "same action": track created within [x time] before playlist creation
-                tracks_to_dedupe = set()
-                for playlist in created_playlists:
-                    for track_entry in playlist.playlist_contents["track_ids"]:
-                        track = playlist_tracks_dict.get(track_entry["track"])
-                        if not track:
-                            continue
-                        max_timedelta = datetime.timedelta(
-                            minutes=trackDedupeMaxMinutes
-                        )
-                        if (
-                            (track["owner_id"] == playlist.playlist_owner_id)
-                            and (track["created_at"] <= playlist.created_at)
-                            and (
-                                playlist.created_at - track["created_at"]
-                                <= max_timedelta
-                            )
-                        ):
-                            tracks_to_dedupe.add(track["track_id"])
-                tracks_to_dedupe = list(tracks_to_dedupe)
-            else:
-                # No playlists to consider
-                tracks_to_dedupe = []
-                created_playlists = []
-
-            # Query tracks posted by followees, sorted & paginated by created_at desc
-            # exclude tracks that were posted in "same action" as playlist
-            created_tracks_query = (
-                session.query(Track)
-                .filter(
-                    Track.is_current == True,
-                    Track.is_delete == False,
-                    Track.is_unlisted == False,
-                    Track.stem_of == None,
-                    Track.owner_id.in_(followee_user_ids),
-                    Track.track_id.notin_(tracks_to_dedupe),
-                )
-                .order_by(desc(Track.created_at))
-            )
-            created_tracks = paginate_query(created_tracks_query, False).all()
 
-            # extract created_track_ids and created_playlist_ids
-            created_track_ids = [track.track_id for track in created_tracks]
-            created_playlist_ids = [
-                playlist.playlist_id for playlist in created_playlists
+        if timeline_items is not None:
+            (tracks, playlists) = get_feed_timeline_items(session, timeline_items)
+            sort_keys = [
+                (activity_timestamp, item_id)
+                for (_, item_id, activity_timestamp) in timeline_items
             ]
-
-        # Fetch followee reposts if requested
-        if feed_filter in ["repost", "all"]:
-            # query items reposted by followees, sorted by oldest followee repost of item;
-            # paginated by most recent repost timestamp
-            repost_subquery = session.query(Repost).filter(
-                Repost.is_current == True,
-                Repost.is_delete == False,
-                Repost.user_id.in_(followee_user_ids),
-            )
-            # exclude items also created by followees to guarantee order determinism, in case of "all" filter
-            if feed_filter == "all":
-                repost_subquery = repost_subquery.filter(
-                    or_(
-                        and_(
-                            Repost.repost_type == RepostType.track,
-                            Repost.repost_item_id.notin_(created_track_ids),
-                        ),
-                        and_(
-                            Repost.repost_type != RepostType.track,
-                            Repost.repost_item_id.notin_(created_playlist_ids),
-                        ),
-                    )
-                )
-            repost_subquery = repost_subquery.subquery()
-
-            repost_query = (
-                session.query(
-                    repost_subquery.c.repost_item_id,
-                    repost_subquery.c.repost_type,
-                    func.min(repost_subquery.c.created_at).label("min_created_at"),
+            if len(timeline_items) < limit:
+                # The timeline has no more items, the rest of the page is older
+                # than the horizon and built on read after the last timeline item
+                (
+                    older_tracks,
+                    older_playlists,
+                    older_sort_keys,
+                ) = get_feed_items_on_read(
+                    session, followee_user_ids, feed_filter, tracks_only, sort_keys[-1]
                 )
-                .group_by(
-                    repost_subquery.c.repost_item_id, repost_subquery.c.repost_type
-                )
-                .order_by(desc("min_created_at"))
-            )
-            followee_reposts = paginate_query(repost_query, False).all()
-
-            # build dict of track_id / playlist_id -> oldest followee repost timestamp from followee_reposts above
-            track_repost_timestamp_dict = {}
-            playlist_repost_timestamp_dict = {}
-            for (
-                repost_item_id,
-                repost_type,
-                oldest_followee_repost_timestamp,
-            ) in followee_reposts:
-                if repost_type == RepostType.track:
-                    track_repost_timestamp_dict[
-                        repost_item_id
-                    ] = oldest_followee_repost_timestamp
-                elif repost_type in (RepostType.playlist, RepostType.album):
-                    playlist_repost_timestamp_dict[
-                        repost_item_id
-                    ] = oldest_followee_repost_timestamp
-
-            # extract reposted_track_ids and reposted_playlist_ids
-            reposted_track_ids = list(track_repost_timestamp_dict.keys())
-            reposted_playlist_ids = list(playlist_repost_timestamp_dict.keys())
-
-            # Query tracks reposted by followees
-            reposted_tracks = session.query(Track).filter(
-                Track.is_current == True,
-                Track.is_delete == False,
-                Track.is_unlisted == False,
-                Track.stem_of == None,
-                Track.track_id.in_(reposted_track_ids),
-            )
-            # exclude tracks already fetched from above, in case of "all" filter
-            if feed_filter == "all":
-                reposted_tracks = reposted_tracks.filter(
-                    Track.track_id.notin_(created_track_ids)
-                )
-            reposted_tracks = reposted_tracks.order_by(desc(Track.created_at)).all()
-
-            if not tracks_only:
-                # Query playlists reposted by followees, excluding playlists already fetched from above
-                reposted_playlists = session.query(Playlist).filter(
-                    Playlist.is_current == True,
-                    Playlist.is_delete == False,
-                    Playlist.is_private == False,
-                    Playlist.playlist_id.in_(reposted_playlist_ids),
-                )
-                # exclude playlists already fetched from above, in case of "all" filter
-                if feed_filter == "all":
-                    reposted_playlists = reposted_playlists.filter(
-                        Playlist.playlist_id.notin_(created_playlist_ids)
-                    )
-                reposted_playlists = reposted_playlists.order_by(
-                    desc(Playlist.created_at)
-                ).all()
-            else:
-                reposted_playlists = []
-
-        if feed_filter == "original":
-            tracks_to_process = created_tracks
-            playlists_to_process = created_playlists
-        elif feed_filter == "repost":
-            tracks_to_process = reposted_tracks
-            playlists_to_process = reposted_playlists
+                tracks.extend(older_tracks)
+                playlists.extend(older_playlists)
+                sort_keys.extend(older_sort_keys)
         else:
-            tracks_to_process = created_tracks + reposted_tracks
-            playlists_to_process = created_playlists + reposted_playlists
-
-        tracks = helpers.query_result_to_list(tracks_to_process)
-        playlists = helpers.query_result_to_list(playlists_to_process)
-
-        # define top level feed activity_timestamp to enable sorting
-        # activity_timestamp: created_at if item created by followee, else reposted_at
-        for track in tracks:
-            if track["owner_id"] in followee_user_ids:
-                track[response_name_constants.activity_timestamp] = track["created_at"]
-            else:
-                track[
-                    response_name_constants.activity_timestamp
-                ] = track_repost_timestamp_dict[track["track_id"]]
-        for playlist in playlists:
-            if playlist["playlist_owner_id"] in followee_user_ids:
-                playlist[response_name_constants.activity_timestamp] = playlist[
-                    "created_at"
-                ]
-            else:
-                playlist[
-                    response_name_constants.activity_timestamp
-                ] = playlist_repost_timestamp_dict[playlist["playlist_id"]]
+            (tracks, playlists, sort_keys) = get_feed_items_on_read(
+                session, followee_user_ids, feed_filter, tracks_only, cursor
+            )
+        # Each query fetched at most a page of rows, so the next page starts after
+        # a page's worth of the rows fetched, whether or not they were filtered out
+        next_cursor = get_next_cursor(sort_keys[0:limit], limit)
 
         # bundle peripheral info into track and playlist objects
         track_ids = list(map(lambda track: track["track_id"], tracks))
@@ -277,15 +126,10 @@ def get_feed_sql(args):
         # build combined feed of tracks and playlists
         unsorted_feed = tracks + playlists
 
-        # sort feed based on activity_timestamp
-        sorted_feed = sorted(
-            unsorted_feed,
-            key=lambda entry: entry[response_name_constants.activity_timestamp],
-            reverse=True,
-        )
+        # sort feed based on activity_timestamp, then id like the queries above
+        sorted_feed = sorted(unsorted_feed, key=get_feed_item_sort_key, reverse=True)
 
         # truncate feed to requested limit
-        (limit, _) = get_pagination_vars()
         feed_results = sorted_feed[0:limit]
         if "with_users" in args and args.get("with_users") != False:
             user_id_list = get_users_ids(feed_results)
@@ -300,4 +144,290 @@ def get_feed_sql(args):
                     if user:
                         result["user"] = user
 
-    return feed_results
+    return (feed_results, next_cursor)
+
+
+def get_feed_timeline_items(session, timeline_items):
+    """Loads the tracks and playlists of a page of (item_type, item_id, activity_timestamp) feed items"""
+    activity_timestamps = {
+        (item_type, item_id): activity_timestamp
+        for (item_type, item_id, activity_timestamp) in timeline_items
+    }
+    track_ids = [
+        item_id for (item_type, item_id) in activity_timestamps if item_type == "track"
+    ]
+    playlist_ids = [
+        item_id
+        for (item_type, item_id) in activity_timestamps
+        if item_type == "playlist"
+    ]
+
+    tracks = []
+    if track_ids:
+        tracks = helpers.query_result_to_list(
+            session.query(Track)
+            .filter(Track.is_current == True, Track.track_id.in_(track_ids))
+            .all()
+        )
+    playlists = []
+    if playlist_ids:
+        playlists = helpers.query_result_to_list(
+            session.query(Playlist)
+            .filter(Playlist.is_current == True, Playlist.playlist_id.in_(playlist_ids))
+            .all()
+        )
+
+    for track in tracks:
+        track[response_name_constants.activity_timestamp] = activity_timestamps[
+            ("track", track["track_id"])
+        ]
+    for playlist in playlists:
+        playlist[response_name_constants.activity_timestamp] = activity_timestamps[
+            ("playlist", playlist["playlist_id"])
+        ]
+    return (tracks, playlists)
+
+
+def get_feed_items_on_read(
+    session, followee_user_ids, feed_filter, tracks_only, cursor
+):
+    """
+    Queries a page of the tracks and playlists created or reposted by the followees,
+    each with the activity_timestamp the feed is sorted by, and the sort keys of
+    the rows fetched by each query sorted desc
+    """
+    followee_user_id_set = set(followee_user_ids)
+    sort_keys = []
+
+    # Fetch followee creations if requested
+    if feed_filter in ["original", "all"]:
+        if not tracks_only:
+            # Query playlists posted by followees, sorted and paginated by created_at desc
+            created_playlists_query = (
+                session.query(Playlist)
+                .filter(
+                    Playlist.is_current == True,
+                    Playlist.is_delete == False,
+                    Playlist.is_private == False,
+                    in_user_ids(Playlist.playlist_owner_id, followee_user_ids),
+                )
+                .order_by(desc(Playlist.created_at), desc(Playlist.playlist_id))
+            )
+            if cursor is not None:
+                created_playlists_query = created_playlists_query.filter(
+                    get_keyset_filter(
+                        [(Playlist.created_at, True), (Playlist.playlist_id, True)],
+                        cursor,
+                    )
+                )
+            created_playlists = paginate_query(created_playlists_query, False).all()
+
+            # get track ids for all tracks in playlists
+            playlist_track_ids = set()
+            for playlist in created_playlists:
+                for track in playlist.playlist_contents["track_ids"]:
+                    playlist_track_ids.add(track["track"])
+
+            # get all track objects for track ids
+            playlist_tracks = get_unpopulated_tracks(session, playlist_track_ids)
+            playlist_tracks_dict = {
+                track["track_id"]: track for track in playlist_tracks
+            }
+
+            # get all track ids that have same owner as playlist and created in "same action"
+            # "same action": track created within [x time] before playlist creation
+            tracks_to_dedupe = set()
+            for playlist in created_playlists:
+                for track_entry in playlist.playlist_contents["track_ids"]:
+                    track = playlist_tracks_dict.get(track_entry["track"])
+                    if not track:
+                        continue
+                    max_timedelta = datetime.timedelta(minutes=trackDedupeMaxMinutes)
+                    if (
+                        (track["owner_id"] == playlist.playlist_owner_id)
+                        and (track["created_at"] <= playlist.created_at)
+                        and (playlist.created_at - track["created_at"] <= max_timedelta)
+                    ):
+                        tracks_to_dedupe.add(track["track_id"])
+            tracks_to_dedupe = list(tracks_to_dedupe)
+        else:
+            # No playlists to consider
+            tracks_to_dedupe = []
+            created_playlists = []
+
+        # Query tracks posted by followees, sorted & paginated by created_at desc
+        # exclude tracks that were posted in "same action" as playlist
+        created_tracks_query = (
+            session.query(Track)
+            .filter(
+                Track.is_current == True,
+                Track.is_delete == False,
+                Track.is_unlisted == False,
+                Track.stem_of == None,
+                in_user_ids(Track.owner_id, followee_user_ids),
+                Track.track_id.notin_(tracks_to_dedupe),
+            )
+            .order_by(desc(Track.created_at), desc(Track.track_id))
+        )
+        if cursor is not None:
+            created_tracks_query = created_tracks_query.filter(
+                get_keyset_filter(
+                    [(Track.created_at, True), (Track.track_id, True)], cursor
+                )
+            )
+        created_tracks = paginate_query(created_tracks_query, False).all()
+
+        # extract created_track_ids and created_playlist_ids
+        created_track_ids = [track.track_id for track in created_tracks]
+        created_playlist_ids = [playlist.playlist_id for playlist in created_playlists]
+        sort_keys.extend((track.created_at, track.track_id) for track in created_tracks)
+        sort_keys.extend(
+            (playlist.created_at, playlist.playlist_id)
+            for playlist in created_playlists
+        )
+
+    # Fetch followee reposts if requested
+    if feed_filter in ["repost", "all"]:
+        # query items reposted by followees, sorted by oldest followee repost of item;
+        # paginated by most recent repost timestamp
+        repost_subquery = session.query(Repost).filter(
+            Repost.is_current == True,
+            Repost.is_delete == False,
+            in_user_ids(Repost.user_id, followee_user_ids),
+        )
+        # exclude items also created by followees to guarantee order determinism, in case of "all" filter
+        if feed_filter == "all":
+            repost_subquery = repost_subquery.filter(
+                or_(
+                    and_(
+                        Repost.repost_type == RepostType.track,
+                        Repost.repost_item_id.notin_(created_track_ids),
+                    ),
+                    and_(
+                        Repost.repost_type != RepostType.track,
+                        Repost.repost_item_id.notin_(created_playlist_ids),
+                    ),
+                )
+            )
+        repost_subquery = repost_subquery.subquery()
+
+        min_created_at = func.min(repost_subquery.c.created_at)
+        repost_query = (
+            session.query(
+                repost_subquery.c.repost_item_id,
+                repost_subquery.c.repost_type,
+                min_created_at.label("min_created_at"),
+            )
+            .group_by(repost_subquery.c.repost_item_id, repost_subquery.c.repost_type)
+            .order_by(desc("min_created_at"), desc(repost_subquery.c.repost_item_id))
+        )
+        if cursor is not None:
+            repost_query = repost_query.having(
+                get_keyset_filter(
+                    [
+                        (min_created_at, True),
+                        (repost_subquery.c.repost_item_id, True),
+                    ],
+                    cursor,
+                )
+            )
+        followee_reposts = paginate_query(repost_query, False).all()
+        sort_keys.extend(
+            (oldest_followee_repost_timestamp, repost_item_id)
+            for (
+                repost_item_id,
+                _,
+                oldest_followee_repost_timestamp,
+            ) in followee_reposts
+        )
+
+        # build dict of track_id / playlist_id -> oldest followee repost timestamp from followee_reposts above
+        track_repost_timestamp_dict = {}
+        playlist_repost_timestamp_dict = {}
+        for (
+            repost_item_id,
+            repost_type,
+            oldest_followee_repost_timestamp,
+        ) in followee_reposts:
+            if repost_type == RepostType.track:
+                track_repost_timestamp_dict[
+                    repost_item_id
+                ] = oldest_followee_repost_timestamp
+            elif repost_type in (RepostType.playlist, RepostType.album):
+                playlist_repost_timestamp_dict[
+                    repost_item_id
+                ] = oldest_followee_repost_timestamp
+
+        # extract reposted_track_ids and reposted_playlist_ids
+        reposted_track_ids = list(track_repost_timestamp_dict.keys())
+        reposted_playlist_ids = list(playlist_repost_timestamp_dict.keys())
+
+        # Query tracks reposted by followees
+        reposted_tracks = session.query(Track).filter(
+            Track.is_current == True,
+            Track.is_delete == False,
+            Track.is_unlisted == False,
+            Track.stem_of == None,
+            Track.track_id.in_(reposted_track_ids),
+        )
+        # exclude tracks already fetched from above, in case of "all" filter
+        if feed_filter == "all":
+            reposted_tracks = reposted_tracks.filter(
+                Track.track_id.notin_(created_track_ids)
+            )
+        reposted_tracks = reposted_tracks.order_by(desc(Track.created_at)).all()
+
+        if not tracks_only:
+            # Query playlists reposted by followees, excluding playlists already fetched from above
+            reposted_playlists = session.query(Playlist).filter(
+                Playlist.is_current == True,
+                Playlist.is_delete == False,
+                Playlist.is_private == False,
+                Playlist.playlist_id.in_(reposted_playlist_ids),
+            )
+            # exclude playlists already fetched from above, in case of "all" filter
+            if feed_filter == "all":
+                reposted_playlists = reposted_playlists.filter(
+                    Playlist.playlist_id.notin_(created_playlist_ids)
+                )
+            reposted_playlists = reposted_playlists.order_by(
+                desc(Playlist.created_at)
+            ).all()
+        else:
+            reposted_playlists = []
+
+    if feed_filter == "original":
+        tracks_to_process = created_tracks
+        playlists_to_process = created_playlists
+    elif feed_filter == "repost":
+        tracks_to_process = reposted_tracks
+        playlists_to_process = reposted_playlists
+    else:
+        tracks_to_process = created_tracks + reposted_tracks
+        playlists_to_process = created_playlists + reposted_playlists
+
+    tracks = helpers.query_result_to_list(tracks_to_process)
+    playlists = helpers.query_result_to_list(playlists_to_process)
+
+    # define top level feed activity_timestamp to enable sorting
+    # activity_timestamp: created_at if item created by followee, else reposted_at.
+    # The repost feed only has reposts, so it always uses reposted_at
+    is_repost_feed = feed_filter == "repost"
+    for track in tracks:
+        if not is_repost_feed and track["owner_id"] in followee_user_id_set:
+            track[response_name_constants.activity_timestamp] = track["created_at"]
+        else:
+            track[
+                response_name_constants.activity_timestamp
+            ] = track_repost_timestamp_dict[track["track_id"]]
+    for playlist in playlists:
+        if not is_repost_feed and playlist["playlist_owner_id"] in followee_user_id_set:
+            playlist[response_name_constants.activity_timestamp] = playlist[
+                "created_at"
+            ]
+        else:
+            playlist[
+                response_name_constants.activity_timestamp
+            ] = playlist_repost_timestamp_dict[playlist["playlist_id"]]
+
+    return (tracks, playlists, sorted(sort_keys, reverse=True))
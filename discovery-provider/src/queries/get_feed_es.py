@@ -7,10 +7,13 @@ from src.utils.elasticdsl import (
     ES_SAVES,
     ES_TRACKS,
     ES_USERS,
+    SOURCE_EXCLUDES,
     esclient,
+    fetch_current_user_relationships,
     pluck_hits,
     populate_track_or_playlist_metadata_es,
     populate_user_metadata_es,
+    source_filter,
 )
 
 
@@ -68,6 +71,7 @@ def get_feed_es(args, limit=10):
                     },
                     "size": limit,
                     "sort": {"created_at": "desc"},
+                    "_source": source_filter(ES_TRACKS),
                 },
                 {"index": ES_PLAYLISTS},
                 {
@@ -84,6 +88,7 @@ def get_feed_es(args, limit=10):
                     },
                     "size": limit,
                     "sort": {"created_at": "desc"},
+                    "_source": source_filter(ES_PLAYLISTS),
                 },
             ]
         )
@@ -154,10 +159,10 @@ def get_feed_es(args, limit=10):
         if "min_created_at" not in r:
             continue
         (kind, id) = r["key"].split(":")
-        if kind == "track":
-            mget_reposts.append({"_index": ES_TRACKS, "_id": id})
-        else:
-            mget_reposts.append({"_index": ES_PLAYLISTS, "_id": id})
+        index = ES_TRACKS if kind == "track" else ES_PLAYLISTS
+        mget_reposts.append(
+            {"_index": index, "_id": id, "_source": source_filter(index)}
+        )
 
     if mget_reposts:
         reposted_docs = esclient.mget(docs=mget_reposts)
@@ -198,13 +203,23 @@ def get_feed_es(args, limit=10):
     # attach users
     user_id_list = [str(id) for id in get_users_ids(sorted_feed)]
     user_id_list.append(current_user_id)
-    user_list = esclient.mget(index=ES_USERS, ids=user_id_list)
+    user_list = esclient.mget(
+        index=ES_USERS, ids=user_id_list, source_excludes=SOURCE_EXCLUDES[ES_USERS]
+    )
     user_by_id = {d["_id"]: d["_source"] for d in user_list["docs"] if d["found"]}
 
+    # resolve current user reposts, saves + follows server side
+    relationships = fetch_current_user_relationships(
+        current_user_id,
+        track_ids=[i["track_id"] for i in sorted_feed if "track_id" in i],
+        playlist_ids=[i["playlist_id"] for i in sorted_feed if "playlist_id" in i],
+        user_ids=user_by_id.keys(),
+    )
+
     # populate_user_metadata_es:
     current_user = user_by_id.pop(str(current_user_id))
     for id, user in user_by_id.items():
-        user_by_id[id] = populate_user_metadata_es(user, current_user)
+        user_by_id[id] = populate_user_metadata_es(user, current_user, relationships)
 
     for item in sorted_feed:
         # GOTCHA: es ids must be strings, but our ids are ints...
@@ -227,7 +242,7 @@ def get_feed_es(args, limit=10):
 
     # populate metadata + remove extra fields from items
     sorted_feed = [
-        populate_track_or_playlist_metadata_es(item, current_user)
+        populate_track_or_playlist_metadata_es(item, current_user, relationships)
         for item in sorted_feed
     ]
 
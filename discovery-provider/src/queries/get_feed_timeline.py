@@ -0,0 +1,277 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm.session import Session
+from src.utils.update_indexing_checkpoints import get_last_indexed_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# indexing_checkpoints names of the last fanned out blocknumber
+# and of the last user_id whose timeline was backfilled
+FEED_TIMELINES = "feed_timelines"
+FEED_TIMELINES_BACKFILL = "feed_timelines_backfill"
+
+# Timelines hold the last FEED_TIMELINE_DAYS of activity, older pages are built on read
+FEED_TIMELINE_DAYS = 30
+FEED_TIMELINE_HORIZON = f"now() - interval '{FEED_TIMELINE_DAYS} days'"
+
+# Items of users with more followers are not fanned out on write,
+# the feeds of their followers read them on demand instead
+MAX_FANOUT_FOLLOWER_COUNT = 10000
+# Users are read on demand from half the fan out limit so a user whose follower
+# count dips back under it still has the items that were not fanned out in feeds
+MIN_FAN_IN_FOLLOWER_COUNT = MAX_FANOUT_FOLLOWER_COUNT // 2
+
+# Same as trackDedupeMaxMinutes in get_feed.py
+TRACK_DEDUPE_MAX_MINUTES = 10
+
+# FOLLOWEE_ITEMS_QUERY
+# Rows of (item_type, item_id, actor_user_id, reason, created_at) for the items
+# {followee} created or reposted since the horizon. Playlists and albums are both 'playlist'
+FOLLOWEE_ITEMS_QUERY = """
+    SELECT
+        'track' AS item_type,
+        t.track_id AS item_id,
+        t.owner_id AS actor_user_id,
+        'original' AS reason,
+        t.created_at
+    FROM
+        tracks t
+    WHERE
+        t.owner_id = {followee}
+        AND t.is_current IS TRUE
+        AND t.created_at >= {horizon}
+    UNION ALL
+    SELECT
+        'playlist' AS item_type,
+        p.playlist_id AS item_id,
+        p.playlist_owner_id AS actor_user_id,
+        'original' AS reason,
+        p.created_at
+    FROM
+        playlists p
+    WHERE
+        p.playlist_owner_id = {followee}
+        AND p.is_current IS TRUE
+        AND p.created_at >= {horizon}
+    UNION ALL
+    SELECT
+        CASE
+            WHEN r.repost_type = 'track' THEN 'track'
+            ELSE 'playlist'
+        END AS item_type,
+        r.repost_item_id AS item_id,
+        r.user_id AS actor_user_id,
+        'repost' AS reason,
+        r.created_at
+    FROM
+        reposts r
+    WHERE
+        r.user_id = {followee}
+        AND r.is_current IS TRUE
+        AND r.is_delete IS FALSE
+        AND r.created_at >= {horizon}
+    """
+
+# FEED_TIMELINE_QUERY
+# A page of (item_type, item_id, activity_timestamp) of :user_id's feed, the same items
+# get_feed_sql builds on read: the activity timestamp of an item is its created_at
+# if it is in the feed as a followee's original, else its oldest followee repost.
+# Entries of users who are no longer followed are skipped, so unfollows apply right away.
+FEED_TIMELINE_QUERY = """
+    WITH followees AS (
+        SELECT
+            unnest(CAST(:followee_user_ids AS INTEGER[])) AS user_id
+    ),
+    fan_in_followees AS (
+        SELECT
+            au.user_id
+        FROM
+            followees f
+            JOIN aggregate_user au ON au.user_id = f.user_id
+        WHERE
+            au.follower_count > :min_fan_in_follower_count
+    ),
+    entries AS (
+        SELECT
+            ft.item_type,
+            ft.item_id,
+            ft.reason,
+            ft.created_at
+        FROM
+            feed_timelines ft
+            JOIN followees f ON f.user_id = ft.actor_user_id
+        WHERE
+            ft.user_id = :user_id
+            AND ft.created_at >= {horizon}
+        UNION ALL
+        SELECT
+            e.item_type,
+            e.item_id,
+            e.reason,
+            e.created_at
+        FROM
+            fan_in_followees fi
+            CROSS JOIN LATERAL ({fan_in_followee_items}) e
+    ),
+    items AS (
+        SELECT
+            item_type,
+            item_id,
+            min(created_at) FILTER (
+                WHERE
+                    reason = 'original'
+            ) AS created_at,
+            min(created_at) FILTER (
+                WHERE
+                    reason = 'repost'
+            ) AS reposted_at
+        FROM
+            entries
+        GROUP BY
+            item_type,
+            item_id
+    ),
+    candidates AS (
+        SELECT
+            i.item_type,
+            i.item_id,
+            i.created_at,
+            i.reposted_at,
+            (
+                :include_original
+                AND i.created_at IS NOT NULL
+                -- tracks created in the "same action" as a followee playlist that
+                -- contains them are only in the feed through the playlist
+                AND NOT (
+                    t.track_id IS NOT NULL
+                    AND NOT :tracks_only
+                    AND EXISTS (
+                        SELECT
+                            1
+                        FROM
+                            playlists same_action
+                        WHERE
+                            same_action.playlist_owner_id = t.owner_id
+                            AND same_action.is_current IS TRUE
+                            AND same_action.is_delete IS FALSE
+                            AND same_action.is_private IS FALSE
+                            AND same_action.created_at >= t.created_at
+                            AND same_action.created_at <= t.created_at + interval '{track_dedupe_max_minutes} minutes'
+                            AND same_action.playlist_contents -> 'track_ids' @> jsonb_build_array(
+                                jsonb_build_object('track', t.track_id)
+                            )
+                    )
+                )
+            ) AS is_original
+        FROM
+            items i
+            LEFT OUTER JOIN tracks t ON i.item_type = 'track'
+            AND t.track_id = i.item_id
+            AND t.is_current IS TRUE
+            AND t.is_delete IS FALSE
+            AND t.is_unlisted IS FALSE
+            AND t.stem_of IS NULL
+            LEFT OUTER JOIN playlists p ON i.item_type = 'playlist'
+            AND p.playlist_id = i.item_id
+            AND p.is_current IS TRUE
+            AND p.is_delete IS FALSE
+            AND p.is_private IS FALSE
+        WHERE
+            t.track_id IS NOT NULL
+            OR (
+                p.playlist_id IS NOT NULL
+                AND NOT :tracks_only
+            )
+    ),
+    feed_items AS (
+        SELECT
+            item_type,
+            item_id,
+            CASE
+                WHEN is_original THEN created_at
+                ELSE reposted_at
+            END AS activity_timestamp
+        FROM
+            candidates
+        WHERE
+            is_original
+            OR (
+                :include_repost
+                AND reposted_at IS NOT NULL
+            )
+    )
+    SELECT
+        item_type,
+        item_id,
+        activity_timestamp
+    FROM
+        feed_items
+    {cursor_filter}
+    ORDER BY
+        activity_timestamp DESC,
+        item_id DESC
+    LIMIT
+        :limit
+    """
+
+
+def is_feed_timeline_ready(session: Session, user_id: int) -> bool:
+    """Whether the backfill has reached the user, new follows fan in from then on"""
+    return user_id <= get_last_indexed_checkpoint(session, FEED_TIMELINES_BACKFILL)
+
+
+def get_feed_timeline(
+    session: Session,
+    user_id: int,
+    followee_user_ids: List[int],
+    feed_filter: str,
+    tracks_only: bool,
+    cursor: Optional[Sequence],
+    limit: int,
+) -> Optional[List[Tuple[str, int, datetime]]]:
+    """
+    Returns a page of (item_type, item_id, activity_timestamp) feed items
+    read from the precomputed timeline, sorted by activity_timestamp then id desc.
+    Returns None if the page reaches the timeline horizon and has to be built on read.
+    A short page holds all the timeline items after the cursor, older items are
+    past the horizon.
+    """
+    horizon = datetime.utcnow() - timedelta(days=FEED_TIMELINE_DAYS)
+    if cursor is not None and cursor[0] < horizon:
+        return None
+
+    query = FEED_TIMELINE_QUERY.format(
+        horizon=FEED_TIMELINE_HORIZON,
+        fan_in_followee_items=FOLLOWEE_ITEMS_QUERY.format(
+            followee="fi.user_id", horizon=FEED_TIMELINE_HORIZON
+        ),
+        track_dedupe_max_minutes=TRACK_DEDUPE_MAX_MINUTES,
+        cursor_filter="WHERE (activity_timestamp, item_id) < (:cursor_timestamp, :cursor_id)"
+        if cursor is not None
+        else "",
+    )
+    params = {
+        "user_id": user_id,
+        "followee_user_ids": list(followee_user_ids),
+        "min_fan_in_follower_count": MIN_FAN_IN_FOLLOWER_COUNT,
+        "tracks_only": bool(tracks_only),
+        "include_original": feed_filter in ["original", "all"],
+        "include_repost": feed_filter in ["repost", "all"],
+        "limit": limit,
+    }
+    if cursor is not None:
+        params["cursor_timestamp"] = cursor[0]
+        params["cursor_id"] = cursor[1]
+
+    feed_items = session.execute(text(query), params).fetchall()
+    # A short page is the end of the timeline of a light feed, the page only
+    # reaches the horizon if it is empty or its oldest item is at the horizon
+    if not feed_items or feed_items[-1][2] <= horizon:
+        return None
+    return [
+        (item_type, item_id, activity_timestamp)
+        for (item_type, item_id, activity_timestamp) in feed_items
+    ]
@@ -0,0 +1,65 @@
+import logging
+from array import array
+from typing import List
+
+from sqlalchemy import Integer, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.expression import any_
+from src.models import Follow
+from src.utils import redis_connection
+from src.utils.redis_cache import get_followee_user_ids_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Cache followee user ids for 5 min, follow events also invalidate them on index
+ttl_sec = 5 * 60
+
+
+def get_followee_user_ids(session, user_id: int) -> List[int]:
+    """
+    Returns the sorted ids of the users that `user_id` follows.
+    Cached in redis as a packed int array so personalized queries
+    don't re-query follows on every request.
+
+    Args:
+        session: DB session
+        user_id: int The follower user id
+
+    Returns:
+        List of followee user ids
+    """
+    redis = redis_connection.get_redis()
+    key = get_followee_user_ids_cache_key(user_id)
+    try:
+        cached = redis.get(key)
+        if cached is not None:
+            cached_followee_user_ids = array("i")
+            cached_followee_user_ids.frombytes(cached)
+            return cached_followee_user_ids.tolist()
+    except Exception as e:
+        logger.warning(f"get_followee_user_ids.py | Unable to read {key}: {e}")
+
+    followee_user_ids = [
+        followee_user_id
+        for (followee_user_id,) in session.query(Follow.followee_user_id)
+        .filter(
+            Follow.follower_user_id == user_id,
+            Follow.is_current == True,
+            Follow.is_delete == False,
+        )
+        .order_by(Follow.followee_user_id)
+        .all()
+    ]
+    try:
+        redis.set(key, array("i", followee_user_ids).tobytes(), ttl_sec)
+    except Exception as e:
+        logger.warning(f"get_followee_user_ids.py | Unable to write {key}: {e}")
+    return followee_user_ids
+
+
+def in_user_ids(column, user_ids: List[int]):
+    """
+    Filters `column` to `user_ids` with a single bound array parameter,
+    `column = ANY(:user_ids)`, rather than one bound parameter per id
+    """
+    return column == any_(literal(list(user_ids), ARRAY(Integer)))
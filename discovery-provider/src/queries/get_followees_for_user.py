@@ -1,12 +1,13 @@
 from sqlalchemy.sql import text
 from src.queries.get_unpopulated_users import get_unpopulated_users
-from src.queries.query_helpers import populate_user_metadata
+from src.queries.query_helpers import get_next_cursor, populate_user_metadata
 from src.utils.db_session import get_db_read_replica
 
-sql = text(
-    """
+# followee_user_ids sorted by follower count, paginated by offset or after a cursor
+sql = """
 SELECT
-    followee_user_id
+    followee_user_id,
+    coalesce(follower_count, 0)
 from
     follows
     left outer join aggregate_user on followee_user_id = user_id
@@ -14,13 +15,23 @@ where
     is_current = true
     and is_delete = false
     and follower_user_id = :follower_user_id
+    {cursor_filter}
 order by
-    follower_count desc,
-    user_id asc
-offset :offset
+    coalesce(follower_count, 0) desc,
+    followee_user_id asc
+{offset}
 limit :limit;
 """
-)
+
+cursor_filter = """
+    and (
+        coalesce(follower_count, 0) < :cursor_follower_count
+        or (
+            coalesce(follower_count, 0) = :cursor_follower_count
+            and followee_user_id > :cursor_user_id
+        )
+    )
+"""
 
 
 def get_followees_for_user(args):
@@ -29,14 +40,31 @@ def get_followees_for_user(args):
     current_user_id = args.get("current_user_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
 
     db = get_db_read_replica()
     with db.scoped_session() as session:
-        rows = session.execute(
-            sql,
-            {"follower_user_id": follower_user_id, "limit": limit, "offset": offset},
-        )
+        if cursor is None:
+            query = text(sql.format(cursor_filter="", offset="offset :offset"))
+            params = {
+                "follower_user_id": follower_user_id,
+                "limit": limit,
+                "offset": offset,
+            }
+        else:
+            query = text(sql.format(cursor_filter=cursor_filter, offset=""))
+            (cursor_follower_count, cursor_user_id) = cursor
+            params = {
+                "follower_user_id": follower_user_id,
+                "limit": limit,
+                "cursor_follower_count": cursor_follower_count,
+                "cursor_user_id": cursor_user_id,
+            }
+        rows = session.execute(query, params).fetchall()
         user_ids = [r[0] for r in rows]
+        next_cursor = get_next_cursor(
+            [(follower_count, user_id) for (user_id, follower_count) in rows], limit
+        )
 
         # get all users for above user_ids
         users = get_unpopulated_users(session, user_ids)
@@ -44,4 +72,4 @@ def get_followees_for_user(args):
         # bundle peripheral info into user results
         users = populate_user_metadata(session, user_ids, users, current_user_id)
 
-    return users
+    return (users, next_cursor)
@@ -1,8 +1,9 @@
 import logging
 import os
+import threading
 import time
 from datetime import datetime
-from typing import Dict, Optional, Tuple, TypedDict, cast
+from typing import Dict, List, Optional, Tuple, TypedDict, cast
 
 from elasticsearch import Elasticsearch
 from redis import Redis
@@ -34,6 +35,14 @@ from src.utils.redis_constants import (
     latest_block_hash_redis_key,
     latest_block_redis_key,
     latest_legacy_play_db_key,
+    latest_sol_play_db_tx_key,
+    latest_sol_play_program_tx_key,
+    latest_sol_rewards_manager_db_tx_key,
+    latest_sol_rewards_manager_program_tx_key,
+    latest_sol_spl_token_db_key,
+    latest_sol_spl_token_program_tx_key,
+    latest_sol_user_bank_db_tx_key,
+    latest_sol_user_bank_program_tx_key,
     most_recent_indexed_block_hash_redis_key,
     most_recent_indexed_block_redis_key,
     most_recent_indexed_ipld_block_hash_redis_key,
@@ -65,6 +74,124 @@ min_total_memory: int = 15500000000  # 15.5 GB of RAM
 min_filesystem_size: int = 240000000000  # 240 GB of file system storage
 
 
+# Number of seconds a health snapshot of redis is reused within a single process
+HEALTH_SNAPSHOT_TTL_SEC = 1
+
+# Every string key read while building the health check response
+HEALTH_SNAPSHOT_KEYS: List[str] = [
+    latest_block_redis_key,
+    latest_block_hash_redis_key,
+    most_recent_indexed_block_redis_key,
+    most_recent_indexed_block_hash_redis_key,
+    trending_tracks_last_completion_redis_key,
+    trending_playlists_last_completion_redis_key,
+    challenges_last_processed_event_redis_key,
+    user_balances_refresh_last_completion_redis_key,
+    eth_indexing_last_scanned_block_key,
+    index_eth_last_completion_redis_key,
+    UPDATE_TRACK_IS_AVAILABLE_START_REDIS_KEY,
+    UPDATE_TRACK_IS_AVAILABLE_FINISH_REDIS_KEY,
+    latest_legacy_play_db_key,
+    oldest_unarchived_play_key,
+    latest_sol_play_db_tx_key,
+    latest_sol_play_program_tx_key,
+    latest_sol_rewards_manager_db_tx_key,
+    latest_sol_rewards_manager_program_tx_key,
+    latest_sol_user_bank_db_tx_key,
+    latest_sol_user_bank_program_tx_key,
+    latest_sol_spl_token_db_key,
+    latest_sol_spl_token_program_tx_key,
+    LAST_REACTIONS_INDEX_TIME_KEY,
+    LAST_SEEN_NEW_REACTION_TIME_KEY,
+]
+
+# Every set whose cardinality is reported by the health check
+HEALTH_SNAPSHOT_SET_KEYS: List[str] = [
+    LAZY_REFRESH_REDIS_PREFIX,
+    IMMEDIATE_REFRESH_REDIS_PREFIX,
+]
+
+
+class HealthRedisSnapshot:
+    """
+    Point-in-time view of the redis state read by the health check.
+
+    All keys are fetched with a single pipelined MGET + SCARD round trip.
+    Reads of prefetched keys are served from memory, any other command is
+    passed through to the underlying redis connection. Writes drop the
+    prefetched value so subsequent reads see the fresh state.
+    """
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+        self.created_at = time.time()
+
+        pipe = redis.pipeline(transaction=False)
+        pipe.mget(HEALTH_SNAPSHOT_KEYS)
+        for set_key in HEALTH_SNAPSHOT_SET_KEYS:
+            pipe.scard(set_key)
+        values, *cardinalities = pipe.execute()
+
+        self._values: Dict[str, Optional[bytes]] = dict(
+            zip(HEALTH_SNAPSHOT_KEYS, values)
+        )
+        self._cardinalities: Dict[str, int] = dict(
+            zip(HEALTH_SNAPSHOT_SET_KEYS, cardinalities)
+        )
+
+    @property
+    def redis(self) -> Redis:
+        return self._redis
+
+    def is_expired(self, ttl_sec: float = HEALTH_SNAPSHOT_TTL_SEC) -> bool:
+        return time.time() - self.created_at >= ttl_sec
+
+    def get(self, key):
+        if key in self._values:
+            return self._values[key]
+        return self._redis.get(key)
+
+    def scard(self, key):
+        if key in self._cardinalities:
+            return self._cardinalities[key]
+        return self._redis.scard(key)
+
+    def set(self, key, *args, **kwargs):
+        self._values.pop(key, None)
+        return self._redis.set(key, *args, **kwargs)
+
+    def restore(self, key, *args, **kwargs):
+        self._values.pop(key, None)
+        return self._redis.restore(key, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._redis, name)
+
+
+_health_snapshot: Optional[HealthRedisSnapshot] = None
+_health_snapshot_lock = threading.Lock()
+
+
+def get_health_redis_snapshot(
+    redis: Redis, use_process_cache: bool = True
+) -> HealthRedisSnapshot:
+    """
+    Returns a snapshot of the health check redis state, reusing the snapshot
+    taken by this process if it was taken less than HEALTH_SNAPSHOT_TTL_SEC ago
+    """
+    global _health_snapshot
+
+    if not use_process_cache:
+        return HealthRedisSnapshot(redis)
+
+    with _health_snapshot_lock:
+        snapshot = _health_snapshot
+        if snapshot is None or snapshot.redis is not redis or snapshot.is_expired():
+            snapshot = HealthRedisSnapshot(redis)
+            _health_snapshot = snapshot
+        return snapshot
+
+
 def get_elapsed_time_redis(redis, redis_key):
     last_seen = redis.get(redis_key)
     elapsed_time_in_sec = (int(time.time()) - int(last_seen)) if last_seen else None
@@ -184,7 +311,9 @@ def get_health(args: GetHealthArgs, use_redis_cache: bool = True) -> Tuple[Dict,
 
     Returns a tuple of health results and a boolean indicating an error
     """
-    redis = redis_connection.get_redis()
+    redis = get_health_redis_snapshot(
+        redis_connection.get_redis(), use_process_cache=use_redis_cache
+    )
     web3 = web3_provider.get_web3()
 
     verbose = args.get("verbose")
@@ -5,7 +5,7 @@ from unittest.mock import MagicMock
 
 from hexbytes import HexBytes
 from src.models import Block
-from src.queries.get_health import get_health
+from src.queries.get_health import get_health, get_health_redis_snapshot
 from src.utils.redis_constants import (
     challenges_last_processed_event_redis_key,
     latest_block_hash_redis_key,
@@ -531,3 +531,28 @@ def test_get_health_challenge_events_max_drift(web3_mock, redis_mock, db_mock):
 
     assert error == True
     assert health_results["challenge_last_event_age_sec"] < int(time() - 49)
+
+
+def test_get_health_redis_snapshot(web3_mock, redis_mock, db_mock):
+    """Tests that the health check reads redis through a per-process snapshot"""
+    cache_play_health_vars(redis_mock)
+    redis_mock.set(latest_block_redis_key, "3")
+    redis_mock.set(latest_block_hash_redis_key, "0x3")
+    redis_mock.set(most_recent_indexed_block_redis_key, "2")
+    redis_mock.set(most_recent_indexed_block_hash_redis_key, "0x02")
+
+    health_results, error = get_health({})
+    assert error == False
+    assert health_results["db"]["number"] == 2
+
+    # Changes within the snapshot ttl are not visible to the health check
+    redis_mock.set(most_recent_indexed_block_redis_key, "3")
+    snapshot = get_health_redis_snapshot(redis_mock)
+    assert snapshot.get(most_recent_indexed_block_redis_key) == b"2"
+    health_results, error = get_health({})
+    assert health_results["db"]["number"] == 2
+
+    # Skipping the redis cache takes a fresh snapshot
+    fresh_snapshot = get_health_redis_snapshot(redis_mock, use_process_cache=False)
+    assert fresh_snapshot is not snapshot
+    assert fresh_snapshot.get(most_recent_indexed_block_redis_key) == b"3"
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
-from typing import List, Tuple, cast
+from itertools import islice
+from typing import Iterator, List, Tuple, cast
 
+import numpy as np
 from sqlalchemy.orm import Session, aliased
 from sqlalchemy.sql.expression import column, desc, tablesample
 from sqlalchemy.sql.functions import func
@@ -8,6 +10,10 @@ from sqlalchemy.sql.selectable import FromClause
 from src.models import RelatedArtist
 from src.models.models import AggregateUser, Follow, User
 from src.queries.query_helpers import helpers, populate_user_metadata
+from src.queries.related_artists_scoring import (
+    build_co_follow_matrix,
+    calculate_related_artist_scores,
+)
 from src.utils.db_session import get_db_read_replica
 from src.utils.helpers import time_method
 
@@ -21,6 +27,10 @@ MAX_FOLLOWERS_WITHOUT_SAMPLE = 10000
 SAMPLE_SIZE_ROWS = 3000000
 # Maximum number of related artists to have precalculated
 MAX_RELATED_ARTIST_COUNT = 100
+# Number of follows streamed from the database at a time when recalculating every artist
+FOLLOWS_CHUNK_SIZE = 100_000
+# Number of artists whose related artists are replaced at a time
+WRITE_BATCH_SIZE = 1_000
 
 
 @time_method
@@ -175,6 +185,97 @@ def update_related_artist_scores_if_needed(
     return False, "No results"
 
 
+def stream_artist_follows(
+    session: Session, chunk_size=FOLLOWS_CHUNK_SIZE
+) -> Iterator[np.ndarray]:
+    """Streams the (follower_user_id, followee_user_id) follows of artists
+    with tracks in arrays of up to chunk_size rows"""
+    query = (
+        session.query(Follow.follower_user_id, Follow.followee_user_id)
+        .join(AggregateUser, AggregateUser.user_id == Follow.followee_user_id)
+        .filter(
+            Follow.is_current,
+            Follow.is_delete == False,
+            AggregateUser.track_count > 0,
+            AggregateUser.follower_count > 0,
+        )
+    )
+    rows = []
+    for (follower_user_id, followee_user_id) in query.yield_per(chunk_size):
+        rows.append((follower_user_id, followee_user_id))
+        if len(rows) == chunk_size:
+            yield np.array(rows, dtype=np.int64)
+            rows = []
+    if rows:
+        yield np.array(rows, dtype=np.int64)
+
+
+@time_method
+def update_all_related_artist_scores(
+    session: Session, limit=MAX_RELATED_ARTIST_COUNT
+) -> int:
+    """Recalculates the related artists of every artist with at least the minimum
+    required number of followers from a single pass over the follows table.
+
+    Candidates and scores are the same as `_calculate_related_artists_scores`
+    without sampling. The queue keeps refreshing artists between full recalculations.
+
+    Args:
+        session (Session): the db sesssion to use for the connection
+        limit (int): the number of related artists to keep per artist
+
+    Returns:
+        int: the number of artists whose related artists were updated
+    """
+    artists = (
+        session.query(AggregateUser.user_id, AggregateUser.follower_count)
+        .filter(AggregateUser.track_count > 0, AggregateUser.follower_count > 0)
+        .order_by(AggregateUser.user_id)
+        .all()
+    )
+    if not artists:
+        return 0
+    artist_ids = np.array([user_id for (user_id, _) in artists], dtype=np.int64)
+    follower_counts = np.array(
+        [follower_count for (_, follower_count) in artists], dtype=np.float64
+    )
+    is_scored = follower_counts >= MIN_FOLLOWER_REQUIREMENT
+
+    matrix = build_co_follow_matrix(
+        stream_artist_follows(session), artist_ids, is_scored
+    )
+    scored_artists = calculate_related_artist_scores(
+        matrix, follower_counts, np.flatnonzero(is_scored), limit
+    )
+
+    created_at = datetime.utcnow()
+    updated_count = 0
+    while True:
+        batch = list(islice(scored_artists, WRITE_BATCH_SIZE))
+        if not batch:
+            break
+        session.query(RelatedArtist).filter(
+            RelatedArtist.user_id.in_([user_id for (user_id, _, _) in batch])
+        ).delete(synchronize_session=False)
+        session.bulk_insert_mappings(
+            RelatedArtist,
+            [
+                {
+                    "user_id": user_id,
+                    "related_artist_user_id": related_artist_user_id,
+                    "score": score,
+                    "created_at": created_at,
+                }
+                for (user_id, related_artist_ids, scores) in batch
+                for (related_artist_user_id, score) in zip(
+                    related_artist_ids.tolist(), scores.tolist()
+                )
+            ],
+        )
+        updated_count += len(batch)
+    return updated_count
+
+
 def _get_related_artists(session: Session, user_id: int, limit=100):
     related_artists = (
         session.query(User)
@@ -1,4 +1,5 @@
-from typing import Optional, TypedDict, cast
+from datetime import datetime
+from typing import Optional, Tuple, TypedDict, cast
 
 from sqlalchemy import desc
 from sqlalchemy.orm.session import Session
@@ -6,7 +7,8 @@ from sqlalchemy.sql.elements import and_, or_
 from src.models import Playlist, Repost, RepostType, SaveType, Track, User
 from src.queries import response_name_constants
 from src.queries.query_helpers import (
-    add_query_pagination,
+    add_query_cursor_pagination,
+    get_next_cursor,
     get_users_by_id,
     get_users_ids,
     populate_playlist_metadata,
@@ -19,6 +21,8 @@ from src.utils.db_session import get_db_read_replica
 class GetRepostFeedForUserArgs(TypedDict):
     offset: int
     limit: int
+    # (created_at, repost_item_id, repost_type) of the last repost of the previous page
+    cursor: Optional[Tuple[datetime, int, RepostType]]
     handle: Optional[str]
     current_user_id: Optional[int]
     with_suers: Optional[bool]
@@ -34,7 +38,7 @@ def get_repost_feed_for_user(user_id: int, args: GetRepostFeedForUserArgs):
 
     Returns:
         Array of tracks and playlists (albums) interspersed ordered by
-        most recent repost
+        most recent repost, and the cursor of the next page
     """
     db = get_db_read_replica()
     with db.scoped_session() as session:
@@ -48,6 +52,7 @@ def _get_repost_feed_for_user(
     current_user_id = args.get("current_user_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
     if "handle" in args:
         handle = args.get("handle") or ""
         user_id = cast(
@@ -98,7 +103,29 @@ def _get_repost_feed_for_user(
         )
     )
 
-    reposts = add_query_pagination(repost_query, limit, offset).all()
+    reposts = add_query_cursor_pagination(
+        repost_query,
+        limit,
+        offset,
+        cursor,
+        [
+            (Repost.created_at, True),
+            (Repost.repost_item_id, True),
+            (Repost.repost_type, True),
+        ],
+    ).all()
+    # The legacy route passes the limit as it is in the query string, if at all
+    next_cursor = (
+        get_next_cursor(
+            [
+                (repost.created_at, repost.repost_item_id, repost.repost_type)
+                for (repost, _, _) in reposts
+            ],
+            int(limit),
+        )
+        if limit is not None
+        else None
+    )
     # get track reposts from above
     track_reposts = [r[0] for r in reposts if r[1] is not None]
     track_reposts = helpers.query_result_to_list(track_reposts)
@@ -148,14 +175,15 @@ def _get_repost_feed_for_user(
             playlist["playlist_id"]
         ]["created_at"]
 
-    unsorted_feed = tracks + playlists
-
-    # sort feed by repost timestamp desc
-    feed_results = sorted(
-        unsorted_feed,
-        key=lambda entry: entry[response_name_constants.activity_timestamp],
-        reverse=True,
-    )
+    # order feed in the same order as the reposts query
+    tracks_by_id = {track["track_id"]: track for track in tracks}
+    playlists_by_id = {playlist["playlist_id"]: playlist for playlist in playlists}
+    feed_results = [
+        tracks_by_id[repost.repost_item_id]
+        if track is not None
+        else playlists_by_id[repost.repost_item_id]
+        for (repost, track, _) in reposts
+    ]
 
     if args.get("with_users", False):
         user_id_list = get_users_ids(feed_results)
@@ -170,4 +198,4 @@ def _get_repost_feed_for_user(
                 if user:
                     result["user"] = user
 
-    return feed_results
+    return (feed_results, next_cursor)
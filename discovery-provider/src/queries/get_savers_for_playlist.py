@@ -2,7 +2,11 @@ from sqlalchemy import desc, func
 from src import exceptions
 from src.models import AggregateUser, Playlist, Save, SaveType, User
 from src.queries import response_name_constants
-from src.queries.query_helpers import add_query_pagination, populate_user_metadata
+from src.queries.query_helpers import (
+    add_query_cursor_pagination,
+    get_next_cursor,
+    populate_user_metadata,
+)
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 
@@ -13,6 +17,7 @@ def get_savers_for_playlist(args):
     save_playlist_id = args.get("save_playlist_id")
     limit = args.get("limit")
     offset = args.get("offset")
+    cursor = args.get("cursor")
 
     db = get_db_read_replica()
     with db.scoped_session() as session:
@@ -29,14 +34,14 @@ def get_savers_for_playlist(args):
                 "Resource not found for provided playlist id"
             )
 
+        # Replace null values from left outer join with 0 to ensure sort works correctly.
+        follower_count = func.coalesce(AggregateUser.follower_count, 0)
+
         # Get all Users that saved Playlist, ordered by follower_count desc & paginated.
         query = (
             session.query(
                 User,
-                # Replace null values from left outer join with 0 to ensure sort works correctly.
-                (func.coalesce(AggregateUser.follower_count, 0)).label(
-                    response_name_constants.follower_count
-                ),
+                follower_count.label(response_name_constants.follower_count),
             )
             # Left outer join to associate users with their follower count.
             .outerjoin(AggregateUser, AggregateUser.user_id == User.user_id)
@@ -53,9 +58,19 @@ def get_savers_for_playlist(args):
                     )
                 ),
             )
-            .order_by(desc(response_name_constants.follower_count))
+            .order_by(desc(response_name_constants.follower_count), User.user_id)
+        )
+        user_results = add_query_cursor_pagination(
+            query,
+            limit,
+            offset,
+            cursor,
+            [(follower_count, True), (User.user_id, False)],
+        ).all()
+        next_cursor = get_next_cursor(
+            [(count, user.user_id) for (user, count) in user_results],
+            limit,
         )
-        user_results = add_query_pagination(query, limit, offset).all()
 
         # Fix format to return only Users objects with follower_count field.
         if user_results:
@@ -67,4 +82,4 @@ def get_savers_for_playlist(args):
                 session, user_ids, user_results, current_user_id
             )
 
-    return user_results
+    return (user_results, next_cursor)
@@ -2,10 +2,12 @@ import logging
 from datetime import datetime
 from typing import List, Tuple, TypedDict, Union, cast
 
-from sqlalchemy import func, or_
+from sqlalchemy import Integer, func, literal, or_
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Query, aliased
 from sqlalchemy.orm.session import Session
-from src.models import AggregateUser, AggregateUserTips, Follow, User, UserTip
+from src.models import AggregateUser, AggregateUserTips, User, UserTip
+from src.queries.get_followee_user_ids import get_followee_user_ids
 from src.queries.get_unpopulated_users import get_unpopulated_users
 from src.queries.query_helpers import paginate_query, populate_user_metadata
 from src.utils.db_session import get_db_read_replica
@@ -49,13 +51,7 @@ class TipResult(TypedDict):
 # WITH followees AS
 # (
 #     SELECT
-#         follows.followee_user_id AS followee_user_id
-#     FROM
-#         follows
-#     WHERE
-#         follows.is_current = true
-#         AND follows.is_delete = false
-#         AND follows.follower_user_id = 8
+#         unnest(:followee_user_ids) AS followee_user_id
 # )
 # ,
 # tips AS
@@ -182,15 +178,12 @@ def _get_tips(session: Session, args: GetTipsArgs):
         # 1) To filter tips to recipients the user follows (if necessary)
         # 2) To filter tips to senders the user follows (if necessary)
         # 3) To get the followees of the current user that have also tipped the receiver
-        followees_query = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id == args["user_id"],
+        followee_user_ids = get_followee_user_ids(session, args["user_id"])
+        followees_query = session.query(
+            func.unnest(literal(followee_user_ids, ARRAY(Integer))).label(
+                "followee_user_id"
             )
-            .cte("followees")
-        )
+        ).cte("followees")
         # First, filter the senders/receivers as necessary
         if args.get("current_user_follows"):
             FolloweesSender = aliased(followees_query, name="followees_for_sender")
@@ -1,7 +1,8 @@
 from sqlalchemy import desc, func
 from src import exceptions
-from src.models import Follow, Save, Track
+from src.models import Save, Track
 from src.queries import response_name_constants
+from src.queries.get_followee_user_ids import get_followee_user_ids, in_user_ids
 from src.queries.query_helpers import (
     get_users_by_id,
     get_users_ids,
@@ -20,13 +21,7 @@ def get_top_followee_saves(saveType, args):
     current_user_id = args.get("user_id")
     db = get_db_read_replica()
     with db.scoped_session() as session:
-        # Construct a subquery of all followees
-        followee_user_ids = session.query(Follow.followee_user_id).filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False,
-        )
-        followee_user_ids_subquery = followee_user_ids.subquery()
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
         # Construct a subquery of all saves from followees aggregated by id
         save_count = (
@@ -34,11 +29,8 @@ def get_top_followee_saves(saveType, args):
                 Save.save_item_id,
                 func.count(Save.save_item_id).label(response_name_constants.save_count),
             )
-            .join(
-                followee_user_ids_subquery,
-                Save.user_id == followee_user_ids_subquery.c.followee_user_id,
-            )
             .filter(
+                in_user_ids(Save.user_id, followee_user_ids),
                 Save.is_current == True,
                 Save.is_delete == False,
                 Save.save_type == saveType,
@@ -1,7 +1,8 @@
 from sqlalchemy import desc, text
 from src import exceptions
-from src.models import Follow, Track
+from src.models import Track
 from src.models.models import AggregateTrack
+from src.queries.get_followee_user_ids import get_followee_user_ids, in_user_ids
 from src.queries.query_helpers import (
     get_users_by_id,
     get_users_ids,
@@ -27,24 +28,16 @@ def get_top_followee_windowed(type, window, args):
     db = get_db_read_replica()
     with db.scoped_session() as session:
 
-        followee_user_ids = session.query(Follow.followee_user_id).filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False,
-        )
-        followee_user_ids_subquery = followee_user_ids.subquery()
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
-        # Queries for tracks joined against followed users and counts
+        # Queries for tracks of followed users joined against counts
         tracks_query = (
             session.query(
                 Track,
             )
-            .join(
-                followee_user_ids_subquery,
-                Track.owner_id == followee_user_ids_subquery.c.followee_user_id,
-            )
             .join(AggregateTrack, Track.track_id == AggregateTrack.track_id)
             .filter(
+                in_user_ids(Track.owner_id, followee_user_ids),
                 Track.is_current == True,
                 Track.is_delete == False,
                 Track.is_unlisted == False,
@@ -12,7 +12,7 @@ from src.utils.redis_cache import get_trending_cache_key, use_redis_cache
 logger = logging.getLogger(__name__)
 
 
-def get_trending(args, strategy):
+def get_trending(args, strategy, limit=TRENDING_LIMIT, offset=0):
     """Get Trending, shared between full and regular endpoints."""
     # construct args
     time = args.get("time") if args.get("time") is not None else "week"
@@ -21,8 +21,8 @@ def get_trending(args, strategy):
         "time": time,
         "genre": args.get("genre", None),
         "with_users": True,
-        "limit": TRENDING_LIMIT,
-        "offset": 0,
+        "limit": limit,
+        "offset": offset,
     }
 
     # decode and add user_id if necessary
@@ -39,12 +39,13 @@ def get_full_trending(request, args, strategy):
     limit = format_limit(args, TRENDING_LIMIT)
     key = get_trending_cache_key(to_dict(request.args), request.path)
 
-    # Attempt to use the cached tracks list
+    # Users get their own populated page, only hydrating the requested tracks
     if args["user_id"] is not None:
-        full_trending = get_trending(args, strategy)
-    else:
-        full_trending = use_redis_cache(
-            key, TRENDING_TTL_SEC, lambda: get_trending(args, strategy)
-        )
+        return get_trending(args, strategy, limit, offset)
+
+    # Attempt to use the cached tracks list
+    full_trending = use_redis_cache(
+        key, TRENDING_TTL_SEC, lambda: get_trending(args, strategy)
+    )
     trending_tracks = full_trending[offset : limit + offset]
     return trending_tracks
@@ -29,6 +29,7 @@ from src.queries.query_helpers import (
     populate_track_metadata,
 )
 from src.tasks.generate_trending import time_delta_map
+from src.trending_strategies.trending_scoring import to_scoring_columns, top_k_indexes
 from src.trending_strategies.trending_strategy_factory import DEFAULT_TRENDING_VERSIONS
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
@@ -201,16 +202,16 @@ def make_get_unpopulated_playlists(session, time_range, strategy):
         )
 
         # score the playlists
-        scored_playlists = [
-            strategy.get_track_score(time_range, playlist)
-            for playlist in playlist_scoring_data
-        ]
-        sorted_playlists = sorted(
-            scored_playlists, key=lambda k: k["score"], reverse=True
+        playlist_columns = to_scoring_columns(
+            playlist_scoring_data, response_name_constants.playlist_id
         )
+        scores = strategy.get_track_scores(time_range, playlist_columns)
+        sorted_indexes = top_k_indexes(scores, len(scores))
 
         # Get the unpopulated playlist metadata
-        playlist_ids = [playlist["playlist_id"] for playlist in sorted_playlists]
+        playlist_ids = playlist_columns[response_name_constants.playlist_id][
+            sorted_indexes
+        ].tolist()
         playlists = get_unpopulated_playlists(session, playlist_ids)
 
         playlist_tracks_map = get_playlist_tracks(session, {"playlists": playlists})
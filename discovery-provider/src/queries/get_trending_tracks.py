@@ -1,5 +1,6 @@
-from typing import Optional, TypedDict
+from typing import List, Optional, Tuple, TypedDict
 
+from redis import Redis
 from sqlalchemy import desc
 from sqlalchemy.orm.session import Session
 from src.models import TrackTrendingScore
@@ -16,28 +17,42 @@ from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
 )
+from src.utils import redis_connection
 from src.utils.db_session import get_db_read_replica
-from src.utils.redis_cache import use_redis_cache
 
 TRENDING_LIMIT = 100
 TRENDING_TTL_SEC = 30 * 60
 
+# Sorted set members are zero padded track ids, so redis orders tied scores
+# lexicographically in the same order as numeric track ids.
+# 10 digits fit any Integer track_id
+TRACK_ID_MEMBER_WIDTH = 10
+
 
 def make_trending_cache_key(
     time_range, genre, version=DEFAULT_TRENDING_VERSIONS[TrendingType.TRACKS]
 ):
-    """Makes a cache key resembling `generated-trending:week:electronic`"""
+    """
+    Makes a cache key resembling `generated-trending-scores:week:electronic`
+    The key holds a sorted set of zero padded track_id -> trending score
+    """
     version_name = (
         f":{version.name}"
         if version != DEFAULT_TRENDING_VERSIONS[TrendingType.TRACKS]
         else ""
     )
-    return f"generated-trending{version_name}:{time_range}:{(genre.lower() if genre else '')}"
+    return f"generated-trending-scores{version_name}:{time_range}:{(genre.lower() if genre else '')}"
 
 
-def generate_unpopulated_trending(
+def generate_trending_track_scores(
     session, genre, time_range, strategy, limit=TRENDING_LIMIT
-):
+) -> List[Tuple[int, float]]:
+    """Returns the top (track_id, score) pairs, sorted by descending score"""
+    if strategy.use_mat_view:
+        return generate_trending_track_scores_from_mat_views(
+            session, genre, time_range, strategy, limit
+        )
+
     trending_tracks = generate_trending(session, time_range, genre, limit, 0, strategy)
 
     track_scores = [
@@ -48,15 +63,12 @@ def generate_unpopulated_trending(
     sorted_track_scores = sorted(
         track_scores, key=lambda k: (k["score"], k["track_id"]), reverse=True
     )[:limit]
-    track_ids = [track["track_id"] for track in sorted_track_scores]
-
-    tracks = get_unpopulated_tracks(session, track_ids)
-    return (tracks, track_ids)
+    return [(track["track_id"], track["score"]) for track in sorted_track_scores]
 
 
-def generate_unpopulated_trending_from_mat_views(
+def generate_trending_track_scores_from_mat_views(
     session, genre, time_range, strategy, limit=TRENDING_LIMIT
-):
+) -> List[Tuple[int, float]]:
 
     # use all time instead of year for version EJ57D
     if strategy.version == TrendingVersion.EJ57D and time_range == "year":
@@ -85,29 +97,81 @@ def generate_unpopulated_trending_from_mat_views(
         .all()
     )
 
-    track_ids = [track_id[0] for track_id in trending_track_ids]
-    tracks = get_unpopulated_tracks(session, track_ids)
-    return (tracks, track_ids)
+    return [(track_id, float(score)) for track_id, score in trending_track_ids]
 
 
-def make_generate_unpopulated_trending(session, genre, time_range, strategy):
-    """Wraps a call to `generate_unpopulated_trending` for use in `use_redis_cache`, which
-    expects to be passed a function with no arguments."""
+def make_empty_trending_cache_key(key: str) -> str:
+    """Makes the key marking that the trending sorted set at `key` is empty"""
+    return f"{key}:empty"
 
-    def wrapped():
-        if strategy.use_mat_view:
-            return generate_unpopulated_trending_from_mat_views(
-                session, genre, time_range, strategy
-            )
-        return generate_unpopulated_trending(session, genre, time_range, strategy)
 
-    return wrapped
+def set_trending_track_scores(
+    redis: Redis, key: str, track_scores: List[Tuple[int, float]]
+):
+    """
+    Replaces the sorted set at `key` with the given track scores.
+    The new set is written to a temporary key and renamed over the old one
+    so readers never observe a partially written set.
+    An empty sorted set can't exist in redis, so an empty result is cached as
+    a marker key expiring after TRENDING_TTL_SEC instead, so that readers don't
+    regenerate it on every request.
+    """
+    empty_key = make_empty_trending_cache_key(key)
+    pipe = redis.pipeline()
+    if not track_scores:
+        pipe.delete(key)
+        pipe.set(empty_key, 1, TRENDING_TTL_SEC)
+        pipe.execute()
+        return
+    tmp_key = f"{key}:tmp"
+    pipe.delete(tmp_key)
+    pipe.zadd(
+        tmp_key,
+        {
+            f"{track_id:0{TRACK_ID_MEMBER_WIDTH}d}": score
+            for track_id, score in track_scores
+        },
+    )
+    pipe.rename(tmp_key, key)
+    pipe.delete(empty_key)
+    pipe.execute()
+
+
+def get_trending_track_ids(
+    session: Session,
+    redis: Redis,
+    genre: Optional[str],
+    time_range: str,
+    strategy: BaseTrendingStrategy,
+    limit: int = TRENDING_LIMIT,
+    offset: int = 0,
+) -> List[int]:
+    """
+    Pages through the trending sorted set materialized by index_trending, falling back
+    to generating and storing it here if necessary.
+    Tracks with the same score are sorted by track_id desc like the trending queries.
+    """
+    key = make_trending_cache_key(time_range, genre, strategy.version)
+    track_ids = redis.zrevrange(key, offset, offset + limit - 1)
+    if track_ids or offset >= TRENDING_LIMIT:
+        return [int(track_id) for track_id in track_ids]
+
+    # An empty page within the limit is either the end of the set,
+    # a cached empty result or a missing key
+    if redis.exists(key, make_empty_trending_cache_key(key)):
+        return []
+    track_scores = generate_trending_track_scores(session, genre, time_range, strategy)
+    set_trending_track_scores(redis, key, track_scores)
+    return [track_id for track_id, _ in track_scores[offset : offset + limit]]
 
 
 class GetTrendingTracksArgs(TypedDict, total=False):
     current_user_id: Optional[int]
     genre: Optional[str]
     time: str
+    limit: int
+    offset: int
+    with_users: bool
 
 
 def get_trending_tracks(args: GetTrendingTracksArgs, strategy: BaseTrendingStrategy):
@@ -126,22 +190,24 @@ def _get_trending_tracks_with_session(
         args.get("time", "week"),
     )
     time_range = "week" if time not in ["week", "month", "year", "allTime"] else time
-    key = make_trending_cache_key(time_range, genre, strategy.version)
+    limit, offset = args.get("limit", TRENDING_LIMIT), args.get("offset", 0)
 
-    # Will try to hit cached trending from task, falling back
-    # to generating it here if necessary and storing it with no TTL
-    (tracks, track_ids) = use_redis_cache(
-        key,
-        None,
-        make_generate_unpopulated_trending(session, genre, time_range, strategy),
+    # Only the requested page of ids is read from the sorted set cached by the task
+    redis = redis_connection.get_redis()
+    track_ids = get_trending_track_ids(
+        session, redis, genre, time_range, strategy, limit, offset
     )
 
-    # populate track metadata
+    # Hydrate the page through the track cache and populate track metadata
+    tracks = get_unpopulated_tracks(session, track_ids)
     tracks = populate_track_metadata(session, track_ids, tracks, current_user_id)
     tracks_map = {track["track_id"]: track for track in tracks}
 
-    # Re-sort the populated tracks b/c it loses sort order in sql query
-    sorted_tracks = [tracks_map[track_id] for track_id in track_ids]
+    # Re-sort the populated tracks b/c it loses sort order in sql query,
+    # dropping any that have since been deleted or unlisted
+    sorted_tracks = [
+        tracks_map[track_id] for track_id in track_ids if track_id in tracks_map
+    ]
 
     if args.get("with_users", False):
         user_id_list = get_users_ids(sorted_tracks)
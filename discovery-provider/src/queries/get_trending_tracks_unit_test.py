@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+
+import src.queries.get_trending_tracks
+from src.queries.get_trending_tracks import (
+    TRENDING_TTL_SEC,
+    get_trending_track_ids,
+    make_empty_trending_cache_key,
+    make_trending_cache_key,
+    set_trending_track_scores,
+)
+from src.trending_strategies.trending_type_and_version import TrendingVersion
+
+
+def test_get_trending_track_ids_pages_sorted_set(redis_mock):
+    """Tests that trending track ids are paged from the sorted set by score"""
+    strategy = MagicMock(version=TrendingVersion.EJ57D)
+    key = make_trending_cache_key("week", "Electronic", strategy.version)
+    set_trending_track_scores(redis_mock, key, [(3, 30.0), (1, 10.0), (2, 20.0)])
+
+    assert get_trending_track_ids(None, redis_mock, "Electronic", "week", strategy) == [
+        3,
+        2,
+        1,
+    ]
+    assert get_trending_track_ids(
+        None, redis_mock, "Electronic", "week", strategy, limit=1, offset=1
+    ) == [2]
+    assert (
+        get_trending_track_ids(
+            None, redis_mock, "Electronic", "week", strategy, limit=2, offset=3
+        )
+        == []
+    )
+
+    # Ties are broken by numeric track_id desc
+    set_trending_track_scores(
+        redis_mock, key, [(100, 5.0), (99, 5.0), (1000, 5.0), (7, 9.0)]
+    )
+    assert get_trending_track_ids(None, redis_mock, "Electronic", "week", strategy) == [
+        7,
+        1000,
+        100,
+        99,
+    ]
+    assert get_trending_track_ids(
+        None, redis_mock, "Electronic", "week", strategy, limit=2, offset=1
+    ) == [1000, 100]
+
+    # Re-materializing replaces the previous set
+    set_trending_track_scores(redis_mock, key, [(4, 1.0)])
+    assert get_trending_track_ids(None, redis_mock, "Electronic", "week", strategy) == [
+        4
+    ]
+
+
+def test_get_trending_track_ids_generates_missing_set(redis_mock, monkeypatch):
+    """Tests that a missing sorted set is generated and stored on read"""
+    strategy = MagicMock(version=TrendingVersion.EJ57D)
+    generate = MagicMock(return_value=[(5, 50.0), (6, 40.0)])
+    monkeypatch.setattr(
+        src.queries.get_trending_tracks, "generate_trending_track_scores", generate
+    )
+
+    assert get_trending_track_ids(
+        None, redis_mock, None, "week", strategy, limit=1
+    ) == [5]
+    assert get_trending_track_ids(None, redis_mock, None, "week", strategy) == [5, 6]
+    assert generate.call_count == 1
+
+
+def test_get_trending_track_ids_caches_empty_set(redis_mock, monkeypatch):
+    """Tests that an empty result is cached rather than regenerated on every read"""
+    strategy = MagicMock(version=TrendingVersion.EJ57D)
+    generate = MagicMock(return_value=[])
+    monkeypatch.setattr(
+        src.queries.get_trending_tracks, "generate_trending_track_scores", generate
+    )
+
+    assert get_trending_track_ids(None, redis_mock, "Jazz", "week", strategy) == []
+    assert get_trending_track_ids(None, redis_mock, "Jazz", "week", strategy) == []
+    assert generate.call_count == 1
+
+    key = make_trending_cache_key("week", "Jazz", strategy.version)
+    assert 0 < redis_mock.ttl(make_empty_trending_cache_key(key)) <= TRENDING_TTL_SEC
+
+    # Scores written afterwards replace the empty result
+    set_trending_track_scores(redis_mock, key, [(8, 1.0)])
+    assert not redis_mock.exists(make_empty_trending_cache_key(key))
+    assert get_trending_track_ids(None, redis_mock, "Jazz", "week", strategy) == [8]
@@ -2,6 +2,7 @@ import logging  # pylint: disable=C0302
 from datetime import datetime, timedelta
 from typing import Any, Optional, TypedDict
 
+import numpy as np
 import redis
 from sqlalchemy import func
 from sqlalchemy.orm.session import Session
@@ -9,6 +10,7 @@ from src.api.v1.helpers import extend_track, format_limit, format_offset, to_dic
 from src.models import (
     AggregatePlays,
     AggregateUser,
+    AggregateUserAgedFollowers,
     Follow,
     RepostType,
     SaveType,
@@ -29,16 +31,19 @@ from src.queries.query_helpers import (
     get_users_ids,
     populate_track_metadata,
 )
+from src.tasks.index_aggregate_user_aged_followers import AGED_FOLLOWER_DAYS
+from src.trending_strategies.trending_scoring import (
+    ScoringColumns,
+    get_age_days,
+    set_column_values,
+    top_k_indexes,
+)
 from src.trending_strategies.trending_strategy_factory import DEFAULT_TRENDING_VERSIONS
 from src.trending_strategies.trending_type_and_version import TrendingType
 from src.utils.config import shared_config
 from src.utils.db_session import get_db_read_replica
 from src.utils.helpers import decode_string_id
-from src.utils.redis_cache import (
-    get_json_cached_key,
-    get_trending_cache_key,
-    use_redis_cache,
-)
+from src.utils.redis_cache import get_trending_cache_key, use_redis_cache
 
 redis_url = shared_config["redis"]["url"]
 redis_conn = redis.Redis.from_url(url=redis_url)
@@ -49,20 +54,39 @@ UNDERGROUND_TRENDING_CACHE_KEY = "generated-trending-tracks-underground"
 UNDERGROUND_TRENDING_LENGTH = 50
 
 
-def get_scorable_track_data(session, redis_instance, strategy):
+def get_aged_follower_query(session, days):
+    """Counts followers older than `days` per followee from the follows table"""
+    return (
+        session.query(
+            Follow.followee_user_id.label("user_id"),
+            User.is_verified.label("is_verified"),
+            func.count(Follow.followee_user_id).label("follower_count"),
+        )
+        .join(User, User.user_id == Follow.followee_user_id)
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            User.is_current == True,
+            Follow.created_at < (datetime.now() - timedelta(days=days)),
+        )
+        .group_by(Follow.followee_user_id, User.is_verified)
+    ).subquery()
+
+
+def get_scorable_track_data(session, redis_instance, strategy) -> ScoringColumns:
     """
-    Returns a map: {
-        "track_id": string
-        "created_at": string
-        "owner_id": number
-        "windowed_save_count": number
-        "save_count": number
-        "repost_count": number
-        "windowed_repost_count": number
-        "owner_follower_count": number
-        "karma": number
-        "listens": number
-        "owner_verified": boolean
+    Returns the scorable tracks as scoring columns: {
+        "track_id": int array
+        "owner_id": int array
+        "windowed_save_count": float array
+        "save_count": float array
+        "repost_count": float array
+        "windowed_repost_count": float array
+        "owner_follower_count": float array
+        "karma": float array
+        "listens": float array
+        "owner_verified": bool array
+        "age_days": float array
     }
     """
 
@@ -76,28 +100,25 @@ def get_scorable_track_data(session, redis_instance, strategy):
     xf = score_params["xf"]
     pt = score_params["pt"]
     trending_key = make_trending_cache_key("week", None, strategy.version)
-    track_ids = []
-    old_trending = get_json_cached_key(redis_instance, trending_key)
-    if old_trending:
-        track_ids = old_trending[1]
-    exclude_track_ids = track_ids[:qr]
+    exclude_track_ids = [
+        int(track_id) for track_id in redis_instance.zrevrange(trending_key, 0, qr - 1)
+    ]
 
     # Get followers
-    follower_query = (
-        session.query(
-            Follow.followee_user_id.label("user_id"),
-            User.is_verified.label("is_verified"),
-            func.count(Follow.followee_user_id).label("follower_count"),
-        )
-        .join(User, User.user_id == Follow.followee_user_id)
-        .filter(
-            Follow.is_current == True,
-            Follow.is_delete == False,
-            User.is_current == True,
-            Follow.created_at < (datetime.now() - timedelta(days=f)),
-        )
-        .group_by(Follow.followee_user_id, User.is_verified)
-    ).subquery()
+    if f == AGED_FOLLOWER_DAYS:
+        # Aged follower counts are maintained incrementally by
+        # index_aggregate_user_aged_followers
+        follower_query = (
+            session.query(
+                AggregateUserAgedFollowers.user_id.label("user_id"),
+                User.is_verified.label("is_verified"),
+                AggregateUserAgedFollowers.follower_count.label("follower_count"),
+            )
+            .join(User, User.user_id == AggregateUserAgedFollowers.user_id)
+            .filter(User.is_current == True)
+        ).subquery()
+    else:
+        follower_query = get_aged_follower_query(session, f)
 
     base_query = (
         session.query(
@@ -125,24 +146,26 @@ def get_scorable_track_data(session, redis_instance, strategy):
         )
     ).all()
 
-    tracks_map = {
-        record[0]: {
-            "track_id": record[0],
-            "created_at": record[4].isoformat(timespec="seconds"),
-            "owner_id": record[1],
-            "windowed_save_count": 0,
-            "save_count": 0,
-            "repost_count": 0,
-            "windowed_repost_count": 0,
-            "owner_follower_count": record[2],
-            "karma": 1,
-            "listens": record[3],
-            "owner_verified": record[5],
-        }
-        for record in base_query
-    }
-
     track_ids = [record[0] for record in base_query]
+    track_indexes = {track_id: i for i, track_id in enumerate(track_ids)}
+    num_tracks = len(track_ids)
+    tracks: ScoringColumns = {
+        "track_id": np.array(track_ids, dtype=np.int64),
+        "owner_id": np.array([record[1] for record in base_query], dtype=np.int64),
+        "windowed_save_count": np.zeros(num_tracks),
+        "save_count": np.zeros(num_tracks),
+        "repost_count": np.zeros(num_tracks),
+        "windowed_repost_count": np.zeros(num_tracks),
+        "owner_follower_count": np.array(
+            [record[2] for record in base_query], dtype=np.float64
+        ),
+        "karma": np.ones(num_tracks),
+        "listens": np.array([record[3] for record in base_query], dtype=np.float64),
+        "owner_verified": np.array(
+            [bool(record[5]) for record in base_query], dtype=bool
+        ),
+        "age_days": get_age_days(record[4] for record in base_query),
+    }
 
     # Get all the extra values
     repost_counts = get_repost_counts(
@@ -162,18 +185,17 @@ def get_scorable_track_data(session, redis_instance, strategy):
     karma_scores = get_karma(session, tuple(track_ids), strategy, None, False, xf)
 
     # Associate all the extra data
-    for (track_id, repost_count) in repost_counts:
-        tracks_map[track_id]["repost_count"] = repost_count
-    for (track_id, repost_count) in windowed_repost_counts:
-        tracks_map[track_id]["windowed_repost_count"] = repost_count
-    for (track_id, save_count) in save_counts:
-        tracks_map[track_id]["save_count"] = save_count
-    for (track_id, save_count) in windowed_save_counts:
-        tracks_map[track_id]["windowed_save_count"] = save_count
-    for (track_id, karma) in karma_scores:
-        tracks_map[track_id]["karma"] = karma
+    set_column_values(tracks, track_indexes, "repost_count", repost_counts)
+    set_column_values(
+        tracks, track_indexes, "windowed_repost_count", windowed_repost_counts
+    )
+    set_column_values(tracks, track_indexes, "save_count", save_counts)
+    set_column_values(
+        tracks, track_indexes, "windowed_save_count", windowed_save_counts
+    )
+    set_column_values(tracks, track_indexes, "karma", karma_scores)
 
-    return list(tracks_map.values())
+    return tracks
 
 
 def make_underground_trending_cache_key(
@@ -191,14 +213,11 @@ def make_get_unpopulated_tracks(session, redis_instance, strategy):
     def wrapped():
         # Score and sort
         track_scoring_data = get_scorable_track_data(session, redis_instance, strategy)
-        scored_tracks = [
-            strategy.get_track_score("week", track) for track in track_scoring_data
-        ]
-        sorted_tracks = sorted(scored_tracks, key=lambda k: k["score"], reverse=True)
-        sorted_tracks = sorted_tracks[:UNDERGROUND_TRENDING_LENGTH]
+        scores = strategy.get_track_scores("week", track_scoring_data)
+        top_indexes = top_k_indexes(scores, UNDERGROUND_TRENDING_LENGTH)
 
         # Get unpopulated metadata
-        track_ids = [track["track_id"] for track in sorted_tracks]
+        track_ids = track_scoring_data["track_id"][top_indexes].tolist()
         tracks = get_unpopulated_tracks(session, track_ids)
         return (tracks, track_ids)
 
@@ -1,6 +1,6 @@
 import logging  # pylint: disable=C0302
 from datetime import date, datetime, timedelta
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from flask import Blueprint, request
 from redis import Redis
@@ -27,6 +27,12 @@ from src.models import (
 from src.models.reaction import Reaction
 from src.queries import response_name_constants as const
 from src.queries.get_prev_track_entries import get_prev_track_entries
+from src.queries.notifications_changefeed import (
+    NOTIFICATIONS_CHANGEFEED_KEY,
+    SOLANA_NOTIFICATIONS_CHANGEFEED_KEY,
+    merge_notifications_changefeed_entries,
+    merge_solana_notifications_changefeed_entries,
+)
 from src.queries.query_helpers import (
     get_follower_count_dict,
     get_repost_counts,
@@ -34,6 +40,7 @@ from src.queries.query_helpers import (
 )
 from src.tasks.index_listen_count_milestones import LISTEN_COUNT_MILESTONE
 from src.utils import web3_provider
+from src.utils.changefeed import get_changefeed_entries
 from src.utils.config import shared_config
 from src.utils.db_session import get_db_read_replica
 from src.utils.redis_connection import get_redis
@@ -201,77 +208,13 @@ def get_cosign_remix_notifications(session, max_block_number, remix_tracks):
     return remix_notifications
 
 
-@bp.route("/notifications", methods=("GET",))
 # pylint: disable=R0915
-def notifications():
+def get_notifications(db, min_block_number, max_block_number, track_ids_to_owner):
     """
-    Fetches the notifications events that occurred between the given block numbers
-
-    URL Params:
-        min_block_number: (int) The start block number for querying for notifications
-        max_block_number?: (int) The end block number for querying for notifications
-        track_id?: (Array<int>) Array of track id for fetching the track's owner id
-            and adding the track id to owner user id mapping to the `owners` response field
-            NOTE: this is added for notification for listen counts
-
-    Response - Json object w/ the following fields
-        notifications: Array of notifications of shape:
-            type: 'Follow' | 'Favorite' | 'Repost' | 'Create' | 'RemixCreate' | 'RemixCosign' | 'PlaylistUpdate'
-            blocknumber: (int) blocknumber of notification
-            timestamp: (string) timestamp of notification
-            initiator: (int) the user id that caused this notification
-            metadata?: (any) additional information about the notification
-                entity_id?: (int) the id of the target entity (ie. playlist id of a playlist that is reposted)
-                entity_type?: (string) the type of the target entity
-                entity_owner_id?: (int) the id of the target entity's owner (if applicable)
-                playlist_update_timestamp?: (string) timestamp of last update of a given playlist
-                playlist_update_users?: (array<int>) user ids which favorited a given playlist
-
-        info: Dictionary of metadata w/ min_block_number & max_block_number fields
-
-        milestones: Dictionary mapping of follows/reposts/favorites (processed within the blocks params)
-            Root fields:
-                follower_counts: Contains a dictionary of user id => follower count (up to the max_block_number)
-                repost_counts: Contains a dictionary tracks/albums/playlists of id to repost count
-                favorite_counts: Contains a dictionary tracks/albums/playlists of id to favorite count
-
-        owners: Dictionary containing the mapping for track id / playlist id / album -> owner user id
-            The root keys are 'tracks', 'playlists', 'albums' and each contains the id to owner id mapping
+    Computes the notifications, milestones and owners of the block range (min_block_number, max_block_number]
+    See `notifications` for the shape of the response
     """
-
-    db = get_db_read_replica()
     web3 = web3_provider.get_web3()
-    min_block_number = request.args.get("min_block_number", type=int)
-    max_block_number = request.args.get("max_block_number", type=int)
-
-    track_ids_to_owner = []
-    try:
-        track_ids_str_list = request.args.getlist("track_id")
-        track_ids_to_owner = [int(y) for y in track_ids_str_list]
-    except Exception as e:
-        logger.error(f"Failed to retrieve track list {e}")
-
-    # Max block number is not explicitly required (yet)
-    if not min_block_number and min_block_number != 0:
-        return api_helpers.error_response({"msg": "Missing min block number"}, 400)
-
-    if not max_block_number:
-        max_block_number = min_block_number + max_block_diff
-    elif (max_block_number - min_block_number) > max_block_diff:
-        max_block_number = min_block_number + max_block_diff
-
-    with db.scoped_session() as session:
-        current_block_query = session.query(Block).filter_by(is_current=True)
-        current_block_query_results = current_block_query.all()
-        current_block = current_block_query_results[0]
-        current_max_block_num = current_block.number
-        if current_max_block_num < max_block_number:
-            max_block_number = current_max_block_num
-
-    notification_metadata = {
-        "min_block_number": min_block_number,
-        "max_block_number": max_block_number,
-    }
 
     # Retrieve milestones statistics
     milestone_info = {}
@@ -1062,14 +1005,117 @@ def notifications():
         f"notifications.py | sorted notifications {datetime.now() - start_time}"
     )
 
-    return api_helpers.success_response(
-        {
-            "notifications": sorted_notifications,
-            "info": notification_metadata,
-            "milestones": milestone_info,
-            "owners": owner_info,
-        }
+    return {
+        "notifications": sorted_notifications,
+        "milestones": milestone_info,
+        "owners": owner_info,
+    }
+
+
+def get_track_owners(session, track_ids) -> Dict[str, int]:
+    """Returns the owner of each track, keyed by the stringified track id as in the changefeed"""
+    if not track_ids:
+        return {}
+    track_owners = session.query(Track.track_id, Track.owner_id).filter(
+        Track.is_current == True, Track.track_id.in_(track_ids)
+    )
+    return {str(track_id): owner_id for track_id, owner_id in track_owners}
+
+
+@bp.route("/notifications", methods=("GET",))
+def notifications():
+    """
+    Fetches the notifications events that occurred between the given block numbers
+
+    URL Params:
+        min_block_number: (int) The start block number for querying for notifications
+        max_block_number?: (int) The end block number for querying for notifications
+        track_id?: (Array<int>) Array of track id for fetching the track's owner id
+            and adding the track id to owner user id mapping to the `owners` response field
+            NOTE: this is added for notification for listen counts
+
+    Response - Json object w/ the following fields
+        notifications: Array of notifications of shape:
+            type: 'Follow' | 'Favorite' | 'Repost' | 'Create' | 'RemixCreate' | 'RemixCosign' | 'PlaylistUpdate'
+            blocknumber: (int) blocknumber of notification
+            timestamp: (string) timestamp of notification
+            initiator: (int) the user id that caused this notification
+            metadata?: (any) additional information about the notification
+                entity_id?: (int) the id of the target entity (ie. playlist id of a playlist that is reposted)
+                entity_type?: (string) the type of the target entity
+                entity_owner_id?: (int) the id of the target entity's owner (if applicable)
+                playlist_update_timestamp?: (string) timestamp of last update of a given playlist
+                playlist_update_users?: (array<int>) user ids which favorited a given playlist
+
+        info: Dictionary of metadata w/ min_block_number & max_block_number fields
+
+        milestones: Dictionary mapping of follows/reposts/favorites (processed within the blocks params)
+            Root fields:
+                follower_counts: Contains a dictionary of user id => follower count (up to the max_block_number)
+                repost_counts: Contains a dictionary tracks/albums/playlists of id to repost count
+                favorite_counts: Contains a dictionary tracks/albums/playlists of id to favorite count
+
+        owners: Dictionary containing the mapping for track id / playlist id / album -> owner user id
+            The root keys are 'tracks', 'playlists', 'albums' and each contains the id to owner id mapping
+
+        reverted?: Dictionary of the entities written in blocks that were reverted after being returned.
+            It is returned with every window starting at or before the block the revert was recorded at,
+            so pollers that request a window again get it again
+            users/tracks/playlists: Array of entity ids
+            follows: Array of [follower user id, followee user id]
+            saves/reposts: Array of [user id, type, entity id]
+    """
+
+    db = get_db_read_replica()
+    min_block_number = request.args.get("min_block_number", type=int)
+    max_block_number = request.args.get("max_block_number", type=int)
+
+    track_ids_to_owner = []
+    try:
+        track_ids_str_list = request.args.getlist("track_id")
+        track_ids_to_owner = [int(y) for y in track_ids_str_list]
+    except Exception as e:
+        logger.error(f"Failed to retrieve track list {e}")
+
+    # Max block number is not explicitly required (yet)
+    if not min_block_number and min_block_number != 0:
+        return api_helpers.error_response({"msg": "Missing min block number"}, 400)
+
+    if not max_block_number:
+        max_block_number = min_block_number + max_block_diff
+    elif (max_block_number - min_block_number) > max_block_diff:
+        max_block_number = min_block_number + max_block_diff
+
+    with db.scoped_session() as session:
+        current_block_query = session.query(Block).filter_by(is_current=True)
+        current_block_query_results = current_block_query.all()
+        current_block = current_block_query_results[0]
+        current_max_block_num = current_block.number
+        if current_max_block_num < max_block_number:
+            max_block_number = current_max_block_num
+
+    redis = get_redis()
+    changefeed_entries, max_block_number = get_changefeed_entries(
+        redis, NOTIFICATIONS_CHANGEFEED_KEY, min_block_number, max_block_number
     )
+    notification_metadata = {
+        "min_block_number": min_block_number,
+        "max_block_number": max_block_number,
+    }
+
+    if changefeed_entries is not None:
+        # Serve the window from the changefeed written by the indexer
+        response = merge_notifications_changefeed_entries(changefeed_entries)
+        with db.scoped_session() as session:
+            response["owners"][const.tracks].update(
+                get_track_owners(session, track_ids_to_owner)
+            )
+    else:
+        response = get_notifications(
+            db, min_block_number, max_block_number, track_ids_to_owner
+        )
+
+    return api_helpers.success_response({**response, "info": notification_metadata})
 
 
 def get_max_slot(redis: Redis):
@@ -1099,46 +1145,12 @@ def get_max_slot(redis: Redis):
     return min(all_slots)
 
 
-@bp.route("/solana_notifications", methods=("GET",))
-def solana_notifications():
+def get_solana_notifications(db, min_slot_number, max_slot_number) -> List[Dict]:
     """
-    Fetches the notifications events that occurred between the given slot numbers
-
-    URL Params:
-        min_slot_number: (int) The start slot number for querying for notifications
-        max_slot_number?: (int) The end slot number for querying for notifications
-
-    Response - Json object w/ the following fields
-        notifications: Array of notifications of shape:
-            type: 'ChallengeReward' | 'MilestoneListen' | 'SupporterRankUp' | 'Reaction'
-            slot: (int) slot number of notification
-            initiator: (int) the user id that caused this notification
-            metadata?: (any) additional information about the notification
-                challenge_id?: (int) completed challenge id for challenge reward notifications
-
-        info: Dictionary of metadata w/ min_slot_number & max_slot_number fields
+    Computes the notifications of the slot range [min_slot_number, max_slot_number], sorted by slot
+    See `solana_notifications` for the shape of the notifications
     """
-    db = get_db_read_replica()
-    redis = get_redis()
-    min_slot_number = request.args.get("min_slot_number", type=int)
-    max_slot_number = request.args.get("max_slot_number", type=int)
-
-    # Max slot number is not explicitly required (yet)
-    if not min_slot_number and min_slot_number != 0:
-        return api_helpers.error_response({"msg": "Missing min slot number"}, 400)
-
-    if not max_slot_number or (max_slot_number - min_slot_number) > max_slot_diff:
-        max_slot_number = min_slot_number + max_slot_diff
-
-    max_valid_slot = get_max_slot(redis)
-    max_slot_number = min(max_slot_number, max_valid_slot)
-
     notifications_unsorted = []
-    notification_metadata = {
-        "min_slot_number": min_slot_number,
-        "max_slot_number": max_slot_number,
-    }
-
     with db.scoped_session() as session:
         #
         # Query relevant challenge disbursement information for challenge reward notifications
@@ -1165,7 +1177,7 @@ def solana_notifications():
                 }
             )
 
-        track_listen_milestone: List[Tuple(Milestone, int)] = (
+        track_listen_milestone: List[Tuple[Milestone, int]] = (
             session.query(Milestone, Track.owner_id)
             .filter(
                 Milestone.name == LISTEN_COUNT_MILESTONE,
@@ -1297,6 +1309,61 @@ def solana_notifications():
         reverse=False,
     )
 
+    return sorted_notifications
+
+
+@bp.route("/solana_notifications", methods=("GET",))
+def solana_notifications():
+    """
+    Fetches the notifications events that occurred between the given slot numbers
+
+    URL Params:
+        min_slot_number: (int) The start slot number for querying for notifications
+        max_slot_number?: (int) The end slot number for querying for notifications
+
+    Response - Json object w/ the following fields
+        notifications: Array of notifications of shape:
+            type: 'ChallengeReward' | 'MilestoneListen' | 'SupporterRankUp' | 'Reaction'
+            slot: (int) slot number of notification
+            initiator: (int) the user id that caused this notification
+            metadata?: (any) additional information about the notification
+                challenge_id?: (int) completed challenge id for challenge reward notifications
+
+        info: Dictionary of metadata w/ min_slot_number & max_slot_number fields
+    """
+    db = get_db_read_replica()
+    redis = get_redis()
+    min_slot_number = request.args.get("min_slot_number", type=int)
+    max_slot_number = request.args.get("max_slot_number", type=int)
+
+    # Max slot number is not explicitly required (yet)
+    if not min_slot_number and min_slot_number != 0:
+        return api_helpers.error_response({"msg": "Missing min slot number"}, 400)
+
+    if not max_slot_number or (max_slot_number - min_slot_number) > max_slot_diff:
+        max_slot_number = min_slot_number + max_slot_diff
+
+    max_valid_slot = get_max_slot(redis)
+    max_slot_number = min(max_slot_number, max_valid_slot)
+
+    changefeed_entries, max_slot_number = get_changefeed_entries(
+        redis, SOLANA_NOTIFICATIONS_CHANGEFEED_KEY, min_slot_number, max_slot_number
+    )
+    notification_metadata = {
+        "min_slot_number": min_slot_number,
+        "max_slot_number": max_slot_number,
+    }
+
+    if changefeed_entries is not None:
+        # Serve the window from the changefeed written by the indexer
+        sorted_notifications = merge_solana_notifications_changefeed_entries(
+            changefeed_entries
+        )
+    else:
+        sorted_notifications = get_solana_notifications(
+            db, min_slot_number, max_slot_number
+        )
+
     return api_helpers.success_response(
         {
             "notifications": sorted_notifications,
@@ -0,0 +1,67 @@
+"""
+Append-only changefeeds of the notifications returned by the `/notifications`
+and `/solana_notifications` endpoints.
+
+The index_notifications_changefeed task computes the notifications of each newly
+indexed block (or slot) range once and appends them to a changefeed (see
+src/utils/changefeed.py), so entries can be addressed by the cursor a poller already
+sends as `min_block_number` / `min_slot_number`.
+
+Block ranges are (min, max] as in `/notifications`, slot ranges are [min, max]
+as in `/solana_notifications`, so consecutive slot entries share their boundary slot.
+Revert entries list the entities of the reverted blocks under `reverted`.
+"""
+from typing import Dict, List
+
+from src.queries import response_name_constants as const
+
+NOTIFICATIONS_CHANGEFEED_KEY = "notifications-changefeed"
+SOLANA_NOTIFICATIONS_CHANGEFEED_KEY = "solana-notifications-changefeed"
+
+
+def merge_notifications_changefeed_entries(entries: List[Dict]) -> Dict:
+    """
+    Merges consecutive `/notifications` entries into a single response,
+    with the entities of reverted blocks under `reverted` if any
+    """
+    notifications: List[Dict] = []
+    reverted: Dict[str, List] = {}
+    milestones: Dict[str, Dict] = {}
+    owners: Dict[str, Dict] = {const.tracks: {}, const.albums: {}, const.playlists: {}}
+    for entry in entries:
+        notifications.extend(entry["notifications"])
+        # Later entries hold the counts as of a later block
+        for milestone_type, counts in entry["milestones"].items():
+            if milestone_type == "follower_counts":
+                milestones.setdefault(milestone_type, {}).update(counts)
+                continue
+            for entity_type, entity_counts in counts.items():
+                milestones.setdefault(milestone_type, {}).setdefault(
+                    entity_type, {}
+                ).update(entity_counts)
+        for entity_type, entity_owners in entry["owners"].items():
+            owners[entity_type].update(entity_owners)
+        for entity_type, entities in entry.get("reverted", {}).items():
+            reverted.setdefault(entity_type, []).extend(entities)
+    response = {
+        "notifications": notifications,
+        "milestones": milestones,
+        "owners": owners,
+    }
+    if reverted:
+        response["reverted"] = reverted
+    return response
+
+
+def merge_solana_notifications_changefeed_entries(entries: List[Dict]) -> List[Dict]:
+    """Merges consecutive `/solana_notifications` entries, dropping the shared boundary slots"""
+    notifications: List[Dict] = []
+    for i, entry in enumerate(entries):
+        for notification in entry["notifications"]:
+            if (
+                i > 0
+                and notification[const.solana_notification_slot] == entry["min_number"]
+            ):
+                continue
+            notifications.append(notification)
+    return notifications
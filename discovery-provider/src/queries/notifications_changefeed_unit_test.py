@@ -0,0 +1,117 @@
+from src.queries.notifications_changefeed import (
+    merge_notifications_changefeed_entries,
+    merge_solana_notifications_changefeed_entries,
+)
+from src.utils.changefeed import (
+    append_changefeed_entry,
+    append_changefeed_revert_entry,
+    get_changefeed_entries,
+    get_changefeed_position,
+)
+
+KEY = "test-changefeed"
+
+
+def get_payload(notifications, reverted=None):
+    payload = {
+        "notifications": notifications,
+        "milestones": {},
+        "owners": {"tracks": {}, "albums": {}, "playlists": {}},
+    }
+    if reverted is not None:
+        payload["reverted"] = reverted
+    return payload
+
+
+def test_changefeed_revert_entries(redis_mock):
+    """Tests that reverted blocks are compensated for at the cursor and indexed again"""
+    append_changefeed_entry(redis_mock, KEY, 10, 20, get_payload([{"blocknumber": 15}]))
+    append_changefeed_entry(redis_mock, KEY, 20, 30, get_payload([{"blocknumber": 25}]))
+    assert get_changefeed_position(redis_mock, KEY) == (30, 30)
+
+    # Nothing past block 30 was appended
+    append_changefeed_revert_entry(redis_mock, KEY, 30, get_payload([]))
+    assert get_changefeed_position(redis_mock, KEY) == (30, 30)
+
+    # Blocks 25 to 30 are reverted, then 22 to 24
+    append_changefeed_revert_entry(
+        redis_mock, KEY, 24, get_payload([], {"tracks": [1]})
+    )
+    append_changefeed_revert_entry(
+        redis_mock, KEY, 21, get_payload([], {"tracks": [2]})
+    )
+    assert get_changefeed_position(redis_mock, KEY) == (30, 21)
+
+    # A poller at the cursor gets the revert entries even if the head is behind it
+    entries, max_number = get_changefeed_entries(redis_mock, KEY, 30, 23)
+    assert max_number == 30
+    merged = merge_notifications_changefeed_entries(entries)
+    assert merged["notifications"] == []
+    assert merged["reverted"] == {"tracks": [1, 2]}
+
+    # The writer's next entry starts at the cursor
+    append_changefeed_entry(redis_mock, KEY, 30, 35, get_payload([{"blocknumber": 26}]))
+    assert get_changefeed_position(redis_mock, KEY) == (35, 35)
+    entries, max_number = get_changefeed_entries(redis_mock, KEY, 20, 40)
+    assert max_number == 35
+    assert [(entry["min_number"], entry["max_number"]) for entry in entries] == [
+        (20, 30),
+        (30, 30),
+        (30, 30),
+        (30, 35),
+    ]
+    merged = merge_notifications_changefeed_entries(entries)
+    assert [n["blocknumber"] for n in merged["notifications"]] == [25, 26]
+    assert merged["reverted"] == {"tracks": [1, 2]}
+    assert "reverted" not in merge_notifications_changefeed_entries(entries[:1])
+
+
+def test_merge_notifications_changefeed_entries():
+    """Tests that consecutive entries merge into a single response with the latest counts"""
+    entries = [
+        {
+            "min_number": 10,
+            "max_number": 20,
+            "notifications": [{"type": "Follow", "blocknumber": 15}],
+            "milestones": {
+                "follower_counts": {"1": 10},
+                "repost_counts": {"tracks": {"2": 25}, "albums": {}, "playlists": {}},
+            },
+            "owners": {"tracks": {"2": 1}, "albums": {}, "playlists": {}},
+        },
+        {
+            "min_number": 20,
+            "max_number": 30,
+            "notifications": [{"type": "Repost", "blocknumber": 25}],
+            "milestones": {
+                "follower_counts": {"1": 25, "3": 10},
+                "repost_counts": {"tracks": {"4": 10}, "albums": {}, "playlists": {}},
+            },
+            "owners": {"tracks": {"4": 3}, "albums": {}, "playlists": {}},
+        },
+    ]
+
+    merged = merge_notifications_changefeed_entries(entries)
+    assert [n["blocknumber"] for n in merged["notifications"]] == [15, 25]
+    assert merged["milestones"]["follower_counts"] == {"1": 25, "3": 10}
+    assert merged["milestones"]["repost_counts"]["tracks"] == {"2": 25, "4": 10}
+    assert merged["owners"]["tracks"] == {"2": 1, "4": 3}
+
+
+def test_merge_solana_notifications_changefeed_entries():
+    """Tests that the slot shared by consecutive entries is only returned once"""
+    entries = [
+        {
+            "min_number": 100,
+            "max_number": 200,
+            "notifications": [{"slot": 100}, {"slot": 200}],
+        },
+        {
+            "min_number": 200,
+            "max_number": 300,
+            "notifications": [{"slot": 200}, {"slot": 250}],
+        },
+    ]
+
+    merged = merge_solana_notifications_changefeed_entries(entries)
+    assert [n["slot"] for n in merged] == [100, 200, 250]
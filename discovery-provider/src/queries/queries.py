@@ -189,7 +189,7 @@ def get_feed_route():
         )
     user_id = get_current_user_id()
     args["user_id"] = user_id
-    feed_results = get_feed(args)
+    (feed_results, _) = get_feed(args)
     return api_helpers.success_response(feed_results)
 
 
@@ -207,7 +207,7 @@ def get_repost_feed_for_user_route(user_id):
     if "with_users" in request.args:
         args["with_users"] = parse_bool_param(request.args.get("with_users"))
     args["current_user_id"] = get_current_user_id(required=False)
-    feed_results = get_repost_feed_for_user(user_id, args)
+    (feed_results, _) = get_repost_feed_for_user(user_id, args)
     return api_helpers.success_response(feed_results)
 
 
@@ -272,7 +272,7 @@ def get_followers_for_user_route(followee_user_id):
         "limit": limit,
         "offset": offset,
     }
-    users = get_followers_for_user(args)
+    (users, _) = get_followers_for_user(args)
     return api_helpers.success_response(users)
 
 
@@ -288,7 +288,7 @@ def get_followees_for_user_route(follower_user_id):
         "limit": limit,
         "offset": offset,
     }
-    users = get_followees_for_user(args)
+    (users, _) = get_followees_for_user(args)
     return api_helpers.success_response(users)
 
 
@@ -305,7 +305,7 @@ def get_reposters_for_track_route(repost_track_id):
             "limit": limit,
             "offset": offset,
         }
-        user_results = get_reposters_for_track(args)
+        (user_results, _) = get_reposters_for_track(args)
         return api_helpers.success_response(user_results)
     except exceptions.NotFoundError as e:
         return api_helpers.error_response(str(e), 404)
@@ -324,7 +324,7 @@ def get_reposters_for_playlist_route(repost_playlist_id):
             "limit": limit,
             "offset": offset,
         }
-        user_results = get_reposters_for_playlist(args)
+        (user_results, _) = get_reposters_for_playlist(args)
         return api_helpers.success_response(user_results)
     except exceptions.NotFoundError as e:
         return api_helpers.error_response(str(e), 404)
@@ -343,7 +343,7 @@ def get_savers_for_track_route(save_track_id):
             "limit": limit,
             "offset": offset,
         }
-        user_results = get_savers_for_track(args)
+        (user_results, _) = get_savers_for_track(args)
         return api_helpers.success_response(user_results)
     except exceptions.NotFoundError as e:
         return api_helpers.error_response(str(e), 404)
@@ -362,7 +362,7 @@ def get_savers_for_playlist_route(save_playlist_id):
             "limit": limit,
             "offset": offset,
         }
-        user_results = get_savers_for_playlist(args)
+        (user_results, _) = get_savers_for_playlist(args)
         return api_helpers.success_response(user_results)
     except exceptions.NotFoundError as e:
         return api_helpers.error_response(str(e), 404)
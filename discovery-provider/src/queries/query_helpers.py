@@ -1,6 +1,9 @@
 # pylint: disable=too-many-lines
+import base64
+import json
 import logging
-from typing import Tuple
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
 from flask import request
 from sqlalchemy import Integer, and_, bindparam, cast, desc, func, text
@@ -8,6 +11,7 @@ from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import or_
 from src import exceptions
 from src.models import (
+    AggregateItemKarma,
     AggregatePlaylist,
     AggregatePlays,
     AggregateTrack,
@@ -25,6 +29,7 @@ from src.models import (
 )
 from src.queries import response_name_constants
 from src.queries.get_balances import get_balances
+from src.queries.get_followee_user_ids import get_followee_user_ids, in_user_ids
 from src.queries.get_unpopulated_users import get_unpopulated_users, set_users_in_cache
 from src.trending_strategies.trending_type_and_version import TrendingVersion
 from src.utils import helpers, redis_connection
@@ -182,48 +187,32 @@ def populate_user_metadata(
     current_user_followed_user_ids = {}
     current_user_followee_follow_count_dict = {}
     if current_user_id:
-        # collect all incoming and outgoing follow edges for current user.
-        current_user_follow_rows = (
-            session.query(Follow.follower_user_id, Follow.followee_user_id)
+        current_user_followees = get_followee_user_ids(session, current_user_id)
+        current_user_followed_user_ids = {
+            followee_user_id: True
+            for followee_user_id in set(user_ids).intersection(current_user_followees)
+        }
+
+        # collect all incoming follow edges for current user.
+        follows_current_user_set = {
+            follower_user_id
+            for (follower_user_id,) in session.query(Follow.follower_user_id)
             .filter(
                 Follow.is_current == True,
                 Follow.is_delete == False,
-                or_(
-                    and_(
-                        Follow.followee_user_id.in_(user_ids),
-                        Follow.follower_user_id == current_user_id,
-                    ),
-                    and_(
-                        Follow.followee_user_id == current_user_id,
-                        Follow.follower_user_id.in_(user_ids),
-                    ),
-                ),
+                Follow.followee_user_id == current_user_id,
+                Follow.follower_user_id.in_(user_ids),
             )
             .all()
-        )
-        for follower_id, following_id in current_user_follow_rows:
-            if follower_id == current_user_id:
-                current_user_followed_user_ids[following_id] = True
-            else:
-                follows_current_user_set.add(follower_id)
+        }
 
         # build dict of user id --> followee follow count
-        current_user_followees = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id == current_user_id,
-            )
-            .subquery()
-        )
-
         current_user_followee_follow_counts = (
             session.query(Follow.followee_user_id, func.count(Follow.followee_user_id))
             .filter(
                 Follow.is_current == True,
                 Follow.is_delete == False,
-                Follow.follower_user_id.in_(current_user_followees),
+                in_user_ids(Follow.follower_user_id, current_user_followees),
                 Follow.followee_user_id.in_(user_ids),
             )
             .group_by(Follow.followee_user_id)
@@ -382,11 +371,7 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
         user_saved_track_dict = {save[0]: True for save in user_saved_tracks_query}
 
         # Get current user's followees.
-        followees = session.query(Follow.followee_user_id).filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False,
-        )
+        followees = get_followee_user_ids(session, current_user_id)
 
         # build dict of track id --> followee reposts
         followee_track_reposts = session.query(Repost).filter(
@@ -394,7 +379,7 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
             Repost.is_delete == False,
             Repost.repost_item_id.in_(track_ids),
             Repost.repost_type == RepostType.track,
-            Repost.user_id.in_(followees),
+            in_user_ids(Repost.user_id, followees),
         )
         followee_track_reposts = helpers.query_result_to_list(followee_track_reposts)
         for track_repost in followee_track_reposts:
@@ -410,7 +395,7 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
             Save.is_delete == False,
             Save.save_item_id.in_(track_ids),
             Save.save_type == SaveType.track,
-            Save.user_id.in_(followees),
+            in_user_ids(Save.user_id, followees),
         )
         followee_track_saves = helpers.query_result_to_list(followee_track_saves)
         for track_save in followee_track_saves:
@@ -660,15 +645,7 @@ def populate_playlist_metadata(
         }
 
         # Get current user's followees.
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False,
-            )
-            .all()
-        )
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
         # Build dict of playlist id --> followee reposts.
         followee_playlist_reposts = (
@@ -678,7 +655,7 @@ def populate_playlist_metadata(
                 Repost.is_delete == False,
                 Repost.repost_item_id.in_(playlist_ids),
                 Repost.repost_type.in_(repost_types),
-                Repost.user_id.in_(followee_user_ids),
+                in_user_ids(Repost.user_id, followee_user_ids),
             )
             .all()
         )
@@ -700,7 +677,7 @@ def populate_playlist_metadata(
                 Save.is_delete == False,
                 Save.save_item_id.in_(playlist_ids),
                 Save.save_type.in_(save_types),
-                Save.user_id.in_(followee_user_ids),
+                in_user_ids(Save.user_id, followee_user_ids),
             )
             .all()
         )
@@ -828,9 +805,9 @@ def get_repost_counts(
 
 def get_karma(
     session: Session,
-    ids: Tuple[int],
+    ids: Sequence[int],
     strategy: TrendingVersion,
-    time: str = None,
+    time: Optional[str] = None,
     is_playlist: bool = False,
     xf: bool = False,
 ):
@@ -839,6 +816,20 @@ def get_karma(
     repost_type = RepostType.playlist if is_playlist else RepostType.track
     save_type = SaveType.playlist if is_playlist else SaveType.track
 
+    if time is None:
+        # All time karma is maintained by the aggregate_user task. Items without
+        # karma are left out like in the query below, so callers keep their default
+        karma = AggregateItemKarma.xf_karma if xf else AggregateItemKarma.karma
+        return (
+            session.query(AggregateItemKarma.item_id, cast(karma, Integer))
+            .filter(
+                AggregateItemKarma.item_id.in_(ids),
+                AggregateItemKarma.item_type == repost_type.value,
+                karma > 0,
+            )
+            .all()
+        )
+
     reposters = session.query(
         Repost.user_id.label("user_id"), Repost.repost_item_id.label("item_id")
     ).filter(
@@ -1051,6 +1042,90 @@ def add_query_pagination(
     return modified_query
 
 
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encodes the sort key of the last row of a page as an opaque cursor"""
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> Tuple:
+    """
+    Decodes a cursor from encode_cursor into the sort key of the last row of the previous page
+
+    Args:
+        cursor: the opaque cursor
+        types: a function parsing each value of the sort key, e.g. int or datetime.fromisoformat
+
+    Raises:
+        ArgumentError if the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(f"Expected {len(types)} values")
+        return tuple(parse(value) for (parse, value) in zip(types, values))
+    except (ValueError, TypeError) as e:
+        raise exceptions.ArgumentError(f"Invalid cursor {cursor}") from e
+
+
+# Sort key of user lists, (follower_count desc, user_id asc)
+USER_LIST_CURSOR_TYPES = (int, int)
+
+# Sort key of feeds, (activity_timestamp desc, track or playlist id desc)
+FEED_CURSOR_TYPES = (datetime.fromisoformat, int)
+
+# Sort key of repost feeds, (created_at desc, repost_item_id desc, repost_type desc)
+REPOST_FEED_CURSOR_TYPES = (datetime.fromisoformat, int, RepostType)
+
+
+def get_keyset_filter(sort_keys, cursor: Sequence[Any]):
+    """
+    Filter for the rows sorted after the cursor, e.g. for sort keys (a desc, b asc)
+    and a cursor (x, y): a < x OR (a = x AND b > y)
+
+    Args:
+        sort_keys: list of (column, is_descending) the query is ordered by
+        cursor: the sort key of the last row of the previous page
+    """
+    conditions = []
+    for i, (column, is_descending) in enumerate(sort_keys):
+        conditions.append(
+            and_(
+                *[
+                    prev_column == value
+                    for ((prev_column, _), value) in zip(sort_keys[:i], cursor)
+                ],
+                column < cursor[i] if is_descending else column > cursor[i],
+            )
+        )
+    return or_(*conditions)
+
+
+def add_query_cursor_pagination(query_obj, limit, offset, cursor, sort_keys):
+    """Paginates after the cursor if there is one, otherwise by offset"""
+    if cursor is None:
+        return add_query_pagination(query_obj, limit, offset)
+    return query_obj.filter(get_keyset_filter(sort_keys, cursor)).limit(limit)
+
+
+def get_next_cursor(sort_keys: Sequence[Sequence[Any]], limit: int) -> Optional[str]:
+    """
+    Cursor of the page after the given rows, None if it was the last page.
+    Takes the sort keys of the rows fetched by the page's query rather than
+    the returned results, which can be fewer once rows are filtered out.
+    """
+    if not sort_keys or len(sort_keys) < limit:
+        return None
+    return encode_cursor(sort_keys[-1])
+
+
+def get_feed_item_sort_key(item: Dict) -> Tuple[datetime, int]:
+    item_id = item["playlist_id"] if "playlist_id" in item else item["track_id"]
+    return (item[response_name_constants.activity_timestamp], item_id)
+
+
 def get_genre_list(genre):
     genre_list = []
     genre_list.append(genre)
@@ -1098,22 +1173,10 @@ def create_followee_playlists_subquery(session, current_user_id):
         current_user_id: The current user id to query against
     """
     # Get active followees
-    followee_user_ids_subquery = (
-        session.query(Follow.followee_user_id)
-        .filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False,
-        )
-        .subquery()
-    )
+    followee_user_ids = get_followee_user_ids(session, current_user_id)
     followee_playlists_subquery = (
         session.query(Playlist)
-        .select_from(Playlist)
-        .join(
-            followee_user_ids_subquery,
-            Playlist.playlist_owner_id == followee_user_ids_subquery.c.followee_user_id,
-        )
+        .filter(in_user_ids(Playlist.playlist_owner_id, followee_user_ids))
         .subquery()
     )
     return followee_playlists_subquery
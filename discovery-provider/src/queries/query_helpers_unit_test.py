@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+from src import exceptions
+from src.models import RepostType
+from src.queries.query_helpers import (
+    FEED_CURSOR_TYPES,
+    REPOST_FEED_CURSOR_TYPES,
+    USER_LIST_CURSOR_TYPES,
+    decode_cursor,
+    encode_cursor,
+    get_next_cursor,
+)
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode into the sort key they were encoded from"""
+    assert decode_cursor(encode_cursor([10, 3]), USER_LIST_CURSOR_TYPES) == (10, 3)
+
+    sort_key = (datetime(2022, 1, 1, 12, 30, 15, 500), 7)
+    assert decode_cursor(encode_cursor(sort_key), FEED_CURSOR_TYPES) == sort_key
+
+    sort_key = (datetime(2022, 1, 1), 7, RepostType.album)
+    assert decode_cursor(encode_cursor(sort_key), REPOST_FEED_CURSOR_TYPES) == sort_key
+
+
+def test_get_next_cursor():
+    """Test that the next cursor is the sort key of the last row of a full page"""
+    assert get_next_cursor([(30, 1), (20, 2)], 2) == encode_cursor([20, 2])
+    assert get_next_cursor([(30, 1)], 2) is None
+    assert get_next_cursor([], 2) is None
+
+
+def test_decode_invalid_cursor():
+    """Test that malformed cursors raise an ArgumentError"""
+    for cursor in ["not a cursor", encode_cursor([1]), encode_cursor(["a", 1])]:
+        with pytest.raises(exceptions.ArgumentError):
+            decode_cursor(cursor, USER_LIST_CURSOR_TYPES)
@@ -0,0 +1,149 @@
+"""
+Sparse co-follow matrix used to score the related artists of every artist in one pass.
+
+The follows of artists are kept twice as compressed sparse arrays of indexes:
+    by follower (CSR): the artist columns each follower follows
+    by artist (CSC): the followers of each artist column
+The mutual followers of an artist and every other artist are one row of the
+co-follow matrix (followers x artists)^T (followers x artists), counted by gathering
+the artists followed by the artist's followers.
+
+Scores are `mutual_follower_count * percentage_of_suggested_artist_followers`,
+the same as `_calculate_related_artists_scores`.
+"""
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+# Number of followers whose follows are gathered at once when counting mutual followers
+FOLLOWER_SLICE_SIZE = 50_000
+
+
+class CoFollowMatrix(NamedTuple):
+    # Sorted user_ids of the artist columns
+    artist_ids: np.ndarray
+    # The artist columns of follower i are follower_artists[follower_indptr[i]:follower_indptr[i + 1]]
+    follower_indptr: np.ndarray
+    follower_artists: np.ndarray
+    # The followers of artist column j are artist_followers[artist_indptr[j]:artist_indptr[j + 1]]
+    artist_indptr: np.ndarray
+    artist_followers: np.ndarray
+
+
+def get_indptr(indexes: np.ndarray, size: int) -> np.ndarray:
+    """Offsets of each index's entries in an array sorted by index"""
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indexes, minlength=size), out=indptr[1:])
+    return indptr
+
+
+def get_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for each start and count"""
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(
+        ends[-1] if len(ends) else 0
+    )
+
+
+def build_co_follow_matrix(
+    follow_chunks: Iterable[np.ndarray], artist_ids: np.ndarray, is_scored: np.ndarray
+) -> CoFollowMatrix:
+    """
+    Builds the co-follow matrix from a stream of follows.
+
+    Args:
+        follow_chunks: arrays of (follower_user_id, followee_user_id) rows
+        artist_ids: sorted user_ids of the artist columns, follows of other users are skipped
+        is_scored: whether each artist column is scored, only the followers
+            of a scored artist are kept since the others don't co-follow into a score
+    """
+    num_artists = len(artist_ids)
+    follower_id_chunks = []
+    artist_chunks = []
+    for chunk in follow_chunks:
+        columns = np.searchsorted(artist_ids, chunk[:, 1])
+        is_artist = columns < num_artists
+        is_artist[is_artist] = artist_ids[columns[is_artist]] == chunk[is_artist, 1]
+        follower_id_chunks.append(chunk[is_artist, 0])
+        artist_chunks.append(columns[is_artist])
+    follower_ids = np.concatenate(follower_id_chunks or [np.empty(0, np.int64)])
+    artists = np.concatenate(artist_chunks or [np.empty(0, np.int64)])
+
+    scoring_follower_ids = np.unique(follower_ids[is_scored[artists]])
+    is_scoring_follow = np.isin(follower_ids, scoring_follower_ids)
+    followers = np.searchsorted(scoring_follower_ids, follower_ids[is_scoring_follow])
+    artists = artists[is_scoring_follow]
+
+    # One entry per (follower, artist), sorted by follower then artist
+    keys = np.unique(followers.astype(np.int64) * num_artists + artists)
+    followers = keys // num_artists
+    artists = keys % num_artists
+
+    artist_order = np.argsort(artists, kind="stable")
+    return CoFollowMatrix(
+        artist_ids=artist_ids,
+        follower_indptr=get_indptr(followers, len(scoring_follower_ids)),
+        follower_artists=artists.astype(np.int32),
+        artist_indptr=get_indptr(artists, num_artists),
+        artist_followers=followers[artist_order].astype(np.int32),
+    )
+
+
+def get_mutual_follower_counts(matrix: CoFollowMatrix, column: int) -> np.ndarray:
+    """Returns the number of followers the artist column shares with each artist column"""
+    mutual_follower_counts = np.zeros(len(matrix.artist_ids), dtype=np.int64)
+    followers = matrix.artist_followers[
+        matrix.artist_indptr[column] : matrix.artist_indptr[column + 1]
+    ]
+    for offset in range(0, len(followers), FOLLOWER_SLICE_SIZE):
+        follower_slice = followers[offset : offset + FOLLOWER_SLICE_SIZE]
+        starts = matrix.follower_indptr[follower_slice]
+        counts = matrix.follower_indptr[follower_slice + 1] - starts
+        co_followed = matrix.follower_artists[get_ranges(starts, counts)]
+        mutual_follower_counts += np.bincount(
+            co_followed, minlength=len(matrix.artist_ids)
+        )
+    mutual_follower_counts[column] = 0
+    return mutual_follower_counts
+
+
+def score_related_artists(
+    matrix: CoFollowMatrix, follower_counts: np.ndarray, column: int, limit: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the user_ids and scores of the top related artists of the artist column,
+    sorted by score desc then user_id like `_calculate_related_artists_scores`
+
+    Args:
+        follower_counts: the aggregate_user follower count of each artist column
+    """
+    mutual_follower_counts = get_mutual_follower_counts(matrix, column)
+    candidates = np.flatnonzero(mutual_follower_counts)
+    mutual_follower_counts = mutual_follower_counts[candidates].astype(np.float64)
+    scores = np.round(
+        mutual_follower_counts * mutual_follower_counts / follower_counts[candidates],
+        3,
+    )
+    if len(candidates) > limit:
+        # Keep the ties at the limit, so they are broken by user_id
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        is_top = scores >= threshold
+        candidates = candidates[is_top]
+        scores = scores[is_top]
+    order = np.lexsort((matrix.artist_ids[candidates], -scores))[:limit]
+    return matrix.artist_ids[candidates[order]], scores[order]
+
+
+def calculate_related_artist_scores(
+    matrix: CoFollowMatrix,
+    follower_counts: np.ndarray,
+    columns: Iterable[int],
+    limit: int,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Yields (user_id, related artist user_ids, scores) for each artist column with related artists"""
+    for column in columns:
+        related_artist_ids, scores = score_related_artists(
+            matrix, follower_counts, column, limit
+        )
+        if len(related_artist_ids):
+            yield (int(matrix.artist_ids[column]), related_artist_ids, scores)
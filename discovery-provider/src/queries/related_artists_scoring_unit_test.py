@@ -0,0 +1,78 @@
+import numpy as np
+from src.queries.related_artists_scoring import (
+    build_co_follow_matrix,
+    calculate_related_artist_scores,
+    get_mutual_follower_counts,
+    get_ranges,
+)
+
+# Same follows as test_index_related_artists, user 7 is not an artist
+follows = (
+    [(i, 0) for i in range(1, 201)]
+    + [(i, 1) for i in range(151, 201)]
+    + [(i, 2) for i in range(151, 251)]
+    + [(i, 3) for i in range(181, 221)]
+    + [(i, 4) for i in range(197, 202)]
+    + [(i, 5) for i in range(151, 651)]
+    + [(i, 6) for i in range(141, 341)]
+    + [(i, 7) for i in range(1, 301)]
+)
+artist_ids = np.arange(7)
+follower_counts = np.array([200, 50, 100, 40, 5, 500, 200], dtype=np.float64)
+
+
+def make_chunks(rows, chunk_size):
+    rows = np.array(rows, dtype=np.int64)
+    return (rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size))
+
+
+def test_get_ranges():
+    assert get_ranges(np.array([5, 0, 9]), np.array([2, 0, 3])).tolist() == [
+        5,
+        6,
+        9,
+        10,
+        11,
+    ]
+    assert (
+        get_ranges(np.array([], dtype=np.int64), np.array([], dtype=np.int64)).tolist()
+        == []
+    )
+
+
+def test_calculate_related_artist_scores():
+    matrix = build_co_follow_matrix(
+        make_chunks(follows, 97), artist_ids, follower_counts >= 200
+    )
+    scores = {
+        user_id: list(zip(related_artist_ids.tolist(), related_scores.tolist()))
+        for (user_id, related_artist_ids, related_scores) in (
+            calculate_related_artist_scores(matrix, follower_counts, [0, 5, 6], 100)
+        )
+    }
+
+    assert scores[0] == [(1, 50), (2, 25), (6, 18), (3, 10), (5, 5), (4, 3.2)]
+    assert scores[5] == [(6, 180.5), (2, 100), (1, 50), (3, 40), (0, 12.5), (4, 5)]
+
+    top_two = next(calculate_related_artist_scores(matrix, follower_counts, [0], 2))
+    assert top_two[1].tolist() == [1, 2]
+
+
+def test_get_mutual_follower_counts():
+    rng = np.random.default_rng(0)
+    rows = np.unique(rng.integers(0, 40, size=(2000, 2)), axis=0)
+    artist_ids = np.arange(0, 40, 2)
+    matrix = build_co_follow_matrix(
+        make_chunks(rows, 128), artist_ids, np.ones(len(artist_ids), dtype=bool)
+    )
+
+    followers = {
+        artist_id: set(rows[rows[:, 1] == artist_id, 0].tolist())
+        for artist_id in artist_ids.tolist()
+    }
+    for column, artist_id in enumerate(artist_ids.tolist()):
+        expected = [
+            0 if other == artist_id else len(followers[artist_id] & followers[other])
+            for other in artist_ids.tolist()
+        ]
+        assert get_mutual_follower_counts(matrix, column).tolist() == expected
@@ -0,0 +1,552 @@
+"""
+In-process prefix index answering search autocomplete without a database query.
+
+Each web worker keeps one AutocompleteIndex per search kind over the words of user
+names and handles, track titles, and playlist and album names. The words are held in a
+sorted list with a parallel array of entity ids, so a prefix is a binary search and a
+scan of the matching range. Matches are ranked by follower count for users and repost
+count for tracks, playlists and albums.
+
+The indexes are loaded from the database when the worker starts and then kept up to
+date from the autocomplete changefeed, a redis stream to which the
+index_autocomplete_changefeed task appends the users, tracks and playlists written in
+each indexed block range. Entities changed since the last build go to a small sorted
+pending list that is merged into the main arrays once it grows past MAX_PENDING_TERMS.
+Ranks are taken at write time, so the whole index is rebuilt every
+AUTOCOMPLETE_RELOAD_SEC to pick up new follower and repost counts. When indexed blocks
+are reverted, a revert entry restores their entities to the state of the new chain head.
+"""
+import bisect
+import heapq
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm.session import Session
+from src.models import (
+    AggregatePlaylist,
+    AggregateTrack,
+    AggregateUser,
+    Playlist,
+    Track,
+    User,
+)
+from src.utils.changefeed import parse_entry_id
+from src.utils.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_CHANGEFEED_KEY = "autocomplete-changefeed"
+
+# Search kinds with an autocomplete index, matching SearchKind names
+AUTOCOMPLETE_KINDS = ("users", "tracks", "playlists", "albums")
+
+# Number of seconds between reads of the changefeed
+AUTOCOMPLETE_REFRESH_SEC = 5
+
+# Number of seconds between full rebuilds, which refresh the ranks
+AUTOCOMPLETE_RELOAD_SEC = 60 * 60
+
+# Number of changefeed entries applied per read
+CHANGEFEED_READ_COUNT = 100
+
+# Number of rows fetched per round trip when loading the index
+LOAD_BATCH_SIZE = 50_000
+
+# Pending terms are merged into the main arrays past this size
+MAX_PENDING_TERMS = 20_000
+
+# Max number of terms scanned for a prefix. Prefixes matching more terms keep
+# a precomputed list of their TOP_PREFIX_SIZE best ranked ids instead
+MAX_SCAN_TERMS = 2_000
+TOP_PREFIX_SIZE = 200
+
+# Sorts after any word starting with a given prefix
+LAST_CHARACTER = chr(sys.maxunicode)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class AutocompleteDocument(NamedTuple):
+    id: int
+    # Owner of tracks and playlists, the user itself for users
+    owner_id: int
+    # Follower count for users, repost count for the others
+    rank: int
+    words: Tuple[str, ...]
+
+
+def get_words(*texts: Optional[str]) -> Tuple[str, ...]:
+    """Lowercased, unaccented words of the texts, without duplicates"""
+    words: Dict[str, None] = {}
+    for text in texts:
+        if not text:
+            continue
+        text = unicodedata.normalize("NFKD", text.replace("&", "and").lower())
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        for word in WORD_PATTERN.findall(text):
+            words[sys.intern(word)] = None
+    return tuple(words)
+
+
+def is_match(document: AutocompleteDocument, query_words: Tuple[str, ...]) -> bool:
+    """Whether each word of the query is a prefix of a word of the document"""
+    return all(
+        any(word.startswith(query_word) for word in document.words)
+        for query_word in query_words
+    )
+
+
+class AutocompleteIndex:
+    """
+    Word prefix index over the documents of one search kind.
+
+    Writes come from a single thread. Searches may run concurrently with them and
+    only hold the lock to read the current arrays and pending terms.
+    """
+
+    def __init__(self, documents: Iterable[AutocompleteDocument] = ()):
+        self._lock = threading.Lock()
+        self._documents: Dict[int, AutocompleteDocument] = {
+            document.id: document for document in documents
+        }
+        self._pending: List[Tuple[str, int]] = []
+        self._build()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _build(self):
+        """Rebuilds the sorted arrays from the documents and clears the pending terms"""
+        documents = self._documents
+        entries = sorted(
+            (word, document.id)
+            for document in documents.values()
+            for word in document.words
+        )
+        terms = [word for (word, _) in entries]
+        ids = array("i", (id for (_, id) in entries))
+
+        # Precompute the top ranked ids of the prefixes matching more than
+        # MAX_SCAN_TERMS terms. Prefixes of such a prefix match at least as many terms,
+        # so they are found by extending the heavy prefixes one character at a time
+        top = {}
+        ranges = [(1, 0, len(terms))]
+        while ranges:
+            (length, start, end) = ranges.pop()
+            i = start
+            while i < end:
+                if len(terms[i]) < length:
+                    i += 1
+                    continue
+                prefix = terms[i][:length]
+                prefix_end = bisect.bisect_left(terms, prefix + LAST_CHARACTER, i, end)
+                if prefix_end - i > MAX_SCAN_TERMS:
+                    top[prefix] = array(
+                        "i",
+                        heapq.nsmallest(
+                            TOP_PREFIX_SIZE,
+                            set(ids[i:prefix_end]),
+                            key=lambda id: get_rank_key(documents[id]),
+                        ),
+                    )
+                    ranges.append((length + 1, i, prefix_end))
+                i = prefix_end
+
+        with self._lock:
+            self._terms = terms
+            self._ids = ids
+            self._top = top
+            self._pending = []
+
+    def upsert(self, document: AutocompleteDocument):
+        # Terms of the previous version are left in place, searches drop them
+        # because they no longer match the stored document
+        self._documents[document.id] = document
+        with self._lock:
+            for word in document.words:
+                bisect.insort(self._pending, (word, document.id))
+        if len(self._pending) > MAX_PENDING_TERMS:
+            self._build()
+
+    def remove(self, id: int):
+        self._documents.pop(id, None)
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[int]:
+        """Ids of the best ranked documents matching each word of the query as a prefix"""
+        query_words = get_words(query)
+        if not query_words:
+            return []
+        # Probe the arrays with the most selective word
+        probe = max(query_words, key=len)
+
+        with self._lock:
+            terms, ids, top, pending = self._terms, self._ids, self._top, self._pending
+            top_ids = top.get(probe)
+            if top_ids is not None:
+                candidate_ids = list(top_ids)
+            else:
+                start = bisect.bisect_left(terms, probe)
+                end = bisect.bisect_left(terms, probe + LAST_CHARACTER, start)
+                candidate_ids = list(ids[start:end])
+            start = bisect.bisect_left(pending, (probe,))
+            for (word, id) in pending[start:]:
+                if not word.startswith(probe):
+                    break
+                candidate_ids.append(id)
+
+        matches = {}
+        for id in candidate_ids:
+            document = self._documents.get(id)
+            if document is not None and is_match(document, query_words):
+                matches[id] = document
+        ranked = sorted(
+            matches.values(),
+            key=lambda document: (probe not in document.words, *get_rank_key(document)),
+        )
+        # Keep the best match of each owner, like the search queries
+        owner_ids = set()
+        results = []
+        for document in ranked:
+            if document.owner_id not in owner_ids:
+                owner_ids.add(document.owner_id)
+                results.append(document.id)
+        return results[offset : offset + limit]
+
+
+def get_rank_key(document: AutocompleteDocument):
+    return (-document.rank, document.id)
+
+
+# ####### DOCUMENTS ####### #
+
+
+def get_user_documents(
+    session: Session,
+    min_blocknumber: Optional[int],
+    max_blocknumber: Optional[int],
+    ids: Optional[List[int]] = None,
+) -> Iterable[Tuple[AutocompleteDocument, bool]]:
+    """
+    (document, is_searchable) of the current users, only the ones written in
+    (min_blocknumber, max_blocknumber] and with the given ids if given
+    """
+    query = (
+        session.query(
+            User.user_id,
+            User.name,
+            User.handle,
+            func.coalesce(AggregateUser.follower_count, 0),
+            User.is_deactivated,
+        )
+        .outerjoin(AggregateUser, AggregateUser.user_id == User.user_id)
+        .filter(User.is_current == True, User.handle != None)
+    )
+    if min_blocknumber is not None:
+        query = query.filter(
+            User.blocknumber > min_blocknumber, User.blocknumber <= max_blocknumber
+        )
+    if ids is not None:
+        query = query.filter(User.user_id.in_(ids))
+    for (user_id, name, handle, follower_count, is_deactivated) in query.yield_per(
+        LOAD_BATCH_SIZE
+    ):
+        yield (
+            AutocompleteDocument(
+                user_id, user_id, follower_count, get_words(name, handle)
+            ),
+            not is_deactivated,
+        )
+
+
+def get_track_documents(
+    session: Session,
+    min_blocknumber: Optional[int],
+    max_blocknumber: Optional[int],
+    ids: Optional[List[int]] = None,
+) -> Iterable[Tuple[AutocompleteDocument, bool]]:
+    """Same as get_user_documents for tracks"""
+    query = (
+        session.query(
+            Track.track_id,
+            Track.title,
+            Track.owner_id,
+            func.coalesce(AggregateTrack.repost_count, 0),
+            Track.is_delete,
+            Track.is_unlisted,
+            Track.stem_of,
+        )
+        .outerjoin(AggregateTrack, AggregateTrack.track_id == Track.track_id)
+        .filter(Track.is_current == True)
+    )
+    if min_blocknumber is not None:
+        query = query.filter(
+            Track.blocknumber > min_blocknumber, Track.blocknumber <= max_blocknumber
+        )
+    if ids is not None:
+        query = query.filter(Track.track_id.in_(ids))
+    for (
+        track_id,
+        title,
+        owner_id,
+        repost_count,
+        is_delete,
+        is_unlisted,
+        stem_of,
+    ) in query.yield_per(LOAD_BATCH_SIZE):
+        yield (
+            AutocompleteDocument(track_id, owner_id, repost_count, get_words(title)),
+            not is_delete and not is_unlisted and stem_of is None,
+        )
+
+
+def get_playlist_documents(
+    session: Session,
+    min_blocknumber: Optional[int],
+    max_blocknumber: Optional[int],
+    ids: Optional[List[int]] = None,
+) -> Iterable[Tuple[str, AutocompleteDocument, bool]]:
+    """Same as get_user_documents for playlists, with the kind of each playlist"""
+    query = (
+        session.query(
+            Playlist.playlist_id,
+            Playlist.playlist_name,
+            Playlist.playlist_owner_id,
+            func.coalesce(AggregatePlaylist.repost_count, 0),
+            Playlist.is_album,
+            Playlist.is_delete,
+            Playlist.is_private,
+        )
+        .outerjoin(
+            AggregatePlaylist, AggregatePlaylist.playlist_id == Playlist.playlist_id
+        )
+        .filter(Playlist.is_current == True)
+    )
+    if min_blocknumber is not None:
+        query = query.filter(
+            Playlist.blocknumber > min_blocknumber,
+            Playlist.blocknumber <= max_blocknumber,
+        )
+    if ids is not None:
+        query = query.filter(Playlist.playlist_id.in_(ids))
+    for (
+        playlist_id,
+        playlist_name,
+        owner_id,
+        repost_count,
+        is_album,
+        is_delete,
+        is_private,
+    ) in query.yield_per(LOAD_BATCH_SIZE):
+        yield (
+            "albums" if is_album else "playlists",
+            AutocompleteDocument(
+                playlist_id, owner_id, repost_count, get_words(playlist_name)
+            ),
+            not is_delete and not is_private,
+        )
+
+
+def get_changed_documents(
+    session: Session, min_blocknumber: int, max_blocknumber: int
+) -> Dict[str, List]:
+    """
+    Changefeed payload of the entities written in (min_blocknumber, max_blocknumber],
+    documents that are no longer searchable are sent with is_searchable false
+    """
+    return get_documents_payload(
+        get_user_documents(session, min_blocknumber, max_blocknumber),
+        get_track_documents(session, min_blocknumber, max_blocknumber),
+        get_playlist_documents(session, min_blocknumber, max_blocknumber),
+    )
+
+
+def get_reverted_documents(
+    session: Session, reverted_entities: Dict[str, List]
+) -> Dict[str, List]:
+    """
+    Changefeed payload restoring the users, tracks and playlists written in reverted
+    blocks to their current state, the ones created in those blocks are removed
+    """
+    user_ids = reverted_entities.get("users", [])
+    track_ids = reverted_entities.get("tracks", [])
+    playlist_ids = reverted_entities.get("playlists", [])
+    payload = get_documents_payload(
+        get_user_documents(session, None, None, user_ids) if user_ids else [],
+        get_track_documents(session, None, None, track_ids) if track_ids else [],
+        get_playlist_documents(session, None, None, playlist_ids)
+        if playlist_ids
+        else [],
+    )
+    # Changed playlists are in both kinds of the payload
+    current_ids = {
+        kind: {document[0] for document in documents}
+        for (kind, documents) in payload.items()
+    }
+    for (kinds, ids) in (
+        (("users",), user_ids),
+        (("tracks",), track_ids),
+        (("playlists", "albums"), playlist_ids),
+    ):
+        for id in ids:
+            if id not in current_ids[kinds[0]]:
+                for kind in kinds:
+                    payload[kind].append([id, id, 0, [], False])
+    return payload
+
+
+def get_documents_payload(
+    user_documents: Iterable[Tuple[AutocompleteDocument, bool]],
+    track_documents: Iterable[Tuple[AutocompleteDocument, bool]],
+    playlist_documents: Iterable[Tuple[str, AutocompleteDocument, bool]],
+) -> Dict[str, List]:
+    payload: Dict[str, List] = {kind: [] for kind in AUTOCOMPLETE_KINDS}
+    for (document, is_searchable) in user_documents:
+        payload["users"].append([*document, is_searchable])
+    for (document, is_searchable) in track_documents:
+        payload["tracks"].append([*document, is_searchable])
+    for (kind, document, is_searchable) in playlist_documents:
+        payload[kind].append([*document, is_searchable])
+    # A playlist switched between album and playlist leaves the other index,
+    # the removals are built from the changed documents before either list is extended
+    playlists, albums = list(payload["playlists"]), list(payload["albums"])
+    for kind_documents, other_kind in ((playlists, "albums"), (albums, "playlists")):
+        payload[other_kind].extend(
+            [id, owner_id, rank, words, False]
+            for (id, owner_id, rank, words, _) in kind_documents
+        )
+    return payload
+
+
+def load_autocomplete_indexes(session: Session) -> Dict[str, AutocompleteIndex]:
+    documents: Dict[str, List[AutocompleteDocument]] = {
+        kind: [] for kind in AUTOCOMPLETE_KINDS
+    }
+    for (document, is_searchable) in get_user_documents(session, None, None):
+        if is_searchable:
+            documents["users"].append(document)
+    for (document, is_searchable) in get_track_documents(session, None, None):
+        if is_searchable:
+            documents["tracks"].append(document)
+    for (kind, document, is_searchable) in get_playlist_documents(session, None, None):
+        if is_searchable:
+            documents[kind].append(document)
+    return {
+        kind: AutocompleteIndex(kind_documents)
+        for (kind, kind_documents) in documents.items()
+    }
+
+
+# ####### PROCESS STATE ####### #
+
+# kind -> index, empty until the first load finishes
+_indexes: Dict[str, AutocompleteIndex] = {}
+
+# (number, sequence) id of the last changefeed entry applied to _indexes
+_changefeed_cursor: Optional[Tuple[int, int]] = None
+
+
+def apply_changefeed_payload(indexes: Dict[str, AutocompleteIndex], payload: Dict):
+    for kind, documents in payload.items():
+        index = indexes[kind]
+        for (id, owner_id, rank, words, is_searchable) in documents:
+            if is_searchable:
+                index.upsert(AutocompleteDocument(id, owner_id, rank, tuple(words)))
+            else:
+                index.remove(id)
+
+
+def get_last_entry_id(redis) -> Optional[Tuple[int, int]]:
+    last_entry = redis.xrevrange(AUTOCOMPLETE_CHANGEFEED_KEY, count=1)
+    if not last_entry:
+        return None
+    entry_id, _ = last_entry[0]
+    return parse_entry_id(entry_id)
+
+
+def reload_autocomplete_indexes(db: SessionManager, redis):
+    """Rebuilds the indexes from the database and swaps them in"""
+    global _changefeed_cursor  # pylint: disable=W0603
+    start_time = time.time()
+    # Read the cursor first, entries appended during the load are applied
+    # again afterwards, which is a no-op for the entities already loaded
+    cursor = get_last_entry_id(redis)
+    with db.scoped_session() as session:
+        indexes = load_autocomplete_indexes(session)
+    _indexes.update(indexes)
+    _changefeed_cursor = cursor
+    logger.info(
+        f"search_autocomplete.py | Loaded {[(kind, len(index)) for (kind, index) in indexes.items()]} "
+        f"in {time.time() - start_time} seconds"
+    )
+
+
+def refresh_autocomplete_indexes(db: SessionManager, redis):
+    """Applies the changefeed entries appended since the last refresh"""
+    global _changefeed_cursor  # pylint: disable=W0603
+    if _changefeed_cursor is None:
+        # The changefeed didn't exist at load time
+        _changefeed_cursor = get_last_entry_id(redis)
+        return
+
+    # Revert entries share the number of the entry before them, with the next sequence
+    number, sequence = _changefeed_cursor
+    entries = redis.xrange(
+        AUTOCOMPLETE_CHANGEFEED_KEY,
+        min=f"{number}-{sequence + 1}",
+        count=CHANGEFEED_READ_COUNT,
+    )
+    for entry_id, fields in entries:
+        if int(fields[b"min"]) != _changefeed_cursor[0]:
+            # The entries after the cursor were trimmed
+            logger.warning(
+                f"search_autocomplete.py | Missed changefeed entries after {_changefeed_cursor[0]}, reloading"
+            )
+            reload_autocomplete_indexes(db, redis)
+            return
+        apply_changefeed_payload(_indexes, json.loads(fields[b"payload"]))
+        _changefeed_cursor = parse_entry_id(entry_id)
+
+
+def run_autocomplete_indexes(db: SessionManager, redis):
+    """Loads the indexes and keeps them up to date, runs in a daemon thread"""
+    reloaded_at = 0.0
+    while True:
+        try:
+            if time.time() - reloaded_at > AUTOCOMPLETE_RELOAD_SEC:
+                reload_autocomplete_indexes(db, redis)
+                reloaded_at = time.time()
+            else:
+                refresh_autocomplete_indexes(db, redis)
+        except Exception as e:
+            logger.error(
+                f"search_autocomplete.py | Unable to update autocomplete indexes: {e}",
+                exc_info=True,
+            )
+        time.sleep(AUTOCOMPLETE_REFRESH_SEC)
+
+
+def start_autocomplete_indexes(db: SessionManager, redis):
+    threading.Thread(
+        target=run_autocomplete_indexes,
+        args=(db, redis),
+        name="autocomplete_indexes",
+        daemon=True,
+    ).start()
+
+
+def search_autocomplete_index(
+    kind: str, query: str, limit: int, offset: int
+) -> Optional[List[int]]:
+    """Ranked ids of the kind matching the query, None until the indexes are loaded"""
+    index = _indexes.get(kind)
+    if index is None:
+        return None
+    return index.search(query, limit, offset)
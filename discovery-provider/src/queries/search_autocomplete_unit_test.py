@@ -0,0 +1,168 @@
+from src.queries import search_autocomplete
+from src.queries.search_autocomplete import (
+    AutocompleteDocument,
+    AutocompleteIndex,
+    apply_changefeed_payload,
+    get_changed_documents,
+    get_reverted_documents,
+    get_words,
+)
+
+
+def get_document(id, rank, *texts, owner_id=None):
+    return AutocompleteDocument(
+        id, id if owner_id is None else owner_id, rank, get_words(*texts)
+    )
+
+
+def test_search_prefixes():
+    """Test that each query word matches a word prefix and results are ranked"""
+    index = AutocompleteIndex(
+        [
+            get_document(1, 10, "Skrillex", "skrillex"),
+            get_document(2, 50, "Sküll Crusher", "skullcrusher"),
+            get_document(3, 5, "Deadmau5", "deadmau5"),
+            get_document(4, 100, "Sam & Co", "samco"),
+        ]
+    )
+    assert index.search("s", 10) == [4, 2, 1]
+    assert index.search("SK", 10) == [2, 1]
+    assert index.search("skull cru", 10) == [2]
+    assert index.search("sam and", 10) == [4]
+    assert index.search("s", 2, 1) == [2, 1]
+    assert index.search("x", 10) == []
+    # exact words rank first
+    assert index.search("skrillex", 10) == [1]
+
+
+def test_search_heavy_prefixes(monkeypatch):
+    """Test that prefixes matching many terms are answered from their top ids"""
+    monkeypatch.setattr(search_autocomplete, "MAX_SCAN_TERMS", 2)
+    monkeypatch.setattr(search_autocomplete, "TOP_PREFIX_SIZE", 2)
+    index = AutocompleteIndex(
+        [get_document(id, id, f"remix {id}") for id in range(1, 6)]
+    )
+    assert index.search("r", 10) == [5, 4]
+    assert index.search("rem", 10) == [5, 4]
+
+
+def test_search_one_result_per_owner():
+    """Test that only the best ranked track of an owner is returned"""
+    index = AutocompleteIndex(
+        [
+            get_document(1, 10, "Intro", owner_id=7),
+            get_document(2, 20, "Interlude", owner_id=7),
+            get_document(3, 5, "Into the night", owner_id=8),
+        ]
+    )
+    assert index.search("in", 10) == [2, 3]
+
+
+def test_apply_changefeed_payload(monkeypatch):
+    """Test that changefeed entries add, update and remove documents"""
+    monkeypatch.setattr(search_autocomplete, "MAX_PENDING_TERMS", 3)
+    indexes = {
+        "users": AutocompleteIndex(
+            [get_document(1, 10, "Alice"), get_document(2, 20, "Bob")]
+        ),
+        "tracks": AutocompleteIndex(),
+    }
+    apply_changefeed_payload(
+        indexes,
+        {
+            "users": [
+                [1, 1, 10, ["alicia"], True],
+                [2, 2, 20, ["bob"], False],
+                [3, 3, 30, ["alex"], True],
+            ],
+            "tracks": [[5, 3, 0, ["all", "night"], True]],
+        },
+    )
+    assert indexes["users"].search("ali", 10) == [1]
+    assert indexes["users"].search("al", 10) == [3, 1]
+    assert indexes["users"].search("alice", 10) == []
+    assert indexes["users"].search("bob", 10) == []
+    assert indexes["tracks"].search("night", 10) == [5]
+
+    # past MAX_PENDING_TERMS the pending terms are merged into the main arrays
+    apply_changefeed_payload(
+        indexes,
+        {"users": [[4, 4, 40, ["alvin", "and", "chipmunks"], True]]},
+    )
+    assert indexes["users"].search("al", 10) == [4, 3, 1]
+
+
+def test_get_changed_documents(monkeypatch):
+    """Test that changed playlists and albums are removed from the other index"""
+    monkeypatch.setattr(search_autocomplete, "get_user_documents", lambda *args: [])
+    monkeypatch.setattr(search_autocomplete, "get_track_documents", lambda *args: [])
+    monkeypatch.setattr(
+        search_autocomplete,
+        "get_playlist_documents",
+        lambda *args: [
+            ("playlists", get_document(1, 10, "Chill mix", owner_id=7), True),
+            ("albums", get_document(2, 20, "Debut", owner_id=7), True),
+            # playlist 3 became an album
+            ("albums", get_document(3, 30, "Chill album", owner_id=8), True),
+        ],
+    )
+    payload = get_changed_documents(None, 1, 2)
+    assert payload["users"] == []
+    assert payload["tracks"] == []
+    assert payload["playlists"] == [
+        [1, 7, 10, ("chill", "mix"), True],
+        [2, 7, 20, ("debut",), False],
+        [3, 8, 30, ("chill", "album"), False],
+    ]
+    assert payload["albums"] == [
+        [2, 7, 20, ("debut",), True],
+        [3, 8, 30, ("chill", "album"), True],
+        [1, 7, 10, ("chill", "mix"), False],
+    ]
+
+    indexes = {
+        "users": AutocompleteIndex(),
+        "tracks": AutocompleteIndex(),
+        "playlists": AutocompleteIndex(
+            [get_document(3, 30, "Chill album", owner_id=8)]
+        ),
+        "albums": AutocompleteIndex(),
+    }
+    apply_changefeed_payload(indexes, payload)
+    assert indexes["playlists"].search("chill", 10) == [1]
+    assert indexes["albums"].search("chill", 10) == [3]
+
+
+def test_get_reverted_documents(monkeypatch):
+    """Test that reverted entities are restored and the ones that no longer exist removed"""
+    monkeypatch.setattr(
+        search_autocomplete,
+        "get_user_documents",
+        lambda session, min_blocknumber, max_blocknumber, ids: [
+            (get_document(1, 10, "Alice"), True)
+        ],
+    )
+    monkeypatch.setattr(search_autocomplete, "get_track_documents", lambda *args: [])
+    monkeypatch.setattr(
+        search_autocomplete,
+        "get_playlist_documents",
+        lambda session, min_blocknumber, max_blocknumber, ids: [
+            ("albums", get_document(3, 30, "Debut", owner_id=1), True)
+        ],
+    )
+    payload = get_reverted_documents(
+        None, {"users": [1, 2], "playlists": [3, 4], "follows": [[1, 2]]}
+    )
+    assert payload["users"] == [
+        [1, 1, 10, ("alice",), True],
+        [2, 2, 0, [], False],
+    ]
+    assert payload["tracks"] == []
+    assert payload["playlists"] == [
+        [3, 1, 30, ("debut",), False],
+        [4, 4, 0, [], False],
+    ]
+    assert payload["albums"] == [
+        [3, 1, 30, ("debut",), True],
+        [4, 4, 0, [], False],
+    ]
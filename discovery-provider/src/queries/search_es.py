@@ -13,10 +13,13 @@ from src.utils.elasticdsl import (
     ES_PLAYLISTS,
     ES_TRACKS,
     ES_USERS,
+    SOURCE_EXCLUDES,
     esclient,
+    fetch_current_user_relationships,
     pluck_hits,
     populate_track_or_playlist_metadata_es,
     populate_user_metadata_es,
+    source_filter,
 )
 
 logger = logging.getLogger(__name__)
@@ -132,6 +135,7 @@ def search_es_full(args: dict):
             continue
         dsl["size"] = limit
         dsl["from"] = offset
+        dsl["_source"] = source_filter(index_name)
         if index_name == ES_USERS:
             dsl["size"] = limit + 5
 
@@ -192,12 +196,34 @@ def search_es_full(args: dict):
     current_user = None
 
     if user_ids:
-        users_mget = esclient.mget(index=ES_USERS, ids=list(user_ids))
+        users_mget = esclient.mget(
+            index=ES_USERS,
+            ids=list(user_ids),
+            source_excludes=SOURCE_EXCLUDES[ES_USERS],
+        )
         users_by_id = {d["_id"]: d["_source"] for d in users_mget["docs"] if d["found"]}
         if current_user_id:
             current_user = users_by_id.get(str(current_user_id))
-        for id, user in users_by_id.items():
-            users_by_id[id] = populate_user_metadata_es(user, current_user)
+
+    # resolve current user reposts, saves + follows for every doc in one msearch
+    relationships = fetch_current_user_relationships(
+        current_user_id,
+        track_ids=[
+            t["track_id"] for k in ["tracks", "saved_tracks"] for t in response[k]
+        ],
+        playlist_ids=[
+            p["playlist_id"]
+            for k in ["playlists", "saved_playlists"]
+            for p in response[k]
+        ],
+        user_ids=[
+            *users_by_id.keys(),
+            *[u["user_id"] for k in ["users", "followed_users"] for u in response[k]],
+        ],
+    )
+
+    for id, user in users_by_id.items():
+        users_by_id[id] = populate_user_metadata_es(user, current_user, relationships)
 
     # fetch followed saves + reposts
     # TODO: instead of limit param (20) should do an agg to get 3 saves / reposts per item_key
@@ -210,14 +236,15 @@ def search_es_full(args: dict):
         tracks = response[k]
         hydrate_user(tracks, users_by_id)
         hydrate_saves_reposts(tracks, follow_saves, follow_reposts)
-        response[k] = transform_tracks(tracks, users_by_id, current_user)
+        response[k] = transform_tracks(tracks, users_by_id, current_user, relationships)
 
     # users: finalize
     for k in ["users", "followed_users"]:
         users = drop_copycats(response[k])
         users = users[:limit]
         response[k] = [
-            extend_user(populate_user_metadata_es(user, current_user)) for user in users
+            extend_user(populate_user_metadata_es(user, current_user, relationships))
+            for user in users
         ]
 
     # playlists: finalize
@@ -226,7 +253,11 @@ def search_es_full(args: dict):
         hydrate_saves_reposts(playlists, follow_saves, follow_reposts)
         hydrate_user(playlists, users_by_id)
         response[k] = [
-            extend_playlist(populate_track_or_playlist_metadata_es(item, current_user))
+            extend_playlist(
+                populate_track_or_playlist_metadata_es(
+                    item, current_user, relationships
+                )
+            )
             for item in playlists
         ]
 
@@ -410,10 +441,12 @@ def hydrate_saves_reposts(items, follow_saves, follow_reposts):
         item["followee_favorites"] = [extend_favorite(x) for x in follow_saves[ik]]
 
 
-def transform_tracks(tracks, users_by_id, current_user):
+def transform_tracks(tracks, users_by_id, current_user, relationships=None):
     tracks_out = []
     for track in tracks:
-        track = populate_track_or_playlist_metadata_es(track, current_user)
+        track = populate_track_or_playlist_metadata_es(
+            track, current_user, relationships
+        )
         track = extend_track(track)
         tracks_out.append(track)
 
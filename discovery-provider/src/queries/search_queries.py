@@ -8,8 +8,9 @@ import sqlalchemy
 from flask import Blueprint, request
 from src import api_helpers, exceptions
 from src.api.v1.helpers import extend_search
-from src.models import Follow, RepostType, Save, SaveType
+from src.models import RepostType, Save, SaveType, UserBalance
 from src.queries import response_name_constants
+from src.queries.get_followee_user_ids import get_followee_user_ids
 from src.queries.get_unpopulated_playlists import get_unpopulated_playlists
 from src.queries.get_unpopulated_tracks import get_unpopulated_tracks
 from src.queries.get_unpopulated_users import get_unpopulated_users
@@ -22,6 +23,10 @@ from src.queries.query_helpers import (
     populate_track_metadata,
     populate_user_metadata,
 )
+from src.queries.search_autocomplete import (
+    AUTOCOMPLETE_KINDS,
+    search_autocomplete_index,
+)
 from src.queries.search_config import (
     current_user_saved_match_boost,
     search_handle_exact_match_boost,
@@ -151,17 +156,9 @@ def search_tags():
         if searchKind in [SearchKind.all, SearchKind.users]:
             # Query followed users that have referenced this tag
             user_ids = [user["user_id"] for user in results["users"]]
-            followed_user_query = (
-                session.query(Follow.followee_user_id)
-                .filter(
-                    Follow.is_current == True,
-                    Follow.is_delete == False,
-                    Follow.follower_user_id == current_user_id,
-                    Follow.followee_user_id.in_(user_ids),
-                )
-                .all()
+            followed_user_ids = set(user_ids).intersection(
+                get_followee_user_ids(session, current_user_id)
             )
-            followed_user_ids = {i[0] for i in followed_user_query}
             followed_users = list(
                 filter(
                     lambda user: user["user_id"] in followed_user_ids, results["users"]
@@ -266,6 +263,11 @@ def search(args):
     `query`, `kind`, `current_user_id`, and `only_downloadable`
     """
 
+    if args.get("is_auto_complete") and not args.get("only_downloadable"):
+        results = search_autocomplete(args)
+        if results is not None:
+            return extend_search(results)
+
     if os.getenv("audius_elasticsearch_search_enabled"):
         try:
             resp = search_es_full(args)
@@ -371,6 +373,119 @@ def search(args):
     return extend_search(results)
 
 
+def search_autocomplete(args):
+    """Autocomplete from the in-process indexes, None until the indexes are loaded"""
+    search_str = args.get("query")
+    searchKind = SearchKind[args.get("kind", "all")]
+    current_user_id = args.get("current_user_id")
+
+    ids = {}
+    for kind in AUTOCOMPLETE_KINDS:
+        if searchKind in [SearchKind.all, SearchKind[kind]]:
+            kind_ids = search_autocomplete_index(
+                kind, search_str, args.get("limit"), args.get("offset")
+            )
+            if kind_ids is None:
+                return None
+            ids[kind] = kind_ids
+
+    results = {}
+    db = get_db_read_replica()
+    with db.scoped_session() as session:
+        if "tracks" in ids:
+            tracks = sort_by_ids(
+                get_unpopulated_tracks(session, ids["tracks"], True),
+                "track_id",
+                ids["tracks"],
+            )
+            saved_ids = get_saved_ids(
+                session, current_user_id, SaveType.track, ids["tracks"]
+            )
+            results["tracks"] = tracks
+            results["saved_tracks"] = [t for t in tracks if t["track_id"] in saved_ids]
+
+        if "users" in ids:
+            users = sort_by_ids(
+                get_unpopulated_users(session, ids["users"]), "user_id", ids["users"]
+            )
+            balances = {
+                balance.user_id: balance
+                for balance in session.query(UserBalance).filter(
+                    UserBalance.user_id.in_(ids["users"])
+                )
+            }
+            for user in users:
+                balance = balances.get(user["user_id"])
+                user[response_name_constants.balance] = balance and balance.balance
+                user[response_name_constants.associated_wallets_balance] = (
+                    balance and balance.associated_wallets_balance
+                )
+            followed_ids = set()
+            if current_user_id and ids["users"]:
+                followed_ids = set(ids["users"]).intersection(
+                    get_followee_user_ids(session, current_user_id)
+                )
+            users.sort(key=cmp_to_key(compare_users))
+            results["users"] = users
+            results["followed_users"] = [
+                u for u in users if u["user_id"] in followed_ids
+            ]
+
+        for (kind, save_type) in [
+            ("playlists", SaveType.playlist),
+            ("albums", SaveType.album),
+        ]:
+            if kind in ids:
+                playlists = sort_by_ids(
+                    get_unpopulated_playlists(session, ids[kind], True),
+                    "playlist_id",
+                    ids[kind],
+                )
+                saved_ids = get_saved_ids(
+                    session, current_user_id, save_type, ids[kind]
+                )
+                results[kind] = playlists
+                results[f"saved_{kind}"] = [
+                    p for p in playlists if p["playlist_id"] in saved_ids
+                ]
+
+        # Add users back
+        user_ids = set()
+        for (kind, result_list) in results.items():
+            if kind in ["tracks", "playlists", "albums"]:
+                user_ids.update(get_users_ids(result_list))
+        owners = get_users_by_id(session, list(user_ids), current_user_id)
+        for (_, result_list) in results.items():
+            for result in result_list:
+                if "playlist_owner_id" in result:
+                    result["user"] = owners[result["playlist_owner_id"]]
+                elif "owner_id" in result:
+                    result["user"] = owners[result["owner_id"]]
+    return results
+
+
+def sort_by_ids(items, id_key, ids):
+    """Orders the items like the ids, dropping ids without an item"""
+    items_map = {item[id_key]: item for item in items}
+    return [items_map[id] for id in ids if id in items_map]
+
+
+def get_saved_ids(session, current_user_id, save_type, item_ids):
+    """Ids of the items saved by the current user"""
+    if not current_user_id or not item_ids:
+        return set()
+    return {
+        save_item_id
+        for (save_item_id,) in session.query(Save.save_item_id).filter(
+            Save.is_current == True,
+            Save.is_delete == False,
+            Save.user_id == current_user_id,
+            Save.save_type == save_type,
+            Save.save_item_id.in_(item_ids),
+        )
+    }
+
+
 def track_search_query(
     session,
     search_str,
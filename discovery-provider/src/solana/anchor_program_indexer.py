@@ -13,7 +13,7 @@ from src.solana.anchor_parser import AnchorParser
 from src.solana.audius_data_transaction_handlers import ParsedTx, transaction_handlers
 from src.solana.solana_client_manager import SolanaClientManager
 from src.solana.solana_program_indexer import SolanaProgramIndexer
-from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.ipld_blacklist import get_blacklisted_iplds
 from src.utils.cid_metadata_client import CIDMetadataClient
 from src.utils.helpers import split_list
 from src.utils.session_manager import SessionManager
@@ -323,6 +323,7 @@ class AnchorProgramIndexer(SolanaProgramIndexer):
                 )
                 .all()
             )
+            blacklisted_iplds = get_blacklisted_iplds(session, self._redis)
 
         # any instructions with  metadata
         for transaction in parsed_transactions:
@@ -334,7 +335,7 @@ class AnchorProgramIndexer(SolanaProgramIndexer):
                     and "metadata" in instruction["data"]
                 ):
                     cid = instruction["data"]["metadata"]
-                    if is_blacklisted_ipld(session, cid):
+                    if cid in blacklisted_iplds:
                         blacklisted_cids.add(cid)
                     else:
                         cids_txhash_set.add((cid, transaction["tx_sig"]))
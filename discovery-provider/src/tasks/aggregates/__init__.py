@@ -1,7 +1,7 @@
 import logging
 from inspect import currentframe
 from time import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, List, Optional, Sequence
 
 from redis import Redis
 from sqlalchemy import text
@@ -112,6 +112,89 @@ def update_aggregate_table(
     save_indexed_checkpoint(session, table_name, current_checkpoint)
 
 
+# GET_DELTAS_QUERY
+# For every key of {table} written in (:prev_blocknumber, :current_blocknumber]
+# compare the latest row in that range with the latest row before it.
+# The key's {id_column} gets +1 if the row is now counted and -1 if it was counted before,
+# so the counts move by what changed since the checkpoint without recounting.
+# Keys counted both before and after produce a +1 and a -1 that cancel out.
+GET_DELTAS_QUERY = """
+    (
+        WITH changed AS (
+            SELECT
+                DISTINCT ON ({keys}) *
+            FROM
+                {table} r
+            WHERE
+                r.blocknumber > :prev_blocknumber
+                AND r.blocknumber <= :current_blocknumber
+            ORDER BY
+                {keys},
+                r.blocknumber DESC,
+                r.is_current DESC
+        )
+        SELECT
+            changed.{id_column} AS id,{changed_columns}
+            CASE WHEN {is_counted_changed} THEN 1 ELSE 0 END AS delta
+        FROM
+            changed
+        UNION
+        ALL
+        SELECT
+            prior.{id_column} AS id,{prior_columns}
+            -1 AS delta
+        FROM
+            changed
+            CROSS JOIN LATERAL (
+                SELECT
+                    *
+                FROM
+                    {table} p
+                WHERE
+                    p.is_current IS FALSE
+                    AND {prior_keys}
+                    AND p.blocknumber <= :prev_blocknumber
+                ORDER BY
+                    p.blocknumber DESC
+                LIMIT
+                    1
+            ) prior
+        WHERE
+            {is_counted_prior}
+    )
+    """
+
+
+def get_deltas_query(
+    table: str,
+    key_columns: List[str],
+    id_column: str,
+    is_counted: str,
+    extra_columns: Sequence[str] = (),
+) -> str:
+    """
+    Returns a subquery of (id, delta) rows for the changes to table in the block range.
+
+    Args:
+        table: the table of the counted rows, e.g. follows
+        key_columns: the columns identifying a row across its versions
+        id_column: the column of the entity the rows are counted towards
+        is_counted: condition on the `{row}` alias for a row to be counted
+        extra_columns: columns of the row selected between id and delta,
+            e.g. `repost_item_id AS item_id`
+    """
+    return GET_DELTAS_QUERY.format(
+        changed_columns="".join(f" changed.{column}," for column in extra_columns),
+        prior_columns="".join(f" prior.{column}," for column in extra_columns),
+        table=table,
+        keys=", ".join(key_columns),
+        id_column=id_column,
+        prior_keys=" AND ".join(f"p.{key} = changed.{key}" for key in key_columns),
+        is_counted_changed=is_counted.format(row="changed"),
+        is_counted_prior=is_counted.format(row="prior"),
+    )
+
+
 def get_latest_blocknumber(session: Session) -> Optional[int]:
     db_block_query = (
         session.query(Block.number).filter(Block.is_current == True).first()
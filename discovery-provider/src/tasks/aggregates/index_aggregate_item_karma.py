@@ -0,0 +1,397 @@
+import logging
+
+from sqlalchemy.orm.session import Session
+from src.tasks.aggregates import get_deltas_query, update_aggregate_table
+
+logger = logging.getLogger(__name__)
+
+# Name of the aggregate table to update
+AGGREGATE_ITEM_KARMA = "aggregate_item_karma"
+
+# Condition on the `{row}` users alias for the user to count towards xf_karma
+IS_COMPLETE_PROFILE = """
+    ({row}.cover_photo IS NOT NULL OR {row}.cover_photo_sizes IS NOT NULL)
+    AND ({row}.profile_picture IS NOT NULL OR {row}.profile_picture_sizes IS NOT NULL)
+    AND {row}.bio IS NOT NULL
+    """
+
+# ENGAGEMENT_DELTAS_QUERY
+# Rows of (user_id, item_id, item_type, delta), one per repost or save changed in the block range
+ENGAGEMENT_DELTAS_QUERY = """
+    SELECT
+        id AS user_id,
+        item_id,
+        item_type,
+        delta
+    FROM
+        {repost_deltas_query} AS repost_deltas
+    UNION ALL
+    SELECT
+        id AS user_id,
+        item_id,
+        item_type,
+        delta
+    FROM
+        {save_deltas_query} AS save_deltas
+    """.format(
+    repost_deltas_query=get_deltas_query(
+        "reposts",
+        ["user_id", "repost_item_id", "repost_type"],
+        "user_id",
+        "{row}.is_delete IS FALSE",
+        ["repost_item_id AS item_id", "repost_type::text AS item_type"],
+    ),
+    save_deltas_query=get_deltas_query(
+        "saves",
+        ["user_id", "save_item_id", "save_type"],
+        "user_id",
+        "{row}.is_delete IS FALSE",
+        ["save_item_id AS item_id", "save_type::text AS item_type"],
+    ),
+)
+
+# UPDATE_AGGREGATE_ITEM_KARMA_QUERY
+# An item's karma is the sum of the weights of its reposters and savers,
+# where the weight is the user's follower count (and 0 for incomplete profiles in xf_karma).
+# Between the last indexed blocknumber and the current one an item's karma changes by
+# - delta * previous weight, for each of its reposts and saves changed in the range
+# - current weight - previous weight, for each of its current reposts and saves
+#   by users whose follows or profile changed in the range
+# The previous follower counts are read from aggregate_user, so this has to run
+# before aggregate_user is updated over the same block range.
+# The current ones are the previous ones plus the follow deltas, or a recount for
+# users without a row yet, the same way aggregate_user will update them
+UPDATE_AGGREGATE_ITEM_KARMA_QUERY = """
+    WITH engagement_deltas AS (
+        {engagement_deltas_query}
+    ),
+    follower_deltas AS (
+        SELECT
+            id AS user_id,
+            sum(delta) AS follower_count
+        FROM
+            {follower_deltas_query} AS deltas
+        GROUP BY
+            id
+    ),
+    weighted_users AS (
+        SELECT
+            user_id
+        FROM
+            engagement_deltas
+        UNION
+        SELECT
+            user_id
+        FROM
+            follower_deltas
+        UNION
+        SELECT
+            u.user_id
+        FROM
+            users u
+        WHERE
+            u.is_current IS TRUE
+            AND u.blocknumber > :prev_blocknumber
+            AND u.blocknumber <= :current_blocknumber
+    ),
+    user_follower_counts AS (
+        SELECT
+            w.user_id,
+            COALESCE(au.follower_count, 0) AS prev_follower_count,
+            -- users without a row yet are counted from scratch by aggregate_user
+            CASE
+                WHEN au.user_id IS NULL THEN new_user.follower_count
+                ELSE au.follower_count + COALESCE(fd.follower_count, 0)
+            END AS current_follower_count,
+            COALESCE(prev_profile.is_complete, FALSE) AS prev_is_complete,
+            COALESCE(current_profile.is_complete, FALSE) AS current_is_complete
+        FROM
+            weighted_users w
+            LEFT OUTER JOIN aggregate_user au ON au.user_id = w.user_id
+            LEFT OUTER JOIN follower_deltas fd ON fd.user_id = w.user_id
+            LEFT OUTER JOIN LATERAL (
+                SELECT
+                    count(*) AS follower_count
+                FROM
+                    follows f
+                WHERE
+                    au.user_id IS NULL
+                    AND f.followee_user_id = w.user_id
+                    AND f.is_current IS TRUE
+                    AND f.is_delete IS FALSE
+            ) new_user ON TRUE
+            LEFT OUTER JOIN LATERAL (
+                SELECT
+                    {is_complete_profile} AS is_complete
+                FROM
+                    users u
+                WHERE
+                    u.user_id = w.user_id
+                    AND u.blocknumber <= :prev_blocknumber
+                ORDER BY
+                    u.blocknumber DESC,
+                    u.is_current DESC
+                LIMIT
+                    1
+            ) prev_profile ON TRUE
+            LEFT OUTER JOIN LATERAL (
+                SELECT
+                    {is_complete_profile} AS is_complete
+                FROM
+                    users u
+                WHERE
+                    u.user_id = w.user_id
+                    AND u.blocknumber <= :current_blocknumber
+                ORDER BY
+                    u.blocknumber DESC,
+                    u.is_current DESC
+                LIMIT
+                    1
+            ) current_profile ON TRUE
+    ),
+    user_weights AS (
+        SELECT
+            user_id,
+            prev_follower_count AS prev_weight,
+            current_follower_count AS current_weight,
+            CASE
+                WHEN prev_is_complete THEN prev_follower_count
+                ELSE 0
+            END AS prev_xf_weight,
+            CASE
+                WHEN current_is_complete THEN current_follower_count
+                ELSE 0
+            END AS current_xf_weight
+        FROM
+            user_follower_counts
+    ),
+    changed_weights AS (
+        SELECT
+            *
+        FROM
+            user_weights
+        WHERE
+            (current_weight, current_xf_weight) <> (prev_weight, prev_xf_weight)
+    ),
+    karma_deltas AS (
+        SELECT
+            d.item_id,
+            d.item_type,
+            d.delta * w.prev_weight AS karma,
+            d.delta * w.prev_xf_weight AS xf_karma
+        FROM
+            engagement_deltas d
+            JOIN user_weights w ON w.user_id = d.user_id
+        WHERE
+            d.delta <> 0
+        UNION ALL
+        SELECT
+            r.repost_item_id AS item_id,
+            r.repost_type::text AS item_type,
+            w.current_weight - w.prev_weight AS karma,
+            w.current_xf_weight - w.prev_xf_weight AS xf_karma
+        FROM
+            changed_weights w
+            JOIN reposts r ON r.user_id = w.user_id
+        WHERE
+            r.is_current IS TRUE
+            AND r.is_delete IS FALSE
+            AND r.blocknumber <= :current_blocknumber
+        UNION ALL
+        SELECT
+            s.save_item_id AS item_id,
+            s.save_type::text AS item_type,
+            w.current_weight - w.prev_weight AS karma,
+            w.current_xf_weight - w.prev_xf_weight AS xf_karma
+        FROM
+            changed_weights w
+            JOIN saves s ON s.user_id = w.user_id
+        WHERE
+            s.is_current IS TRUE
+            AND s.is_delete IS FALSE
+            AND s.blocknumber <= :current_blocknumber
+    ),
+    item_deltas AS (
+        SELECT
+            item_id,
+            item_type,
+            sum(karma) AS karma,
+            sum(xf_karma) AS xf_karma
+        FROM
+            karma_deltas
+        GROUP BY
+            item_id,
+            item_type
+    )
+    INSERT INTO
+        aggregate_item_karma (item_id, item_type, karma, xf_karma)
+    SELECT
+        item_id,
+        item_type,
+        karma,
+        xf_karma
+    FROM
+        item_deltas
+    WHERE
+        (karma, xf_karma) <> (0, 0)
+    ON CONFLICT (item_id, item_type) DO
+    UPDATE
+    SET
+        karma = aggregate_item_karma.karma + EXCLUDED.karma,
+        xf_karma = aggregate_item_karma.xf_karma + EXCLUDED.xf_karma
+    """.format(
+    engagement_deltas_query=ENGAGEMENT_DELTAS_QUERY,
+    follower_deltas_query=get_deltas_query(
+        "follows",
+        ["follower_user_id", "followee_user_id"],
+        "followee_user_id",
+        "{row}.is_delete IS FALSE",
+    ),
+    is_complete_profile=IS_COMPLETE_PROFILE.format(row="u"),
+)
+
+# RECOUNT_AGGREGATE_ITEM_KARMA_QUERY
+# Sums the karma from scratch for the (item_id, item_type) rows of the {items} CTE
+# with the follower counts of aggregate_user and the profiles as of the last indexed blocknumber.
+# The checkpoint is read in the same statement as aggregate_user so both are as of the same update
+RECOUNT_AGGREGATE_ITEM_KARMA_QUERY = """
+    SELECT
+        i.item_id,
+        i.item_type,
+        COALESCE(sum(au.follower_count), 0) AS karma,
+        COALESCE(
+            sum(
+                CASE
+                    WHEN profiles.is_complete THEN au.follower_count
+                    ELSE 0
+                END
+            ),
+            0
+        ) AS xf_karma
+    FROM
+        {items} i
+        LEFT OUTER JOIN (
+            SELECT
+                r.user_id,
+                r.repost_item_id AS item_id,
+                r.repost_type::text AS item_type
+            FROM
+                reposts r
+            WHERE
+                r.is_current IS TRUE
+                AND r.is_delete IS FALSE
+                AND (r.repost_item_id, r.repost_type::text) IN (
+                    SELECT
+                        item_id,
+                        item_type
+                    FROM
+                        {items}
+                )
+            UNION ALL
+            SELECT
+                s.user_id,
+                s.save_item_id AS item_id,
+                s.save_type::text AS item_type
+            FROM
+                saves s
+            WHERE
+                s.is_current IS TRUE
+                AND s.is_delete IS FALSE
+                AND (s.save_item_id, s.save_type::text) IN (
+                    SELECT
+                        item_id,
+                        item_type
+                    FROM
+                        {items}
+                )
+        ) engagements ON engagements.item_id = i.item_id
+        AND engagements.item_type = i.item_type
+        LEFT OUTER JOIN aggregate_user au ON au.user_id = engagements.user_id
+        LEFT OUTER JOIN LATERAL (
+            SELECT
+                {is_complete_profile} AS is_complete
+            FROM
+                users u
+            WHERE
+                u.user_id = engagements.user_id
+                AND u.blocknumber <= (
+                    SELECT
+                        last_checkpoint
+                    FROM
+                        indexing_checkpoints
+                    WHERE
+                        tablename = 'aggregate_item_karma'
+                )
+            ORDER BY
+                u.blocknumber DESC,
+                u.is_current DESC
+            LIMIT
+                1
+        ) profiles ON TRUE
+    GROUP BY
+        i.item_id,
+        i.item_type
+    """
+
+# RECONCILE_AGGREGATE_ITEM_KARMA_QUERY
+# Recount the aggregate_item_karma rows in (:min_id, :max_id] and correct the ones that drifted
+# Items with reposts or saves written after the last indexed blocknumber are skipped,
+# their deltas are not applied yet so their karma can't be compared to a recount
+RECONCILE_AGGREGATE_ITEM_KARMA_QUERY = """
+    WITH engagement_deltas AS (
+        {engagement_deltas_query}
+    ),
+    reconciled_items AS (
+        SELECT
+            item_id,
+            item_type
+        FROM
+            aggregate_item_karma
+        WHERE
+            item_id > :min_id
+            AND item_id <= :max_id
+        EXCEPT
+        SELECT
+            item_id,
+            item_type
+        FROM
+            engagement_deltas
+    ),
+    recounted AS (
+        {recount_reconciled_items_query}
+    )
+    UPDATE
+        aggregate_item_karma a
+    SET
+        karma = r.karma,
+        xf_karma = r.xf_karma
+    FROM
+        recounted r
+    WHERE
+        a.item_id = r.item_id
+        AND a.item_type = r.item_type
+        AND (a.karma, a.xf_karma) IS DISTINCT FROM (r.karma, r.xf_karma)
+    RETURNING
+        a.item_id
+    """.format(
+    engagement_deltas_query=ENGAGEMENT_DELTAS_QUERY,
+    recount_reconciled_items_query=RECOUNT_AGGREGATE_ITEM_KARMA_QUERY.format(
+        items="reconciled_items",
+        is_complete_profile=IS_COMPLETE_PROFILE.format(row="u"),
+    ),
+)
+
+
+def update_aggregate_item_karma(session: Session, current_blocknumber: int):
+    """
+    Applies the karma deltas up to current_blocknumber.
+    Called from the aggregate_user task before it updates the follower counts.
+    """
+    update_aggregate_table(
+        logger,
+        session,
+        AGGREGATE_ITEM_KARMA,
+        UPDATE_AGGREGATE_ITEM_KARMA_QUERY,
+        "blocknumber",
+        current_blocknumber,
+    )
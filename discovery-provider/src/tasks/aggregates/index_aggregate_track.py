@@ -1,6 +1,7 @@
 import logging
 
 from src.tasks.aggregates import (
+    get_deltas_query,
     get_latest_blocknumber,
     init_task_and_acquire_lock,
     update_aggregate_table,
@@ -11,69 +12,9 @@ logger = logging.getLogger(__name__)
 
 AGGREGATE_TRACK = "aggregate_track"
 
-# UPDATE_AGGREGATE_TRACK_QUERY
-# Get a lower bound blocknumber to check for new save/repost activity
-# Find a subset of tracks that have changed after that blocknumber
-# For that subset of tracks calculate the play/repost total counts
-# Insert that count for new users or update an existing row
-UPDATE_AGGREGATE_TRACK_QUERY = """
-    WITH new_track AS (
-        SELECT
-            t.track_id AS track_id
-        FROM
-            tracks t
-        WHERE
-            t.is_current IS TRUE
-            AND t.is_delete IS FALSE
-            AND t.blocknumber > :prev_blocknumber
-        GROUP BY
-            t.track_id
-        UNION
-        ALL (
-            SELECT
-                r.repost_item_id AS track_id
-            FROM
-                reposts r
-            WHERE
-                r.is_current IS TRUE
-                AND r.repost_type = 'track'
-                AND r.is_delete IS FALSE
-                AND r.blocknumber > :prev_blocknumber
-            GROUP BY
-                r.repost_item_id
-        )
-        UNION
-        ALL (
-            SELECT
-                s.save_item_id AS track_id
-            FROM
-                saves s
-            WHERE
-                s.is_current IS TRUE
-                AND s.save_type = 'track'
-                AND s.is_delete IS FALSE
-                AND s.blocknumber > :prev_blocknumber
-            GROUP BY
-                s.save_item_id
-        )
-    ),
-    deleted_tracks AS (
-        DELETE FROM
-            aggregate_track a
-        WHERE
-            a.track_id IN (
-                SELECT
-                    track_id
-                FROM
-                    tracks d
-                WHERE
-                    d.is_current IS TRUE
-                    AND d.is_delete IS TRUE
-                    AND d.blocknumber > :prev_blocknumber
-            )
-    )
-    INSERT INTO
-        aggregate_track (track_id, repost_count, save_count)
+# RECOUNT_AGGREGATE_TRACK_QUERY
+# Counts the reposts and saves from scratch for the tracks in the {track_ids} CTE
+RECOUNT_AGGREGATE_TRACK_QUERY = """
     SELECT
         DISTINCT(t.track_id),
         COALESCE(track_repost.repost_count, 0) AS repost_count,
@@ -94,7 +35,7 @@ UPDATE_AGGREGATE_TRACK_QUERY = """
                     SELECT
                         track_id
                     FROM
-                        new_track
+                        {track_ids}
                 )
             GROUP BY
                 r.repost_item_id
@@ -113,7 +54,7 @@ UPDATE_AGGREGATE_TRACK_QUERY = """
                     SELECT
                         track_id
                     FROM
-                        new_track
+                        {track_ids}
                 )
             GROUP BY
                 s.save_item_id
@@ -125,13 +66,188 @@ UPDATE_AGGREGATE_TRACK_QUERY = """
             SELECT
                 track_id
             FROM
-                new_track
-        ) ON CONFLICT (track_id) DO
+                {track_ids}
+        )
+    """
+
+# TRACK_DELTAS_QUERY
+# Rows of (track_id, repost_count delta, save_count delta), one per changed repost or save
+TRACK_DELTAS_QUERY = """
+    SELECT
+        id AS track_id,
+        delta AS repost_count,
+        0 AS save_count
+    FROM
+        {repost_deltas_query} AS repost_deltas
+    UNION
+    ALL
+    SELECT
+        id AS track_id,
+        0 AS repost_count,
+        delta AS save_count
+    FROM
+        {save_deltas_query} AS save_deltas
+    """.format(
+    repost_deltas_query=get_deltas_query(
+        "reposts",
+        ["user_id", "repost_item_id", "repost_type"],
+        "repost_item_id",
+        "{row}.repost_type = 'track' AND {row}.is_delete IS FALSE",
+    ),
+    save_deltas_query=get_deltas_query(
+        "saves",
+        ["user_id", "save_item_id", "save_type"],
+        "save_item_id",
+        "{row}.save_type = 'track' AND {row}.is_delete IS FALSE",
+    ),
+)
+
+# UPDATE_AGGREGATE_TRACK_QUERY
+# Sum the deltas of the reposts and saves written since the last indexed blocknumber
+# Tracks that have an aggregate_track row get the deltas added to their counts
+# Tracks deleted since then lose their row
+# Tracks written since then without a row, new or undeleted ones, are counted from scratch
+UPDATE_AGGREGATE_TRACK_QUERY = """
+    WITH deltas AS (
+        {track_deltas_query}
+    ),
+    track_deltas AS (
+        SELECT
+            track_id,
+            sum(repost_count) AS repost_count,
+            sum(save_count) AS save_count
+        FROM
+            deltas
+        GROUP BY
+            track_id
+    ),
+    deleted_tracks AS (
+        SELECT
+            d.track_id
+        FROM
+            tracks d
+        WHERE
+            d.is_current IS TRUE
+            AND d.is_delete IS TRUE
+            AND d.blocknumber > :prev_blocknumber
+            AND d.blocknumber <= :current_blocknumber
+    ),
+    removed_tracks AS (
+        DELETE FROM
+            aggregate_track a
+        WHERE
+            a.track_id IN (
+                SELECT
+                    track_id
+                FROM
+                    deleted_tracks
+            )
+    ),
+    new_tracks AS (
+        SELECT
+            t.track_id
+        FROM
+            tracks t
+        WHERE
+            t.is_current IS TRUE
+            AND t.is_delete IS FALSE
+            AND t.blocknumber > :prev_blocknumber
+            AND t.blocknumber <= :current_blocknumber
+            AND NOT EXISTS (
+                SELECT
+                    1
+                FROM
+                    aggregate_track a
+                WHERE
+                    a.track_id = t.track_id
+            )
+    ),
+    updated_tracks AS (
+        UPDATE
+            aggregate_track a
+        SET
+            repost_count = a.repost_count + d.repost_count,
+            save_count = a.save_count + d.save_count
+        FROM
+            track_deltas d
+        WHERE
+            a.track_id = d.track_id
+            AND (d.repost_count, d.save_count) <> (0, 0)
+            AND d.track_id NOT IN (
+                SELECT
+                    track_id
+                FROM
+                    deleted_tracks
+            )
+    )
+    INSERT INTO
+        aggregate_track (track_id, repost_count, save_count)
+    {recount_new_tracks_query}
+    ON CONFLICT (track_id) DO
     UPDATE
     SET
         repost_count = EXCLUDED.repost_count,
         save_count = EXCLUDED.save_count
-    """
+    """.format(
+    track_deltas_query=TRACK_DELTAS_QUERY,
+    recount_new_tracks_query=RECOUNT_AGGREGATE_TRACK_QUERY.format(
+        track_ids="new_tracks"
+    ),
+)
+
+# RECONCILE_AGGREGATE_TRACK_QUERY
+# Recount the aggregate_track rows in (:min_id, :max_id] and correct the ones that drifted
+# Tracks with rows written after the last indexed blocknumber are skipped,
+# their deltas are not applied yet so their counts can't be compared to a recount
+RECONCILE_AGGREGATE_TRACK_QUERY = """
+    WITH deltas AS (
+        {track_deltas_query}
+    ),
+    reconciled_tracks AS (
+        SELECT
+            track_id
+        FROM
+            aggregate_track
+        WHERE
+            track_id > :min_id
+            AND track_id <= :max_id
+        EXCEPT
+        (
+            SELECT
+                track_id
+            FROM
+                deltas
+            UNION
+            SELECT
+                t.track_id
+            FROM
+                tracks t
+            WHERE
+                t.is_current IS TRUE
+                AND t.blocknumber > :prev_blocknumber
+        )
+    ),
+    recounted AS (
+        {recount_reconciled_tracks_query}
+    )
+    UPDATE
+        aggregate_track a
+    SET
+        repost_count = r.repost_count,
+        save_count = r.save_count
+    FROM
+        recounted r
+    WHERE
+        a.track_id = r.track_id
+        AND (a.repost_count, a.save_count) IS DISTINCT FROM (r.repost_count, r.save_count)
+    RETURNING
+        a.track_id
+    """.format(
+    track_deltas_query=TRACK_DELTAS_QUERY,
+    recount_reconciled_tracks_query=RECOUNT_AGGREGATE_TRACK_QUERY.format(
+        track_ids="reconciled_tracks"
+    ),
+)
 
 
 def _update_aggregate_track(session, _=None):
@@ -0,0 +1,205 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Table, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.session import Session
+from src.models import AggregateMonthlyPlays, AggregatePlays, HourlyPlayCounts, Play
+from src.tasks.aggregates import init_task_and_acquire_lock
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import PrometheusMetric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+PLAY_ROLLUPS = "play_rollups"
+
+# Names of the rollup tables, each keeps its own plays id checkpoint
+AGGREGATE_PLAYS_TABLE_NAME = "aggregate_plays"
+AGGREGATE_MONTHLY_PLAYS_TABLE_NAME = "aggregate_monthly_plays"
+HOURLY_PLAY_COUNTS_TABLE_NAME = "hourly_play_counts"
+
+# Max number of play ids read in a single run, bounds the size of the
+# in memory rollups when catching up on first population or after downtime
+MAX_PLAYS_PER_RUN = 1_000_000
+
+# Max number of rows written by a single multi-row upsert
+UPSERT_BATCH_SIZE = 10_000
+
+# GET_NEW_PLAY_BUCKETS_QUERY
+# Reads the new plays for every rollup in one scan of the plays table
+# Plays are grouped by play item id and hour, the only dimensions the rollups need,
+# and flagged with whether they come after each rollup's checkpoint
+GET_NEW_PLAY_BUCKETS_QUERY = """
+    SELECT
+        p.play_item_id,
+        date_trunc('hour', p.created_at) AS hourly_timestamp,
+        {is_new_columns},
+        count(p.id) AS count
+    FROM
+        plays p
+    WHERE
+        p.id > :min_prev_id_checkpoint
+        AND p.id <= :new_id_checkpoint
+    GROUP BY
+        {group_by_columns}
+    """
+
+# (play_item_id, hourly_timestamp, count)
+PlayBucket = Tuple[int, datetime, int]
+
+
+class PlayRollup(NamedTuple):
+    table_name: str
+    # Rollup key of a play bucket
+    get_key: Callable[[int, datetime], Tuple]
+    # Upsert rows from the rollup keys and summed counts
+    to_row: Callable[[Tuple, int], Dict]
+    table: Table
+    count_column: str
+
+
+PLAY_ROLLUP_DEFINITIONS: List[PlayRollup] = [
+    PlayRollup(
+        AGGREGATE_PLAYS_TABLE_NAME,
+        lambda play_item_id, _: (play_item_id,),
+        lambda key, count: {"play_item_id": key[0], "count": count},
+        AggregatePlays.__table__,
+        "count",
+    ),
+    PlayRollup(
+        AGGREGATE_MONTHLY_PLAYS_TABLE_NAME,
+        lambda play_item_id, hourly_timestamp: (
+            play_item_id,
+            hourly_timestamp.date().replace(day=1),
+        ),
+        lambda key, count: {
+            "play_item_id": key[0],
+            "timestamp": key[1],
+            "count": count,
+        },
+        AggregateMonthlyPlays.__table__,
+        "count",
+    ),
+    PlayRollup(
+        HOURLY_PLAY_COUNTS_TABLE_NAME,
+        lambda _, hourly_timestamp: (hourly_timestamp,),
+        lambda key, count: {"hourly_timestamp": key[0], "play_count": count},
+        HourlyPlayCounts.__table__,
+        "play_count",
+    ),
+]
+
+
+def rollup_play_buckets(rollup: PlayRollup, buckets: Iterable[PlayBucket]) -> Dict:
+    """Sums the play buckets into the rollup's keys"""
+    counts: Dict[Tuple, int] = defaultdict(int)
+    for play_item_id, hourly_timestamp, count in buckets:
+        counts[rollup.get_key(play_item_id, hourly_timestamp)] += count
+    return counts
+
+
+def upsert_rollup(session: Session, rollup: PlayRollup, counts: Dict[Tuple, int]):
+    """Adds the counts to the rollup table with multi-row upserts"""
+    rows = [rollup.to_row(key, count) for key, count in counts.items()]
+    table = rollup.table
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(table).values(rows[i : i + UPSERT_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={
+                rollup.count_column: table.c[rollup.count_column]
+                + statement.excluded[rollup.count_column]
+            },
+        )
+        session.execute(statement)
+
+
+def _index_play_rollups(
+    session: Session, _=None, table_names: Optional[List[str]] = None
+):
+    """
+    Rolls the plays that came after each rollup's checkpoint up into
+    hourly_play_counts, aggregate_monthly_plays and aggregate_plays.
+    The new plays are read once for all rollups.
+    """
+    metric = PrometheusMetric(
+        "update_aggregate_table_latency_seconds",
+        "Runtimes for src.task.aggregates:update_aggregate_table()",
+        ("table_name", "task_name"),
+    )
+
+    rollups = [
+        rollup
+        for rollup in PLAY_ROLLUP_DEFINITIONS
+        if table_names is None or rollup.table_name in table_names
+    ]
+    prev_id_checkpoints = [
+        get_last_indexed_checkpoint(session, rollup.table_name) for rollup in rollups
+    ]
+    min_prev_id_checkpoint = min(prev_id_checkpoints)
+
+    latest_play_id = (session.query(func.max(Play.id))).scalar()
+    if not latest_play_id or latest_play_id <= min_prev_id_checkpoint:
+        logger.info(
+            "index_play_rollups.py | Skip update because there are no new plays"
+        )
+        return
+    new_id_checkpoint = min(latest_play_id, min_prev_id_checkpoint + MAX_PLAYS_PER_RUN)
+
+    logger.info(
+        f"index_play_rollups.py | Updating {[rollup.table_name for rollup in rollups]}"
+        f" | checkpoint: ({min_prev_id_checkpoint}, {new_id_checkpoint}]"
+    )
+
+    is_new_columns = [f"p.id > :prev_id_checkpoint_{i}" for i in range(len(rollups))]
+    query = GET_NEW_PLAY_BUCKETS_QUERY.format(
+        is_new_columns=", ".join(is_new_columns),
+        group_by_columns=", ".join(
+            [str(column) for column in range(1, len(rollups) + 3)]
+        ),
+    )
+    buckets = session.execute(
+        text(query),
+        {
+            "min_prev_id_checkpoint": min_prev_id_checkpoint,
+            "new_id_checkpoint": new_id_checkpoint,
+            **{
+                f"prev_id_checkpoint_{i}": prev_id_checkpoint
+                for i, prev_id_checkpoint in enumerate(prev_id_checkpoints)
+            },
+        },
+    ).fetchall()
+
+    for i, (rollup, prev_id_checkpoint) in enumerate(zip(rollups, prev_id_checkpoints)):
+        if new_id_checkpoint <= prev_id_checkpoint:
+            continue
+
+        counts = rollup_play_buckets(
+            rollup,
+            ((bucket[0], bucket[1], bucket[-1]) for bucket in buckets if bucket[2 + i]),
+        )
+        upsert_rollup(session, rollup, counts)
+        save_indexed_checkpoint(session, rollup.table_name, new_id_checkpoint)
+
+    for rollup in rollups:
+        metric.save_time(
+            {"table_name": rollup.table_name, "task_name": "_index_play_rollups()"}
+        )
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="index_play_rollups", bind=True)
+def index_play_rollups(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/app.py
+    db = index_play_rollups.db
+    redis = index_play_rollups.redis
+
+    init_task_and_acquire_lock(logger, db, redis, PLAY_ROLLUPS, _index_play_rollups)
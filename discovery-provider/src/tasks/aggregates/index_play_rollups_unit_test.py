@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+from src.tasks.aggregates.index_play_rollups import (
+    AGGREGATE_MONTHLY_PLAYS_TABLE_NAME,
+    AGGREGATE_PLAYS_TABLE_NAME,
+    HOURLY_PLAY_COUNTS_TABLE_NAME,
+    PLAY_ROLLUP_DEFINITIONS,
+    rollup_play_buckets,
+)
+
+rollups = {rollup.table_name: rollup for rollup in PLAY_ROLLUP_DEFINITIONS}
+
+buckets = [
+    (1, datetime(2022, 1, 20, 10), 2),
+    (1, datetime(2022, 1, 20, 11), 1),
+    (1, datetime(2022, 2, 1, 0), 4),
+    (2, datetime(2022, 1, 20, 10), 3),
+]
+
+
+def test_rollup_play_buckets():
+    assert rollup_play_buckets(rollups[AGGREGATE_PLAYS_TABLE_NAME], buckets) == {
+        (1,): 7,
+        (2,): 3,
+    }
+    assert rollup_play_buckets(
+        rollups[AGGREGATE_MONTHLY_PLAYS_TABLE_NAME], buckets
+    ) == {
+        (1, date(2022, 1, 1)): 3,
+        (1, date(2022, 2, 1)): 4,
+        (2, date(2022, 1, 1)): 3,
+    }
+    assert rollup_play_buckets(rollups[HOURLY_PLAY_COUNTS_TABLE_NAME], buckets) == {
+        (datetime(2022, 1, 20, 10),): 5,
+        (datetime(2022, 1, 20, 11),): 1,
+        (datetime(2022, 2, 1, 0),): 4,
+    }
@@ -0,0 +1,155 @@
+import logging
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.orm.session import Session
+from src.tasks.aggregates import init_task_and_acquire_lock
+from src.tasks.aggregates.index_aggregate_item_karma import (
+    AGGREGATE_ITEM_KARMA,
+    RECONCILE_AGGREGATE_ITEM_KARMA_QUERY,
+)
+from src.tasks.aggregates.index_aggregate_track import (
+    AGGREGATE_TRACK,
+    RECONCILE_AGGREGATE_TRACK_QUERY,
+)
+from src.tasks.celery_app import celery
+from src.tasks.index_aggregate_user import (
+    AGGREGATE_USER,
+    RECONCILE_AGGREGATE_USER_QUERY,
+)
+from src.utils.prometheus_metric import PrometheusMetric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_AGGREGATES = "reconcile_aggregates"
+
+# Number of aggregate rows recounted per table per run
+RECONCILE_BATCH_SIZE = 5_000
+
+# Upper bound of the block range when looking for rows written after a checkpoint
+MAX_BLOCKNUMBER = 2**31 - 1
+
+GET_BATCH_MAX_ID_QUERY = """
+    SELECT
+        max({id_column})
+    FROM
+        (
+            SELECT
+                {id_column}
+            FROM
+                {table_name}
+            WHERE
+                {id_column} > :min_id
+            ORDER BY
+                {id_column}
+            LIMIT
+                :batch_size
+        ) AS batch
+    """
+
+
+class AggregateReconciliation(NamedTuple):
+    table_name: str
+    id_column: str
+    # Recounts the rows in (:min_id, :max_id] and returns the ids of the corrected ones
+    reconcile_query: str
+
+
+AGGREGATE_RECONCILIATIONS = [
+    AggregateReconciliation(AGGREGATE_USER, "user_id", RECONCILE_AGGREGATE_USER_QUERY),
+    AggregateReconciliation(
+        AGGREGATE_TRACK, "track_id", RECONCILE_AGGREGATE_TRACK_QUERY
+    ),
+    AggregateReconciliation(
+        AGGREGATE_ITEM_KARMA, "item_id", RECONCILE_AGGREGATE_ITEM_KARMA_QUERY
+    ),
+]
+
+
+def get_reconciled_id_checkpoint_name(table_name: str) -> str:
+    return f"{table_name}:reconciled_id"
+
+
+def reconcile_aggregate_batch(
+    session: Session,
+    reconciliation: AggregateReconciliation,
+    batch_size: int = RECONCILE_BATCH_SIZE,
+):
+    """
+    Recounts the next batch of rows of the delta maintained aggregate table
+    and corrects the ones that drifted, wrapping around after the last row
+    """
+    checkpoint_name = get_reconciled_id_checkpoint_name(reconciliation.table_name)
+    min_id = get_last_indexed_checkpoint(session, checkpoint_name)
+    max_id = session.execute(
+        text(
+            GET_BATCH_MAX_ID_QUERY.format(
+                id_column=reconciliation.id_column,
+                table_name=reconciliation.table_name,
+            )
+        ),
+        {"min_id": min_id, "batch_size": batch_size},
+    ).scalar()
+    if max_id is None:
+        # start over from the first row on the next run
+        save_indexed_checkpoint(session, checkpoint_name, 0)
+        return []
+
+    corrected_ids = [
+        row[0]
+        for row in session.execute(
+            text(reconciliation.reconcile_query),
+            {
+                "min_id": min_id,
+                "max_id": max_id,
+                "prev_blocknumber": get_last_indexed_checkpoint(
+                    session, reconciliation.table_name
+                ),
+                "current_blocknumber": MAX_BLOCKNUMBER,
+            },
+        ).fetchall()
+    ]
+    if corrected_ids:
+        logger.warning(
+            f"reconcile_aggregates.py | Corrected {len(corrected_ids)} rows of "
+            f"{reconciliation.table_name} in ({min_id}, {max_id}]: {corrected_ids[:100]}"
+        )
+
+    save_indexed_checkpoint(session, checkpoint_name, max_id)
+    return corrected_ids
+
+
+def _reconcile_aggregates(session: Session, _=None):
+    metric = PrometheusMetric(
+        "update_aggregate_table_latency_seconds",
+        "Runtimes for src.task.aggregates:update_aggregate_table()",
+        ("table_name", "task_name"),
+    )
+
+    for reconciliation in AGGREGATE_RECONCILIATIONS:
+        metric.reset_timer()
+        reconcile_aggregate_batch(session, reconciliation)
+        metric.save_time(
+            {
+                "table_name": reconciliation.table_name,
+                "task_name": "_reconcile_aggregates()",
+            }
+        )
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="reconcile_aggregates", bind=True)
+def reconcile_aggregates(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/app.py
+    db = reconcile_aggregates.db
+    redis = reconcile_aggregates.redis
+
+    init_task_and_acquire_lock(
+        logger, db, redis, RECONCILE_AGGREGATES, _reconcile_aggregates
+    )
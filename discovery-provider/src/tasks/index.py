@@ -26,14 +26,17 @@ from src.models import (
 from src.queries.confirm_indexing_transaction_error import (
     confirm_indexing_transaction_error,
 )
+from src.queries.get_feed_timeline import FEED_TIMELINES
 from src.queries.get_skipped_transactions import (
     clear_indexing_error,
     get_indexing_error,
     set_indexing_error,
 )
+from src.queries.notifications_changefeed import NOTIFICATIONS_CHANGEFEED_KEY
+from src.queries.search_autocomplete import AUTOCOMPLETE_CHANGEFEED_KEY
 from src.queries.skipped_transactions import add_network_level_skipped_transaction
 from src.tasks.celery_app import celery
-from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.ipld_blacklist import get_blacklisted_iplds
 from src.tasks.playlists import playlist_state_update
 from src.tasks.social_features import social_feature_state_update
 from src.tasks.tracks import track_event_types_lookup, track_state_update
@@ -41,6 +44,7 @@ from src.tasks.user_library import user_library_state_update
 from src.tasks.user_replica_set import user_replica_set_state_update
 from src.tasks.users import user_event_types_lookup, user_state_update
 from src.utils import helpers, multihash
+from src.utils.changefeed import push_changefeed_revert
 from src.utils.constants import CONTRACT_NAMES_ON_CHAIN, CONTRACT_TYPES
 from src.utils.index_blocks_performance import (
     record_add_indexed_block_to_db_ms,
@@ -53,6 +57,7 @@ from src.utils.index_blocks_performance import (
 from src.utils.indexing_errors import IndexingError
 from src.utils.prometheus_metric import PrometheusMetric
 from src.utils.redis_cache import (
+    remove_cached_followee_user_ids,
     remove_cached_playlist_ids,
     remove_cached_track_ids,
     remove_cached_user_ids,
@@ -279,6 +284,7 @@ def fetch_cid_metadata(
 
     # fetch transactions
     with db.scoped_session() as session:
+        blacklisted_iplds = get_blacklisted_iplds(session, update_task.redis)
         for tx_receipt in user_factory_txs:
             txhash = update_task.web3.toHex(tx_receipt.transactionHash)
             user_events_tx = getattr(
@@ -287,7 +293,7 @@ def fetch_cid_metadata(
             for entry in user_events_tx:
                 event_args = entry["args"]
                 cid = helpers.multihash_digest_to_cid(event_args._multihashDigest)
-                if not is_blacklisted_ipld(session, cid):
+                if cid not in blacklisted_iplds:
                     cids_txhash_set.add((cid, txhash))
                     cid_type[cid] = "user"
                 else:
@@ -313,7 +319,7 @@ def fetch_cid_metadata(
                         bytes.fromhex(track_metadata_digest), track_metadata_hash_fn
                     )
                     cid = multihash.to_b58_string(buf)
-                    if not is_blacklisted_ipld(session, cid):
+                    if cid not in blacklisted_iplds:
                         cids_txhash_set.add((cid, txhash))
                         cid_type[cid] = "track"
                     else:
@@ -487,6 +493,7 @@ def process_state_changes(
         TRACK_FACTORY: [],
         PLAYLIST_FACTORY: [],
         USER_REPLICA_SET_MANAGER: [],
+        SOCIAL_FEATURE_FACTORY: [],
     }
 
     for tx_type, bulk_processor in TX_TYPE_TO_HANDLER_MAP.items():
@@ -526,6 +533,7 @@ def remove_updated_entities_from_cache(redis, changed_entity_type_to_updated_ids
         USER_REPLICA_SET_MANAGER: remove_cached_user_ids,
         TRACK_FACTORY: remove_cached_track_ids,
         PLAYLIST_FACTORY: remove_cached_playlist_ids,
+        SOCIAL_FEATURE_FACTORY: remove_cached_followee_user_ids,
     }
     for (
         contract_type,
@@ -812,6 +820,16 @@ def revert_blocks(self, db, revert_blocks_list):
         rebuild_playlist_index = False
         rebuild_track_index = False
         rebuild_user_index = False
+        reverted_follower_user_ids = set()
+        # Entities written in the reverted blocks, for the changefeeds
+        reverted_entities: Dict[str, Set] = {
+            "users": set(),
+            "tracks": set(),
+            "playlists": set(),
+            "follows": set(),
+            "saves": set(),
+            "reposts": set(),
+        }
 
         for revert_block in revert_blocks_list:
             # Cache relevant information about current block
@@ -889,6 +907,7 @@ def revert_blocks(self, db, revert_blocks_list):
                     previous_save_entry.is_current = True
                 # Remove outdated save item entry
                 session.delete(save_to_revert)
+                reverted_entities["saves"].add((save_user_id, save_type, save_item_id))
 
             for repost_to_revert in revert_repost_entries:
                 repost_user_id = repost_to_revert.user_id
@@ -908,6 +927,9 @@ def revert_blocks(self, db, revert_blocks_list):
                 # Remove outdated repost entry
                 logger.info(f"Reverting repost: {repost_to_revert}")
                 session.delete(repost_to_revert)
+                reverted_entities["reposts"].add(
+                    (repost_user_id, repost_type, repost_item_id)
+                )
 
             for follow_to_revert in revert_follow_entries:
                 previous_follow_entry = (
@@ -927,6 +949,13 @@ def revert_blocks(self, db, revert_blocks_list):
                 # remove outdated follow entry
                 logger.info(f"Reverting follow: {follow_to_revert}")
                 session.delete(follow_to_revert)
+                reverted_follower_user_ids.add(follow_to_revert.follower_user_id)
+                reverted_entities["follows"].add(
+                    (
+                        follow_to_revert.follower_user_id,
+                        follow_to_revert.followee_user_id,
+                    )
+                )
 
             for playlist_to_revert in revert_playlist_entries:
                 playlist_id = playlist_to_revert.playlist_id
@@ -941,6 +970,7 @@ def revert_blocks(self, db, revert_blocks_list):
                     previous_playlist_entry.is_current = True
                 # Remove outdated playlist entry
                 session.delete(playlist_to_revert)
+                reverted_entities["playlists"].add(playlist_id)
 
             for track_to_revert in revert_track_entries:
                 track_id = track_to_revert.track_id
@@ -957,6 +987,7 @@ def revert_blocks(self, db, revert_blocks_list):
                 # Remove track entries
                 logger.info(f"Reverting track: {track_to_revert}")
                 session.delete(track_to_revert)
+                reverted_entities["tracks"].add(track_id)
 
             for ursm_content_node_to_revert in revert_ursm_content_node_entries:
                 cnode_sp_id = ursm_content_node_to_revert.cnode_sp_id
@@ -996,6 +1027,7 @@ def revert_blocks(self, db, revert_blocks_list):
                 # Remove outdated user entries
                 logger.info(f"Reverting user: {user_to_revert}")
                 session.delete(user_to_revert)
+                reverted_entities["users"].add(user_id)
 
             for associated_wallets_to_revert in revert_associated_wallets:
                 user_id = associated_wallets_to_revert.user_id
@@ -1045,6 +1077,26 @@ def revert_blocks(self, db, revert_blocks_list):
             )
             rebuild_track_index = rebuild_track_index or bool(revert_track_entries)
             rebuild_user_index = rebuild_user_index or bool(revert_user_entries)
+
+    if reverted_follower_user_ids:
+        remove_cached_followee_user_ids(update_task.redis, reverted_follower_user_ids)
+
+    # Record the revert for the changefeed writers and the feed timelines, which
+    # compensate for the reverted blocks they already processed on their next run
+    revert_to = min(revert_block.number for revert_block in revert_blocks_list) - 1
+    reverted_entity_lists = {
+        entity_type: sorted(entities)
+        for (entity_type, entities) in reverted_entities.items()
+        if entities
+    }
+    for changefeed_key in (
+        NOTIFICATIONS_CHANGEFEED_KEY,
+        AUTOCOMPLETE_CHANGEFEED_KEY,
+        FEED_TIMELINES,
+    ):
+        push_changefeed_revert(
+            update_task.redis, changefeed_key, revert_to, reverted_entity_lists
+        )
     # TODO - if we enable revert, need to set the most_recent_indexed_block_redis_key key in redis
 
 
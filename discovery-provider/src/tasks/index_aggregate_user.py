@@ -1,10 +1,12 @@
 import logging
 
 from src.tasks.aggregates import (
+    get_deltas_query,
     get_latest_blocknumber,
     init_task_and_acquire_lock,
     update_aggregate_table,
 )
+from src.tasks.aggregates.index_aggregate_item_karma import update_aggregate_item_karma
 from src.tasks.celery_app import celery
 
 logger = logging.getLogger(__name__)
@@ -12,335 +14,411 @@ logger = logging.getLogger(__name__)
 # Names of the aggregate tables to update
 AGGREGATE_USER = "aggregate_user"
 
-# UPDATE_AGGREGATE_USER_QUERY
-# Get a lower bound blocknumber to check for new entity counts for a user
-# Find a subset of users that have changed since that blocknumber
-# For that subset of users reclaculate the entire counts for each entity
-# Insert that count for new users or update it to an existing row
-UPDATE_AGGREGATE_USER_QUERY = """
-        WITH aggregate_user_latest_blocknumber AS (
-            SELECT
-                :prev_indexed_aggregate_block AS blocknumber
-        ),
-        changed_users AS (
+# RECOUNT_AGGREGATE_USER_QUERY
+# Counts every entity from scratch for the users in the {user_ids} CTE
+RECOUNT_AGGREGATE_USER_QUERY = """
+    SELECT
+        DISTINCT(u.user_id),
+        COALESCE (user_track.track_count, 0) AS track_count,
+        COALESCE (user_playlist.playlist_count, 0) AS playlist_count,
+        COALESCE (user_album.album_count, 0) AS album_count,
+        COALESCE (user_follower.follower_count, 0) AS follower_count,
+        COALESCE (user_followee.followee_count, 0) AS following_count,
+        COALESCE (user_repost.repost_count, 0) AS repost_count,
+        COALESCE (user_track_save.save_count, 0) AS track_save_count
+    FROM
+        users u
+        LEFT OUTER JOIN (
             SELECT
-                user_id
-            FROM
-                users u
-            WHERE
-                u.is_current IS TRUE
-                AND u.blocknumber > (
-                    SELECT
-                        blocknumber
-                    FROM
-                        aggregate_user_latest_blocknumber
-                )
-            GROUP BY
-                user_id
-            UNION
-            ALL
-            SELECT
-                t.owner_id AS owner_id
+                t.owner_id AS owner_id,
+                count(t.owner_id) AS track_count
             FROM
                 tracks t
             WHERE
                 t.is_current IS TRUE
-                AND t.blocknumber > (
-                    SELECT
-                        blocknumber
-                    FROM
-                        aggregate_user_latest_blocknumber
+                AND t.is_delete IS FALSE
+                AND t.is_unlisted IS FALSE
+                AND t.stem_of IS NULL
+                AND t.owner_id IN (
+                    select
+                        user_id
+                    from
+                        {user_ids}
                 )
             GROUP BY
                 t.owner_id
-            UNION
-            ALL
+        ) as user_track ON user_track.owner_id = u.user_id
+        LEFT OUTER JOIN (
             SELECT
-                p.playlist_owner_id AS owner_id
+                p.playlist_owner_id AS owner_id,
+                count(p.playlist_owner_id) AS playlist_count
             FROM
                 playlists p
             WHERE
                 p.is_album IS FALSE
                 AND p.is_current IS TRUE
-                AND p.blocknumber > (
-                    SELECT
-                        blocknumber
-                    FROM
-                        aggregate_user_latest_blocknumber
+                AND p.is_delete IS FALSE
+                AND p.is_private IS FALSE
+                AND p.playlist_owner_id IN (
+                    select
+                        user_id
+                    from
+                        {user_ids}
                 )
             GROUP BY
                 p.playlist_owner_id
-            UNION
-            ALL
+        ) AS user_playlist ON user_playlist.owner_id = u.user_id
+        LEFT OUTER JOIN (
             SELECT
-                p.playlist_owner_id AS owner_id
+                p.playlist_owner_id AS owner_id,
+                count(p.playlist_owner_id) AS album_count
             FROM
                 playlists p
             WHERE
                 p.is_album IS TRUE
                 AND p.is_current IS TRUE
-                AND p.blocknumber > (
+                AND p.is_delete IS FALSE
+                AND p.is_private IS FALSE
+                AND p.playlist_owner_id IN (
                     SELECT
-                        blocknumber
+                        user_id
                     FROM
-                        aggregate_user_latest_blocknumber
+                        {user_ids}
                 )
             GROUP BY
                 p.playlist_owner_id
-            UNION
-            ALL (
-                SELECT
-                    f.followee_user_id AS followee_user_id
-                FROM
-                    follows f
-                WHERE
-                    f.is_current IS TRUE
-                    AND f.blocknumber > (
-                        SELECT
-                            blocknumber
-                        FROM
-                            aggregate_user_latest_blocknumber
-                    )
-                GROUP BY
-                    f.followee_user_id
-            )
-            UNION
-            ALL (
-                SELECT
-                    f.follower_user_id AS follower_user_id
-                FROM
-                    follows f
-                WHERE
-                    f.is_current IS TRUE
-                    AND f.blocknumber > (
-                        SELECT
-                            blocknumber
-                        from
-                            aggregate_user_latest_blocknumber
-                    )
-                GROUP BY
-                    f.follower_user_id
-            )
-            UNION
-            ALL (
-                SELECT
-                    r.user_id AS user_id
-                FROM
-                    reposts r
-                WHERE
-                    r.is_current IS TRUE
-                    AND r.blocknumber > (
-                        SELECT
-                            blocknumber
-                        from
-                            aggregate_user_latest_blocknumber
-                    )
-                GROUP BY
-                    r.user_id
-            )
-            UNION
-            ALL (
-                SELECT
-                    s.user_id AS user_id
-                FROM
-                    saves s
-                WHERE
-                    s.is_current IS TRUE
-                    AND s.save_type = 'track'
-                    AND s.blocknumber > (
-                        SELECT
-                            blocknumber
-                        FROM
-                            aggregate_user_latest_blocknumber
-                    )
-                GROUP BY
-                    s.user_id
-            )
+        ) user_album ON user_album.owner_id = u.user_id
+        LEFT OUTER JOIN (
+            SELECT
+                f.followee_user_id AS followee_user_id,
+                count(f.followee_user_id) AS follower_count
+            FROM
+                follows f
+            WHERE
+                f.is_current IS TRUE
+                AND f.is_delete IS FALSE
+                AND f.followee_user_id IN ( -- to calculate follower count for changed users, changed user id must match followee user id
+                    SELECT
+                        user_id
+                    FROM
+                        {user_ids}
+                )
+            GROUP BY
+                f.followee_user_id
+        ) user_follower ON user_follower.followee_user_id = u.user_id
+        LEFT OUTER JOIN (
+            SELECT
+                f.follower_user_id AS follower_user_id,
+                count(f.follower_user_id) AS followee_count
+            FROM
+                follows f
+            WHERE
+                f.is_current IS TRUE
+                AND f.is_delete IS FALSE
+                AND f.follower_user_id IN (
+                    SELECT
+                        user_id
+                    FROM
+                        {user_ids}
+                )
+            GROUP BY
+                f.follower_user_id
+        ) user_followee ON user_followee.follower_user_id = u.user_id
+        LEFT OUTER JOIN (
+            SELECT
+                r.user_id AS user_id,
+                count(r.user_id) AS repost_count
+            FROM
+                reposts r
+            WHERE
+                r.is_current IS TRUE
+                AND r.is_delete IS FALSE
+                AND r.user_id IN (
+                    SELECT
+                        user_id
+                    from
+                        {user_ids}
+                )
+            GROUP BY
+                r.user_id
+        ) user_repost ON user_repost.user_id = u.user_id
+        LEFT OUTER JOIN (
+            SELECT
+                s.user_id AS user_id,
+                count(s.user_id) AS save_count
+            FROM
+                saves s
+            WHERE
+                s.is_current IS TRUE
+                AND s.save_type = 'track'
+                AND s.is_delete IS FALSE
+                AND s.user_id IN (
+                    select
+                        user_id
+                    from
+                        {user_ids}
+                )
+            GROUP BY
+                s.user_id
+        ) user_track_save ON user_track_save.user_id = u.user_id
+    WHERE
+        u.is_current IS TRUE
+        AND u.user_id in (
+            SELECT
+                user_id
+            FROM
+                {user_ids}
         )
-        INSERT INTO
-            aggregate_user (
-                user_id,
-                track_count,
-                playlist_count,
-                album_count,
-                follower_count,
-                following_count,
-                repost_count,
-                track_save_count
-            )
+    """
+
+# Deltas of each aggregate_user count for the rows written in the block range
+AGGREGATE_USER_DELTAS = {
+    "track_count": get_deltas_query(
+        "tracks",
+        ["track_id"],
+        "owner_id",
+        "{row}.is_delete IS FALSE AND {row}.is_unlisted IS FALSE AND {row}.stem_of IS NULL",
+    ),
+    "playlist_count": get_deltas_query(
+        "playlists",
+        ["playlist_id"],
+        "playlist_owner_id",
+        "{row}.is_album IS FALSE AND {row}.is_delete IS FALSE AND {row}.is_private IS FALSE",
+    ),
+    "album_count": get_deltas_query(
+        "playlists",
+        ["playlist_id"],
+        "playlist_owner_id",
+        "{row}.is_album IS TRUE AND {row}.is_delete IS FALSE AND {row}.is_private IS FALSE",
+    ),
+    "follower_count": get_deltas_query(
+        "follows",
+        ["follower_user_id", "followee_user_id"],
+        "followee_user_id",
+        "{row}.is_delete IS FALSE",
+    ),
+    "following_count": get_deltas_query(
+        "follows",
+        ["follower_user_id", "followee_user_id"],
+        "follower_user_id",
+        "{row}.is_delete IS FALSE",
+    ),
+    "repost_count": get_deltas_query(
+        "reposts",
+        ["user_id", "repost_item_id", "repost_type"],
+        "user_id",
+        "{row}.is_delete IS FALSE",
+    ),
+    "track_save_count": get_deltas_query(
+        "saves",
+        ["user_id", "save_item_id", "save_type"],
+        "user_id",
+        "{row}.save_type = 'track' AND {row}.is_delete IS FALSE",
+    ),
+}
+
+# USER_DELTAS_QUERY
+# Rows of (user_id, <delta of each aggregate_user count>), one per changed row
+USER_DELTAS_QUERY = "\n    UNION ALL\n".join(
+    """
+    SELECT
+        id AS user_id,
+        {delta_columns}
+    FROM
+        {deltas_query} AS deltas
+    """.format(
+        delta_columns=", ".join(
+            f"delta AS {column}" if column == delta_column else f"0 AS {column}"
+            for column in AGGREGATE_USER_DELTAS
+        ),
+        deltas_query=deltas_query,
+    )
+    for delta_column, deltas_query in AGGREGATE_USER_DELTAS.items()
+)
+
+# UPDATE_AGGREGATE_USER_QUERY
+# Sum the deltas of the rows written since the last indexed blocknumber for each user
+# Users that have an aggregate_user row get the deltas added to their counts
+# Changed users without a row yet are counted from scratch, which is cheap for new users
+UPDATE_AGGREGATE_USER_QUERY = """
+    WITH deltas AS (
+        {user_deltas_query}
+    ),
+    user_deltas AS (
+        SELECT
+            user_id,
+            sum(track_count) AS track_count,
+            sum(playlist_count) AS playlist_count,
+            sum(album_count) AS album_count,
+            sum(follower_count) AS follower_count,
+            sum(following_count) AS following_count,
+            sum(repost_count) AS repost_count,
+            sum(track_save_count) AS track_save_count
+        FROM
+            deltas
+        GROUP BY
+            user_id
+    ),
+    changed_users AS (
         SELECT
-            DISTINCT(u.user_id),
-            COALESCE (user_track.track_count, 0) AS track_count,
-            COALESCE (user_playlist.playlist_count, 0) AS playlist_count,
-            COALESCE (user_album.album_count, 0) AS album_count,
-            COALESCE (user_follower.follower_count, 0) AS follower_count,
-            COALESCE (user_followee.followee_count, 0) AS following_count,
-            COALESCE (user_repost.repost_count, 0) AS repost_count,
-            COALESCE (user_track_save.save_count, 0) AS track_save_count
+            user_id
+        FROM
+            user_deltas
+        UNION
+        SELECT
+            u.user_id
         FROM
             users u
-            LEFT OUTER JOIN (
-                SELECT
-                    t.owner_id AS owner_id,
-                    count(t.owner_id) AS track_count
-                FROM
-                    tracks t
-                WHERE
-                    t.is_current IS TRUE
-                    AND t.is_delete IS FALSE
-                    AND t.is_unlisted IS FALSE
-                    AND t.stem_of IS NULL
-                    AND t.owner_id IN (
-                        select
-                            user_id
-                        from
-                            changed_users
-                    )
-                GROUP BY
-                    t.owner_id
-            ) as user_track ON user_track.owner_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    p.playlist_owner_id AS owner_id,
-                    count(p.playlist_owner_id) AS playlist_count
-                FROM
-                    playlists p
-                WHERE
-                    p.is_album IS FALSE
-                    AND p.is_current IS TRUE
-                    AND p.is_delete IS FALSE
-                    AND p.is_private IS FALSE
-                    AND p.playlist_owner_id IN (
-                        select
-                            user_id
-                        from
-                            changed_users
-                    )
-                GROUP BY
-                    p.playlist_owner_id
-            ) AS user_playlist ON user_playlist.owner_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    p.playlist_owner_id AS owner_id,
-                    count(p.playlist_owner_id) AS album_count
-                FROM
-                    playlists p
-                WHERE
-                    p.is_album IS TRUE
-                    AND p.is_current IS TRUE
-                    AND p.is_delete IS FALSE
-                    AND p.is_private IS FALSE
-                    AND p.playlist_owner_id IN (
-                        SELECT
-                            user_id
-                        FROM
-                            changed_users
-                    )
-                GROUP BY
-                    p.playlist_owner_id
-            ) user_album ON user_album.owner_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    f.followee_user_id AS followee_user_id,
-                    count(f.followee_user_id) AS follower_count
-                FROM
-                    follows f
-                WHERE
-                    f.is_current IS TRUE
-                    AND f.is_delete IS FALSE
-                    AND f.followee_user_id IN ( -- to calculate follower count for changed users, changed user id must match followee user id
-                        SELECT
-                            user_id
-                        FROM
-                            changed_users
-                    )
-                GROUP BY
-                    f.followee_user_id
-            ) user_follower ON user_follower.followee_user_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    f.follower_user_id AS follower_user_id,
-                    count(f.follower_user_id) AS followee_count
-                FROM
-                    follows f
-                WHERE
-                    f.is_current IS TRUE
-                    AND f.is_delete IS FALSE
-                    AND f.follower_user_id IN (
-                        SELECT
-                            user_id
-                        FROM
-                            changed_users
-                    )
-                GROUP BY
-                    f.follower_user_id
-            ) user_followee ON user_followee.follower_user_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    r.user_id AS user_id,
-                    count(r.user_id) AS repost_count
-                FROM
-                    reposts r
-                WHERE
-                    r.is_current IS TRUE
-                    AND r.is_delete IS FALSE
-                    AND r.user_id IN (
-                        SELECT
-                            user_id
-                        from
-                            changed_users
-                    )
-                GROUP BY
-                    r.user_id
-            ) user_repost ON user_repost.user_id = u.user_id
-            LEFT OUTER JOIN (
-                SELECT
-                    s.user_id AS user_id,
-                    count(s.user_id) AS save_count
-                FROM
-                    saves s
-                WHERE
-                    s.is_current IS TRUE
-                    AND s.save_type = 'track'
-                    AND s.is_delete IS FALSE
-                    AND s.user_id IN (
-                        select
-                            user_id
-                        from
-                            changed_users
-                    )
-                GROUP BY
-                    s.user_id
-            ) user_track_save ON user_track_save.user_id = u.user_id
         WHERE
             u.is_current IS TRUE
-            AND u.user_id in (
+            AND u.blocknumber > :prev_blocknumber
+            AND u.blocknumber <= :current_blocknumber
+    ),
+    new_users AS (
+        SELECT
+            c.user_id
+        FROM
+            changed_users c
+        WHERE
+            NOT EXISTS (
                 SELECT
-                    user_id
+                    1
                 FROM
-                    changed_users
-            ) ON CONFLICT (user_id) DO
+                    aggregate_user a
+                WHERE
+                    a.user_id = c.user_id
+            )
+    ),
+    updated_users AS (
         UPDATE
+            aggregate_user a
         SET
-            track_count = EXCLUDED.track_count,
-            playlist_count = EXCLUDED.playlist_count,
-            album_count = EXCLUDED.album_count,
-            follower_count = EXCLUDED.follower_count,
-            following_count = EXCLUDED.following_count,
-            repost_count = EXCLUDED.repost_count,
-            track_save_count = EXCLUDED.track_save_count
-    """
+            track_count = a.track_count + d.track_count,
+            playlist_count = a.playlist_count + d.playlist_count,
+            album_count = a.album_count + d.album_count,
+            follower_count = a.follower_count + d.follower_count,
+            following_count = a.following_count + d.following_count,
+            repost_count = a.repost_count + d.repost_count,
+            track_save_count = a.track_save_count + d.track_save_count
+        FROM
+            user_deltas d
+        WHERE
+            a.user_id = d.user_id
+            AND (
+                d.track_count,
+                d.playlist_count,
+                d.album_count,
+                d.follower_count,
+                d.following_count,
+                d.repost_count,
+                d.track_save_count
+            ) <> (0, 0, 0, 0, 0, 0, 0)
+    )
+    INSERT INTO
+        aggregate_user (
+            user_id,
+            track_count,
+            playlist_count,
+            album_count,
+            follower_count,
+            following_count,
+            repost_count,
+            track_save_count
+        )
+    {recount_new_users_query}
+    ON CONFLICT (user_id) DO
+    UPDATE
+    SET
+        track_count = EXCLUDED.track_count,
+        playlist_count = EXCLUDED.playlist_count,
+        album_count = EXCLUDED.album_count,
+        follower_count = EXCLUDED.follower_count,
+        following_count = EXCLUDED.following_count,
+        repost_count = EXCLUDED.repost_count,
+        track_save_count = EXCLUDED.track_save_count
+    """.format(
+    user_deltas_query=USER_DELTAS_QUERY,
+    recount_new_users_query=RECOUNT_AGGREGATE_USER_QUERY.format(user_ids="new_users"),
+)
+
+# RECONCILE_AGGREGATE_USER_QUERY
+# Recount the aggregate_user rows in (:min_id, :max_id] and correct the ones that drifted
+# Users with rows written after the last indexed blocknumber are skipped,
+# their deltas are not applied yet so their counts can't be compared to a recount
+RECONCILE_AGGREGATE_USER_QUERY = """
+    WITH deltas AS (
+        {user_deltas_query}
+    ),
+    reconciled_users AS (
+        SELECT
+            user_id
+        FROM
+            aggregate_user
+        WHERE
+            user_id > :min_id
+            AND user_id <= :max_id
+        EXCEPT
+        SELECT
+            user_id
+        FROM
+            deltas
+    ),
+    recounted AS (
+        {recount_reconciled_users_query}
+    )
+    UPDATE
+        aggregate_user a
+    SET
+        track_count = r.track_count,
+        playlist_count = r.playlist_count,
+        album_count = r.album_count,
+        follower_count = r.follower_count,
+        following_count = r.following_count,
+        repost_count = r.repost_count,
+        track_save_count = r.track_save_count
+    FROM
+        recounted r
+    WHERE
+        a.user_id = r.user_id
+        AND (
+            a.track_count,
+            a.playlist_count,
+            a.album_count,
+            a.follower_count,
+            a.following_count,
+            a.repost_count,
+            a.track_save_count
+        ) IS DISTINCT FROM (
+            r.track_count,
+            r.playlist_count,
+            r.album_count,
+            r.follower_count,
+            r.following_count,
+            r.repost_count,
+            r.track_save_count
+        )
+    RETURNING
+        a.user_id
+    """.format(
+    user_deltas_query=USER_DELTAS_QUERY,
+    recount_reconciled_users_query=RECOUNT_AGGREGATE_USER_QUERY.format(
+        user_ids="reconciled_users"
+    ),
+)
 
 
 def _update_aggregate_user(session, _=None):
     current_blocknumber = get_latest_blocknumber(session)
 
+    # karma deltas are weighted by the follower counts as of the last indexed
+    # blocknumber, so they are applied before aggregate_user moves past it
+    update_aggregate_item_karma(session, current_blocknumber)
     update_aggregate_table(
         logger,
         session,
         AGGREGATE_USER,
         UPDATE_AGGREGATE_USER_QUERY,
-        "indexed_aggregate_block",
+        "blocknumber",
         current_blocknumber,
     )
 
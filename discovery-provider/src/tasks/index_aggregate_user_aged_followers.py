@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime, timedelta
+
+from redis import Redis
+from sqlalchemy import text
+from sqlalchemy.orm.session import Session
+from src.tasks.aggregates import get_latest_blocknumber, init_task_and_acquire_lock
+from src.tasks.celery_app import celery
+from src.utils.prometheus_metric import PrometheusMetric
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+# Name of the aggregate table to update
+AGGREGATE_USER_AGED_FOLLOWERS = "aggregate_user_aged_followers"
+
+# Checkpoint holding the follow created_at cutoff (unix seconds) of the last run
+AGGREGATE_USER_AGED_FOLLOWERS_AGED_AT = f"{AGGREGATE_USER_AGED_FOLLOWERS}:aged_at"
+
+# Follows count towards the aggregate once they are this many days old
+AGED_FOLLOWER_DAYS = 7
+
+# UPDATE_AGGREGATE_USER_AGED_FOLLOWERS_QUERY
+# A followee's aged follower count can change for two reasons:
+# - one of their follows was written since the last indexed blocknumber
+# - one of their follows crossed the aged cutoff since the last run
+# For that subset of followees recalculate the aged follower count
+# Insert that count for new users or update it to an existing row
+UPDATE_AGGREGATE_USER_AGED_FOLLOWERS_QUERY = """
+    WITH changed_users AS (
+        SELECT
+            f.followee_user_id AS user_id
+        FROM
+            follows f
+        WHERE
+            f.is_current IS TRUE
+            AND f.blocknumber > :prev_blocknumber
+            AND f.blocknumber <= :current_blocknumber
+        UNION
+        SELECT
+            f.followee_user_id AS user_id
+        FROM
+            follows f
+        WHERE
+            f.is_current IS TRUE
+            AND f.is_delete IS FALSE
+            AND f.created_at >= :prev_aged_at
+            AND f.created_at < :current_aged_at
+    )
+    INSERT INTO
+        aggregate_user_aged_followers (user_id, follower_count)
+    SELECT
+        changed_users.user_id,
+        count(f.follower_user_id) AS follower_count
+    FROM
+        changed_users
+        LEFT OUTER JOIN follows f ON f.followee_user_id = changed_users.user_id
+        AND f.is_current IS TRUE
+        AND f.is_delete IS FALSE
+        AND f.created_at < :current_aged_at
+    GROUP BY
+        changed_users.user_id
+    ON CONFLICT (user_id) DO
+    UPDATE
+    SET
+        follower_count = EXCLUDED.follower_count
+    """
+
+
+def _update_aggregate_user_aged_followers(session: Session, _=None):
+    metric = PrometheusMetric(
+        "update_aggregate_table_latency_seconds",
+        "Runtimes for src.task.aggregates:update_aggregate_table()",
+        ("table_name", "task_name"),
+    )
+
+    current_blocknumber = get_latest_blocknumber(session)
+    if not current_blocknumber:
+        return
+    prev_blocknumber = get_last_indexed_checkpoint(
+        session, AGGREGATE_USER_AGED_FOLLOWERS
+    )
+    prev_aged_at = get_last_indexed_checkpoint(
+        session, AGGREGATE_USER_AGED_FOLLOWERS_AGED_AT
+    )
+    current_aged_at = int(
+        (datetime.now() - timedelta(days=AGED_FOLLOWER_DAYS)).timestamp()
+    )
+
+    logger.info(
+        f"index_aggregate_user_aged_followers.py | Updating {AGGREGATE_USER_AGED_FOLLOWERS}"
+        f" | blocks: ({prev_blocknumber}, {current_blocknumber}]"
+        f" | aged at: [{prev_aged_at}, {current_aged_at})"
+    )
+
+    session.execute(
+        text(UPDATE_AGGREGATE_USER_AGED_FOLLOWERS_QUERY),
+        {
+            "prev_blocknumber": prev_blocknumber,
+            "current_blocknumber": current_blocknumber,
+            "prev_aged_at": datetime.fromtimestamp(prev_aged_at),
+            "current_aged_at": datetime.fromtimestamp(current_aged_at),
+        },
+    )
+
+    metric.save_time(
+        {
+            "table_name": AGGREGATE_USER_AGED_FOLLOWERS,
+            "task_name": "_update_aggregate_user_aged_followers()",
+        }
+    )
+
+    save_indexed_checkpoint(session, AGGREGATE_USER_AGED_FOLLOWERS, current_blocknumber)
+    save_indexed_checkpoint(
+        session, AGGREGATE_USER_AGED_FOLLOWERS_AGED_AT, current_aged_at
+    )
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="update_aggregate_user_aged_followers", bind=True)
+def update_aggregate_user_aged_followers(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/app.py
+    db = update_aggregate_user_aged_followers.db
+    redis: Redis = update_aggregate_user_aged_followers.redis
+
+    init_task_and_acquire_lock(
+        logger,
+        db,
+        redis,
+        AGGREGATE_USER_AGED_FOLLOWERS,
+        _update_aggregate_user_aged_followers,
+        timeout=60 * 30,
+    )
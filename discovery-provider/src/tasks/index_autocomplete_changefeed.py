@@ -0,0 +1,103 @@
+import logging
+import time
+
+from redis import Redis
+from src.models import Block
+from src.queries.search_autocomplete import (
+    AUTOCOMPLETE_CHANGEFEED_KEY,
+    get_changed_documents,
+    get_reverted_documents,
+)
+from src.tasks.celery_app import celery
+from src.utils.changefeed import (
+    append_changefeed_entry,
+    append_changefeed_revert_entry,
+    clear_changefeed_reverts,
+    get_changefeed_position,
+    get_changefeed_reverts,
+)
+from src.utils.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+INDEX_AUTOCOMPLETE_CHANGEFEED_LOCK = "index_autocomplete_changefeed_lock"
+
+# Max number of blocks in a single changefeed entry
+MAX_BLOCK_RANGE = 1000
+
+
+def index_autocomplete_changefeed(db: SessionManager, redis: Redis):
+    """Appends the users, tracks and playlists written since the last run to the changefeed"""
+    # Reverts recorded by the indexer come first, they rewind where the next entry starts
+    append_autocomplete_changefeed_reverts(db, redis)
+
+    with db.scoped_session() as session:
+        current_block = session.query(Block.number).filter(Block.is_current == True)
+        current_block_number = current_block.scalar()
+        if current_block_number is None:
+            return
+
+        position = get_changefeed_position(redis, AUTOCOMPLETE_CHANGEFEED_KEY)
+        if position is None:
+            # Start the changefeed at the head of the chain, workers load older blocks from the database
+            position = (current_block_number - 1, current_block_number - 1)
+        cursor, start = position
+        max_block_number = min(cursor + MAX_BLOCK_RANGE, current_block_number)
+        if max_block_number <= cursor:
+            return
+
+        # After a revert the blocks indexed again since the new head are included
+        payload = get_changed_documents(session, start, max_block_number)
+
+    append_changefeed_entry(
+        redis, AUTOCOMPLETE_CHANGEFEED_KEY, cursor, max_block_number, payload
+    )
+    logger.info(
+        f"index_autocomplete_changefeed.py | appended {[(kind, len(documents)) for (kind, documents) in payload.items()]} "
+        f"for blocks ({start}, {max_block_number}]"
+    )
+
+
+def append_autocomplete_changefeed_reverts(db: SessionManager, redis: Redis):
+    """Appends the current documents of the entities of each revert recorded by the indexer"""
+    reverts = get_changefeed_reverts(redis, AUTOCOMPLETE_CHANGEFEED_KEY)
+    for revert in reverts:
+        with db.scoped_session() as session:
+            payload = get_reverted_documents(session, revert["reverted"])
+        append_changefeed_revert_entry(
+            redis, AUTOCOMPLETE_CHANGEFEED_KEY, revert["revert_to"], payload
+        )
+        logger.info(
+            f"index_autocomplete_changefeed.py | appended reverted documents after block {revert['revert_to']}"
+        )
+    clear_changefeed_reverts(redis, AUTOCOMPLETE_CHANGEFEED_KEY, len(reverts))
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="index_autocomplete_changefeed", bind=True)
+def index_autocomplete_changefeed_task(self):
+    db = index_autocomplete_changefeed_task.db
+    redis = index_autocomplete_changefeed_task.redis
+    have_lock = False
+    update_lock = redis.lock(INDEX_AUTOCOMPLETE_CHANGEFEED_LOCK, timeout=600)
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+        if have_lock:
+            start_time = time.time()
+            index_autocomplete_changefeed(db, redis)
+            logger.info(
+                f"index_autocomplete_changefeed.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info(
+                "index_autocomplete_changefeed.py | Failed to acquire index autocomplete changefeed lock"
+            )
+    except Exception as e:
+        logger.error(
+            "index_autocomplete_changefeed.py | Fatal error in main loop",
+            exc_info=True,
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
@@ -3,7 +3,10 @@ import logging
 from src.app import get_contract_addresses
 from src.models import BlacklistedIPLD, IPLDBlacklistBlock
 from src.tasks.celery_app import celery
-from src.tasks.ipld_blacklist import ipld_blacklist_state_update
+from src.tasks.ipld_blacklist import (
+    bump_ipld_blacklist_version,
+    ipld_blacklist_state_update,
+)
 from src.utils.redis_constants import (
     most_recent_indexed_ipld_block_hash_redis_key,
     most_recent_indexed_ipld_block_redis_key,
@@ -161,7 +164,7 @@ def index_blocks(self, db, blocks_list):
                     f"ipld_blacklist_factory_txs {ipld_blacklist_factory_txs}"
                 )
 
-            ipld_blacklist_state_update(
+            num_ipld_blacklist_events = ipld_blacklist_state_update(
                 self,
                 update_ipld_blacklist_task,
                 session,
@@ -171,6 +174,10 @@ def index_blocks(self, db, blocks_list):
                 get_contract_addresses(),
             )
 
+        # Let processes refresh their blacklist once the block is committed
+        if num_ipld_blacklist_events:
+            bump_ipld_blacklist_version(redis)
+
         # Add the block number of the most recently processed ipld block to redis
         redis.set(most_recent_indexed_ipld_block_redis_key, block_number)
         redis.set(most_recent_indexed_ipld_block_hash_redis_key, block.hash.hex())
@@ -228,6 +235,10 @@ def revert_blocks(self, db, revert_blocks_list):
                 IPLDBlacklistBlock.blockhash == revert_hash
             ).delete()
 
+    if revert_blocks_list:
+        # Reverted rows can't be removed incrementally, have processes reload their blacklist
+        bump_ipld_blacklist_version(update_ipld_blacklist_task.redis, is_reset=True)
+
 
 # ####### CELERY TASKS ####### #
 
@@ -8,26 +8,49 @@ logger = logging.getLogger(__name__)
 index_challenges_last_event_key = ""
 
 
-def index_challenges(event_bus, db, redis):
+def get_index_challenges_lock_key(partition: int):
+    return f"index_challenges_lock:{partition}"
+
+
+def index_challenges(event_bus, db, redis, partition=None):
+    partitions = None if partition is None else [partition]
     with db.scoped_session() as session:
-        num_processed = event_bus.process_events(session)
-        if num_processed:
+        num_processed, _ = event_bus.process_events(session, partitions=partitions)
+        if num_processed > 0:
             redis.set(challenges_last_processed_event_redis_key, int(time.time()))
 
 
 @celery.task(name="index_challenges", bind=True)
 def index_challenges_task(self):
-    db = index_challenges_task.db
-    redis = index_challenges_task.redis
+    """Records the event backlog and fans out a task per partition that has events to process"""
     event_bus = index_challenges_task.challenge_event_bus
+    try:
+        partition_stats = event_bus.record_partition_metrics()
+        for partition, stats in partition_stats.items():
+            if stats["backlog"] > 0:
+                celery.send_task(
+                    "index_challenges_partition", kwargs={"partition": partition}
+                )
+    except Exception as e:
+        logger.error("index_challenges.py | Fatal error in main loop", exc_info=True)
+        raise e
+
+
+@celery.task(name="index_challenges_partition", bind=True)
+def index_challenges_partition_task(self, partition):
+    db = index_challenges_partition_task.db
+    redis = index_challenges_partition_task.redis
+    event_bus = index_challenges_partition_task.challenge_event_bus
     have_lock = False
-    update_lock = redis.lock("index_challenges_lock", timeout=7200)
+    update_lock = redis.lock(get_index_challenges_lock_key(partition), timeout=7200)
     try:
         have_lock = update_lock.acquire(blocking=False)
         if have_lock:
-            index_challenges(event_bus, db, redis)
+            index_challenges(event_bus, db, redis, partition)
         else:
-            logger.info("index_challenges.py | Failed to acquire index challenges lock")
+            logger.info(
+                f"index_challenges.py | Failed to acquire index challenges lock for partition {partition}"
+            )
     except Exception as e:
         logger.error("index_challenges.py | Fatal error in main loop", exc_info=True)
         raise e
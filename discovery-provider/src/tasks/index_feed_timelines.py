@@ -0,0 +1,456 @@
+import logging
+from typing import Optional
+
+from redis import Redis
+from sqlalchemy import text
+from sqlalchemy.orm.session import Session
+from src.queries.get_feed_timeline import (
+    FEED_TIMELINE_HORIZON,
+    FEED_TIMELINES,
+    FEED_TIMELINES_BACKFILL,
+    FOLLOWEE_ITEMS_QUERY,
+    MAX_FANOUT_FOLLOWER_COUNT,
+)
+from src.tasks.aggregates import (
+    get_latest_blocknumber,
+    init_task_and_acquire_lock,
+    update_aggregate_table,
+)
+from src.tasks.celery_app import celery
+from src.utils.changefeed import clear_changefeed_reverts, get_changefeed_reverts
+from src.utils.update_indexing_checkpoints import (
+    get_last_indexed_checkpoint,
+    save_indexed_checkpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+TRIM_FEED_TIMELINES = "trim_feed_timelines"
+
+# Number of followers whose timelines are backfilled per run
+BACKFILL_BATCH_SIZE = 1_000
+
+# Condition on the `{row}` aggregate_user alias for a user's items to be fanned out on write
+IS_FANNED_OUT = f"COALESCE({{row}}.follower_count, 0) <= {MAX_FANOUT_FOLLOWER_COUNT}"
+
+# UPDATE_FEED_TIMELINES_QUERY
+# Fans the tracks, playlists and reposts created in (:prev_blocknumber, :current_blocknumber]
+# out to the timelines of their owner's followers, and removes the reposts undone in the range.
+# Then fans the recent items of the users followed in the range in to the new followers.
+# Unfollows and deleted or hidden items are left in the timelines and skipped on read.
+UPDATE_FEED_TIMELINES_QUERY = """
+    WITH changed_reposts AS (
+        SELECT
+            DISTINCT ON (r.user_id, r.repost_item_id, r.repost_type) r.user_id,
+            r.repost_item_id,
+            CASE
+                WHEN r.repost_type = 'track' THEN 'track'
+                ELSE 'playlist'
+            END AS item_type,
+            r.is_delete,
+            r.created_at
+        FROM
+            reposts r
+        WHERE
+            r.blocknumber > :prev_blocknumber
+            AND r.blocknumber <= :current_blocknumber
+        ORDER BY
+            r.user_id,
+            r.repost_item_id,
+            r.repost_type,
+            r.blocknumber DESC,
+            r.is_current DESC
+    ),
+    undone_reposts AS (
+        DELETE FROM
+            feed_timelines ft USING changed_reposts cr
+        WHERE
+            cr.is_delete IS TRUE
+            AND ft.item_type = cr.item_type
+            AND ft.item_id = cr.repost_item_id
+            AND ft.actor_user_id = cr.user_id
+            AND ft.reason = 'repost'
+    ),
+    new_items AS (
+        SELECT
+            'track' AS item_type,
+            t.track_id AS item_id,
+            t.owner_id AS actor_user_id,
+            'original' AS reason,
+            t.created_at
+        FROM
+            tracks t
+        WHERE
+            t.is_current IS TRUE
+            AND t.blocknumber > :prev_blocknumber
+            AND t.blocknumber <= :current_blocknumber
+            AND t.created_at >= {horizon}
+            AND NOT EXISTS (
+                SELECT
+                    1
+                FROM
+                    tracks prior
+                WHERE
+                    prior.track_id = t.track_id
+                    AND prior.blocknumber <= :prev_blocknumber
+            )
+        UNION ALL
+        SELECT
+            'playlist' AS item_type,
+            p.playlist_id AS item_id,
+            p.playlist_owner_id AS actor_user_id,
+            'original' AS reason,
+            p.created_at
+        FROM
+            playlists p
+        WHERE
+            p.is_current IS TRUE
+            AND p.blocknumber > :prev_blocknumber
+            AND p.blocknumber <= :current_blocknumber
+            AND p.created_at >= {horizon}
+            AND NOT EXISTS (
+                SELECT
+                    1
+                FROM
+                    playlists prior
+                WHERE
+                    prior.playlist_id = p.playlist_id
+                    AND prior.blocknumber <= :prev_blocknumber
+            )
+        UNION ALL
+        SELECT
+            cr.item_type,
+            cr.repost_item_id AS item_id,
+            cr.user_id AS actor_user_id,
+            'repost' AS reason,
+            cr.created_at
+        FROM
+            changed_reposts cr
+        WHERE
+            cr.is_delete IS FALSE
+            AND cr.created_at >= {horizon}
+    )
+    INSERT INTO
+        feed_timelines (
+            user_id,
+            item_type,
+            item_id,
+            actor_user_id,
+            reason,
+            created_at
+        )
+    SELECT
+        f.follower_user_id,
+        i.item_type,
+        i.item_id,
+        i.actor_user_id,
+        i.reason,
+        i.created_at
+    FROM
+        new_items i
+        LEFT OUTER JOIN aggregate_user au ON au.user_id = i.actor_user_id
+        JOIN follows f ON f.followee_user_id = i.actor_user_id
+    WHERE
+        {is_fanned_out}
+        AND f.is_current IS TRUE
+        AND f.is_delete IS FALSE
+    ON CONFLICT (user_id, item_type, item_id, actor_user_id, reason) DO
+    UPDATE
+    SET
+        created_at = EXCLUDED.created_at;
+
+    WITH new_follows AS (
+        SELECT
+            DISTINCT ON (f.follower_user_id, f.followee_user_id) f.follower_user_id,
+            f.followee_user_id,
+            f.is_delete
+        FROM
+            follows f
+        WHERE
+            f.blocknumber > :prev_blocknumber
+            AND f.blocknumber <= :current_blocknumber
+        ORDER BY
+            f.follower_user_id,
+            f.followee_user_id,
+            f.blocknumber DESC,
+            f.is_current DESC
+    )
+    INSERT INTO
+        feed_timelines (
+            user_id,
+            item_type,
+            item_id,
+            actor_user_id,
+            reason,
+            created_at
+        )
+    SELECT
+        nf.follower_user_id,
+        e.item_type,
+        e.item_id,
+        e.actor_user_id,
+        e.reason,
+        e.created_at
+    FROM
+        new_follows nf
+        LEFT OUTER JOIN aggregate_user au ON au.user_id = nf.followee_user_id
+        CROSS JOIN LATERAL ({followee_items}) e
+    WHERE
+        nf.is_delete IS FALSE
+        AND {is_fanned_out}
+    ON CONFLICT DO NOTHING
+    """.format(
+    horizon=FEED_TIMELINE_HORIZON,
+    is_fanned_out=IS_FANNED_OUT.format(row="au"),
+    followee_items=FOLLOWEE_ITEMS_QUERY.format(
+        followee="nf.followee_user_id", horizon=FEED_TIMELINE_HORIZON
+    ),
+)
+
+GET_BACKFILL_BATCH_MAX_USER_ID_QUERY = """
+    SELECT
+        max(user_id)
+    FROM
+        (
+            SELECT
+                user_id
+            FROM
+                users
+            WHERE
+                is_current IS TRUE
+                AND user_id > :min_user_id
+            ORDER BY
+                user_id
+            LIMIT
+                :batch_size
+        ) AS batch
+    """
+
+# BACKFILL_FEED_TIMELINES_QUERY
+# Fans the recent items of the followees of the users in (:min_user_id, :max_user_id] in to their timelines
+BACKFILL_FEED_TIMELINES_QUERY = """
+    INSERT INTO
+        feed_timelines (
+            user_id,
+            item_type,
+            item_id,
+            actor_user_id,
+            reason,
+            created_at
+        )
+    SELECT
+        f.follower_user_id,
+        e.item_type,
+        e.item_id,
+        e.actor_user_id,
+        e.reason,
+        e.created_at
+    FROM
+        follows f
+        LEFT OUTER JOIN aggregate_user au ON au.user_id = f.followee_user_id
+        CROSS JOIN LATERAL ({followee_items}) e
+    WHERE
+        f.follower_user_id > :min_user_id
+        AND f.follower_user_id <= :max_user_id
+        AND f.is_current IS TRUE
+        AND f.is_delete IS FALSE
+        AND {is_fanned_out}
+    ON CONFLICT DO NOTHING
+    """.format(
+    is_fanned_out=IS_FANNED_OUT.format(row="au"),
+    followee_items=FOLLOWEE_ITEMS_QUERY.format(
+        followee="f.followee_user_id", horizon=FEED_TIMELINE_HORIZON
+    ),
+)
+
+# REVERT_FEED_TIMELINE_REPOSTS_QUERY
+# Removes the timeline entries of the reposts written in reverted blocks, then fans
+# the reposts the revert made current again back out
+REVERT_FEED_TIMELINE_REPOSTS_QUERY = """
+    DELETE FROM
+        feed_timelines ft USING (
+            SELECT
+                unnest(CAST(:user_ids AS INTEGER[])) AS user_id,
+                unnest(CAST(:item_types AS VARCHAR[])) AS item_type,
+                unnest(CAST(:item_ids AS INTEGER[])) AS item_id
+        ) rr
+    WHERE
+        ft.item_type = rr.item_type
+        AND ft.item_id = rr.item_id
+        AND ft.actor_user_id = rr.user_id
+        AND ft.reason = 'repost';
+
+    INSERT INTO
+        feed_timelines (
+            user_id,
+            item_type,
+            item_id,
+            actor_user_id,
+            reason,
+            created_at
+        )
+    SELECT
+        f.follower_user_id,
+        rr.item_type,
+        rr.item_id,
+        rr.user_id,
+        'repost',
+        r.created_at
+    FROM
+        (
+            SELECT
+                unnest(CAST(:user_ids AS INTEGER[])) AS user_id,
+                unnest(CAST(:item_types AS VARCHAR[])) AS item_type,
+                unnest(CAST(:item_ids AS INTEGER[])) AS item_id
+        ) rr
+        JOIN reposts r ON r.user_id = rr.user_id
+        AND r.repost_item_id = rr.item_id
+        AND CASE
+            WHEN r.repost_type = 'track' THEN 'track'
+            ELSE 'playlist'
+        END = rr.item_type
+        LEFT OUTER JOIN aggregate_user au ON au.user_id = rr.user_id
+        JOIN follows f ON f.followee_user_id = rr.user_id
+    WHERE
+        r.is_current IS TRUE
+        AND r.is_delete IS FALSE
+        AND r.created_at >= {horizon}
+        AND {is_fanned_out}
+        AND f.is_current IS TRUE
+        AND f.is_delete IS FALSE
+    ON CONFLICT DO NOTHING
+    """.format(
+    horizon=FEED_TIMELINE_HORIZON,
+    is_fanned_out=IS_FANNED_OUT.format(row="au"),
+)
+
+TRIM_FEED_TIMELINES_QUERY = f"""
+    DELETE FROM
+        feed_timelines
+    WHERE
+        created_at < {FEED_TIMELINE_HORIZON}
+    """
+
+
+def update_feed_timelines(session: Session):
+    """Fans the activity since the last indexed blocknumber out to the timelines"""
+    current_blocknumber = get_latest_blocknumber(session)
+    if current_blocknumber is None:
+        return
+
+    if not get_last_indexed_checkpoint(session, FEED_TIMELINES):
+        # Start fanning out at the head of the chain, older activity is backfilled
+        save_indexed_checkpoint(session, FEED_TIMELINES, current_blocknumber)
+        return
+
+    update_aggregate_table(
+        logger,
+        session,
+        FEED_TIMELINES,
+        UPDATE_FEED_TIMELINES_QUERY,
+        "blocknumber",
+        current_blocknumber,
+    )
+
+
+def revert_feed_timelines(session: Session, redis: Redis):
+    """
+    Applies the reverts recorded by the indexer: rewinds the fan out checkpoint so
+    the blocks indexed again are fanned out, and replaces the entries of reverted reposts
+    """
+    reverts = get_changefeed_reverts(redis, FEED_TIMELINES)
+    if not reverts:
+        return
+
+    revert_to = min(revert["revert_to"] for revert in reverts)
+    if get_last_indexed_checkpoint(session, FEED_TIMELINES) > revert_to:
+        save_indexed_checkpoint(session, FEED_TIMELINES, revert_to)
+
+    reverted_reposts = {
+        (user_id, "track" if repost_type == "track" else "playlist", item_id)
+        for revert in reverts
+        for (user_id, repost_type, item_id) in revert["reverted"].get("reposts", [])
+    }
+    if reverted_reposts:
+        user_ids, item_types, item_ids = zip(*reverted_reposts)
+        session.execute(
+            text(REVERT_FEED_TIMELINE_REPOSTS_QUERY),
+            {
+                "user_ids": list(user_ids),
+                "item_types": list(item_types),
+                "item_ids": list(item_ids),
+            },
+        )
+    clear_changefeed_reverts(redis, FEED_TIMELINES, len(reverts))
+    logger.info(
+        f"index_feed_timelines.py | Reverted timelines to block {revert_to}, "
+        f"replaced the entries of {len(reverted_reposts)} reposts"
+    )
+
+
+def backfill_feed_timelines(
+    session: Session, batch_size: int = BACKFILL_BATCH_SIZE
+) -> Optional[int]:
+    """
+    Backfills the timelines of the next batch of users and returns the last user_id backfilled.
+    Users past the checkpoint, including the ones created since the last batch,
+    have their feed built on read until they are backfilled.
+    """
+    min_user_id = get_last_indexed_checkpoint(session, FEED_TIMELINES_BACKFILL)
+    max_user_id = session.execute(
+        text(GET_BACKFILL_BATCH_MAX_USER_ID_QUERY),
+        {"min_user_id": min_user_id, "batch_size": batch_size},
+    ).scalar()
+    if max_user_id is None:
+        return None
+
+    session.execute(
+        text(BACKFILL_FEED_TIMELINES_QUERY),
+        {"min_user_id": min_user_id, "max_user_id": max_user_id},
+    )
+    save_indexed_checkpoint(session, FEED_TIMELINES_BACKFILL, max_user_id)
+    logger.info(
+        f"index_feed_timelines.py | Backfilled timelines of users in ({min_user_id}, {max_user_id}]"
+    )
+    return max_user_id
+
+
+def _index_feed_timelines(session: Session, redis: Optional[Redis] = None):
+    if redis is not None:
+        revert_feed_timelines(session, redis)
+    # The fan out checkpoint is set before any user is backfilled,
+    # so the activity after a backfill is always fanned out
+    update_feed_timelines(session)
+    if get_last_indexed_checkpoint(session, FEED_TIMELINES):
+        backfill_feed_timelines(session)
+
+
+def _trim_feed_timelines(session: Session, _=None):
+    result = session.execute(text(TRIM_FEED_TIMELINES_QUERY))
+    logger.info(
+        f"index_feed_timelines.py | Trimmed {result.rowcount} feed timeline entries"
+    )
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="index_feed_timelines", bind=True)
+def index_feed_timelines(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/app.py
+    db = index_feed_timelines.db
+    redis = index_feed_timelines.redis
+
+    init_task_and_acquire_lock(
+        logger, db, redis, FEED_TIMELINES, _index_feed_timelines, timeout=60 * 30
+    )
+
+
+@celery.task(name="trim_feed_timelines", bind=True)
+def trim_feed_timelines(self):
+    db = trim_feed_timelines.db
+    redis = trim_feed_timelines.redis
+
+    init_task_and_acquire_lock(
+        logger, db, redis, TRIM_FEED_TIMELINES, _trim_feed_timelines, timeout=60 * 60
+    )
@@ -1,9 +1,12 @@
+import concurrent.futures
 import json
 import logging
 import time
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from src.models import AppNameMetrics, RouteMetrics
 from src.queries.update_historical_metrics import (
     update_historical_daily_app_metrics,
@@ -36,6 +39,24 @@ logger = logging.getLogger(__name__)
 
 discovery_node_service_type = bytes("discovery-node", "utf-8")
 
+# Max number of peer discovery nodes queried concurrently for metrics
+METRICS_FETCH_MAX_WORKERS = 10
+
+# (connect, read) timeout in seconds for each request to a peer node
+METRICS_FETCH_TIMEOUT = (3, 10)
+
+
+def get_metrics_session(max_workers=METRICS_FETCH_MAX_WORKERS):
+    """
+    Session shared by all metrics requests in a run so connections to
+    peer nodes are kept alive between the route and app metrics requests
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
 def process_route_keys(session, redis, key, ip, date):
     """
@@ -161,13 +182,15 @@ def refresh_metrics_matviews(db):
         )
 
 
-def get_metrics(endpoint, start_time):
+def get_metrics(endpoint, start_time, http=requests):
     try:
         route_metrics_endpoint = (
             f"{endpoint}/v1/metrics/routes/cached?start_time={start_time}"
         )
         logger.info(f"route metrics request to: {route_metrics_endpoint}")
-        route_metrics_response = requests.get(route_metrics_endpoint, timeout=10)
+        route_metrics_response = http.get(
+            route_metrics_endpoint, timeout=METRICS_FETCH_TIMEOUT
+        )
         if route_metrics_response.status_code != 200:
             raise Exception(
                 f"Query to cached route metrics endpoint {route_metrics_endpoint} \
@@ -178,7 +201,9 @@ def get_metrics(endpoint, start_time):
             f"{endpoint}/v1/metrics/apps/cached?start_time={start_time}"
         )
         logger.info(f"app metrics request to: {app_metrics_endpoint}")
-        app_metrics_response = requests.get(app_metrics_endpoint, timeout=10)
+        app_metrics_response = http.get(
+            app_metrics_endpoint, timeout=METRICS_FETCH_TIMEOUT
+        )
         if app_metrics_response.status_code != 200:
             raise Exception(
                 f"Query to cached app metrics endpoint {app_metrics_endpoint} \
@@ -197,6 +222,49 @@ def get_metrics(endpoint, start_time):
         return None, None
 
 
+def get_metrics_from_nodes(
+    node_start_times: Dict[str, int]
+) -> Dict[str, Tuple[Optional[Dict], Optional[Dict]]]:
+    """
+    Fetches route and app metrics from every node concurrently, each node
+    is only asked for metrics since the start time it was last visited at.
+    A slow or unreachable node only costs its own request timeout.
+
+    Returns a mapping of node endpoint to (route metrics, app metrics)
+    """
+    results: Dict[str, Tuple[Optional[Dict], Optional[Dict]]] = {}
+    if not node_start_times:
+        return results
+
+    with get_metrics_session() as http:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=METRICS_FETCH_MAX_WORKERS
+        ) as executor:
+            metrics_futures = {
+                executor.submit(get_metrics, node, start_time, http): node
+                for node, start_time in node_start_times.items()
+            }
+            for future in concurrent.futures.as_completed(metrics_futures):
+                node = metrics_futures[future]
+                try:
+                    results[node] = future.result()
+                except Exception as e:
+                    logger.error(
+                        f"index_metrics.py | ERROR in metrics_futures {node} generated {e}"
+                    )
+                    results[node] = (None, None)
+    return results
+
+
+def sum_metrics(all_metrics: List[Dict]) -> Dict:
+    """Sums the counts of several {ip or app name: count} metrics dicts"""
+    summed: Dict = {}
+    for metrics in all_metrics:
+        for value, count in metrics.items():
+            summed[value] = summed[value] + count if value in summed else count
+    return summed
+
+
 def consolidate_metrics_from_other_nodes(self, db, redis):
     """
     Get recent route and app metrics from all other discovery nodes
@@ -247,10 +315,8 @@ def consolidate_metrics_from_other_nodes(self, db, redis):
                 else:
                     new_personal_app_metrics[app_name] = count
 
-    merge_route_metrics(new_personal_route_metrics, end_time, db)
-    merge_app_metrics(new_personal_app_metrics, end_time, db)
-
-    # Merge & persist metrics for other nodes
+    # Fetch metrics for other nodes concurrently
+    node_start_times = {}
     for node in all_other_nodes:
         start_time_str = (
             visited_node_timestamps[node]
@@ -258,11 +324,15 @@ def consolidate_metrics_from_other_nodes(self, db, redis):
             else one_iteration_ago_str
         )
         start_time_obj = datetime.strptime(start_time_str, datetime_format_secondary)
-        start_time = int(start_time_obj.timestamp())
-        new_route_metrics, new_app_metrics = get_metrics(node, start_time)
+        node_start_times[node] = int(start_time_obj.timestamp())
+    node_metrics = get_metrics_from_nodes(node_start_times)
 
+    all_route_metrics = [new_personal_route_metrics]
+    all_app_metrics = [new_personal_app_metrics]
+    visited_nodes = []
+    for node, (new_route_metrics, new_app_metrics) in node_metrics.items():
         logger.info(
-            f"did attempt to receive route and app metrics from {node} at {start_time_obj} ({start_time})"
+            f"did attempt to receive route and app metrics from {node} at {node_start_times[node]}"
         )
 
         # add other nodes' summed unique daily and monthly counts to this node's
@@ -274,14 +344,24 @@ def consolidate_metrics_from_other_nodes(self, db, redis):
             summed_unique_monthly_count += new_route_metrics["summed"]["monthly"]
             new_route_metrics = new_route_metrics["deduped"]
 
-        merge_route_metrics(new_route_metrics or {}, end_time, db)
-        merge_app_metrics(new_app_metrics or {}, end_time, db)
+        all_route_metrics.append(new_route_metrics or {})
+        all_app_metrics.append(new_app_metrics or {})
 
         if new_route_metrics is not None and new_app_metrics is not None:
+            visited_nodes.append(node)
+
+    # Merge & persist metrics for our personal node and all other nodes at once
+    # Summing before merging is equivalent to merging each node in turn
+    # but only persists once per metric type
+    merge_route_metrics(sum_metrics(all_route_metrics), end_time, db)
+    merge_app_metrics(sum_metrics(all_app_metrics), end_time, db)
+
+    if visited_nodes:
+        for node in visited_nodes:
             visited_node_timestamps[node] = end_time
-            redis_set_and_dump(
-                redis, metrics_visited_nodes, json.dumps(visited_node_timestamps)
-            )
+        redis_set_and_dump(
+            redis, metrics_visited_nodes, json.dumps(visited_node_timestamps)
+        )
 
     # persist updated summed unique counts
     persist_summed_unique_counts(
@@ -291,11 +371,11 @@ def consolidate_metrics_from_other_nodes(self, db, redis):
     logger.info(f"visited node timestamps: {visited_node_timestamps}")
 
 
-def get_historical_metrics(node):
+def get_historical_metrics(node, http=requests):
+    endpoint = f"{node}/v1/metrics/aggregates/historical"
     try:
-        endpoint = f"{node}/v1/metrics/aggregates/historical"
         logger.info(f"historical metrics request to: {endpoint}")
-        response = requests.get(endpoint, timeout=10)
+        response = http.get(endpoint, timeout=METRICS_FETCH_TIMEOUT)
         if response.status_code != 200:
             raise Exception(
                 f"Query to historical metrics endpoint {endpoint} \
@@ -361,8 +441,27 @@ def synchronize_all_node_metrics(self, db):
     daily_app_metrics = {}
     monthly_app_metrics = {}
     all_other_nodes = get_all_other_nodes()[0]
-    for node in all_other_nodes:
-        historical_metrics = get_historical_metrics(node)
+
+    # fetch historical metrics from all other nodes concurrently
+    all_historical_metrics = {}
+    with get_metrics_session() as http:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=METRICS_FETCH_MAX_WORKERS
+        ) as executor:
+            historical_metrics_futures = {
+                executor.submit(get_historical_metrics, node, http): node
+                for node in all_other_nodes
+            }
+            for future in concurrent.futures.as_completed(historical_metrics_futures):
+                node = historical_metrics_futures[future]
+                try:
+                    all_historical_metrics[node] = future.result()
+                except Exception as e:
+                    logger.error(
+                        f"index_metrics.py | ERROR in historical_metrics_futures {node} generated {e}"
+                    )
+
+    for node, historical_metrics in all_historical_metrics.items():
         logger.info(f"got historical metrics from {node}: {historical_metrics}")
         if historical_metrics:
             update_route_metrics_count(
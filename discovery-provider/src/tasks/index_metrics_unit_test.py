@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
 
+import requests
+import src.tasks.index_metrics
 from sqlalchemy import func
 from src.models import AppNameMetrics, RouteMetrics
 from src.tasks.index_metrics import (
+    get_metrics_from_nodes,
     process_app_name_keys,
     process_route_keys,
+    sum_metrics,
     sweep_metrics,
 )
 from src.utils.redis_metrics import datetime_format
@@ -203,3 +207,78 @@ def test_sweep_metrics(redis_mock, db_mock):
     assert len(keys) == 2
     assert currentKey in key_strs
     assert afterKey in key_strs
+
+
+def test_sum_metrics():
+    """Tests that counts of the same key are summed across nodes"""
+    assert sum_metrics([]) == {}
+    assert sum_metrics(
+        [
+            {"192.168.0.1": 3, "192.168.0.2": 1},
+            {"192.168.0.1": 2, "192.168.0.3": 4},
+            {},
+            {"192.168.0.3": 1},
+        ]
+    ) == {"192.168.0.1": 5, "192.168.0.2": 1, "192.168.0.3": 5}
+
+
+class MockResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return {"data": self.data}
+
+
+class MockHttp:
+    """Serves cached route and app metrics per node, raising for failing nodes"""
+
+    def __init__(self, metrics_by_node, failures):
+        self.metrics_by_node = metrics_by_node
+        self.failures = failures
+
+    def get(self, url, timeout=None):
+        node = url.split("/v1/")[0]
+        if node in self.failures:
+            raise self.failures[node]
+        route_metrics, app_metrics = self.metrics_by_node[node]
+        return MockResponse(route_metrics if "/routes/" in url else app_metrics)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def test_get_metrics_from_nodes(monkeypatch):
+    """Tests that a failing or timed out node doesn't stop the others from being counted"""
+    metrics_by_node = {
+        "https://dn1.co": ({"192.168.0.1": 3}, {"app": 2}),
+        "https://dn2.co": ({"192.168.0.1": 1, "192.168.0.2": 4}, {"app": 1}),
+    }
+    failures = {
+        "https://dn3.co": requests.exceptions.Timeout(),
+        "https://dn4.co": requests.exceptions.ConnectionError(),
+    }
+    monkeypatch.setattr(
+        src.tasks.index_metrics,
+        "get_metrics_session",
+        lambda: MockHttp(metrics_by_node, failures),
+    )
+
+    results = get_metrics_from_nodes(
+        {node: 0 for node in [*metrics_by_node, *failures]}
+    )
+
+    assert results == {
+        "https://dn1.co": ({"192.168.0.1": 3}, {"app": 2}),
+        "https://dn2.co": ({"192.168.0.1": 1, "192.168.0.2": 4}, {"app": 1}),
+        "https://dn3.co": (None, None),
+        "https://dn4.co": (None, None),
+    }
+    assert sum_metrics(
+        [route_metrics for (route_metrics, _) in results.values() if route_metrics]
+    ) == {"192.168.0.1": 4, "192.168.0.2": 4}
+    assert get_metrics_from_nodes({}) == {}
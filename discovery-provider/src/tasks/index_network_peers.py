@@ -3,6 +3,10 @@ import logging
 from src.models import User
 from src.tasks.celery_app import celery
 from src.utils.eth_contracts_helpers import fetch_all_registered_content_nodes
+from src.utils.service_provider_registry import (
+    discovery_node_service_type,
+    refresh_sp_registry,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,17 @@ def retrieve_peers_from_eth_contracts(self):
     )
 
 
+# Keep the discovery node registry snapshot used to find other discovery nodes up to date
+def refresh_discovery_node_registry(self):
+    refresh_sp_registry(
+        update_network_peers.eth_web3,
+        update_network_peers.shared_config,
+        update_network_peers.redis,
+        update_network_peers.eth_abi_values,
+        discovery_node_service_type,
+    )
+
+
 # Determine the known set of distinct peers currently within a user replica set
 # This function differs from the above as we are not interacting with eth-contracts,
 #   instead we are pulling local db state and retrieving the relevant information
@@ -72,6 +87,7 @@ def update_network_peers(self):
             logger.info(
                 f"index_network_peers.py | Peers from eth-contracts: {peers_from_ethereum}"
             )
+            refresh_discovery_node_registry(self)
             # An object returned from local database queries
             peers_from_local = retrieve_peers_from_db(self)
             logger.info(f"index_network_peers.py | Peers from db : {peers_from_local}")
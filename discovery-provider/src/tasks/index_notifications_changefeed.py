@@ -0,0 +1,139 @@
+import logging
+import time
+
+from redis import Redis
+from src.models import Block
+from src.queries import response_name_constants as const
+from src.queries.notifications import (
+    get_max_slot,
+    get_notifications,
+    get_solana_notifications,
+    max_block_diff,
+    max_slot_diff,
+)
+from src.queries.notifications_changefeed import (
+    NOTIFICATIONS_CHANGEFEED_KEY,
+    SOLANA_NOTIFICATIONS_CHANGEFEED_KEY,
+)
+from src.tasks.celery_app import celery
+from src.utils.changefeed import (
+    append_changefeed_entry,
+    append_changefeed_revert_entry,
+    clear_changefeed_reverts,
+    get_changefeed_cursor,
+    get_changefeed_position,
+    get_changefeed_reverts,
+)
+from src.utils.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+INDEX_NOTIFICATIONS_CHANGEFEED_LOCK = "index_notifications_changefeed_lock"
+
+
+def index_notifications_changefeed(db: SessionManager, redis: Redis):
+    """Appends the notifications of the blocks indexed since the last run to the changefeed"""
+    # Reverts recorded by the indexer come first, they rewind where the next entry starts
+    append_notifications_changefeed_reverts(redis)
+
+    with db.scoped_session() as session:
+        current_block = session.query(Block.number).filter(Block.is_current == True)
+        current_block_number = current_block.scalar()
+    if current_block_number is None:
+        return
+
+    position = get_changefeed_position(redis, NOTIFICATIONS_CHANGEFEED_KEY)
+    if position is None:
+        # Start the changefeed at the head of the chain, older windows are computed on request
+        position = (current_block_number - 1, current_block_number - 1)
+    cursor, start = position
+    max_block_number = min(cursor + max_block_diff, current_block_number)
+    if max_block_number <= cursor:
+        return
+
+    # After a revert the blocks indexed again since the new head are included
+    payload = get_notifications(db, start, max_block_number, [])
+    append_changefeed_entry(
+        redis, NOTIFICATIONS_CHANGEFEED_KEY, cursor, max_block_number, payload
+    )
+    logger.info(
+        f"index_notifications_changefeed.py | appended {len(payload['notifications'])} notifications "
+        f"for blocks ({start}, {max_block_number}]"
+    )
+
+
+def append_notifications_changefeed_reverts(redis: Redis):
+    """Appends an entry with the reverted entities of each revert recorded by the indexer"""
+    reverts = get_changefeed_reverts(redis, NOTIFICATIONS_CHANGEFEED_KEY)
+    for revert in reverts:
+        payload = {
+            "notifications": [],
+            "milestones": {},
+            "owners": {const.tracks: {}, const.albums: {}, const.playlists: {}},
+            "reverted": revert["reverted"],
+        }
+        append_changefeed_revert_entry(
+            redis, NOTIFICATIONS_CHANGEFEED_KEY, revert["revert_to"], payload
+        )
+        logger.info(
+            f"index_notifications_changefeed.py | appended reverted entities after block {revert['revert_to']}"
+        )
+    clear_changefeed_reverts(redis, NOTIFICATIONS_CHANGEFEED_KEY, len(reverts))
+
+
+def index_solana_notifications_changefeed(db: SessionManager, redis: Redis):
+    """Appends the notifications of the slots indexed since the last run to the changefeed"""
+    max_valid_slot = get_max_slot(redis)
+    if not max_valid_slot:
+        return
+
+    cursor = get_changefeed_cursor(redis, SOLANA_NOTIFICATIONS_CHANGEFEED_KEY)
+    if cursor is None:
+        cursor = max_valid_slot - 1
+    max_slot_number = min(cursor + max_slot_diff, max_valid_slot)
+    if max_slot_number <= cursor:
+        return
+
+    notifications = get_solana_notifications(db, cursor, max_slot_number)
+    append_changefeed_entry(
+        redis,
+        SOLANA_NOTIFICATIONS_CHANGEFEED_KEY,
+        cursor,
+        max_slot_number,
+        {"notifications": notifications},
+    )
+    logger.info(
+        f"index_notifications_changefeed.py | appended {len(notifications)} solana notifications "
+        f"for slots [{cursor}, {max_slot_number}]"
+    )
+
+
+# ####### CELERY TASKS ####### #
+@celery.task(name="index_notifications_changefeed", bind=True)
+def index_notifications_changefeed_task(self):
+    db = index_notifications_changefeed_task.db
+    redis = index_notifications_changefeed_task.redis
+    have_lock = False
+    update_lock = redis.lock(INDEX_NOTIFICATIONS_CHANGEFEED_LOCK, timeout=600)
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+        if have_lock:
+            start_time = time.time()
+            index_notifications_changefeed(db, redis)
+            index_solana_notifications_changefeed(db, redis)
+            logger.info(
+                f"index_notifications_changefeed.py | Finished in {time.time() - start_time} seconds"
+            )
+        else:
+            logger.info(
+                "index_notifications_changefeed.py | Failed to acquire index notifications changefeed lock"
+            )
+    except Exception as e:
+        logger.error(
+            "index_notifications_changefeed.py | Fatal error in main loop",
+            exc_info=True,
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
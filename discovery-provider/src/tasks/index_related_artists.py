@@ -2,13 +2,17 @@ import logging
 from typing import Union
 
 from redis import Redis
-from src.queries.get_related_artists import update_related_artist_scores_if_needed
+from src.queries.get_related_artists import (
+    update_all_related_artist_scores,
+    update_related_artist_scores_if_needed,
+)
 from src.tasks.celery_app import celery
 from src.utils.session_manager import SessionManager
 
 logger = logging.getLogger(__name__)
 
 INDEX_RELATED_ARTIST_REDIS_QUEUE = "related-artists-calculation-queue"
+RECALCULATE_RELATED_ARTISTS_LOCK = "recalculate_related_artists_lock"
 
 
 def queue_related_artist_calculation(redis: Redis, user_id: int):
@@ -60,3 +64,34 @@ def index_related_artists(self):
     finally:
         if have_lock:
             update_lock.release()
+
+
+def recalculate_related_artists(db: SessionManager):
+    with db.scoped_session() as session:
+        updated_count = update_all_related_artist_scores(session)
+    logger.info(
+        f"index_related_artists.py | Recalculated related artists for {updated_count} artists"
+    )
+
+
+@celery.task(name="recalculate_related_artists", bind=True)
+def recalculate_related_artists_task(self):
+    redis = recalculate_related_artists_task.redis
+    db = recalculate_related_artists_task.db
+    have_lock = False
+    update_lock = redis.lock(RECALCULATE_RELATED_ARTISTS_LOCK, timeout=60 * 60 * 2)
+    try:
+        have_lock = update_lock.acquire(blocking=False)
+        if have_lock:
+            recalculate_related_artists(db)
+        else:
+            logger.info("index_related_artists.py | Failed to acquire recalculate lock")
+    except Exception as e:
+        logger.error(
+            "index_related_artists.py | Fatal error recalculating related artists",
+            exc_info=True,
+        )
+        raise e
+    finally:
+        if have_lock:
+            update_lock.release()
@@ -488,13 +488,17 @@ def parse_sol_tx_batch(
 
         logger.info("index_solana_plays.py | Dispatching listen events")
         listen_dispatch_start = time.time()
-        for event in challenge_bus_events:
-            challenge_bus.dispatch(
-                ChallengeEvent.track_listen,
-                event.get("slot"),
-                event.get("user_id"),
-                {"created_at": event.get("created_at")},
-            )
+        challenge_bus.dispatch_many(
+            ChallengeEvent.track_listen,
+            [
+                (
+                    event.get("slot"),
+                    event.get("user_id"),
+                    {"created_at": event.get("created_at")},
+                )
+                for event in challenge_bus_events
+            ],
+        )
         listen_dispatch_end = time.time()
         listen_dispatch_diff = listen_dispatch_end - listen_dispatch_start
         logger.info(
@@ -7,9 +7,9 @@ from redis import Redis
 from sqlalchemy.orm.session import Session
 from src.models import Block, Track
 from src.queries.get_trending_tracks import (
-    generate_unpopulated_trending,
-    generate_unpopulated_trending_from_mat_views,
+    generate_trending_track_scores,
     make_trending_cache_key,
+    set_trending_track_scores,
 )
 from src.queries.get_underground_trending import (
     make_get_unpopulated_tracks,
@@ -154,16 +154,11 @@ def index_trending(self, db: SessionManager, redis: Redis, timestamp):
             for genre in genres:
                 for time_range in time_ranges:
                     cache_start_time = time.time()
-                    if strategy.use_mat_view:
-                        res = generate_unpopulated_trending_from_mat_views(
-                            session, genre, time_range, strategy
-                        )
-                    else:
-                        res = generate_unpopulated_trending(
-                            session, genre, time_range, strategy
-                        )
+                    track_scores = generate_trending_track_scores(
+                        session, genre, time_range, strategy
+                    )
                     key = make_trending_cache_key(time_range, genre, version)
-                    set_json_cached_key(redis, key, res)
+                    set_trending_track_scores(redis, key, track_scores)
                     cache_end_time = time.time()
                     total_time = cache_end_time - cache_start_time
                     logger.info(
@@ -1,10 +1,66 @@
 import logging
+from typing import Optional, Set
 
 from src.models import BlacklistedIPLD
 from src.utils import helpers
 
 logger = logging.getLogger(__name__)
 
+# Incremented after each change to ipld_blacklists so processes know to refresh their set
+IPLD_BLACKLIST_VERSION_KEY = "ipld_blacklist:version"
+
+# Version of the last revert, which removes rows so processes past it reload their set
+IPLD_BLACKLIST_RESET_VERSION_KEY = "ipld_blacklist:reset_version"
+
+
+class BlacklistedIPLDSet:
+    """
+    In-process copy of the blacklisted iplds, refreshed when the redis version moves.
+    Rows are only ever added by blocks after the ones already loaded, except for
+    reverts, so a refresh reads the rows past the highest loaded blocknumber.
+    """
+
+    def __init__(self):
+        self.iplds: Set[str] = set()
+        self.version: Optional[int] = None
+        self.blocknumber: Optional[int] = None
+
+    def refresh(self, session, redis):
+        (version, reset_version) = [
+            int(value or 0)
+            for value in redis.mget(
+                IPLD_BLACKLIST_VERSION_KEY, IPLD_BLACKLIST_RESET_VERSION_KEY
+            )
+        ]
+        if version == self.version:
+            return
+        if self.version is None or reset_version > self.version:
+            self.iplds = set()
+            self.blocknumber = None
+
+        query = session.query(BlacklistedIPLD.ipld, BlacklistedIPLD.blocknumber)
+        if self.blocknumber is not None:
+            query = query.filter(BlacklistedIPLD.blocknumber > self.blocknumber)
+        for (ipld, blocknumber) in query.all():
+            self.iplds.add(ipld)
+            self.blocknumber = max(self.blocknumber or 0, blocknumber)
+        self.version = version
+
+
+_blacklisted_iplds = BlacklistedIPLDSet()
+
+
+def get_blacklisted_iplds(session, redis) -> Set[str]:
+    """Returns the blacklisted iplds, reading only the rows added since the last call"""
+    _blacklisted_iplds.refresh(session, redis)
+    return _blacklisted_iplds.iplds
+
+
+def bump_ipld_blacklist_version(redis, is_reset=False):
+    version = redis.incr(IPLD_BLACKLIST_VERSION_KEY)
+    if is_reset:
+        redis.set(IPLD_BLACKLIST_RESET_VERSION_KEY, version)
+
 
 def ipld_blacklist_state_update(
     self,
@@ -33,7 +89,7 @@ def ipld_blacklist_state_update(
             block_timestamp,
         )
 
-        num_new_ipld_blacklist_events += num_new_ipld_blacklist_events
+        total_new_ipld_blacklist_events += num_new_ipld_blacklist_events
 
     return total_new_ipld_blacklist_events
 
@@ -77,10 +133,3 @@ def add_to_blacklist(
             continue
         session.add(ipld_blacklist_model)
     return len(new_ipld_blacklist_event)
-
-
-def is_blacklisted_ipld(session, ipld_blacklist_multihash):
-    ipld_blacklist_entry = session.query(BlacklistedIPLD).filter(
-        BlacklistedIPLD.ipld == ipld_blacklist_multihash
-    )
-    return ipld_blacklist_entry.count() > 0
@@ -6,7 +6,7 @@ from sqlalchemy.orm.session import Session, make_transient
 from src.database_task import DatabaseTask
 from src.models import Playlist
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
-from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.ipld_blacklist import get_blacklisted_iplds
 from src.utils import helpers
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
@@ -308,8 +308,9 @@ def parse_playlist_event(
         )
 
         # If cid is in blacklist, do not index playlist
-        is_blacklisted = is_blacklisted_ipld(
-            session, playlist_record.playlist_image_multihash
+        is_blacklisted = (
+            playlist_record.playlist_image_multihash
+            in get_blacklisted_iplds(session, update_task.redis)
         )
         if is_blacklisted:
             logger.info(
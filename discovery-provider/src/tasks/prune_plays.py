@@ -1,22 +1,67 @@
 import logging
 import time
 from datetime import datetime
+from typing import List, Optional
 
 from sqlalchemy import text
 from src.tasks.celery_app import celery
 
 logger = logging.getLogger(__name__)
 
+PLAYS_TABLE_NAME = "plays"
 PLAYS_ARCHIVE_TABLE_NAME = "plays_archive"
+PLAYS_DEFAULT_PARTITION_NAME = "plays_default"
 
-PRUNE_PLAYS_QUERY = """
+# plays and plays_archive are partitioned by created_at month, with
+# partitions named <table>_<YYYY>_<MM>
+# Plays older than the retention window are archived by detaching their monthly
+# partition from plays and attaching it to plays_archive, without moving rows
+PARTITION_NAME_FORMAT = "%Y_%m"
+
+# Number of months of plays kept in the plays table
+DEFAULT_RETENTION_MONTHS = 24
+
+# Number of months ahead of the current month to create partitions for,
+# so new plays never land in the default partition
+PARTITIONS_AHEAD_MONTHS = 3
+
+GET_PARTITIONS_QUERY = """
+    select
+        child.relname
+    from
+        pg_inherits
+        join pg_class parent on parent.oid = pg_inherits.inhparent
+        join pg_class child on child.oid = pg_inherits.inhrelid
+    where
+        parent.relname = :table_name
+    """
+
+# Plays outside of the monthly partitions, e.g. backfilled plays older than the
+# first partition, land in the default partition and are archived row by row
+PRUNE_DEFAULT_PARTITION_QUERY = """
     with archived as (
         insert into
-            plays_archive
+            plays_archive (
+                id,
+                user_id,
+                source,
+                city,
+                region,
+                country,
+                play_item_id,
+                created_at,
+                updated_at,
+                slot,
+                signature,
+                archived_at
+            )
         select
             id,
             user_id,
             source,
+            city,
+            region,
+            country,
             play_item_id,
             created_at,
             updated_at,
@@ -24,41 +69,170 @@ PRUNE_PLAYS_QUERY = """
             signature,
             :current_timestamp
         from
-            plays
+            plays_default
         where
-            plays.created_at <= :cutoff_timestamp
+            plays_default.created_at <= :cutoff_timestamp
         order by
-            plays.created_at asc
+            plays_default.created_at asc
         limit
             :max_batch
         returning id
     )
     delete from
-        plays
+        plays_default
     where
         id in (select id from archived)
     """
 
-# Prune up to the cutoff date
-# start at all plays before 2020 (328751 total)
-# TODO move to a sliding window
-DEFAULT_CUTOFF_TIMESTAMP = datetime.fromisoformat("2020-01-01")
-
-# max number of plays to prune per run
+# max number of plays to prune from the default partition per run
 # 50000 max * 8 runs a day = 400000 plays per day
 DEFAULT_MAX_BATCH = 50000
 
 
+def get_month_start(timestamp: datetime) -> datetime:
+    return datetime(timestamp.year, timestamp.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    month_index = month.year * 12 + month.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_{month.strftime(PARTITION_NAME_FORMAT)}"
+
+
+def get_partition_months(session, table_name: str) -> List[datetime]:
+    """Returns the months of the monthly partitions of table_name, sorted"""
+    partition_names = session.execute(
+        text(GET_PARTITIONS_QUERY), {"table_name": table_name}
+    ).fetchall()
+    months = []
+    for (partition_name,) in partition_names:
+        try:
+            months.append(
+                datetime.strptime(
+                    partition_name[len(table_name) + 1 :], PARTITION_NAME_FORMAT
+                )
+            )
+        except ValueError:
+            # the default and legacy partitions do not cover a single month
+            continue
+    return sorted(months)
+
+
+def create_plays_partition(session, month: datetime):
+    """
+    Creates the plays partition of month. Plays of that month already in the
+    default partition would violate the new partition's bounds, so the default
+    partition is detached while they are moved into the new partition
+    """
+    partition_name = get_partition_name(PLAYS_TABLE_NAME, month)
+    next_month = add_months(month, 1)
+    has_default_plays = session.execute(
+        text(
+            f"""
+            SELECT EXISTS (
+                SELECT 1 FROM {PLAYS_DEFAULT_PARTITION_NAME}
+                WHERE created_at >= :month AND created_at < :next_month
+            )
+            """
+        ),
+        {"month": month, "next_month": next_month},
+    ).scalar()
+    if not has_default_plays:
+        session.execute(
+            f"""
+            CREATE TABLE {partition_name}
+            PARTITION OF {PLAYS_TABLE_NAME}
+            FOR VALUES FROM ('{month}') TO ('{next_month}')
+            """
+        )
+        return
+
+    logger.info(
+        f"prune_plays.py | Moving plays from {PLAYS_DEFAULT_PARTITION_NAME} to {partition_name}"
+    )
+    session.execute(
+        f"""
+        ALTER TABLE {PLAYS_TABLE_NAME} DETACH PARTITION {PLAYS_DEFAULT_PARTITION_NAME};
+        CREATE TABLE {partition_name}
+            PARTITION OF {PLAYS_TABLE_NAME}
+            FOR VALUES FROM ('{month}') TO ('{next_month}');
+        WITH moved AS (
+            DELETE FROM {PLAYS_DEFAULT_PARTITION_NAME}
+            WHERE created_at >= '{month}' AND created_at < '{next_month}'
+            RETURNING *
+        )
+        INSERT INTO {partition_name} SELECT * FROM moved;
+        ALTER TABLE {PLAYS_TABLE_NAME}
+            ATTACH PARTITION {PLAYS_DEFAULT_PARTITION_NAME} DEFAULT;
+        """
+    )
+
+
+def create_plays_partitions(session, start_month: datetime, end_month: datetime):
+    """Creates the missing monthly plays partitions from start_month to end_month"""
+    partition_months = set(get_partition_months(session, PLAYS_TABLE_NAME))
+    month = get_month_start(start_month)
+    while month <= end_month:
+        if month not in partition_months:
+            # A partition that fails to be created is retried on the next run
+            # without holding back the other partitions or the pruning
+            try:
+                with session.begin_nested():
+                    create_plays_partition(session, month)
+            except Exception:
+                logger.error(
+                    f"prune_plays.py | Failed to create the plays partition of {month}",
+                    exc_info=True,
+                )
+        month = add_months(month, 1)
+
+
+def archive_plays_partition(session, month: datetime, archived_at: datetime):
+    """Moves the plays partition of month from plays to plays_archive"""
+    partition_name = get_partition_name(PLAYS_TABLE_NAME, month)
+    archive_partition_name = get_partition_name(PLAYS_ARCHIVE_TABLE_NAME, month)
+    logger.info(
+        f"prune_plays.py | Archiving {partition_name} to {archive_partition_name}"
+    )
+    session.execute(
+        f"""
+        ALTER TABLE {PLAYS_TABLE_NAME} DETACH PARTITION {partition_name};
+        ALTER TABLE {partition_name}
+            ADD COLUMN archived_at timestamp NOT NULL DEFAULT '{archived_at}';
+        ALTER TABLE {partition_name} RENAME TO {archive_partition_name};
+        ALTER TABLE {PLAYS_ARCHIVE_TABLE_NAME}
+            ATTACH PARTITION {archive_partition_name}
+            FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}');
+        """
+    )
+
+
 def _prune_plays(
     session,
-    current_timestamp,
-    cutoff_timestamp=DEFAULT_CUTOFF_TIMESTAMP,
+    current_timestamp: datetime,
+    cutoff_timestamp: Optional[datetime] = None,
     max_batch=DEFAULT_MAX_BATCH,
 ):
+    current_month = get_month_start(current_timestamp)
+    if cutoff_timestamp is None:
+        cutoff_timestamp = add_months(current_month, -DEFAULT_RETENTION_MONTHS)
+
+    create_plays_partitions(
+        session, current_month, add_months(current_month, PARTITIONS_AHEAD_MONTHS)
+    )
+
+    # archive the monthly partitions entirely before cutoff_timestamp
+    for month in get_partition_months(session, PLAYS_TABLE_NAME):
+        if add_months(month, 1) > cutoff_timestamp:
+            break
+        archive_plays_partition(session, month, current_timestamp)
 
-    # archive and prune plays at most max_batch plays before cutoff_timestamp
+    # archive and prune at most max_batch plays of the default partition before cutoff_timestamp
     session.execute(
-        text(PRUNE_PLAYS_QUERY),
+        text(PRUNE_DEFAULT_PARTITION_QUERY),
         {
             "current_timestamp": current_timestamp,
             "cutoff_timestamp": cutoff_timestamp,
@@ -24,11 +24,11 @@ def social_feature_state_update(
     _ipfs_metadata,  # prefix unused args with underscore to prevent pylint
     _blacklisted_cids,
 ) -> Tuple[int, Set]:
-    """Return Tuple containing int representing number of social feature related state changes in this transaction and empty Set (to align with other _state_update function signatures)"""
-    empty_set: Set[int] = set()
+    """Return Tuple containing int representing number of social feature related state changes in this transaction and a Set of the follower user ids whose follows changed"""
+    changed_follower_user_ids: Set[int] = set()
     num_total_changes = 0
     if not social_feature_factory_txs:
-        return num_total_changes, empty_set
+        return num_total_changes, changed_follower_user_ids
 
     challenge_bus = update_task.challenge_event_bus
     block_datetime = datetime.utcfromtimestamp(block_timestamp)
@@ -144,7 +144,8 @@ def social_feature_state_update(
             dispatch_challenge_follow(challenge_bus, follow, block_number)
             queue_related_artist_calculation(update_task.redis, followee_user_id)
         num_total_changes += len(followee_user_ids)
-    return num_total_changes, empty_set
+        changed_follower_user_ids.add(follower_user_id)
+    return num_total_changes, changed_follower_user_ids
 
 
 # ####### HELPERS ####### #
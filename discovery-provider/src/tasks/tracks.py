@@ -10,7 +10,7 @@ from src.challenges.challenge_event_bus import ChallengeEventBus
 from src.database_task import DatabaseTask
 from src.models import Remix, Stem, Track, TrackRoute, User
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
-from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.ipld_blacklist import get_blacklisted_iplds
 from src.utils import helpers, multihash
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
@@ -465,7 +465,9 @@ def parse_track_event(
         # if cover_art CID is of a dir, store under _sizes field instead
         if track_record.cover_art:
             # If CID is in IPLD blacklist table, do not continue with indexing
-            if is_blacklisted_ipld(session, track_record.cover_art):
+            if track_record.cover_art in get_blacklisted_iplds(
+                session, update_task.redis
+            ):
                 logger.info(
                     f"index.py | tracks.py | Encountered blacklisted cover art CID:"
                     f"{track_record.cover_art} in indexing new track"
@@ -521,7 +523,9 @@ def parse_track_event(
         # Any write to cover_art field is replaced by cover_art_sizes
         if track_record.cover_art:
             # If CID is in IPLD blacklist table, do not continue with indexing
-            if is_blacklisted_ipld(session, track_record.cover_art):
+            if track_record.cover_art in get_blacklisted_iplds(
+                session, update_task.redis
+            ):
                 logger.info(
                     f"index.py | tracks.py | Encountered blacklisted cover art CID:"
                     f"{track_record.cover_art} in indexing update track"
@@ -1,8 +1,10 @@
+import concurrent.futures
 import logging
 from datetime import datetime, timezone
-from typing import Any, List, Tuple, TypedDict, Union
+from typing import Any, Dict, List, Set, Tuple, TypedDict, Union
 
 import requests
+from sqlalchemy import text
 from src.models import Track, URSMContentNode, User
 from src.tasks.celery_app import celery
 from src.utils.redis_constants import (
@@ -18,6 +20,7 @@ UPDATE_TRACK_IS_AVAILABLE_LOCK = "update_track_is_available_lock"
 BATCH_SIZE = 1000
 DEFAULT_LOCK_TIMEOUT_SECONDS = 30  # 30 seconds
 REQUESTS_TIMEOUT_SECONDS = 300  # 5 minutes
+MAX_CONCURRENT_REQUESTS = 10
 
 
 class ContentNodeInfo(TypedDict):
@@ -38,20 +41,50 @@ def fetch_unavailable_track_ids_in_network(session: Any, redis: Any) -> None:
     # Clear redis for existing data
     redis.delete(ALL_UNAVAILABLE_TRACKS_REDIS_KEY)
 
-    for node in content_nodes:
-        # Keep mapping of spId to set of unavailable tracks
-        unavailable_track_ids = fetch_unavailable_track_ids(node["endpoint"])
-        spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(node["spID"])
-
-        # Clear redis for existing data
-        redis.delete(spID_unavailable_tracks_key)
-
-        for i in range(0, len(unavailable_track_ids), BATCH_SIZE):
-            unavailable_track_ids_batch = unavailable_track_ids[i : i + BATCH_SIZE]
-            redis.sadd(spID_unavailable_tracks_key, *unavailable_track_ids_batch)
-
-            # Aggregate a set of unavailable tracks
-            redis.sadd(ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *unavailable_track_ids_batch)
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_REQUESTS
+    ) as executor:
+        fetch_futures = {
+            executor.submit(fetch_unavailable_track_ids, node["endpoint"]): node
+            for node in content_nodes
+        }
+        for future in concurrent.futures.as_completed(fetch_futures):
+            node = fetch_futures[future]
+            # Keep mapping of spId to set of unavailable tracks
+            unavailable_track_ids = future.result()
+            spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(node["spID"])
+
+            pipeline = redis.pipeline(transaction=False)
+            # Clear redis for existing data
+            pipeline.delete(spID_unavailable_tracks_key)
+
+            for i in range(0, len(unavailable_track_ids), BATCH_SIZE):
+                unavailable_track_ids_batch = unavailable_track_ids[i : i + BATCH_SIZE]
+                pipeline.sadd(spID_unavailable_tracks_key, *unavailable_track_ids_batch)
+
+                # Aggregate a set of unavailable tracks
+                pipeline.sadd(
+                    ALL_UNAVAILABLE_TRACKS_REDIS_KEY, *unavailable_track_ids_batch
+                )
+            pipeline.execute()
+
+
+# Flags the tracks in the VALUES list as unavailable and deleted
+UPDATE_UNAVAILABLE_TRACKS_QUERY = """
+    UPDATE
+        tracks
+    SET
+        is_available = FALSE,
+        is_delete = TRUE
+    FROM
+        (
+            VALUES
+                {values}
+        ) AS unavailable_tracks (track_id)
+    WHERE
+        tracks.track_id = unavailable_tracks.track_id
+        AND tracks.is_current IS TRUE
+    """
 
 
 def update_tracks_is_available_status(db: Any, redis: Any) -> None:
@@ -59,6 +92,8 @@ def update_tracks_is_available_status(db: Any, redis: Any) -> None:
     all_unavailable_track_ids = _get_redis_set_members_as_list(
         redis, ALL_UNAVAILABLE_TRACKS_REDIS_KEY
     )
+    # Unavailable track ids per spID, loaded from redis once per Content Node
+    spID_unavailable_track_ids: Dict[int, Set[int]] = {}
 
     for i in range(0, len(all_unavailable_track_ids), BATCH_SIZE):
         unavailable_track_ids_batch = all_unavailable_track_ids[i : i + BATCH_SIZE]
@@ -67,41 +102,39 @@ def update_tracks_is_available_status(db: Any, redis: Any) -> None:
                 track_ids_to_replica_set = query_replica_set_by_track_id(
                     session, unavailable_track_ids_batch
                 )
+                load_unavailable_track_ids(
+                    redis,
+                    {
+                        spID
+                        for entry in track_ids_to_replica_set
+                        for spID in [entry[1], *(entry[2] or [])]
+                        if spID is not None
+                    },
+                    spID_unavailable_track_ids,
+                )
 
-                track_id_to_is_available_status = {}
-
-                for entry in track_ids_to_replica_set:
-                    track_id = entry[0]
-
-                    # Some users are do not have primary_ids or secondary_ids
-                    # If these values are not null, check if track is available
-                    # Else, default to track as available
-                    if (
-                        entry[1] is not None  # primary_id
-                        and entry[2][0] is not None  # secondary_id 1
-                        and entry[2][1] is not None  # secondary_id 2
-                    ):
-
-                        spID_replica_set = [entry[1], *entry[2]]
-                        is_available = check_track_is_available(
-                            redis=redis,
-                            track_id=track_id,
-                            spID_replica_set=spID_replica_set,
-                        )
-                    else:
-                        is_available = True
-
-                    track_id_to_is_available_status[track_id] = is_available
+                unavailable_track_ids = get_unavailable_track_ids(
+                    track_ids_to_replica_set, spID_unavailable_track_ids
+                )
+                if not unavailable_track_ids:
+                    continue
 
                 # Update tracks with is_available status
-                tracks = query_tracks_by_track_ids(session, unavailable_track_ids_batch)
-                for track in tracks:
-                    is_available = track_id_to_is_available_status[track.track_id]
-
-                    # If track is not available, also flip 'is_delete' flag to True
-                    if not is_available:
-                        track.is_available = False
-                        track.is_delete = True
+                # If track is not available, also flip 'is_delete' flag to True
+                session.execute(
+                    text(
+                        UPDATE_UNAVAILABLE_TRACKS_QUERY.format(
+                            values=", ".join(
+                                f"(:track_id_{j})"
+                                for j in range(len(unavailable_track_ids))
+                            )
+                        )
+                    ),
+                    {
+                        f"track_id_{j}": track_id
+                        for j, track_id in enumerate(unavailable_track_ids)
+                    },
+                )
 
         except Exception as e:
             logger.warn(
@@ -109,6 +142,61 @@ def update_tracks_is_available_status(db: Any, redis: Any) -> None:
             )
 
 
+def load_unavailable_track_ids(
+    redis: Any, spIDs: Set[int], spID_unavailable_track_ids: Dict[int, Set[int]]
+) -> None:
+    """Loads the unavailable track ids of the spIDs not in `spID_unavailable_track_ids` yet"""
+    spIDs_to_load = [spID for spID in spIDs if spID not in spID_unavailable_track_ids]
+    if not spIDs_to_load:
+        return
+
+    pipeline = redis.pipeline(transaction=False)
+    for spID in spIDs_to_load:
+        pipeline.smembers(get_unavailable_tracks_redis_key(spID))
+    for spID, values in zip(spIDs_to_load, pipeline.execute()):
+        spID_unavailable_track_ids[spID] = {int(value.decode()) for value in values}
+
+
+def get_unavailable_track_ids(
+    track_ids_to_replica_set: Union[
+        List[Tuple[int, int, List[int]]], List[Tuple[int, None, List[None]]]
+    ],
+    spID_unavailable_track_ids: Dict[int, Set[int]],
+) -> List[int]:
+    """
+    Returns the track ids that are unavailable on every node of their replica set.
+    A track needs to only be available on one replica set node to be marked as available.
+        track_ids_to_replica_set: [(track_id | primary_id | secondary_ids), ...]
+        spID_unavailable_track_ids: the unavailable track ids of each SP ID
+    """
+    # Group the tracks by replica set so each distinct replica set is one set intersection
+    replica_set_to_track_ids: Dict[Tuple[int, ...], Set[int]] = {}
+    for entry in track_ids_to_replica_set:
+        # Some users are do not have primary_ids or secondary_ids
+        # If these values are not null, check if track is available
+        # Else, default to track as available
+        if (
+            entry[1] is not None  # primary_id
+            and entry[2][0] is not None  # secondary_id 1
+            and entry[2][1] is not None  # secondary_id 2
+        ):
+            spID_replica_set = (entry[1], *entry[2])
+            replica_set_to_track_ids.setdefault(spID_replica_set, set()).add(entry[0])
+
+    unavailable_track_ids: List[int] = []
+    for spID_replica_set, track_ids in replica_set_to_track_ids.items():
+        unavailable_track_ids.extend(
+            track_ids.intersection(
+                *(
+                    spID_unavailable_track_ids.get(spID, set())
+                    for spID in spID_replica_set
+                )
+            )
+        )
+
+    return sorted(unavailable_track_ids)
+
+
 def fetch_unavailable_track_ids(node: str) -> List[int]:
     """Fetches unavailable tracks from Content Node. Returns empty list if request fails"""
     unavailable_track_ids = []
@@ -179,32 +267,6 @@ def query_registered_content_node_info(
     return list(map(create_node_info_response, registered_content_nodes))
 
 
-def check_track_is_available(
-    redis: Any, track_id: int, spID_replica_set: List[int]
-) -> bool:
-    """
-    Checks if a track is available in the replica set. Needs to only be available
-    on one replica set node to be marked as available.
-        redis: redis instance
-        track_id: the observed track id
-        spID_replica_set: an array of the SP IDs that are associated with track
-    """
-
-    i = 0
-    while i < len(spID_replica_set):
-        spID_unavailable_tracks_key = get_unavailable_tracks_redis_key(
-            spID_replica_set[i]
-        )
-        is_available_on_sp = not redis.sismember(spID_unavailable_tracks_key, track_id)
-
-        if is_available_on_sp:
-            return True
-
-        i = i + 1
-
-    return False
-
-
 def get_unavailable_tracks_redis_key(spID: int) -> str:
     """Returns the redis key used to store the unavailable tracks on a sp"""
     return f"update_track_is_available:unavailable_tracks_{spID}"
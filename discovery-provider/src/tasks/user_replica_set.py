@@ -9,13 +9,14 @@ from src.models import URSMContentNode, User
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
 from src.tasks.users import invalidate_old_user, lookup_user_record
 from src.utils import helpers
-from src.utils.eth_contracts_helpers import (
-    content_node_service_type,
-    sp_factory_registry_key,
-)
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
 from src.utils.redis_cache import get_json_cached_key, get_sp_id_key
+from src.utils.service_provider_registry import (
+    content_node_service_type,
+    get_sp_factory_contract,
+    get_sp_info,
+)
 from src.utils.user_event_constants import (
     user_replica_set_manager_event_types_arr,
     user_replica_set_manager_event_types_lookup,
@@ -199,7 +200,7 @@ def get_user_replica_set_mgr_tx(update_task, event_type, tx_receipt):
 
 
 # Reconstruct endpoint string from primary and secondary IDs
-# Attempt to retrieve from cached values populated in index_network_peers.py
+# Attempt to retrieve from the service provider registry snapshot kept up to date in index_network_peers.py
 # If unavailable, then a fallback to ethereum mainnet contracts will occur
 # Note that in the case of an invalid spID - one that is not yet registered on
 # the ethereum mainnet contracts, there will be an empty value in the returned
@@ -261,6 +262,11 @@ def get_ursm_cnode_endpoint(update_task, sp_id):
 # Returns initialized instance of contract and endpoint
 def get_endpoint_from_id(update_task, sp_factory_inst, sp_id):
     endpoint = None
+    # Attempt to fetch from the in-memory registry snapshot
+    sp_info = get_sp_info(update_task.redis, content_node_service_type, sp_id)
+    if sp_info and sp_info[1]:
+        return sp_factory_inst, sp_info[1]
+
     # Get sp_id cache key
     cache_key = get_sp_id_key(sp_id)
     # Attempt to fetch from cache
@@ -292,22 +298,9 @@ def get_endpoint_from_id(update_task, sp_factory_inst, sp_id):
 
 # Return instance of ServiceProviderFactory initialized with configs
 def get_sp_factory_inst(update_task):
-    shared_config = update_task.shared_config
-    eth_web3 = update_task.eth_web3
-    eth_registry_address = eth_web3.toChecksumAddress(
-        shared_config["eth_contracts"]["registry"]
-    )
-    eth_registry_instance = eth_web3.eth.contract(
-        address=eth_registry_address, abi=get_eth_abi_values()["Registry"]["abi"]
-    )
-    sp_factory_address = eth_registry_instance.functions.getContract(
-        sp_factory_registry_key
-    ).call()
-    sp_factory_inst = eth_web3.eth.contract(
-        address=sp_factory_address,
-        abi=get_eth_abi_values()["ServiceProviderFactory"]["abi"],
+    return get_sp_factory_contract(
+        update_task.eth_web3, update_task.shared_config, get_eth_abi_values()
     )
-    return sp_factory_inst
 
 
 # Update cnode_record with event arguments
@@ -15,7 +15,7 @@ from src.database_task import DatabaseTask
 from src.models import AssociatedWallet, User, UserEvents
 from src.queries.get_balances import enqueue_immediate_balance_refresh
 from src.queries.skipped_transactions import add_node_level_skipped_transaction
-from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.ipld_blacklist import get_blacklisted_iplds
 from src.utils import helpers
 from src.utils.indexing_errors import EntityMissingRequiredFieldError, IndexingError
 from src.utils.model_nullable_validator import all_required_fields_present
@@ -317,7 +317,9 @@ def parse_user_event(
         profile_photo_multihash = helpers.multihash_digest_to_cid(
             helpers.get_tx_arg(entry, "_profilePhotoDigest")
         )
-        is_blacklisted = is_blacklisted_ipld(session, profile_photo_multihash)
+        is_blacklisted = profile_photo_multihash in get_blacklisted_iplds(
+            session, update_task.redis
+        )
         if is_blacklisted:
             logger.info(
                 f"index.py | users.py | Encountered blacklisted CID:"
@@ -329,7 +331,9 @@ def parse_user_event(
         cover_photo_multihash = helpers.multihash_digest_to_cid(
             helpers.get_tx_arg(entry, "_coverPhotoDigest")
         )
-        is_blacklisted = is_blacklisted_ipld(session, cover_photo_multihash)
+        is_blacklisted = cover_photo_multihash in get_blacklisted_iplds(
+            session, update_task.redis
+        )
         if is_blacklisted:
             logger.info(
                 f"index.py | users.py | Encountered blacklisted CID:"
@@ -1,5 +1,5 @@
 from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
-from src.trending_strategies.EJ57D_trending_tracks_strategy import z
+from src.trending_strategies.EJ57D_trending_tracks_strategy import z, z_vectorized
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -13,5 +13,8 @@ class TrendingPlaylistsStrategyBDNxn(BaseTrendingStrategy):
     def get_track_score(self, time_range, playlist):
         return z(time_range, playlist)
 
+    def get_track_scores(self, time_range, playlists):
+        return z_vectorized(time_range, playlists)
+
     def get_score_params(self):
         return {"zq": 1000, "xf": True, "pt": 0, "mt": 3}
@@ -2,9 +2,11 @@ import logging
 import time
 from datetime import datetime
 
+import numpy as np
 from dateutil.parser import parse
 from sqlalchemy.sql import text
 from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
+from src.trending_strategies.trending_scoring import ScoringColumns
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -49,6 +51,23 @@ def z(time, track):
     return {"score": H * Q, **track}
 
 
+def z_vectorized(time, tracks: ScoringColumns) -> np.ndarray:
+    """Vectorized z over scoring columns"""
+    # pylint: disable=W,C,R
+    E = tracks["listens"]
+    e = tracks["windowed_repost_count"]
+    t = tracks["repost_count"]
+    x = tracks["windowed_save_count"]
+    A = tracks["save_count"]
+    k = tracks["age_days"]
+    l = tracks["owner_follower_count"]
+    j = tracks["karma"]
+    H = (N * E + F * e + O * x + R * t + i * A) * j
+    L = T[time]
+    Q = np.where(k > L, np.maximum(1.0 / q, np.power(q, 1 - k / L)), 1)
+    return np.where(l < y, 0, H * Q)
+
+
 class TrendingTracksStrategyEJ57D(BaseTrendingStrategy):
     def __init__(self):
         super().__init__(TrendingType.TRACKS, TrendingVersion.EJ57D, True)
@@ -58,6 +77,10 @@ class TrendingTracksStrategyEJ57D(BaseTrendingStrategy):
             f"get_track_score not implemented for Trending Tracks Strategy with version {TrendingVersion.EJ57D}"
         )
 
+    def get_track_scores(self, time_range, tracks):
+        # Scores are computed by update_track_score_query, this matches its formula
+        return z_vectorized(time_range, tracks)
+
     def update_track_score_query(self, session):
         start_time = time.time()
         trending_track_query = text(
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+import numpy as np
 from dateutil.parser import parse
 from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
 from src.trending_strategies.trending_type_and_version import (
@@ -51,6 +52,28 @@ class UndergroundTrendingTracksStrategyEJ57D(BaseTrendingStrategy):
             rq = xy((1.0 / u), (uk(u, (1 - ul / te))))
         return {"score": vb * rq, **track}
 
+    def get_track_scores(self, time_range, tracks):
+        # pylint: disable=W,C,R
+        mn = tracks["listens"]
+        c = tracks["windowed_repost_count"]
+        x = tracks["repost_count"]
+        v = tracks["windowed_save_count"]
+        ut = tracks["save_count"]
+        ul = tracks["age_days"]
+        bq = tracks["owner_follower_count"]
+        ty = tracks["owner_verified"]
+        kz = tracks["karma"]
+        oj = np.where(ty, qq, 1)
+        zu = np.where(
+            bq >= nb,
+            np.maximum(np.power(oi, 1 - ((1 / nb) * (bq - nb) + 1)), 1 / oi),
+            1,
+        )
+        vb = (b * mn + qw * c + hg * v + ie * x + pn * ut + zu * bq) * kz * zu * oj
+        te = 7
+        rq = np.where(ul > te, np.maximum(1.0 / u, np.power(u, 1 - ul / te)), 1)
+        return np.where(bq < 3, 0, vb * rq)
+
     def get_score_params(self):
         return {
             "S": 1500,
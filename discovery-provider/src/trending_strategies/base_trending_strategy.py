@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+from src.trending_strategies.trending_scoring import ScoringColumns
 from src.trending_strategies.trending_type_and_version import (
     TrendingType,
     TrendingVersion,
@@ -18,6 +20,10 @@ class BaseTrendingStrategy(ABC):
     def get_track_score(self, time_range: str, track):
         pass
 
+    @abstractmethod
+    def get_track_scores(self, time_range: str, tracks: ScoringColumns) -> np.ndarray:
+        """Scores the candidates given as scoring columns, see trending_scoring"""
+
     @abstractmethod
     def get_score_params(self):
         pass
@@ -0,0 +1,82 @@
+"""
+Columnar helpers used to score trending candidates with numpy.
+
+Candidates are passed to `BaseTrendingStrategy.get_track_scores` as a dict of
+equally sized arrays, one per scorable field, instead of one dict per candidate.
+This lets a strategy compute every score in a single vector expression and pick
+the top candidates without sorting the whole candidate set.
+
+Scoring columns:
+    <id field>: int64 (track_id / playlist_id)
+    listens, windowed_repost_count, repost_count, windowed_save_count,
+    save_count, owner_follower_count, karma: float64
+    owner_verified: bool
+    age_days: float64, whole days since created_at
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+ScoringColumns = Dict[str, np.ndarray]
+
+# Numeric fields of a scorable candidate, defaulting to 0 when missing
+SCORING_FIELDS = [
+    "listens",
+    "windowed_repost_count",
+    "repost_count",
+    "windowed_save_count",
+    "save_count",
+    "owner_follower_count",
+    "karma",
+]
+
+
+def get_age_days(created_at: Iterable, now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Returns the whole number of days elapsed since each created_at, matching
+    `(now - created_at).days`. Accepts naive datetimes or ISO 8601 strings.
+    """
+    now_s = np.datetime64(now or datetime.now(), "s")
+    created_at_s = np.asarray(list(created_at), dtype="datetime64[s]")
+    elapsed: np.ndarray = now_s - created_at_s
+    return (elapsed // np.timedelta64(1, "D")).astype(np.float64)
+
+
+def to_scoring_columns(
+    rows: Iterable[Dict], id_field: str, now: Optional[datetime] = None
+) -> ScoringColumns:
+    """Converts scorable candidates given as dicts to scoring columns"""
+    rows = list(rows)
+    columns = {id_field: np.array([row[id_field] for row in rows], dtype=np.int64)}
+    for field in SCORING_FIELDS:
+        columns[field] = np.array([row.get(field, 0) for row in rows], dtype=np.float64)
+    columns["owner_verified"] = np.array(
+        [bool(row.get("owner_verified")) for row in rows], dtype=bool
+    )
+    columns["age_days"] = get_age_days((row["created_at"] for row in rows), now)
+    return columns
+
+
+def set_column_values(
+    columns: ScoringColumns,
+    indexes: Dict[int, int],
+    field: str,
+    values: List[Tuple[int, float]],
+):
+    """Sets the (id, value) pairs returned by an aggregate query on a column"""
+    if not values:
+        return
+    ids, field_values = zip(*values)
+    columns[field][[indexes[item_id] for item_id in ids]] = field_values
+
+
+def top_k_indexes(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns the indexes of the k highest scores, sorted by descending score"""
+    if k <= 0 or len(scores) == 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        indexes = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indexes = np.arange(len(scores))
+    return indexes[np.argsort(-scores[indexes], kind="stable")]
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from src.trending_strategies.EJ57D_trending_tracks_strategy import z, z_vectorized
+from src.trending_strategies.EJ57D_underground_trending_tracks_strategy import (
+    UndergroundTrendingTracksStrategyEJ57D,
+)
+from src.trending_strategies.trending_scoring import (
+    get_age_days,
+    to_scoring_columns,
+    top_k_indexes,
+)
+
+now = datetime.now()
+
+
+def make_track(track_id, days_old, follower_count, verified=False):
+    return {
+        "track_id": track_id,
+        "created_at": (now - timedelta(days=days_old, hours=1)).isoformat(
+            timespec="seconds"
+        ),
+        "listens": 100 + track_id,
+        "windowed_repost_count": track_id % 7,
+        "repost_count": 3 * track_id,
+        "windowed_save_count": track_id % 5,
+        "save_count": 2 * track_id,
+        "owner_follower_count": follower_count,
+        "owner_verified": verified,
+        "karma": 1 + track_id % 3,
+    }
+
+
+tracks = [
+    make_track(1, 0, 100),
+    make_track(2, 3, 2),
+    make_track(3, 10, 800),
+    make_track(4, 30, 1500, True),
+    make_track(5, 400, 50),
+]
+
+
+def test_vectorized_scores_match_row_scores():
+    """Tests that the columnar scores match the per-track scoring functions"""
+    columns = to_scoring_columns(tracks, "track_id", now)
+
+    for time_range in ["week", "month", "year"]:
+        expected = [z(time_range, track)["score"] for track in tracks]
+        assert np.allclose(z_vectorized(time_range, columns), expected)
+
+    strategy = UndergroundTrendingTracksStrategyEJ57D()
+    expected = [strategy.get_track_score("week", track)["score"] for track in tracks]
+    assert np.allclose(strategy.get_track_scores("week", columns), expected)
+
+
+def test_get_age_days():
+    created_at = [now - timedelta(hours=23), now - timedelta(days=8, hours=1)]
+    assert get_age_days(created_at, now).tolist() == [0, 8]
+
+
+def test_top_k_indexes():
+    scores = np.array([5.0, 1.0, 9.0, 3.0, 7.0])
+    assert top_k_indexes(scores, 3).tolist() == [2, 4, 0]
+    assert top_k_indexes(scores, 10).tolist() == [2, 4, 0, 3, 1]
+    assert top_k_indexes(scores, 0).tolist() == []
+    assert top_k_indexes(np.array([]), 3).tolist() == []
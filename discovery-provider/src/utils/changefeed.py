@@ -0,0 +1,160 @@
+"""
+Append-only changefeeds stored as redis streams.
+
+A writer task computes the payload of each newly indexed block (or slot) range once
+and appends it to a stream, using the end of the range as the entry id. Each entry
+also records the start of its range, so entries are contiguous and can be addressed
+by the cursor a reader already has.
+
+Entry ids can't go back, so when blocks already in the changefeed are reverted a
+compensating entry is appended at the cursor instead, with an id of the same number
+and the next sequence. It covers an empty range, and its `revert_to` tells the writer
+to compute the next entry from the new chain head, so the blocks indexed again after
+the revert are not skipped. The indexer only records the revert, the writer appends
+the entry on its next run so the indexer never waits on the writer's lock.
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.helpers import TimestampJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Approximate number of range entries kept in each changefeed
+CHANGEFEED_MAX_LEN = 10000
+
+
+def parse_entry_id(entry_id: bytes) -> Tuple[int, int]:
+    """Returns the (number, sequence) of a changefeed entry id"""
+    number, sequence = entry_id.decode().split("-")
+    return (int(number), int(sequence))
+
+
+def get_changefeed_cursor(redis, key: str) -> Optional[int]:
+    """Returns the end of the last range appended to the changefeed"""
+    last_entry = redis.xrevrange(key, count=1)
+    if not last_entry:
+        return None
+    entry_id, _ = last_entry[0]
+    return parse_entry_id(entry_id)[0]
+
+
+def get_changefeed_position(redis, key: str) -> Optional[Tuple[int, int]]:
+    """
+    Returns (cursor, start) where cursor is the end of the last range appended to the
+    changefeed, and start is where the payload of the next entry is computed from.
+    start is before the cursor while a revert entry is the last entry.
+    """
+    last_entry = redis.xrevrange(key, count=1)
+    if not last_entry:
+        return None
+    entry_id, fields = last_entry[0]
+    cursor = parse_entry_id(entry_id)[0]
+    return (cursor, int(fields.get(b"revert_to", cursor)))
+
+
+def append_changefeed_entry(
+    redis, key: str, min_number: int, max_number: int, payload: Dict
+):
+    """Appends the payload computed for the range ending at max_number"""
+    redis.xadd(
+        key,
+        {
+            "min": min_number,
+            "payload": json.dumps(payload, cls=TimestampJSONEncoder),
+        },
+        id=f"{max_number}-0",
+        maxlen=CHANGEFEED_MAX_LEN,
+    )
+
+
+def append_changefeed_revert_entry(redis, key: str, revert_to: int, payload: Dict):
+    """
+    Appends the payload compensating for the reverted numbers after revert_to,
+    if the changefeed already has entries past it
+    """
+    last_entry = redis.xrevrange(key, count=1)
+    if not last_entry:
+        return
+    entry_id, fields = last_entry[0]
+    cursor, sequence = parse_entry_id(entry_id)
+    if cursor <= revert_to:
+        return
+    # A revert entry the writer hasn't caught up with yet may already start earlier
+    revert_to = min(revert_to, int(fields.get(b"revert_to", revert_to)))
+    redis.xadd(
+        key,
+        {
+            "min": cursor,
+            "revert_to": revert_to,
+            "payload": json.dumps(payload, cls=TimestampJSONEncoder),
+        },
+        id=f"{cursor}-{sequence + 1}",
+        maxlen=CHANGEFEED_MAX_LEN,
+    )
+
+
+def push_changefeed_revert(
+    redis, key: str, revert_to: int, reverted_entities: Dict[str, List]
+):
+    """Records that the blocks after revert_to were reverted, for the changefeed writer"""
+    redis.rpush(
+        f"{key}:reverts",
+        json.dumps({"revert_to": revert_to, "reverted": reverted_entities}),
+    )
+
+
+def get_changefeed_reverts(redis, key: str) -> List[Dict]:
+    """Returns the reverts recorded for the changefeed, oldest first"""
+    return [json.loads(revert) for revert in redis.lrange(f"{key}:reverts", 0, -1)]
+
+
+def clear_changefeed_reverts(redis, key: str, count: int):
+    """Removes the first count reverts once their entries are appended"""
+    if count:
+        redis.ltrim(f"{key}:reverts", count, -1)
+
+
+def get_changefeed_entries(
+    redis, key: str, min_number: int, max_number: int
+) -> Tuple[Optional[List[Dict]], int]:
+    """
+    Reads the entries of the changefeed starting at min_number and ending at or before max_number.
+
+    Returns (entries, max_number) where max_number is the end of the last returned entry.
+    If the window isn't covered by the changefeed, returns (None, max_number) with max_number
+    capped at the next entry boundary, so that the caller computes the window itself and its
+    next request lines up with the changefeed.
+    """
+    # After a revert the chain head can be behind min_number,
+    # the revert entries at min_number are still returned then
+    max_number = max(max_number, min_number)
+    try:
+        # Revert entries at min_number come after the entry ending there
+        next_entry = redis.xrange(key, min=f"{min_number}-1", count=1)
+        if not next_entry:
+            return (None, max_number)
+
+        entry_id, fields = next_entry[0]
+        entry_min = int(fields[b"min"])
+        entry_max = parse_entry_id(entry_id)[0]
+        if entry_min != min_number:
+            # min_number falls inside an entry or before the retained log
+            boundary = entry_max if entry_min < min_number else entry_min
+            return (None, min(max_number, boundary))
+        if entry_max > max_number:
+            return (None, max_number)
+
+        entries = []
+        for entry_id, fields in redis.xrange(
+            key, min=f"{min_number}-1", max=max_number
+        ):
+            entry = json.loads(fields[b"payload"])
+            entry["min_number"] = int(fields[b"min"])
+            entry["max_number"] = parse_entry_id(entry_id)[0]
+            entries.append(entry)
+        return (entries, entries[-1]["max_number"])
+    except Exception as e:
+        logger.error(f"changefeed.py | Unable to read changefeed {key}: {e}")
+        return (None, max_number)
@@ -0,0 +1,25 @@
+from src.utils.changefeed import (
+    clear_changefeed_reverts,
+    get_changefeed_reverts,
+    push_changefeed_revert,
+)
+
+KEY = "test-changefeed"
+
+
+def test_changefeed_reverts(redis_mock):
+    """Tests that recorded reverts are kept until the writer clears the ones it appended"""
+    push_changefeed_revert(redis_mock, KEY, 24, {"tracks": [1]})
+    push_changefeed_revert(redis_mock, KEY, 21, {"tracks": [2]})
+    reverts = get_changefeed_reverts(redis_mock, KEY)
+    assert reverts == [
+        {"revert_to": 24, "reverted": {"tracks": [1]}},
+        {"revert_to": 21, "reverted": {"tracks": [2]}},
+    ]
+
+    # A revert recorded while the writer appends is kept for its next run
+    push_changefeed_revert(redis_mock, KEY, 20, {})
+    clear_changefeed_reverts(redis_mock, KEY, len(reverts))
+    assert get_changefeed_reverts(redis_mock, KEY) == [
+        {"revert_to": 20, "reverted": {}}
+    ]
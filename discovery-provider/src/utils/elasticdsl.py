@@ -1,5 +1,5 @@
-import copy
 import os
+from typing import Dict, Iterable, List, Set, TypedDict
 
 from elasticsearch import Elasticsearch
 from src.utils.spl_audio import to_wei
@@ -18,6 +18,14 @@ ES_USERS = "users"
 
 ES_INDEXES = [ES_PLAYLISTS, ES_REPOSTS, ES_SAVES, ES_TRACKS, ES_USERS]
 
+# large id arrays that are only indexed for filtering + terms lookups
+# and should never be sent back in _source
+SOURCE_EXCLUDES: Dict[str, List[str]] = {
+    ES_USERS: ["following_ids", "follower_ids", "tracks"],
+    ES_TRACKS: ["reposted_by", "saved_by"],
+    ES_PLAYLISTS: ["reposted_by", "saved_by"],
+}
+
 
 def listify(things):
     if isinstance(things, list):
@@ -49,7 +57,115 @@ def hits_by_id(found):
     return {h["_id"]: h["_source"] for h in found["hits"]["hits"]}
 
 
-def populate_user_metadata_es(user, current_user):
+def source_filter(index):
+    """_source filter for a search or mget doc against the given index"""
+    return {"excludes": SOURCE_EXCLUDES.get(index, [])}
+
+
+class CurrentUserRelationships(TypedDict):
+    reposted_track_ids: Set[str]
+    saved_track_ids: Set[str]
+    reposted_playlist_ids: Set[str]
+    saved_playlist_ids: Set[str]
+    # users the current user follows
+    followee_ids: Set[str]
+    # users that follow the current user
+    follower_ids: Set[str]
+
+
+def empty_relationships() -> CurrentUserRelationships:
+    return {
+        "reposted_track_ids": set(),
+        "saved_track_ids": set(),
+        "reposted_playlist_ids": set(),
+        "saved_playlist_ids": set(),
+        "followee_ids": set(),
+        "follower_ids": set(),
+    }
+
+
+def fetch_current_user_relationships(
+    current_user_id,
+    track_ids: Iterable = (),
+    playlist_ids: Iterable = (),
+    user_ids: Iterable = (),
+) -> CurrentUserRelationships:
+    """
+    Resolves the has_current_user_reposted / has_current_user_saved /
+    does_current_user_follow / does_follow_current_user flags for a page of docs.
+
+    Rather than loading the full reposted_by / saved_by / following_ids arrays
+    the id arrays are matched server side and only the ids of the matching docs
+    are returned, in a single msearch.
+    """
+    relationships = empty_relationships()
+    if not current_user_id or not esclient:
+        return relationships
+
+    current_user_id = str(current_user_id)
+    track_ids = sorted(set(listify(list(track_ids))))
+    playlist_ids = sorted(set(listify(list(playlist_ids))))
+    user_ids = sorted(set(listify(list(user_ids))))
+
+    def ids_matching(ids, clause):
+        return {
+            "query": {"bool": {"filter": [{"ids": {"values": ids}}, clause]}},
+            "_source": False,
+            "size": len(ids),
+        }
+
+    searches = []
+    keys = []
+    for index, ids, field, key in [
+        (ES_TRACKS, track_ids, "reposted_by", "reposted_track_ids"),
+        (ES_TRACKS, track_ids, "saved_by", "saved_track_ids"),
+        (ES_PLAYLISTS, playlist_ids, "reposted_by", "reposted_playlist_ids"),
+        (ES_PLAYLISTS, playlist_ids, "saved_by", "saved_playlist_ids"),
+        (ES_USERS, user_ids, "following_ids", "follower_ids"),
+    ]:
+        if not ids:
+            continue
+        searches.extend(
+            [
+                {"index": index},
+                ids_matching(ids, {"term": {field: current_user_id}}),
+            ]
+        )
+        keys.append(key)
+
+    if user_ids:
+        searches.extend(
+            [
+                {"index": ES_USERS},
+                ids_matching(
+                    user_ids,
+                    {
+                        "terms": {
+                            "_id": {
+                                "index": ES_USERS,
+                                "id": current_user_id,
+                                "path": "following_ids",
+                            }
+                        }
+                    },
+                ),
+            ]
+        )
+        keys.append("followee_ids")
+
+    if not searches:
+        return relationships
+
+    founds = esclient.msearch(searches=searches)
+    for key, found in zip(keys, founds["responses"]):
+        if "hits" not in found:
+            continue
+        relationships[key] = {h["_id"] for h in found["hits"]["hits"]}  # type: ignore
+
+    return relationships
+
+
+def populate_user_metadata_es(user, current_user, relationships=None):
     user["total_balance"] = str(
         int(user.get("balance", "0") or "0")
         + int(user.get("associated_wallets_balance", "0") or "0")
@@ -62,22 +178,28 @@ def populate_user_metadata_es(user, current_user):
     # Avoid extra round trips by not computing it here
     user["current_user_followee_follow_count"] = None
 
-    if current_user:
-        user_following = user.get("following_ids", [])
-        current_user_following = current_user.get("following_ids", [])
-        user["does_current_user_follow"] = user["user_id"] in current_user_following
-        user["does_follow_current_user"] = current_user["user_id"] in user_following
+    if current_user and relationships:
+        user_id = str(user["user_id"])
+        user["does_current_user_follow"] = user_id in relationships["followee_ids"]
+        user["does_follow_current_user"] = user_id in relationships["follower_ids"]
     else:
         user["does_current_user_follow"] = False
         user["does_follow_current_user"] = False
     return omit_indexed_fields(user)
 
 
-def populate_track_or_playlist_metadata_es(item, current_user):
-    if current_user:
-        my_id = current_user["user_id"]
-        item["has_current_user_reposted"] = my_id in item["reposted_by"]
-        item["has_current_user_saved"] = my_id in item["saved_by"]
+def populate_track_or_playlist_metadata_es(item, current_user, relationships=None):
+    if current_user and relationships:
+        if "track_id" in item:
+            item_id = str(item["track_id"])
+            reposted_ids = relationships["reposted_track_ids"]
+            saved_ids = relationships["saved_track_ids"]
+        else:
+            item_id = str(item["playlist_id"])
+            reposted_ids = relationships["reposted_playlist_ids"]
+            saved_ids = relationships["saved_playlist_ids"]
+        item["has_current_user_reposted"] = item_id in reposted_ids
+        item["has_current_user_saved"] = item_id in saved_ids
     else:
         item["has_current_user_reposted"] = False
         item["has_current_user_saved"] = False
@@ -98,7 +220,8 @@ omit_keys = [
 
 
 def omit_indexed_fields(doc):
-    doc = copy.copy(doc)
+    # docs are fetched with source_filter so the large id arrays are normally
+    # absent, the doc is modified in place rather than copied
 
     # track
     if "tags" in doc and isinstance(doc["tags"], list):
@@ -108,7 +231,6 @@ def omit_indexed_fields(doc):
         doc["followee_count"] = doc["following_count"]
 
     for key in omit_keys:
-        if key in doc:
-            del doc[key]
+        doc.pop(key, None)
 
     return doc
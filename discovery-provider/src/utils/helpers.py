@@ -12,6 +12,7 @@ from typing import Optional, cast
 
 import requests
 from flask import g, request
+from flask.json import JSONEncoder as FlaskJSONEncoder
 from hashids import Hashids
 from jsonformatter import JsonFormatter
 from src import exceptions
@@ -457,6 +458,15 @@ def validate_arguments(req_args, expected_args):
         raise exceptions.ArgumentError("Not all required arguments exist.")
 
 
+# Custom JSON serializer for timestamps in API responses
+class TimestampJSONEncoder(FlaskJSONEncoder):
+    def default(self, o):  # pylint: disable=method-hidden
+        if isinstance(o, datetime.datetime):
+            # ISO-8601 timestamp format
+            return o.strftime("%Y-%m-%dT%H:%M:%S Z")
+        return FlaskJSONEncoder.default(self, o)
+
+
 # Subclass JSONEncoder to format dates in strict isoformat.
 # Otherwise, it can behave differently on diffeent systems.
 class DateTimeEncoder(JSONEncoder):
@@ -18,16 +18,27 @@ class PrometheusMetric:
     registered_collectors: Dict[str, Callable] = {}
 
     def __init_metric(
-        self, name, description, labelnames, collection, prometheus_metric_cls
+        self,
+        name,
+        description,
+        labelnames,
+        collection,
+        prometheus_metric_cls,
+        **metric_kwargs,
     ):
         if name not in collection:
             collection[name] = prometheus_metric_cls(
-                name, description, labelnames=labelnames
+                name, description, labelnames=labelnames, **metric_kwargs
             )
         self.metric = collection[name]
 
     def __init__(
-        self, name, description, labelnames=(), metric_type=PrometheusType.HISTOGRAM
+        self,
+        name,
+        description,
+        labelnames=(),
+        metric_type=PrometheusType.HISTOGRAM,
+        buckets=None,
     ):
         self.reset_timer()
 
@@ -40,7 +51,13 @@ class PrometheusMetric:
         self.metric_type = metric_type
         if self.metric_type == PrometheusType.HISTOGRAM:
             self.__init_metric(
-                name, description, labelnames, PrometheusMetric.histograms, Histogram
+                name,
+                description,
+                labelnames,
+                PrometheusMetric.histograms,
+                Histogram,
+                # buckets default to latency buckets, override for non time values
+                **({"buckets": buckets} if buckets else {}),
             )
         elif self.metric_type == PrometheusType.GAUGE:
             self.__init_metric(
@@ -6,6 +6,7 @@ from typing import Any, List  # pylint: disable=C0302
 from flask.globals import request
 from src.utils import redis_connection
 from src.utils.query_params import stringify_query_params
+from src.utils.request_costs import record_cache_lookups
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +43,7 @@ def get_json_cached_key(redis, key: str) -> Any:
     Gets a JSON serialized value from the cache.
     """
     cached_value = redis.get(key)
+    record_cache_lookups(1 if cached_value else 0, 0 if cached_value else 1)
     if cached_value:
         logger.debug(f"Redis Cache - hit {key}")
         try:
@@ -64,6 +66,8 @@ def get_all_json_cached_key(redis, keys: List[str]) -> List[Any]:
     If any value is not de-serializable, `None` is returned in place.
     """
     cached_values = redis.mget(keys)
+    hits = len(cached_values) - cached_values.count(None)
+    record_cache_lookups(hits, len(cached_values) - hits)
     results = []
     for i in range(len(cached_values)):
         val = cached_values[i]
@@ -173,6 +177,10 @@ def get_playlist_id_cache_key(id):
     return f"playlist:id:{id}"
 
 
+def get_followee_user_ids_cache_key(id):
+    return f"user:followees:{id}"
+
+
 def get_sp_id_key(id):
     return f"sp:id:{id}"
 
@@ -185,6 +193,14 @@ def remove_cached_user_ids(redis, user_ids):
         logger.error("Unable to remove cached users: %s", e, exc_info=True)
 
 
+def remove_cached_followee_user_ids(redis, user_ids):
+    try:
+        followee_keys = list(map(get_followee_user_ids_cache_key, user_ids))
+        redis.delete(*followee_keys)
+    except Exception as e:
+        logger.error("Unable to remove cached followees: %s", e, exc_info=True)
+
+
 def remove_cached_track_ids(redis, track_ids):
     try:
         track_keys = list(map(get_track_id_cache_key, track_ids))
@@ -1,12 +1,44 @@
 """
 Interface for using a redis connection
 """
+import time
 
 from redis import Redis
+from redis.client import Pipeline
 from src.utils.config import shared_config
+from src.utils.request_costs import record_redis
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline counting its queued commands towards the current request's costs"""
+
+    def execute(self, raise_on_error=True):
+        count = len(self.command_stack)
+        start_time = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            record_redis(time.perf_counter() - start_time, count)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client counting its commands towards the current request's costs"""
+
+    def execute_command(self, *args, **options):
+        start_time = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            record_redis(time.perf_counter() - start_time)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 
 redis_url = shared_config["redis"]["url"]
-redis = Redis.from_url(url=redis_url)
+redis = InstrumentedRedis.from_url(url=redis_url)
 
 
 def get_redis():
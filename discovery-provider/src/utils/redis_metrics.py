@@ -18,6 +18,7 @@ from src.utils.config import shared_config
 from src.utils.helpers import get_ip, redis_get_or_restore, redis_set_and_dump
 from src.utils.prometheus_metric import PrometheusMetric
 from src.utils.query_params import app_name_param, stringify_query_params
+from src.utils.request_costs import save_request_cost_metrics
 from werkzeug.wrappers.response import Response as wResponse
 
 logger = logging.getLogger(__name__)
@@ -679,6 +680,7 @@ def record_metrics(func):
             route = "/".join(route.split("/")[:3])
 
         metric.save_time({"route": route, "code": code})
+        save_request_cost_metrics(route)
 
         return result
 
@@ -0,0 +1,117 @@
+"""
+Request scoped accounting of the SQL statements, redis commands and cache lookups
+made while serving a request.
+
+The costs are exported per route as prometheus histograms from `record_metrics`
+and, when `audius_server_timing_enabled` is set, returned in a `Server-Timing` header.
+Outside of a request, e.g. in celery tasks, nothing is recorded.
+"""
+import logging
+import os
+from typing import Dict, Optional
+
+from flask import g, has_app_context, has_request_context
+from src.utils.prometheus_metric import PrometheusMetric
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_ENABLED = bool(os.getenv("audius_server_timing_enabled"))
+
+# Buckets for the per request statement and command count histograms
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class RequestCosts:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.redis_count = 0
+        self.redis_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def start_request_costs():
+    g.request_costs = RequestCosts()
+
+
+def get_request_costs() -> Optional[RequestCosts]:
+    if not has_app_context() or not has_request_context():
+        return None
+    return g.get("request_costs")
+
+
+def record_sql(seconds: float):
+    costs = get_request_costs()
+    if costs:
+        costs.sql_count += 1
+        costs.sql_seconds += seconds
+
+
+def record_redis(seconds: float, count: int = 1):
+    costs = get_request_costs()
+    if costs:
+        costs.redis_count += count
+        costs.redis_seconds += seconds
+
+
+def record_cache_lookups(hits: int, misses: int):
+    costs = get_request_costs()
+    if costs:
+        costs.cache_hits += hits
+        costs.cache_misses += misses
+
+
+def save_request_cost_metrics(route: str):
+    """Exports the current request's costs to prometheus, labelled by route"""
+    costs = get_request_costs()
+    if not costs:
+        return
+
+    labels = {"route": route}
+    counts: Dict[str, int] = {
+        "flask_route_sql_queries": costs.sql_count,
+        "flask_route_redis_commands": costs.redis_count,
+        "flask_route_cache_hits": costs.cache_hits,
+        "flask_route_cache_misses": costs.cache_misses,
+    }
+    for name, value in counts.items():
+        PrometheusMetric(
+            name,
+            f"Per request {name.replace('flask_route_', '').replace('_', ' ')} of flask routes",
+            ("route",),
+            buckets=COUNT_BUCKETS,
+        ).save(value, labels)
+
+    PrometheusMetric(
+        "flask_route_sql_seconds",
+        "Per request time spent executing SQL in flask routes",
+        ("route",),
+    ).save(costs.sql_seconds, labels)
+    PrometheusMetric(
+        "flask_route_redis_seconds",
+        "Per request time spent executing redis commands in flask routes",
+        ("route",),
+    ).save(costs.redis_seconds, labels)
+
+
+def format_server_timing(costs: RequestCosts) -> str:
+    """
+    Formats the costs as a Server-Timing header value, e.g.
+    `sql;dur=12.3;desc="4 queries", redis;dur=1.2;desc="3 commands", cache;desc="2 hits 1 misses"`
+    """
+    return ", ".join(
+        [
+            f'sql;dur={costs.sql_seconds * 1000:.1f};desc="{costs.sql_count} queries"',
+            f'redis;dur={costs.redis_seconds * 1000:.1f};desc="{costs.redis_count} commands"',
+            f'cache;desc="{costs.cache_hits} hits {costs.cache_misses} misses"',
+        ]
+    )
+
+
+def add_server_timing_header(response):
+    if SERVER_TIMING_ENABLED:
+        costs = get_request_costs()
+        if costs:
+            response.headers["Server-Timing"] = format_server_timing(costs)
+    return response
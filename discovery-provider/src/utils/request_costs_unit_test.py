@@ -0,0 +1,45 @@
+import flask
+from src.utils.redis_cache import get_all_json_cached_key, set_json_cached_key
+from src.utils.request_costs import (
+    format_server_timing,
+    get_request_costs,
+    record_redis,
+    record_sql,
+    start_request_costs,
+)
+
+
+def test_request_costs_are_request_scoped():
+    """Test that costs are accumulated per request and ignored outside of one"""
+    record_sql(1.0)
+    assert get_request_costs() is None
+
+    app = flask.Flask(__name__)
+    with app.test_request_context("/"):
+        start_request_costs()
+        record_sql(0.01)
+        record_sql(0.02)
+        record_redis(0.005, count=3)
+        costs = get_request_costs()
+        assert costs.sql_count == 2
+        assert round(costs.sql_seconds, 3) == 0.03
+        assert costs.redis_count == 3
+
+    with app.test_request_context("/"):
+        start_request_costs()
+        assert get_request_costs().sql_count == 0
+
+
+def test_cache_lookups(redis_mock):
+    """Test that multi key cache lookups count their hits and misses"""
+    set_json_cached_key(redis_mock, "key1", {"name": "thor"})
+    set_json_cached_key(redis_mock, "key2", {"name": "hulk"})
+
+    app = flask.Flask(__name__)
+    with app.test_request_context("/"):
+        start_request_costs()
+        get_all_json_cached_key(redis_mock, ["key1", "key2", "key3"])
+        costs = get_request_costs()
+        assert costs.cache_hits == 2
+        assert costs.cache_misses == 1
+        assert format_server_timing(costs).endswith('cache;desc="2 hits 1 misses"')
@@ -0,0 +1,274 @@
+"""
+Snapshot of the ServiceProviderFactory registry on ethereum mainnet.
+
+Keeps the full sp_id -> getServiceEndpointInfo map for a service type in redis
+and in process memory. After a one-time full scan the snapshot is kept up to date
+incrementally from the Registered / Deregistered / EndpointUpdated /
+DelegateOwnerWalletUpdated events emitted by ServiceProviderFactory, so only the
+service providers that changed since the last scan are re-fetched from chain.
+
+Service endpoint info entries have the same shape as the getServiceEndpointInfo
+return value: [owner_wallet, endpoint, block_number, delegate_owner_wallet]
+"""
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+sp_factory_registry_key = bytes("ServiceProviderFactory", "utf-8")
+content_node_service_type = bytes("content-node", "utf-8")
+discovery_node_service_type = bytes("discovery-node", "utf-8")
+
+# ServiceProviderFactory events that change an sp's endpoint info
+# mapped to the index of the (spID, serviceType) topics of the event
+SP_EVENT_TOPIC_INDEXES = {
+    "RegisteredServiceProvider": (1, 2),
+    "DeregisteredServiceProvider": (1, 2),
+    "EndpointUpdated": (3, 1),
+    "DelegateOwnerWalletUpdated": (3, 2),
+}
+
+# Max number of blocks requested in a single eth_getLogs call
+MAX_EVENT_SCAN_CHUNK_SIZE = 10000
+
+# Number of seconds the in-process snapshot is used before checking redis for a newer version
+SP_REGISTRY_PROCESS_TTL_SEC = 30
+
+# Serializes full scans and incremental refreshes within this process
+_refresh_lock = threading.Lock()
+
+# ServiceProviderFactory contract instances keyed by registry address
+_sp_factory_contracts: Dict[str, object] = {}
+
+# service type -> {"version": str, "checked_at": float, "sp_info": {sp_id: info}}
+_process_snapshots: Dict[bytes, Dict] = {}
+
+
+def get_sp_registry_key(service_type: bytes):
+    return f"sp_registry:{service_type.decode()}"
+
+
+def get_sp_registry_block_key(service_type: bytes):
+    return f"sp_registry:{service_type.decode()}:last_scanned_block"
+
+
+def get_sp_registry_version_key(service_type: bytes):
+    return f"sp_registry:{service_type.decode()}:version"
+
+
+def get_sp_factory_contract(eth_web3, shared_config, eth_abi_values):
+    """
+    Returns the ServiceProviderFactory contract, resolving its address through
+    the Registry contract only once per process
+    """
+    eth_registry_address = eth_web3.toChecksumAddress(
+        shared_config["eth_contracts"]["registry"]
+    )
+    sp_factory_inst = _sp_factory_contracts.get(eth_registry_address)
+    if sp_factory_inst is not None:
+        return sp_factory_inst
+
+    eth_registry_instance = eth_web3.eth.contract(
+        address=eth_registry_address, abi=eth_abi_values["Registry"]["abi"]
+    )
+    sp_factory_address = eth_registry_instance.functions.getContract(
+        sp_factory_registry_key
+    ).call()
+    sp_factory_inst = eth_web3.eth.contract(
+        address=sp_factory_address,
+        abi=eth_abi_values["ServiceProviderFactory"]["abi"],
+    )
+    _sp_factory_contracts[eth_registry_address] = sp_factory_inst
+    return sp_factory_inst
+
+
+def fetch_sp_info(sp_factory_inst, service_type: bytes, sp_id: int) -> List:
+    return list(
+        sp_factory_inst.functions.getServiceEndpointInfo(service_type, sp_id).call()
+    )
+
+
+def fetch_all_sp_info(
+    sp_factory_inst, service_type: bytes, sp_ids: List[int]
+) -> Dict[int, List]:
+    """Fetches the endpoint info of the given sp_ids in parallel"""
+    sp_info = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        sp_info_futures = {
+            executor.submit(fetch_sp_info, sp_factory_inst, service_type, sp_id): sp_id
+            for sp_id in sp_ids
+        }
+        for future in concurrent.futures.as_completed(sp_info_futures):
+            sp_id = sp_info_futures[future]
+            try:
+                sp_info[sp_id] = future.result()
+            except Exception as e:
+                logger.error(
+                    f"service_provider_registry.py | ERROR fetching spID={sp_id} generated {e}"
+                )
+    return sp_info
+
+
+def get_event_topics(eth_abi_values) -> Dict[bytes, str]:
+    """Maps the topic hash of each tracked ServiceProviderFactory event to its name"""
+    topics = {}
+    for entry in eth_abi_values["ServiceProviderFactory"]["abi"]:
+        if entry["type"] != "event" or entry["name"] not in SP_EVENT_TOPIC_INDEXES:
+            continue
+        signature = f"{entry['name']}({','.join(i['type'] for i in entry['inputs'])})"
+        topics[bytes(Web3.keccak(text=signature))] = entry["name"]
+    return topics
+
+
+def get_changed_sp_ids(
+    eth_web3,
+    sp_factory_inst,
+    eth_abi_values,
+    service_type: bytes,
+    from_block: int,
+    to_block: int,
+) -> Set[int]:
+    """Returns the sp_ids of the service type with events in [from_block, to_block]"""
+    event_topics = get_event_topics(eth_abi_values)
+    changed_sp_ids: Set[int] = set()
+
+    start = from_block
+    while start <= to_block:
+        end = min(start + MAX_EVENT_SCAN_CHUNK_SIZE - 1, to_block)
+        logs = eth_web3.eth.get_logs(
+            {
+                "address": sp_factory_inst.address,
+                "fromBlock": start,
+                "toBlock": end,
+                "topics": [[Web3.toHex(topic) for topic in event_topics]],
+            }
+        )
+        for log in logs:
+            topics = [bytes(t) for t in log["topics"]]
+            event_name = event_topics.get(topics[0])
+            if not event_name:
+                continue
+            sp_id_index, service_type_index = SP_EVENT_TOPIC_INDEXES[event_name]
+            if topics[service_type_index].rstrip(b"\x00") != service_type:
+                continue
+            changed_sp_ids.add(int.from_bytes(topics[sp_id_index], "big"))
+        start = end + 1
+
+    return changed_sp_ids
+
+
+def refresh_sp_registry(
+    eth_web3, shared_config, redis, eth_abi_values, service_type: bytes
+) -> Dict[int, List]:
+    """
+    Brings the redis snapshot of the registry for the service type up to date.
+
+    The first run fetches every registered sp, subsequent runs only re-fetch the
+    sps referenced by ServiceProviderFactory events since the last scanned block.
+    """
+    with _refresh_lock:
+        registry_key = get_sp_registry_key(service_type)
+        block_key = get_sp_registry_block_key(service_type)
+
+        sp_factory_inst = get_sp_factory_contract(
+            eth_web3, shared_config, eth_abi_values
+        )
+        latest_block = eth_web3.eth.block_number
+        last_scanned_block = redis.get(block_key)
+
+        if last_scanned_block is None or not redis.exists(registry_key):
+            total_providers = sp_factory_inst.functions.getTotalServiceTypeProviders(
+                service_type
+            ).call()
+            sp_ids = list(range(1, total_providers + 1))
+            logger.info(
+                f"service_provider_registry.py | full scan of {len(sp_ids)} {service_type.decode()} sps"
+            )
+        else:
+            from_block = int(last_scanned_block) + 1
+            if from_block > latest_block:
+                return get_sp_registry(redis, service_type)
+            sp_ids = sorted(
+                get_changed_sp_ids(
+                    eth_web3,
+                    sp_factory_inst,
+                    eth_abi_values,
+                    service_type,
+                    from_block,
+                    latest_block,
+                )
+            )
+            logger.info(
+                f"service_provider_registry.py | {service_type.decode()} sps changed in "
+                f"blocks {from_block}-{latest_block}: {sp_ids}"
+            )
+
+        changed_sp_info = fetch_all_sp_info(sp_factory_inst, service_type, sp_ids)
+        if len(changed_sp_info) != len(sp_ids):
+            # Leave the last scanned block untouched so the sps that failed
+            # to fetch are picked up again on the next refresh
+            logger.warning(
+                f"service_provider_registry.py | failed to fetch {len(sp_ids) - len(changed_sp_info)} "
+                f"{service_type.decode()} sps, will retry"
+            )
+
+        pipe = redis.pipeline()
+        if changed_sp_info:
+            pipe.hmset(
+                registry_key,
+                {
+                    str(sp_id): json.dumps(info)
+                    for sp_id, info in changed_sp_info.items()
+                },
+            )
+        if len(changed_sp_info) == len(sp_ids):
+            pipe.set(block_key, latest_block)
+        if changed_sp_info:
+            pipe.set(get_sp_registry_version_key(service_type), latest_block)
+        pipe.execute()
+
+    return get_sp_registry(redis, service_type, force_reload=True)
+
+
+def get_sp_registry(
+    redis, service_type: bytes, force_reload: bool = False
+) -> Dict[int, List]:
+    """
+    Returns the sp_id -> endpoint info snapshot for the service type.
+    Served from process memory, and reloaded from redis when the version changes.
+    """
+    snapshot = _process_snapshots.get(service_type)
+    now = time.time()
+    if (
+        snapshot
+        and not force_reload
+        and now - snapshot["checked_at"] < SP_REGISTRY_PROCESS_TTL_SEC
+    ):
+        return snapshot["sp_info"]
+
+    version = redis.get(get_sp_registry_version_key(service_type))
+    if snapshot and not force_reload and snapshot["version"] == version:
+        snapshot["checked_at"] = now
+        return snapshot["sp_info"]
+
+    sp_info = {
+        int(sp_id): json.loads(info)
+        for sp_id, info in redis.hgetall(get_sp_registry_key(service_type)).items()
+    }
+    _process_snapshots[service_type] = {
+        "version": version,
+        "checked_at": now,
+        "sp_info": sp_info,
+    }
+    return sp_info
+
+
+def get_sp_info(redis, service_type: bytes, sp_id: int) -> Optional[List]:
+    """Returns the endpoint info of a single sp from the snapshot, if known"""
+    return get_sp_registry(redis, service_type).get(int(sp_id))
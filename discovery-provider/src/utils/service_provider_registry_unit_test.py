@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+from src.utils.helpers import load_eth_abi_values
+from src.utils.service_provider_registry import (
+    content_node_service_type,
+    get_event_topics,
+    get_sp_registry,
+    refresh_sp_registry,
+)
+from web3 import Web3
+
+eth_abi_values = load_eth_abi_values()
+shared_config = {
+    "eth_contracts": {"registry": "0x0000000000000000000000000000000000000001"}
+}
+
+
+def make_eth_web3(sp_info, logs):
+    eth_web3 = MagicMock()
+    eth_web3.toChecksumAddress = Web3.toChecksumAddress
+    sp_factory = MagicMock()
+    sp_factory.address = "0x0000000000000000000000000000000000000002"
+    sp_factory.functions.getTotalServiceTypeProviders.return_value.call.return_value = (
+        len(sp_info)
+    )
+
+    def get_service_endpoint_info(_service_type, sp_id):
+        call = MagicMock()
+        call.call.return_value = sp_info[sp_id]
+        return call
+
+    sp_factory.functions.getServiceEndpointInfo.side_effect = get_service_endpoint_info
+    eth_web3.eth.contract.return_value = sp_factory
+    eth_web3.eth.get_logs.return_value = logs
+    return eth_web3, sp_factory
+
+
+def endpoint_updated_log(sp_id, service_type):
+    topics = {name: topic for topic, name in get_event_topics(eth_abi_values).items()}
+    return {
+        "topics": [
+            topics["EndpointUpdated"],
+            service_type.ljust(32, b"\x00"),
+            bytes(32),
+            sp_id.to_bytes(32, "big"),
+        ]
+    }
+
+
+def test_refresh_sp_registry(redis_mock):
+    """Tests a full scan followed by an incremental refresh from events"""
+    sp_info = {
+        1: ["0xowner1", "https://cn1.audius.co", 10, "0xdelegate1"],
+        2: ["0xowner2", "https://cn2.audius.co", 11, "0xdelegate2"],
+    }
+    eth_web3, sp_factory = make_eth_web3(sp_info, [])
+    eth_web3.eth.block_number = 100
+
+    registry = refresh_sp_registry(
+        eth_web3, shared_config, redis_mock, eth_abi_values, content_node_service_type
+    )
+    assert registry == sp_info
+    assert sp_factory.functions.getServiceEndpointInfo.call_count == 2
+    eth_web3.eth.get_logs.assert_not_called()
+
+    # Only the sp referenced by an event is re-fetched
+    sp_info[2] = ["0xowner2", "https://cn2-new.audius.co", 11, "0xdelegate2"]
+    eth_web3.eth.get_logs.return_value = [
+        endpoint_updated_log(2, content_node_service_type),
+        endpoint_updated_log(1, bytes("discovery-node", "utf-8")),
+    ]
+    eth_web3.eth.block_number = 150
+
+    registry = refresh_sp_registry(
+        eth_web3, shared_config, redis_mock, eth_abi_values, content_node_service_type
+    )
+    assert registry[2][1] == "https://cn2-new.audius.co"
+    assert registry[1][1] == "https://cn1.audius.co"
+    assert sp_factory.functions.getServiceEndpointInfo.call_count == 3
+    log_filter = eth_web3.eth.get_logs.call_args[0][0]
+    assert log_filter["fromBlock"] == 101
+    assert log_filter["toBlock"] == 150
+
+    assert get_sp_registry(redis_mock, content_node_service_type) == registry
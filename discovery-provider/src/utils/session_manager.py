@@ -1,11 +1,13 @@
 import inspect
 import logging  # pylint: disable=C0302
+import time
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
 from sqlalchemy.event import listen
 from sqlalchemy.orm import sessionmaker
 from src.queries.search_config import set_search_similarity
+from src.utils.request_costs import record_sql
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,8 @@ class SessionManager:
         listen(
             self._engine, "before_cursor_execute", self.comment_sql_calls, retval=True
         )  # retval=True allows us to append a comment to the statement ad-hoc
+        listen(self._engine, "before_cursor_execute", self.start_sql_timer)
+        listen(self._engine, "after_cursor_execute", self.record_sql_cost)
 
         # Attach listeners for sessions.
         # See https://docs.sqlalchemy.org/en/14/orm/events.html
@@ -39,6 +43,24 @@ class SessionManager:
 
         return statement, parameters
 
+    def start_sql_timer(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        # A single start time per connection, statements on a connection don't nest
+        # and the start time of a failed statement is overwritten by the next one
+        conn.info["query_start_time"] = time.perf_counter()
+
+    def record_sql_cost(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        """
+        After the engine executes a statement, count it and its duration
+        towards the current request's costs.
+        """
+        start_time = conn.info.pop("query_start_time", None)
+        if start_time is not None:
+            record_sql(time.perf_counter() - start_time)
+
     def session_on_after_begin(self, session, transaction, connection):
         """
         After a transaction has begun, try to add the caller's function